@@ -0,0 +1,312 @@
+"""Initial schema
+
+Creates every table as of the first PostgreSQL-capable release, including the
+allocation rollups and report data versions.
+
+Revision ID: 0001_initial_schema
+Revises:
+Create Date: 2026-10-16 00:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0001_initial_schema"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ai_rag_cache',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('source_entity', sa.String(), nullable=False),
+        sa.Column('source_id', sa.Integer(), nullable=False),
+        sa.Column('owner_manager_id', sa.Integer(), nullable=True),
+        sa.Column('document_text', sa.String(), nullable=False),
+        sa.Column('token_count', sa.Integer(), nullable=True),
+        sa.Column('last_indexed_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('source_entity', 'source_id', name='uq_rag_source'),
+    )
+    op.create_index('idx_ai_rag_cache_owner', 'ai_rag_cache', ['owner_manager_id'])
+    op.create_index('idx_ai_rag_cache_source', 'ai_rag_cache', ['source_entity', 'source_id'])
+
+    op.create_table(
+        'ai_rag_dirty_sources',
+        sa.Column('source_entity', sa.String(), nullable=False),
+        sa.Column('source_id', sa.Integer(), nullable=False),
+        sa.Column('generation', sa.Integer(), nullable=False),
+        sa.Column('marked_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('source_entity', 'source_id'),
+    )
+
+    op.create_table(
+        'ai_recommendations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('recommendation_type', sa.String(), nullable=False),
+        sa.Column('context_json', sa.JSON(), nullable=True),
+        sa.Column('recommendation_text', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('generated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('acted_upon_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+    op.create_table(
+        'ai_response_cache',
+        sa.Column('cache_key', sa.String(length=64), nullable=False),
+        sa.Column('model', sa.String(), nullable=False),
+        sa.Column('response_text', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('last_used_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('cache_key'),
+    )
+    op.create_index('idx_ai_response_cache_last_used', 'ai_response_cache', ['last_used_at'])
+
+    op.create_table(
+        'allocation_rollup_project_month',
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('year', sa.Integer(), nullable=False),
+        sa.Column('month', sa.Integer(), nullable=False),
+        sa.Column('manager_id', sa.Integer(), nullable=False),
+        sa.Column('total_hours', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('project_id', 'year', 'month'),
+    )
+    op.create_index('ix_allocation_rollup_project_month_manager_id', 'allocation_rollup_project_month', ['manager_id'])
+
+    op.create_table(
+        'allocation_rollup_role_month',
+        sa.Column('manager_id', sa.Integer(), nullable=False),
+        sa.Column('role_id', sa.Integer(), nullable=False),
+        sa.Column('year', sa.Integer(), nullable=False),
+        sa.Column('month', sa.Integer(), nullable=False),
+        sa.Column('total_hours', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('manager_id', 'role_id', 'year', 'month'),
+    )
+    op.create_index('idx_rollup_role_month_period', 'allocation_rollup_role_month', ['year', 'month'])
+
+    op.create_table(
+        'allocation_rollup_user_month',
+        sa.Column('manager_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('year', sa.Integer(), nullable=False),
+        sa.Column('month', sa.Integer(), nullable=False),
+        sa.Column('total_hours', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('manager_id', 'user_id', 'year', 'month'),
+    )
+    op.create_index('idx_rollup_user_month_user', 'allocation_rollup_user_month', ['user_id', 'year', 'month'])
+
+    op.create_table(
+        'background_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('manager_id', sa.Integer(), nullable=True),
+        sa.Column('params', sa.JSON(), nullable=True),
+        sa.Column('progress', sa.Float(), nullable=True),
+        sa.Column('message', sa.String(), nullable=True),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('result_path', sa.String(), nullable=True),
+        sa.Column('result_filename', sa.String(), nullable=True),
+        sa.Column('result_media_type', sa.String(), nullable=True),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('idx_background_jobs_status', 'background_jobs', ['status'])
+    op.create_index('ix_background_jobs_manager_id', 'background_jobs', ['manager_id'])
+
+    op.create_table(
+        'report_data_versions',
+        sa.Column('scope', sa.String(), nullable=False),
+        sa.Column('scope_id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('scope', 'scope_id'),
+    )
+
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('full_name', sa.String(), nullable=False),
+        sa.Column('password_hash', sa.String(), nullable=False),
+        sa.Column('system_role', sa.String(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('last_login_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('manager_id', sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['manager_id'], ['users.id'], ondelete='SET NULL'),
+    )
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+    op.create_index('ix_users_manager_id', 'users', ['manager_id'])
+    op.create_index('ix_users_system_role', 'users', ['system_role'])
+
+    op.create_table(
+        'ai_rag_chunks',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('document_id', sa.Integer(), nullable=False),
+        sa.Column('chunk_index', sa.Integer(), nullable=False),
+        sa.Column('embedder', sa.String(), nullable=False),
+        sa.Column('vector', sa.LargeBinary(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['document_id'], ['ai_rag_cache.id'], ondelete='CASCADE'),
+    )
+    op.create_index('ix_ai_rag_chunks_document_id', 'ai_rag_chunks', ['document_id'])
+
+    op.create_table(
+        'ai_rag_postings',
+        sa.Column('term', sa.String(), nullable=False),
+        sa.Column('document_id', sa.Integer(), nullable=False),
+        sa.Column('frequency', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('term', 'document_id'),
+        sa.ForeignKeyConstraint(['document_id'], ['ai_rag_cache.id'], ondelete='CASCADE'),
+    )
+    op.create_index('idx_ai_rag_postings_document', 'ai_rag_postings', ['document_id'])
+
+    op.create_table(
+        'audit_log',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('action', sa.String(), nullable=False),
+        sa.Column('entity_type', sa.String(), nullable=True),
+        sa.Column('entity_id', sa.Integer(), nullable=True),
+        sa.Column('details', sa.JSON(), nullable=True),
+        sa.Column('timestamp', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='SET NULL'),
+    )
+    op.create_index('idx_audit_log_entity', 'audit_log', ['entity_type', 'entity_id'])
+    op.create_index('ix_audit_log_timestamp', 'audit_log', ['timestamp'])
+    op.create_index('ix_audit_log_user_id', 'audit_log', ['user_id'])
+
+    op.create_table(
+        'lcats',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('owner_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='SET NULL'),
+        sa.UniqueConstraint('owner_id', 'name', name='uq_lcats_owner_name'),
+    )
+    op.create_index('ix_lcats_owner_id', 'lcats', ['owner_id'])
+
+    op.create_table(
+        'projects',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('code', sa.String(), nullable=False),
+        sa.Column('client', sa.String(), nullable=True),
+        sa.Column('start_date', sa.Date(), nullable=False),
+        sa.Column('sprints', sa.Integer(), nullable=False),
+        sa.Column('manager_id', sa.Integer(), nullable=True),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['manager_id'], ['users.id'], ondelete='SET NULL'),
+        sa.UniqueConstraint('manager_id', 'code', name='uq_projects_manager_code'),
+        sa.CheckConstraint('sprints > 0', name='ck_project_sprints_positive'),
+    )
+    op.create_index('ix_projects_manager_id', 'projects', ['manager_id'])
+    op.create_index('ix_projects_status', 'projects', ['status'])
+
+    op.create_table(
+        'roles',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('owner_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='SET NULL'),
+        sa.UniqueConstraint('owner_id', 'name', name='uq_roles_owner_name'),
+    )
+    op.create_index('ix_roles_owner_id', 'roles', ['owner_id'])
+
+    op.create_table(
+        'monthly_hour_overrides',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('year', sa.Integer(), nullable=False),
+        sa.Column('month', sa.Integer(), nullable=False),
+        sa.Column('overridden_hours', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+        sa.UniqueConstraint('project_id', 'year', 'month', name='uq_override_project_year_month'),
+        sa.CheckConstraint('overridden_hours > 0', name='ck_override_hours_positive'),
+        sa.CheckConstraint('month >= 1 AND month <= 12', name='ck_override_month_range'),
+    )
+    op.create_index('idx_monthly_hour_overrides_project_year_month', 'monthly_hour_overrides', ['project_id', 'year', 'month'])
+
+    op.create_table(
+        'project_assignments',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('role_id', sa.Integer(), nullable=False),
+        sa.Column('lcat_id', sa.Integer(), nullable=False),
+        sa.Column('funded_hours', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['lcat_id'], ['lcats.id'], ondelete='RESTRICT'),
+        sa.ForeignKeyConstraint(['role_id'], ['roles.id'], ondelete='RESTRICT'),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+        sa.UniqueConstraint('project_id', 'user_id', name='uq_project_user'),
+        sa.CheckConstraint('funded_hours >= 0', name='ck_assignment_funded_hours_nonnegative'),
+    )
+    op.create_index('ix_project_assignments_project_id', 'project_assignments', ['project_id'])
+    op.create_index('ix_project_assignments_role_id', 'project_assignments', ['role_id'])
+    op.create_index('ix_project_assignments_user_id', 'project_assignments', ['user_id'])
+
+    op.create_table(
+        'allocations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('project_assignment_id', sa.Integer(), nullable=False),
+        sa.Column('year', sa.Integer(), nullable=False),
+        sa.Column('month', sa.Integer(), nullable=False),
+        sa.Column('allocated_hours', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['project_assignment_id'], ['project_assignments.id'], ondelete='CASCADE'),
+        sa.UniqueConstraint('project_assignment_id', 'year', 'month', name='uq_assignment_year_month'),
+        sa.CheckConstraint('allocated_hours >= 0', name='ck_allocation_hours_nonnegative'),
+        sa.CheckConstraint('month >= 1 AND month <= 12', name='ck_allocation_month_range'),
+    )
+    op.create_index('idx_allocations_assignment', 'allocations', ['project_assignment_id'])
+    op.create_index('idx_allocations_year_month', 'allocations', ['year', 'month'])
+    op.create_index('ix_allocations_project_assignment_id', 'allocations', ['project_assignment_id'])
+
+
+def downgrade() -> None:
+    op.drop_table('allocations')
+    op.drop_table('project_assignments')
+    op.drop_table('monthly_hour_overrides')
+    op.drop_table('roles')
+    op.drop_table('projects')
+    op.drop_table('lcats')
+    op.drop_table('audit_log')
+    op.drop_table('ai_rag_postings')
+    op.drop_table('ai_rag_chunks')
+    op.drop_table('users')
+    op.drop_table('report_data_versions')
+    op.drop_table('background_jobs')
+    op.drop_table('allocation_rollup_user_month')
+    op.drop_table('allocation_rollup_role_month')
+    op.drop_table('allocation_rollup_project_month')
+    op.drop_table('ai_response_cache')
+    op.drop_table('ai_recommendations')
+    op.drop_table('ai_rag_dirty_sources')
+    op.drop_table('ai_rag_cache')
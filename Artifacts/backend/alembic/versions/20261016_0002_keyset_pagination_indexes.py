@@ -0,0 +1,47 @@
+"""Keyset pagination indexes
+
+Composite indexes matching the orderings of the paginated list queries, so
+every page is an index seek. The audit log's entity and user indexes are
+replaced by ones that end in the ID.
+
+Revision ID: 0002_keyset_pagination_indexes
+Revises: 0001_initial_schema
+Create Date: 2026-10-16 00:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "0002_keyset_pagination_indexes"
+down_revision: Union[str, None] = "0001_initial_schema"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('idx_users_full_name', 'users', ['full_name', 'id'])
+    op.create_index('idx_users_manager_full_name', 'users', ['manager_id', 'full_name', 'id'])
+    op.create_index('idx_projects_name', 'projects', ['name', 'id'])
+    op.create_index('idx_projects_manager_name', 'projects', ['manager_id', 'name', 'id'])
+    op.create_index('idx_projects_status_name', 'projects', ['status', 'name', 'id'])
+    op.create_index('idx_ai_recommendations_status', 'ai_recommendations', ['status', 'id'])
+    op.create_index('idx_ai_recommendations_generated_at', 'ai_recommendations', ['generated_at'])
+    op.create_index('idx_audit_log_entity_id', 'audit_log', ['entity_type', 'entity_id', 'id'])
+    op.create_index('idx_audit_log_user', 'audit_log', ['user_id', 'id'])
+    op.drop_index('idx_audit_log_entity', table_name='audit_log')
+    op.drop_index('ix_audit_log_user_id', table_name='audit_log')
+
+
+def downgrade() -> None:
+    op.create_index('ix_audit_log_user_id', 'audit_log', ['user_id'])
+    op.create_index('idx_audit_log_entity', 'audit_log', ['entity_type', 'entity_id'])
+    op.drop_index('idx_audit_log_user', table_name='audit_log')
+    op.drop_index('idx_audit_log_entity_id', table_name='audit_log')
+    op.drop_index('idx_ai_recommendations_generated_at', table_name='ai_recommendations')
+    op.drop_index('idx_ai_recommendations_status', table_name='ai_recommendations')
+    op.drop_index('idx_projects_status_name', table_name='projects')
+    op.drop_index('idx_projects_manager_name', table_name='projects')
+    op.drop_index('idx_projects_name', table_name='projects')
+    op.drop_index('idx_users_manager_full_name', table_name='users')
+    op.drop_index('idx_users_full_name', table_name='users')
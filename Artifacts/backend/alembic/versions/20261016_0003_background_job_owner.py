@@ -0,0 +1,31 @@
+"""Background job owner and heartbeat
+
+Records which process holds each queued or running job and when it last
+confirmed it, so starting a worker only fails the jobs of exited processes.
+
+Revision ID: 0003_background_job_owner
+Revises: 0002_keyset_pagination_indexes
+Create Date: 2026-10-16 00:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0003_background_job_owner"
+down_revision: Union[str, None] = "0002_keyset_pagination_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('background_jobs', sa.Column('owner_host', sa.String(), nullable=True))
+    op.add_column('background_jobs', sa.Column('owner_pid', sa.Integer(), nullable=True))
+    op.add_column('background_jobs', sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('background_jobs', 'heartbeat_at')
+    op.drop_column('background_jobs', 'owner_pid')
+    op.drop_column('background_jobs', 'owner_host')
@@ -0,0 +1,33 @@
+"""Allocation rollup rebuild requests
+
+Queue of full rollup rebuilds requested by bulk writes that do not say which
+rollup rows they moved. The job runner's maintenance tick consumes it, so
+those rebuilds no longer run inside the writing request.
+
+Revision ID: 0004_rollup_rebuild_requests
+Revises: 0003_background_job_owner
+Create Date: 2026-10-16 00:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0004_rollup_rebuild_requests"
+down_revision: Union[str, None] = "0003_background_job_owner"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'allocation_rollup_rebuild_requests',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('requested_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('allocation_rollup_rebuild_requests')
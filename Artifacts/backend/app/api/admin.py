@@ -10,13 +10,15 @@ This module provides endpoints for:
 These endpoints typically require admin-level permissions.
 """
 import logging
+from datetime import datetime
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 
 from app import crud, schemas
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
+from app.utils.pagination import paginate
 
 logger = logging.getLogger(__name__)
 
@@ -60,8 +62,8 @@ def create_role(role: schemas.RoleCreate, db: Session = Depends(get_db)):
 def read_roles(
     owner_id: Optional[int] = Query(None, description="Manager ID for data isolation (optional)"),
     skip: int = 0,
-    limit: int = Query(default=100, lte=200),
-    db: Session = Depends(get_db),
+    limit: int = Query(default=100, description="Page size; values above 200 are capped"),
+    db: Session = Depends(get_read_db),
 ):
     """
     Retrieve a list of job roles.
@@ -71,7 +73,7 @@ def read_roles(
     roles = crud.get_roles(
         db,
         skip=skip,
-        limit=limit,
+        limit=min(limit, 200),
         owner_id=owner_id,
     )
     return roles
@@ -82,7 +84,7 @@ def read_roles(
     response_model=schemas.RoleResponse,
     summary="Get a role by ID",
 )
-def read_role(role_id: int, db: Session = Depends(get_db)):
+def read_role(role_id: int, db: Session = Depends(get_read_db)):
     """
     Retrieve a single role by its ID.
     """
@@ -155,8 +157,8 @@ def create_lcat(lcat: schemas.LCATCreate, db: Session = Depends(get_db)):
 def read_lcats(
     owner_id: Optional[int] = Query(None, description="Manager ID for data isolation (optional)"),
     skip: int = 0,
-    limit: int = Query(default=100, lte=200),
-    db: Session = Depends(get_db),
+    limit: int = Query(default=100, description="Page size; values above 200 are capped"),
+    db: Session = Depends(get_read_db),
 ):
     """
     Retrieve a list of Labor Categories.
@@ -166,7 +168,7 @@ def read_lcats(
     lcats = crud.get_lcats(
         db,
         skip=skip,
-        limit=limit,
+        limit=min(limit, 200),
         owner_id=owner_id,
     )
     return lcats
@@ -177,7 +179,7 @@ def read_lcats(
     response_model=schemas.LCATResponse,
     summary="Get an LCAT by ID",
 )
-def read_lcat(lcat_id: int, db: Session = Depends(get_db)):
+def read_lcat(lcat_id: int, db: Session = Depends(get_read_db)):
     """
     Retrieve a single LCAT by its ID.
     """
@@ -231,16 +233,36 @@ def delete_lcat(lcat_id: int, db: Session = Depends(get_db)):
     summary="Get all audit logs",
 )
 def read_audit_logs(
-    skip: int = 0,
-    limit: int = Query(default=100, lte=500),
-    db: Session = Depends(get_db),
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    skip: int = Query(0, ge=0, description="Deprecated offset; use cursor instead"),
+    limit: int = Query(default=100, ge=1, description="Page size; values above 500 are capped"),
+    user_id: Optional[int] = Query(None, description="Only actions by this user"),
+    action: Optional[str] = Query(None, description="Only this action code, e.g. 'PROJECT_CREATE'"),
+    entity_type: Optional[str] = Query(None, description="Only this entity type"),
+    since: Optional[datetime] = Query(None, description="Only entries at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only entries at or before this time"),
+    db: Session = Depends(get_read_db),
 ):
     """
-    Retrieve a paginated list of all audit log entries, most recent first.
+    Retrieve a page of audit log entries, most recent first.
     This endpoint is for administrative purposes to track system activity.
-    """
-    logs = crud.get_audit_logs(db, skip=skip, limit=limit)
-    return logs
+    Pass the `X-Next-Cursor` response header as `cursor` to get the next page.
+    """
+    return paginate(
+        response,
+        lambda: crud.get_audit_logs(
+            db,
+            limit=min(limit, 500),
+            after=cursor,
+            skip=skip,
+            user_id=user_id,
+            action=action,
+            entity_type=entity_type,
+            since=since,
+            until=until,
+        ),
+    )
 
 
 @router.get(
@@ -251,21 +273,35 @@ def read_audit_logs(
 def read_audit_logs_for_entity(
     entity_type: str,
     entity_id: int,
-    skip: int = 0,
-    limit: int = Query(default=100, lte=500),
-    db: Session = Depends(get_db),
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    skip: int = Query(0, ge=0, description="Deprecated offset; use cursor instead"),
+    limit: int = Query(default=100, ge=1, description="Page size; values above 500 are capped"),
+    since: Optional[datetime] = Query(None, description="Only entries at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only entries at or before this time"),
+    db: Session = Depends(get_read_db),
 ):
     """
     Retrieve all audit log entries related to a specific entity
-    (e.g., a project, a user).
+    (e.g., a project, a user), most recent first.
 
     - **entity_type**: The type of the entity (e.g., 'project', 'user').
     - **entity_id**: The ID of the entity.
-    """
-    logs = crud.get_audit_logs_for_entity(
-        db, entity_type=entity_type, entity_id=entity_id, skip=skip, limit=limit
+    - **cursor**: The `X-Next-Cursor` response header of the previous page.
+    """
+    return paginate(
+        response,
+        lambda: crud.get_audit_logs_for_entity(
+            db,
+            entity_type=entity_type,
+            entity_id=entity_id,
+            limit=min(limit, 500),
+            after=cursor,
+            skip=skip,
+            since=since,
+            until=until,
+        ),
     )
-    return logs
 
 
 # ======================================================================================
@@ -278,22 +314,34 @@ def read_audit_logs_for_entity(
     summary="Get all AI recommendations",
 )
 def read_ai_recommendations(
+    response: Response,
     status_filter: Optional[schemas.RecommendationStatus] = Query(None, alias="status"),
-    skip: int = 0,
-    limit: int = Query(default=50, lte=200),
-    db: Session = Depends(get_db),
+    recommendation_type: Optional[schemas.RecommendationType] = Query(None, description="Filter by type"),
+    since: Optional[datetime] = Query(None, description="Only recommendations generated at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only recommendations generated at or before this time"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    skip: int = Query(0, ge=0, description="Deprecated offset; use cursor instead"),
+    limit: int = Query(default=50, ge=1, description="Page size; values above 200 are capped"),
+    db: Session = Depends(get_read_db),
 ):
     """
-    Retrieve a list of AI-generated recommendations.
-    Can be filtered by status.
-    """
-    # Note: The provided CRUD function doesn't support filtering.
-    # In a real app, you would add filtering logic to the CRUD layer.
-    # For now, we fetch all and filter in memory if needed, but this is inefficient.
-    recommendations = crud.get_ai_recommendations(db, skip=skip, limit=limit)
-    if status_filter:
-        recommendations = [r for r in recommendations if r.status == status_filter]
-    return recommendations
+    Retrieve a page of AI-generated recommendations, newest first.
+    Can be filtered by status, type and generation time; pass the
+    `X-Next-Cursor` response header as `cursor` to get the next page.
+    """
+    return paginate(
+        response,
+        lambda: crud.get_ai_recommendations(
+            db,
+            limit=min(limit, 200),
+            after=cursor,
+            skip=skip,
+            status=status_filter,
+            recommendation_type=recommendation_type,
+            generated_from=since,
+            generated_to=until,
+        ),
+    )
 
 
 @router.get(
@@ -301,7 +349,7 @@ def read_ai_recommendations(
     response_model=schemas.AIRecommendationResponse,
     summary="Get a specific AI recommendation",
 )
-def read_ai_recommendation(recommendation_id: int, db: Session = Depends(get_db)):
+def read_ai_recommendation(recommendation_id: int, db: Session = Depends(get_read_db)):
     """
     Retrieve a single AI recommendation by its ID.
     """
@@ -347,7 +395,7 @@ def update_ai_recommendation_status(
     response_model=List[schemas.AIRagCacheResponse],
     summary="Get all RAG cache documents",
 )
-def read_all_rag_cache(db: Session = Depends(get_db)):
+def read_all_rag_cache(db: Session = Depends(get_read_db)):
     """
     Retrieve all documents currently in the AI RAG cache.
     Useful for debugging and management.
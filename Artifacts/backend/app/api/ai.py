@@ -2,27 +2,44 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
-from typing import List, Optional
+from typing import AsyncIterator, Awaitable, Dict, List, Optional, TypeVar
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, EmailStr, Field
 from sqlalchemy.orm import Session
 
-from app import crud
+from app import crud, schemas
 from app.db.session import get_db
 from app.services.ai import (
     GeminiConfigurationError,
     GeminiInvocationError,
-    generate_chat_response,
-    generate_forecast_insights,
-    generate_workload_balance_suggestions,
+    complete_draft_async,
+    draft_balance_suggestions,
+    draft_chat_response,
+    draft_conflict_scan,
+    draft_forecast_insights,
+    ensure_gemini_available,
     reindex_rag_cache,
-    scan_allocation_conflicts,
+    stream_draft_async,
 )
+from app.services.jobs import JobContext, JobOutcome, job_handler, submit_job
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# How often an in-flight AI request checks whether its client is still connected.
+_DISCONNECT_POLL_SECONDS = 0.5
+
+# Non-standard "Client Closed Request" status (nginx convention); never seen by
+# the client, but it keeps cancelled requests distinguishable in access logs.
+_CLIENT_CLOSED_REQUEST = 499
+
 router = APIRouter(
     prefix="/ai",
     tags=["AI"],
@@ -130,36 +147,124 @@ def _raise_from_ai_error(exc: Exception) -> None:
     raise exc
 
 
+async def _unless_disconnected(request: Request, awaitable: Awaitable[T]) -> T:
+    """Await ``awaitable``, cancelling it if the client goes away first.
+
+    Only the Gemini phase is run this way: the database work runs to
+    completion in the threadpool beforehand, so a cancellation never leaves
+    the request's session in use by another thread.
+    """
+
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=_DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                logger.info("Client disconnected; cancelling AI request %s", request.url.path)
+                raise HTTPException(
+                    status_code=_CLIENT_CLOSED_REQUEST, detail="Client closed request"
+                )
+    finally:
+        if not task.done():
+            task.cancel()
+
+
 @router.post(
     "/chat",
     response_model=ChatQueryResponse,
     summary="Query the AI assistant using RAG",
 )
-def chat_query(request: ChatQueryRequest, db: Session = Depends(get_db)) -> ChatQueryResponse:
+async def chat_query(
+    request: ChatQueryRequest,
+    http_request: Request,
+    db: Session = Depends(get_db),
+) -> ChatQueryResponse:
     logger.info("AI chat query received", extra={"query": request.query, "manager_id": request.manager_id})
     try:
-        answer, sources = generate_chat_response(
-            db, 
-            query=request.query, 
+        draft = await run_in_threadpool(
+            draft_chat_response,
+            db,
+            query=request.query,
             context_limit=request.context_limit,
-            manager_id=request.manager_id
+            manager_id=request.manager_id,
         )
+        sources, answer = await _unless_disconnected(http_request, complete_draft_async(draft))
     except (GeminiConfigurationError, GeminiInvocationError) as exc:  # pragma: no cover - error paths
         _raise_from_ai_error(exc)
     return ChatQueryResponse(query=request.query, answer=answer, sources=sources)
 
 
+def _sse(event: str, data: object) -> str:
+    """Format one server-sent event with a JSON payload."""
+
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post(
+    "/chat/stream",
+    response_class=StreamingResponse,
+    summary="Query the AI assistant and stream the answer as server-sent events",
+    responses={200: {"content": {"text/event-stream": {}}}},
+)
+async def chat_query_stream(
+    request: ChatQueryRequest,
+    db: Session = Depends(get_db),
+) -> StreamingResponse:
+    """Stream a chat answer as it is generated.
+
+    Events, in order: one ``sources`` event (``{"sources": [...]}``) as soon as
+    retrieval finishes, then ``token`` events (``{"text": "..."}``) as Gemini
+    produces the answer, then ``done``. A failure after the stream has started
+    is reported as an ``error`` event (``{"detail": "..."}``).
+    """
+
+    logger.info("AI chat stream received", extra={"query": request.query, "manager_id": request.manager_id})
+    try:
+        await run_in_threadpool(ensure_gemini_available)
+        draft = await run_in_threadpool(
+            draft_chat_response,
+            db,
+            query=request.query,
+            context_limit=request.context_limit,
+            manager_id=request.manager_id,
+        )
+    except (GeminiConfigurationError, GeminiInvocationError) as exc:  # pragma: no cover - error paths
+        _raise_from_ai_error(exc)
+
+    async def events() -> AsyncIterator[str]:
+        yield _sse("sources", {"sources": draft.items})
+        try:
+            async for text in stream_draft_async(draft):
+                yield _sse("token", {"text": text})
+        except (GeminiConfigurationError, GeminiInvocationError):
+            logger.exception("Gemini streaming failed")
+            yield _sse("error", {"detail": "AI service temporarily unavailable. Try again shortly."})
+            return
+        yield _sse("done", {})
+
+    # Disconnects are handled by StreamingResponse, which cancels the generator.
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get(
     "/conflicts",
     response_model=ConflictsResponse,
     summary="Detect resource allocation conflicts",
 )
-def detect_conflicts(
+async def detect_conflicts(
+    request: Request,
     manager_id: Optional[int] = Query(None, description="Manager ID for data isolation"),
     db: Session = Depends(get_db)
 ) -> ConflictsResponse:
     try:
-        conflicts, message = scan_allocation_conflicts(db, manager_id=manager_id)
+        draft = await run_in_threadpool(draft_conflict_scan, db, manager_id=manager_id)
+        conflicts, message = await _unless_disconnected(request, complete_draft_async(draft))
     except (GeminiConfigurationError, GeminiInvocationError) as exc:  # pragma: no cover
         _raise_from_ai_error(exc)
 
@@ -189,15 +294,17 @@ def detect_conflicts(
     response_model=ForecastResponse,
     summary="Get predictive resource forecasts",
 )
-def get_forecast(
+async def get_forecast(
+    request: Request,
     months_ahead: int = 3,
     manager_id: Optional[int] = Query(None, description="Manager ID for data isolation"),
     db: Session = Depends(get_db)
 ) -> ForecastResponse:
     try:
-        predictions, message = generate_forecast_insights(
-            db, months_ahead=months_ahead, manager_id=manager_id
+        draft = await run_in_threadpool(
+            draft_forecast_insights, db, months_ahead=months_ahead, manager_id=manager_id
         )
+        predictions, message = await _unless_disconnected(request, complete_draft_async(draft))
     except (GeminiConfigurationError, GeminiInvocationError) as exc:  # pragma: no cover
         _raise_from_ai_error(exc)
 
@@ -216,15 +323,17 @@ def get_forecast(
     response_model=BalanceSuggestionsResponse,
     summary="Get workload balance suggestions",
 )
-def get_balance_suggestions(
+async def get_balance_suggestions(
+    request: Request,
     project_id: Optional[int] = None,
     manager_id: Optional[int] = Query(None, description="Manager ID for data isolation"),
     db: Session = Depends(get_db),
 ) -> BalanceSuggestionsResponse:
     try:
-        suggestions, message = generate_workload_balance_suggestions(
-            db, project_id=project_id, manager_id=manager_id
+        draft = await run_in_threadpool(
+            draft_balance_suggestions, db, project_id=project_id, manager_id=manager_id
         )
+        suggestions, message = await _unless_disconnected(request, complete_draft_async(draft))
     except (GeminiConfigurationError, GeminiInvocationError) as exc:  # pragma: no cover
         _raise_from_ai_error(exc)
 
@@ -245,3 +354,23 @@ def trigger_reindex(db: Session = Depends(get_db)) -> ReindexResponse:
     message = f"RAG cache refreshed with {documents_created} documents."
     return ReindexResponse(status="accepted", message=message)
 
+
+@router.post(
+    "/reindex/jobs",
+    response_model=schemas.BackgroundJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Queue RAG cache reindexing as a background job",
+)
+def queue_reindex(
+    manager_id: Optional[int] = Query(None, description="Limit reindexing to this manager's data"),
+    db: Session = Depends(get_db),
+):
+    return submit_job(db, "rag_reindex", {"manager_id": manager_id}, manager_id=manager_id)
+
+
+@job_handler("rag_reindex")
+def _run_reindex_job(db: Session, params: Dict[str, object], context: JobContext) -> JobOutcome:
+    context.report(progress=0.0, message="Reindexing RAG cache")
+    documents_created = reindex_rag_cache(db, manager_id=params.get("manager_id"))
+    return JobOutcome(result={"documents_indexed": documents_created})
+
@@ -14,13 +14,14 @@ This is the core of the allocation grid functionality, supporting user stories:
 """
 import logging
 from datetime import date as dt_date
-from typing import List
+from typing import Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
+from app.utils.pagination import paginate
 from app.utils.reporting import iter_months
 
 logger = logging.getLogger(__name__)
@@ -76,12 +77,43 @@ def create_project_assignment(
     return created_assignment
 
 
+@router.get(
+    "/assignments",
+    response_model=List[schemas.ProjectAssignmentResponse],
+    summary="List project assignments",
+)
+def read_project_assignments(
+    response: Response,
+    project_id: Optional[int] = Query(None, description="Filter by project"),
+    user_id: Optional[int] = Query(None, description="Filter by employee"),
+    role_id: Optional[int] = Query(None, description="Filter by role"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    limit: int = Query(default=100, ge=1, le=500),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Retrieve a page of project assignments ordered by ID. Pass the
+    `X-Next-Cursor` response header as `cursor` to get the next page.
+    """
+    return paginate(
+        response,
+        lambda: crud.get_project_assignments(
+            db,
+            limit=limit,
+            after=cursor,
+            project_id=project_id,
+            user_id=user_id,
+            role_id=role_id,
+        ),
+    )
+
+
 @router.get(
     "/assignments/{assignment_id}",
     response_model=schemas.ProjectAssignmentWithAllocationsResponse,
     summary="Get assignment details by ID",
 )
-def read_project_assignment(assignment_id: int, db: Session = Depends(get_db)):
+def read_project_assignment(assignment_id: int, db: Session = Depends(get_read_db)):
     """
     Retrieve a single project assignment by its ID, including all its
     monthly hour allocations.
@@ -271,12 +303,119 @@ def create_allocation(
     return created_allocation
 
 
+@router.post(
+    "/bulk",
+    response_model=schemas.AllocationBulkResponse,
+    summary="Create or update many allocation cells at once",
+)
+def bulk_upsert_allocations(
+    payload: schemas.AllocationBulkRequest, db: Session = Depends(get_db)
+):
+    """
+    Save a block of grid cells (e.g. pasted from Excel) in one transaction.
+
+    Every cell is validated up front; cells referencing unknown assignments or
+    repeating an earlier (assignment, year, month) in the same request are
+    reported as errors and skipped. All remaining cells are written with a
+    single upsert, and the response lists the outcome for each cell in request
+    order.
+    """
+    requested_ids = {cell.project_assignment_id for cell in payload.cells}
+    known_ids = crud.get_existing_assignment_ids(db, requested_ids)
+
+    valid_cells: List[schemas.AllocationBulkCell] = []
+    errors: Dict[int, str] = {}
+    seen: set = set()
+    for index, cell in enumerate(payload.cells):
+        key = (cell.project_assignment_id, cell.year, cell.month)
+        if cell.project_assignment_id not in known_ids:
+            errors[index] = f"Assignment with ID {cell.project_assignment_id} not found."
+        elif key in seen:
+            errors[index] = "Duplicate cell in request."
+        else:
+            seen.add(key)
+            valid_cells.append(cell)
+
+    written = crud.bulk_upsert_allocations(db, valid_cells)
+
+    response = schemas.AllocationBulkResponse()
+    for index, cell in enumerate(payload.cells):
+        if index in errors:
+            response.failed += 1
+            response.results.append(
+                schemas.AllocationBulkResult(
+                    **cell.model_dump(),
+                    status=schemas.AllocationBulkStatus.ERROR,
+                    detail=errors[index],
+                )
+            )
+            continue
+
+        allocation_id, previous_hours = written[(cell.project_assignment_id, cell.year, cell.month)]
+        if previous_hours is None:
+            outcome = schemas.AllocationBulkStatus.CREATED
+            response.created += 1
+        elif previous_hours != cell.allocated_hours:
+            outcome = schemas.AllocationBulkStatus.UPDATED
+            response.updated += 1
+        else:
+            outcome = schemas.AllocationBulkStatus.UNCHANGED
+            response.unchanged += 1
+        response.results.append(
+            schemas.AllocationBulkResult(**cell.model_dump(), id=allocation_id, status=outcome)
+        )
+
+    logger.info(
+        f"Bulk allocation save: {response.created} created, {response.updated} updated, "
+        f"{response.unchanged} unchanged, {response.failed} failed"
+    )
+    return response
+
+
+@router.get(
+    "/",
+    response_model=List[schemas.AllocationResponse],
+    summary="List allocations",
+)
+def read_allocations(
+    response: Response,
+    project_id: Optional[int] = Query(None, description="Filter by the assignment's project"),
+    user_id: Optional[int] = Query(None, description="Filter by the assignment's employee"),
+    role_id: Optional[int] = Query(None, description="Filter by the assignment's role"),
+    start_year: Optional[int] = Query(None, ge=2020, le=2050, description="First year of the period"),
+    start_month: int = Query(1, ge=1, le=12, description="First month of the period"),
+    end_year: Optional[int] = Query(None, ge=2020, le=2050, description="Last year of the period"),
+    end_month: int = Query(12, ge=1, le=12, description="Last month of the period"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    limit: int = Query(default=1000, ge=1, le=5000),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Retrieve a page of monthly allocations ordered by ID, optionally limited
+    to a period and to assignments of a project, employee or role. Pass the
+    `X-Next-Cursor` response header as `cursor` to get the next page.
+    """
+    return paginate(
+        response,
+        lambda: crud.get_allocations(
+            db,
+            limit=limit,
+            after=cursor,
+            project_id=project_id,
+            user_id=user_id,
+            role_id=role_id,
+            start=(start_year, start_month) if start_year is not None else None,
+            end=(end_year, end_month) if end_year is not None else None,
+        ),
+    )
+
+
 @router.get(
     "/{allocation_id}",
     response_model=schemas.AllocationResponse,
     summary="Get a specific allocation",
 )
-def read_allocation(allocation_id: int, db: Session = Depends(get_db)):
+def read_allocation(allocation_id: int, db: Session = Depends(get_read_db)):
     """
     Retrieve a single allocation by its ID.
     """
@@ -341,7 +480,7 @@ def delete_allocation(allocation_id: int, db: Session = Depends(get_db)):
     "/users/{user_id}/summary",
     summary="Get user's monthly allocation summary",
 )
-def get_user_allocation_summary(user_id: int, db: Session = Depends(get_db)):
+def get_user_allocation_summary(user_id: int, db: Session = Depends(get_read_db)):
     """
     Get a summary of a user's total allocated hours per month across all projects.
     
@@ -11,13 +11,14 @@ Supports the employee management aspects of the PRD.
 import logging
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 
 from app import crud, schemas
 from app.core import security
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.models import SystemRole
+from app.utils.pagination import paginate
 
 logger = logging.getLogger(__name__)
 
@@ -70,29 +71,40 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
     summary="Get a list of employees for a specific manager",
 )
 def read_users(
+    response: Response,
     manager_id: Optional[int] = Query(None, description="Manager ID for data isolation (optional)"),
-    skip: int = 0,
-    limit: int = Query(default=100, lte=200),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    skip: int = Query(0, ge=0, description="Deprecated offset; use cursor instead"),
+    limit: int = Query(default=100, ge=1, description="Page size; values above 200 are capped"),
     system_role: Optional[SystemRole] = Query(
         None, description="Filter by system role"
     ),
-    db: Session = Depends(get_db),
+    project_id: Optional[int] = Query(None, description="Only users assigned to this project"),
+    role_id: Optional[int] = Query(None, description="Only users assigned with this role"),
+    db: Session = Depends(get_read_db),
 ):
     """
-    Retrieve a list of users/employees.
+    Retrieve a page of users/employees ordered by name.
     - **manager_id**: Optional manager ID for filtering. If provided, only returns employees owned by that manager. If None, returns all employees (for admins/global views).
-    - **skip**: Number of records to skip.
-    - **limit**: Maximum number of records to return (max 200).
+    - **cursor**: The `X-Next-Cursor` response header of the previous page; omit for the first page.
+    - **limit**: Maximum number of records to return; larger values are capped at 200.
+    - **skip**: Deprecated offset, kept for older clients; prefer **cursor**.
     - **system_role**: Optional filter by system role.
+    - **project_id**, **role_id**: Optional filters on the users' project assignments.
     """
-    users = crud.get_users(
-        db,
-        skip=skip,
-        limit=limit,
-        manager_id=manager_id,
-        system_role=system_role,
+    return paginate(
+        response,
+        lambda: crud.get_users(
+            db,
+            limit=min(limit, 200),
+            after=cursor,
+            skip=skip,
+            manager_id=manager_id,
+            system_role=system_role,
+            project_id=project_id,
+            role_id=role_id,
+        ),
     )
-    return users
 
 
 @router.get(
@@ -100,26 +112,21 @@ def read_users(
     response_model=schemas.UserWithAssignmentsResponse,
     summary="Get a specific employee by ID with their assignments",
 )
-def read_user(user_id: int, db: Session = Depends(get_db)):
+def read_user(user_id: int, db: Session = Depends(get_read_db)):
     """
     Retrieve a single user by their ID, including all their project assignments.
 
     This supports US012: View a single employee's timeline across all projects.
     """
-    db_user = crud.get_user(db, user_id=user_id)
+    # Assignments and their projects are loaded up front: serializing them
+    # lazily would run a query per assignment.
+    db_user = crud.get_user_with_assignments(db, user_id=user_id)
     if db_user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
 
-    # Use the specialized CRUD function to get assignments
-    assignments = crud.get_assignments_for_user(db, user_id=user_id)
-
-    # Combine the data into the detailed response schema
-    user_response = schemas.UserWithAssignmentsResponse.model_validate(db_user)
-    user_response.assignments = assignments
-
-    return user_response
+    return schemas.UserWithAssignmentsResponse.model_validate(db_user)
 
 
 @router.put(
@@ -0,0 +1,96 @@
+"""
+Background job API endpoints.
+
+Long-running imports, exports and RAG reindexing are queued by their own
+routers (`/projects/import/jobs`, `/reports/export/portfolio/jobs`,
+`/ai/reindex/jobs`). This module exposes the shared status, listing and
+result-download endpoints for those jobs.
+"""
+import logging
+from pathlib import Path
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from app import crud, models, schemas
+from app.db.session import get_db
+from app.services.jobs import live_progress
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/jobs",
+    tags=["Background Jobs"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+@router.get(
+    "/",
+    response_model=List[schemas.BackgroundJobResponse],
+    summary="List background jobs",
+)
+def list_jobs(
+    manager_id: Optional[int] = Query(None, description="Only jobs submitted for this manager"),
+    job_status: Optional[schemas.JobStatus] = Query(None, alias="status", description="Filter by job status"),
+    kind: Optional[str] = Query(None, description="Filter by job kind"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db),
+):
+    db_jobs = crud.get_background_jobs(
+        db,
+        manager_id=manager_id,
+        status=models.JobStatus(job_status.value) if job_status else None,
+        kind=kind,
+        skip=skip,
+        limit=limit,
+    )
+    return [_job_response(db_job) for db_job in db_jobs]
+
+
+@router.get(
+    "/{job_id}",
+    response_model=schemas.BackgroundJobResponse,
+    summary="Get the status of a background job",
+)
+def get_job(job_id: int, db: Session = Depends(get_db)):
+    db_job = crud.get_background_job(db, job_id=job_id)
+    if db_job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return _job_response(db_job)
+
+
+def _job_response(db_job: models.BackgroundJob) -> schemas.BackgroundJobResponse:
+    """Serialize a job, overlaying live progress while it is running."""
+
+    response = schemas.BackgroundJobResponse.model_validate(db_job)
+    if db_job.status == models.JobStatus.RUNNING:
+        response = response.model_copy(update=live_progress(db_job.id))
+    return response
+
+
+@router.get(
+    "/{job_id}/result",
+    summary="Download the file produced by a background job",
+)
+def download_job_result(job_id: int, db: Session = Depends(get_db)):
+    db_job = crud.get_background_job(db, job_id=job_id)
+    if db_job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    if db_job.status != models.JobStatus.SUCCEEDED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job is {models.JobStatus(db_job.status).value}; no result is available yet",
+        )
+    if not db_job.result_path or not Path(db_job.result_path).is_file():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Job has no downloadable result"
+        )
+    return FileResponse(
+        db_job.result_path,
+        media_type=db_job.result_media_type or "application/octet-stream",
+        filename=db_job.result_filename,
+    )
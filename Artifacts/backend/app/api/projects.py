@@ -9,14 +9,20 @@ This module provides RESTful endpoints for managing projects, including:
 Supports user stories: US001, US007
 """
 import logging
-from typing import List, Optional
+import shutil
+import uuid
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional
 
-from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile, status
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.services.importer import ProjectImportError, import_projects_from_workbook
+from app.services.jobs import JobContext, JobOutcome, job_handler, jobs_directory, submit_job
+from app.utils.pagination import paginate
 
 logger = logging.getLogger(__name__)
 
@@ -55,23 +61,35 @@ def create_project(project: schemas.ProjectCreate, db: Session = Depends(get_db)
     summary="Get a list of projects for a specific manager",
 )
 def read_projects(
+    response: Response,
     manager_id: Optional[int] = Query(None, description="Manager ID for data isolation (optional)"),
-    skip: int = 0,
-    limit: int = Query(default=100, lte=200),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    skip: int = Query(0, ge=0, description="Deprecated offset; use cursor instead"),
+    limit: int = Query(default=100, ge=1, description="Page size; values above 200 are capped"),
+    project_status: Optional[models.ProjectStatus] = Query(None, alias="status", description="Filter by status"),
+    start_from: Optional[date] = Query(None, description="Only projects starting on or after this date"),
+    start_to: Optional[date] = Query(None, description="Only projects starting on or before this date"),
+    db: Session = Depends(get_read_db),
 ):
     """
-    Retrieve a list of projects.
+    Retrieve a page of projects ordered by name.
     If manager_id is provided, only returns projects owned by that manager.
     If manager_id is None, returns all projects (for admins/global views).
+    Pass the `X-Next-Cursor` response header as `cursor` to get the next page.
     """
-    projects = crud.get_projects(
-        db,
-        skip=skip,
-        limit=limit,
-        manager_id=manager_id,
+    return paginate(
+        response,
+        lambda: crud.get_projects(
+            db,
+            limit=min(limit, 200),
+            after=cursor,
+            skip=skip,
+            manager_id=manager_id,
+            status=project_status,
+            start_from=start_from,
+            start_to=start_to,
+        ),
     )
-    return projects
 
 
 @router.get(
@@ -79,25 +97,20 @@ def read_projects(
     response_model=schemas.ProjectWithDetailsResponse,
     summary="Get project details by ID",
 )
-def read_project(project_id: int, db: Session = Depends(get_db)):
+def read_project(project_id: int, db: Session = Depends(get_read_db)):
     """
     Retrieve a single project by its ID, including all its assignments
     and monthly hour overrides.
     """
-    db_project = crud.get_project(db, project_id=project_id)
+    # Relationships are loaded up front: serializing them lazily would run a
+    # query per assignment.
+    db_project = crud.get_project_with_details(db, project_id=project_id)
     if db_project is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Project not found"
         )
 
-    # Use specialized CRUD functions to fetch related data
-    assignments = crud.get_assignments_for_project(db, project_id=project_id)
-    overrides = crud.get_overrides_for_project(db, project_id=project_id)
-
-    # Combine data into the detailed response schema
     project_response = schemas.ProjectWithDetailsResponse.model_validate(db_project)
-    project_response.assignments = assignments
-    project_response.monthly_hour_overrides = overrides
     project_response.viewers = []
 
     return project_response
@@ -165,17 +178,20 @@ def delete_project(project_id: int, db: Session = Depends(get_db)):
     status_code=status.HTTP_201_CREATED,
     summary="Import projects from an Excel workbook",
 )
-async def import_projects(
+def import_projects(
     manager_id: Optional[int] = Query(None, description="Assign imported projects to this manager ID"),
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
-    contents = await file.read()
+    file_format = "csv" if (file.filename or "").lower().endswith(".csv") else "xlsx"
     try:
+        # Hand the spooled upload straight to the streaming importer rather
+        # than reading the whole file into memory first.
         created_projects, skipped = import_projects_from_workbook(
-            data=contents,
+            data=file.file,
             db=db,
             manager_id=manager_id,
+            file_format=file_format,
         )
     except ProjectImportError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
@@ -186,6 +202,64 @@ async def import_projects(
     )
 
 
+@router.post(
+    "/import/jobs",
+    response_model=schemas.BackgroundJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Queue a project import as a background job",
+)
+def queue_project_import(
+    manager_id: Optional[int] = Query(None, description="Assign imported projects to this manager ID"),
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db)
+):
+    """
+    Import a large workbook or CSV in the background. The upload is saved to
+    the jobs directory and processed by the worker pool; poll `/jobs/{id}` for
+    progress and the import summary.
+    """
+    file_format = "csv" if (file.filename or "").lower().endswith(".csv") else "xlsx"
+    upload_path = jobs_directory() / f"upload-{uuid.uuid4().hex}.{file_format}"
+    with upload_path.open("wb") as target:
+        shutil.copyfileobj(file.file, target)
+
+    params = {
+        "path": str(upload_path),
+        "filename": file.filename,
+        "file_format": file_format,
+        "manager_id": manager_id,
+    }
+    return submit_job(db, "project_import", params, manager_id=manager_id)
+
+
+@job_handler("project_import")
+def _run_project_import_job(db: Session, params: Dict[str, object], context: JobContext) -> JobOutcome:
+    upload_path = Path(str(params["path"]))
+
+    def on_progress(sheet: str, rows: int) -> None:
+        context.report(message=f"{rows} {sheet.lower()} rows imported")
+
+    try:
+        with upload_path.open("rb") as handle:
+            created_projects, skipped = import_projects_from_workbook(
+                data=handle,
+                db=db,
+                manager_id=params.get("manager_id"),
+                file_format=str(params.get("file_format") or "xlsx"),
+                on_progress=on_progress,
+            )
+    finally:
+        upload_path.unlink(missing_ok=True)
+
+    return JobOutcome(
+        result={
+            "created_project_ids": [project.id for project in created_projects],
+            "created_project_codes": [project.code for project in created_projects],
+            "skipped_codes": skipped,
+        }
+    )
+
+
 # --- Monthly Hour Overrides Sub-resource ---
 
 @router.post(
@@ -11,28 +11,43 @@ These endpoints aggregate data across projects and employees to provide
 high-level insights for directors and resource managers.
 """
 import logging
-from collections import defaultdict
 from datetime import date
-from typing import Dict, List, Optional, Tuple
+from itertools import groupby
+from operator import itemgetter
+from typing import Dict, Iterator, List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from pydantic import BaseModel, Field
-from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from app import crud, models
-from app.db.session import get_db
+from app import crud, models, schemas
+from app.db.session import get_db, get_read_db
 from app.utils.reporting import (
     build_burn_down_series,
     default_project_end,
     iter_months,
+    month_capacity_series,
     standard_month_hours,
 )
-from app.services.exporter import portfolio_workbook, project_workbook
+from app.services.allocation_cube import get_allocation_cube, peek_allocation_cube
+from app.services.export_cache import cached_export, manager_tenant
+from app.services.exporter import (
+    FACT_FILE_SUFFIXES,
+    FACT_MEDIA_TYPES,
+    XLSX_CHUNK_BYTES,
+    FactFormat,
+    project_workbook,
+    require_fact_format,
+    stream_fact_table,
+    stream_portfolio_workbook,
+)
+from app.services.jobs import JobContext, JobOutcome, job_handler, maintenance_task, submit_job
+from app.services.report_cache import cached_report, manager_scope, project_scope, user_scope
 
 logger = logging.getLogger(__name__)
 
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
 router = APIRouter(
     prefix="/reports",
     tags=["Reports"],
@@ -123,8 +138,9 @@ class EmployeeTimelineResponse(BaseModel):
     summary="Get manager-specific portfolio dashboard",
 )
 def get_portfolio_dashboard(
+    request: Request,
     manager_id: Optional[int] = Query(None, description="Manager ID for data isolation (optional)"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Retrieve a manager-specific dashboard with key metrics.
@@ -138,31 +154,42 @@ def get_portfolio_dashboard(
     Manager-specific isolation enforced: only shows data for this manager's projects and employees.
     
     Supports US011: Portfolio-level roll-up dashboard for PMs.
+
+    Responses are cached per manager and carry an ETag; a request whose
+    If-None-Match still matches gets 304 Not Modified.
     
     NOTE: This is a basic implementation. Enhanced analytics can be added.
     """
+    today = date.today()
+    return cached_report(
+        request,
+        db,
+        scopes=[manager_scope(manager_id)],
+        vary=[(today.year, today.month)],
+        build=lambda: build_portfolio_dashboard(db, manager_id=manager_id, today=today),
+    )
+
+
+def build_portfolio_dashboard(
+    db: Session, *, manager_id: Optional[int] = None, today: Optional[date] = None
+) -> PortfolioDashboardResponse:
+    """Assemble the portfolio dashboard for a manager scope as of ``today``."""
+
     logger.info(f"Generating portfolio dashboard for manager {manager_id}")
 
-    today = date.today()
+    today = today or date.today()
     standard_hours_this_month = max(standard_month_hours(today.year, today.month), 1)
 
     # Filter by manager_id for data isolation
-    total_projects = (
-        db.query(func.count(models.Project.id))
-        .filter(models.Project.manager_id == manager_id)
-        .scalar() or 0
-    )
-    total_employees = (
-        db.query(func.count(models.User.id))
-        .filter(models.User.system_role == models.SystemRole.EMPLOYEE)
-        .filter(models.User.manager_id == manager_id)
-        .scalar()
-        or 0
-    )
+    counts = crud.get_portfolio_counts(db, manager_id=manager_id)
+    total_projects = counts["total_projects"]
+    total_employees = counts["total_employees"]
 
-    role_capacity = crud.get_role_capacity_summary(db, manager_id=manager_id)
-    total_funded_hours = sum(int(entry.get("funded_hours") or 0) for entry in role_capacity)
-    total_allocated_hours = sum(int(entry.get("allocated_hours") or 0) for entry in role_capacity)
+    cube = get_allocation_cube(db, manager_id=manager_id)
+
+    role_capacity = cube.role_totals()
+    total_funded_hours = sum(entry.funded_hours for entry in role_capacity)
+    total_allocated_hours = sum(entry.allocated_hours for entry in role_capacity)
 
     overall_utilization_pct = (
         (total_allocated_hours / total_funded_hours) * 100 if total_funded_hours else 0.0
@@ -170,55 +197,20 @@ def get_portfolio_dashboard(
 
     fte_by_role: Dict[str, float] = {}
     for entry in role_capacity:
-        role_name = entry.get("role_name")
-        if not role_name:
+        if not entry.role_name:
             continue
-        funded_hours = float(entry.get("funded_hours") or 0.0)
-        allocated_hours = float(entry.get("allocated_hours") or 0.0)
-        if funded_hours > 0:
-            fte_by_role[role_name] = round((allocated_hours / funded_hours) * 100, 2)
-        else:
-            fte_by_role[role_name] = 0.0
-
-    monthly_user_totals = crud.get_monthly_user_allocation_totals(db, manager_id=manager_id)
-    current_hours_by_user = {
-        row["user_id"]: int(row.get("total_hours") or 0)
-        for row in monthly_user_totals
-        if row["year"] == today.year and row["month"] == today.month
-    }
-
-    project_allocations = crud.get_monthly_user_project_allocations(db, manager_id=manager_id)
-    current_project_breakdown: Dict[int, List[ProjectAllocationBreakdown]] = defaultdict(list)
-    for row in project_allocations:
-        if row["year"] == today.year and row["month"] == today.month:
-            current_project_breakdown[row["user_id"]].append(
-                ProjectAllocationBreakdown(
-                    project_id=row["project_id"],
-                    project_name=row["project_name"],
-                    allocated_hours=int(row.get("allocated_hours") or 0),
-                )
+        if entry.funded_hours > 0:
+            fte_by_role[entry.role_name] = round(
+                (entry.allocated_hours / entry.funded_hours) * 100, 2
             )
+        else:
+            fte_by_role[entry.role_name] = 0.0
 
-    for breakdown in current_project_breakdown.values():
-        breakdown.sort(key=lambda item: item.allocated_hours, reverse=True)
-
-    primary_role_entries = crud.get_user_role_funding_totals(db, manager_id=manager_id)
-    primary_role_lookup: Dict[int, str] = {}
-    role_hours_tracker: Dict[int, float] = {}
-    for entry in primary_role_entries:
-        user_id = entry["user_id"]
-        funded = float(entry.get("funded_hours") or 0.0)
-        if funded <= 0:
-            continue
-        if user_id not in role_hours_tracker or funded > role_hours_tracker[user_id]:
-            role_hours_tracker[user_id] = funded
-            role_name = entry.get("role_name")
-            if role_name:
-                primary_role_lookup[user_id] = role_name
+    current_hours_by_user = cube.user_month_hours(today.year, today.month)
+    primary_role_lookup = cube.primary_roles()
 
     employees = crud.get_users(
         db,
-        skip=0,
         limit=2000,
         manager_id=manager_id,
         system_role=models.SystemRole.EMPLOYEE,
@@ -238,7 +230,16 @@ def get_portfolio_dashboard(
             "total_hours": int(current_hours),
             "fte_percentage": round(current_fte * 100, 2),
             "role": primary_role_lookup.get(employee.id),
-            "projects": current_project_breakdown.get(employee.id, []),
+            "projects": [
+                ProjectAllocationBreakdown(
+                    project_id=project_id,
+                    project_name=project_name,
+                    allocated_hours=hours,
+                )
+                for project_id, project_name, hours in cube.user_project_hours(
+                    employee.id, today.year, today.month
+                )
+            ],
         }
 
         if current_fte > 1.0:
@@ -283,18 +284,33 @@ class ManagerAllocationsResponse(BaseModel):
     employees: List[EmployeeAllocationRollup] = Field(default_factory=list)
     date_range: Dict[str, int] = Field(default_factory=dict)
 
+def _group_monthly_totals_by_user(
+    rows: List[Dict[str, object]],
+) -> Dict[int, List[Tuple[int, int, int]]]:
+    """Index (year, month, hours) rows by user in one pass over user-ordered rows."""
+
+    grouped: Dict[int, List[Tuple[int, int, int]]] = {}
+    for user_id, user_rows in groupby(rows, key=itemgetter("user_id")):
+        grouped[user_id] = [
+            (row["year"], row["month"], int(row.get("total_hours") or 0))
+            for row in user_rows
+        ]
+    return grouped
+
+
 @router.get(
     "/manager-allocations",
     response_model=ManagerAllocationsResponse,
     summary="Get manager allocation rollup for dashboard grid",
 )
 def get_manager_allocations(
+    request: Request,
     manager_id: Optional[int] = Query(None, description="Manager ID for data isolation (optional)"),
     start_year: int = Query(..., ge=2020, le=2050, description="Start year for date range"),
     start_month: int = Query(..., ge=1, le=12, description="Start month for date range"),
     end_year: int = Query(..., ge=2020, le=2050, description="End year for date range"),
     end_month: int = Query(..., ge=1, le=12, description="End month for date range"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Retrieve allocation rollup for all employees managed by a specific manager.
@@ -304,67 +320,68 @@ def get_manager_allocations(
     - Monthly allocation totals for each employee across all projects
     - Date range info
     
-    This endpoint powers the dashboard allocation rollup grid.
+    This endpoint powers the dashboard allocation rollup grid. Responses are
+    cached per manager and window and honour If-None-Match.
     """
+    window = ((start_year, start_month), (end_year, end_month))
+    return cached_report(
+        request,
+        db,
+        scopes=[manager_scope(manager_id)],
+        build=lambda: build_manager_allocations(db, window, manager_id=manager_id),
+    )
+
+
+def build_manager_allocations(
+    db: Session,
+    window: Tuple[Tuple[int, int], Tuple[int, int]],
+    *,
+    manager_id: Optional[int] = None,
+) -> ManagerAllocationsResponse:
+    """Assemble the allocation rollup grid for a manager over an inclusive month window."""
+
     logger.info(f"Generating manager allocations rollup for manager {manager_id}")
+    (start_year, start_month), (end_year, end_month) = window
     
     # Get all employees for this manager
     employees = crud.get_users(
         db,
-        skip=0,
         limit=2000,
         manager_id=manager_id,
         system_role=models.SystemRole.EMPLOYEE,
     )
-    
-    # Get monthly totals for this manager's projects
-    monthly_totals = crud.get_monthly_user_allocation_totals(db, manager_id=manager_id)
-    
-    # Get funded hours per employee across all projects
-    funded_hours_query = (
-        db.query(
-            models.ProjectAssignment.user_id.label("user_id"),
-            func.sum(models.ProjectAssignment.funded_hours).label("total_funded"),
+
+
+    # Reuse the dashboard cube when it is already warm; otherwise push the
+    # window into SQL rather than building a cube for a single rollup.
+    cube = peek_allocation_cube(db, manager_id=manager_id)
+    if cube is not None:
+        monthly_totals = cube.user_monthly_totals(*window)
+        funded_lookup = cube.funded_hours_by_user()
+    else:
+        monthly_totals = _group_monthly_totals_by_user(
+            crud.get_monthly_user_allocation_totals(
+                db, manager_id=manager_id, start=window[0], end=window[1]
+            )
         )
-        .join(models.Project, models.Project.id == models.ProjectAssignment.project_id)
-        .filter(models.Project.manager_id == manager_id)
-        .group_by(models.ProjectAssignment.user_id)
-        .all()
-    )
-    
-    funded_lookup = {row.user_id: int(row.total_funded or 0) for row in funded_hours_query}
-    
+        funded_lookup = crud.get_user_funded_totals(db, manager_id=manager_id)
+
+    window_months = iter_months(date(start_year, start_month, 1), date(end_year, end_month, 1))
+    standard_hours = dict(zip(window_months, month_capacity_series(window_months)))
+
     # Build response
     employee_rollups = []
     for employee in employees:
-        # Get monthly totals for this employee within date range
-        employee_monthlies = []
-        for month_data in monthly_totals:
-            if month_data["user_id"] != employee.id:
-                continue
-            year = month_data["year"]
-            month = month_data["month"]
-            
-            # Check if within date range
-            if (year < start_year or (year == start_year and month < start_month)):
-                continue
-            if (year > end_year or (year == end_year and month > end_month)):
-                continue
-            
-            total_hours = int(month_data.get("total_hours") or 0)
-            standard_hours = max(standard_month_hours(year, month), 1)
-            fte_pct = (total_hours / standard_hours) * 100
-            
-            employee_monthlies.append(EmployeeMonthlyTotal(
+        employee_monthlies = [
+            EmployeeMonthlyTotal(
                 year=year,
                 month=month,
                 total_hours=total_hours,
-                fte_percentage=round(fte_pct, 2)
-            ))
-        
-        # Sort by year/month
-        employee_monthlies.sort(key=lambda x: (x.year, x.month))
-        
+                fte_percentage=round((total_hours / standard_hours[(year, month)]) * 100, 2),
+            )
+            for year, month, total_hours in monthly_totals.get(employee.id, [])
+        ]
+
         employee_rollups.append(EmployeeAllocationRollup(
             employee_id=employee.id,
             employee_name=employee.full_name,
@@ -395,7 +412,7 @@ def get_manager_allocations(
     response_model=ProjectDashboardResponse,
     summary="Get project-specific dashboard",
 )
-def get_project_dashboard(project_id: int, db: Session = Depends(get_db)):
+def get_project_dashboard(project_id: int, request: Request, db: Session = Depends(get_read_db)):
     """
     Retrieve a dashboard for a specific project showing staffing health.
     
@@ -404,27 +421,37 @@ def get_project_dashboard(project_id: int, db: Session = Depends(get_db)):
     - FTE burn-down chart data
     - Budget utilization percentage
     
-    Supports US019: Project-specific dashboard for PMs.
+    Supports US019: Project-specific dashboard for PMs. Responses are cached
+    per project and honour If-None-Match.
     """
-    # Validate project exists
-    db_project = crud.get_project(db, project_id=project_id)
-    if not db_project:
+    return cached_report(
+        request,
+        db,
+        scopes=[project_scope(project_id)],
+        build=lambda: build_project_dashboard(db, project_id),
+    )
+
+
+def build_project_dashboard(db: Session, project_id: int) -> ProjectDashboardResponse:
+    """Assemble a project's dashboard; raises 404 for an unknown project."""
+
+    # Validate project exists; project, totals and months come from one query.
+    series = crud.get_project_allocation_series(db, project_id=project_id)
+    if series is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Project with ID {project_id} not found"
         )
-    
-    totals = crud.get_project_funded_and_allocated_totals(db, project_id=project_id)
-    total_funded = int(totals.get("funded_hours", 0))
-    total_allocated = int(totals.get("allocated_hours", 0))
+    project_name, project_start, project_sprints = series["project"]
+
+    total_funded = series["funded_hours"]
+    total_allocated = series["allocated_hours"]
     utilization = (total_allocated / total_funded * 100) if total_funded else 0.0
 
     logger.info("Generating project dashboard", project_id=project_id)
 
-    monthly_allocations = crud.get_project_monthly_allocations(db, project_id=project_id)
     allocation_map = {
-        (row["year"], row["month"]): float(row.get("allocated_hours") or 0.0)
-        for row in monthly_allocations
+        (year, month): float(hours) for year, month, hours in series["months"]
     }
 
     if allocation_map:
@@ -433,8 +460,8 @@ def get_project_dashboard(project_id: int, db: Session = Depends(get_db)):
         start_month = date(min_year, min_month, 1)
         end_month = date(max_year, max_month, 1)
     else:
-        start_month = date(db_project.start_date.year, db_project.start_date.month, 1)
-        estimated_end = default_project_end(db_project.start_date, db_project.sprints)
+        start_month = date(project_start.year, project_start.month, 1)
+        estimated_end = default_project_end(project_start, project_sprints)
         end_month = date(estimated_end.year, estimated_end.month, 1)
 
     month_windows = iter_months(start_month, end_month)
@@ -453,7 +480,7 @@ def get_project_dashboard(project_id: int, db: Session = Depends(get_db)):
 
     return ProjectDashboardResponse(
         project_id=project_id,
-        project_name=db_project.name,
+        project_name=project_name,
         total_funded_hours=total_funded,
         total_allocated_hours=total_allocated,
         utilization_pct=round(utilization, 2),
@@ -472,11 +499,12 @@ def get_project_dashboard(project_id: int, db: Session = Depends(get_db)):
 )
 def get_employee_timeline(
     employee_id: int,
+    request: Request,
     start_year: Optional[int] = Query(None, description="Start year for timeline"),
     start_month: Optional[int] = Query(None, ge=1, le=12, description="Start month for timeline"),
     end_year: Optional[int] = Query(None, description="End year for timeline"),
     end_month: Optional[int] = Query(None, ge=1, le=12, description="End month for timeline"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get a single employee's timeline showing all project commitments.
@@ -485,7 +513,31 @@ def get_employee_timeline(
     all their projects, making it easy to identify availability and conflicts.
     
     Supports US012: Employee timeline view for resource optimization.
+    Responses are cached per employee and range and honour If-None-Match.
     """
+    return cached_report(
+        request,
+        db,
+        scopes=[user_scope(employee_id)],
+        build=lambda: build_employee_timeline(
+            db,
+            employee_id,
+            start=(start_year, start_month),
+            end=(end_year, end_month),
+        ),
+    )
+
+
+def build_employee_timeline(
+    db: Session,
+    employee_id: int,
+    *,
+    start: Tuple[Optional[int], Optional[int]] = (None, None),
+    end: Tuple[Optional[int], Optional[int]] = (None, None),
+) -> EmployeeTimelineResponse:
+    """Assemble an employee's timeline; raises 404 for an unknown employee."""
+
+    (start_year, start_month), (end_year, end_month) = start, end
     # Validate employee exists
     db_user = crud.get_user(db, employee_id)
     if not db_user:
@@ -494,50 +546,20 @@ def get_employee_timeline(
             detail=f"Employee with ID {employee_id} not found"
         )
     
-    # Get employee's allocation summary
-    summary = crud.get_user_allocation_summary(db, user_id=employee_id)
-    project_breakdown_rows = crud.get_monthly_user_project_allocations(
-        db, user_id=employee_id
+    # One windowed query yields each month's projects and its total.
+    rows = crud.get_employee_timeline_rows(
+        db,
+        employee_id,
+        start=(start_year, start_month) if start_year and start_month else None,
+        end=(end_year, end_month) if end_year and end_month else None,
     )
 
-    breakdown_map: Dict[Tuple[int, int], List[ProjectAllocationBreakdown]] = defaultdict(list)
-    for row in project_breakdown_rows:
-        key = (row["year"], row["month"])
-        breakdown_map[key].append(
-            ProjectAllocationBreakdown(
-                project_id=row["project_id"],
-                project_name=row["project_name"],
-                allocated_hours=int(row.get("allocated_hours") or 0),
-            )
-        )
-
-    for allocations in breakdown_map.values():
-        allocations.sort(key=lambda item: item.allocated_hours, reverse=True)
-
-    # Filter by date range if provided
-    if start_year and start_month:
-        summary = [
-            s
-            for s in summary
-            if (s['year'] > start_year) or (s['year'] == start_year and s['month'] >= start_month)
-        ]
-
-    if end_year and end_month:
-        summary = [
-            s
-            for s in summary
-            if (s['year'] < end_year) or (s['year'] == end_year and s['month'] <= end_month)
-        ]
-
     logger.info("Generating employee timeline", user_id=employee_id)
 
-    summary.sort(key=lambda item: (item["year"], item["month"]))
-
     timeline: List[EmployeeTimelineMonth] = []
-    for item in summary:
-        year = item["year"]
-        month = item["month"]
-        total_hours = int(item.get("total_hours") or 0)
+    for (year, month), month_rows in groupby(rows, key=itemgetter("year", "month")):
+        month_rows = list(month_rows)
+        total_hours = int(month_rows[0]["month_total_hours"] or 0)
         standard_hours = standard_month_hours(year, month)
         fte_percentage = (
             round((total_hours / standard_hours) * 100, 2) if standard_hours else 0.0
@@ -552,7 +574,14 @@ def get_employee_timeline(
                 standard_hours=standard_hours,
                 fte_percentage=fte_percentage,
                 available_hours=available_hours,
-                allocations=breakdown_map.get((year, month), []),
+                allocations=[
+                    ProjectAllocationBreakdown(
+                        project_id=row["project_id"],
+                        project_name=row["project_name"],
+                        allocated_hours=int(row["allocated_hours"] or 0),
+                    )
+                    for row in month_rows
+                ],
             )
         )
 
@@ -577,38 +606,90 @@ def get_employee_timeline(
         }
     },
 )
-def export_portfolio_to_excel(db: Session = Depends(get_db)):
+def export_portfolio_to_excel(
+    request: Request,
+    manager_id: Optional[int] = Query(None, description="Manager ID for data isolation (optional)"),
+    db: Session = Depends(get_read_db),
+):
     """
     Export the portfolio roll-up view to an Excel file.
+
+    The workbook is streamed: project rows are read from the database while
+    the response body is sent in chunks. The file is kept on disk, and repeat
+    downloads are served from there until the manager's data changes.
     """
     logger.info("Exporting portfolio data to Excel")
 
-    from sqlalchemy.orm import joinedload
-
-    projects = (
-        db.query(models.Project)
-        .options(
-            joinedload(models.Project.assignments).joinedload(models.ProjectAssignment.allocations),
-            joinedload(models.Project.manager),
-        )
-        .all()
+    today = date.today()
+    scopes = [manager_scope(manager_id)]
+    if manager_id is not None:
+        # Project rows show the manager's name.
+        scopes.append(user_scope(manager_id))
+    return cached_export(
+        request,
+        db,
+        kind="portfolio",
+        tenant=manager_tenant(manager_id),
+        scopes=scopes,
+        vary=[(today.year, today.month)],
+        build=lambda: stream_portfolio_export(db, manager_id=manager_id),
+        filename=_portfolio_export_filename(),
+        media_type=XLSX_MEDIA_TYPE,
     )
 
-    metrics = get_portfolio_dashboard(db)
 
-    response = portfolio_workbook(
-        projects=projects,
+@router.post(
+    "/export/portfolio/jobs",
+    response_model=schemas.BackgroundJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Queue a portfolio Excel export as a background job",
+)
+def queue_portfolio_export(
+    manager_id: Optional[int] = Query(None, description="Manager ID for data isolation (optional)"),
+    db: Session = Depends(get_db),
+):
+    """
+    Build the portfolio workbook in the background. Poll `/jobs/{id}` and
+    download the file from `/jobs/{id}/result` once it has succeeded.
+    """
+    return submit_job(db, "portfolio_export", {"manager_id": manager_id}, manager_id=manager_id)
+
+
+def stream_portfolio_export(db: Session, *, manager_id: Optional[int] = None) -> Iterator[bytes]:
+    """Stream the portfolio workbook shared by the direct and queued exports."""
+
+    # The over-allocated and bench sheets come from the (cached) dashboard;
+    # project rows are streamed from the database as the file is written.
+    metrics = build_portfolio_dashboard(db, manager_id=manager_id)
+    return stream_portfolio_workbook(
+        project_rows=crud.iter_portfolio_export_rows(db, manager_id=manager_id),
         over_allocated=metrics.over_allocated_employees,
         bench=metrics.bench_employees,
     )
-    filename = f"staffalloc-portfolio-{date.today().isoformat()}.xlsx"
 
-    return StreamingResponse(
-        response,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={
-            "Content-Disposition": f"attachment; filename={filename}",
-        },
+
+def _portfolio_export_filename() -> str:
+    return f"staffalloc-portfolio-{date.today().isoformat()}.xlsx"
+
+
+# Full rollup rebuilds requested by bulk writes run here, off the request path.
+maintenance_task(crud.rebuild_requested_allocation_rollups)
+
+
+@job_handler("portfolio_export")
+def _run_portfolio_export_job(db: Session, params: Dict[str, object], context: JobContext) -> JobOutcome:
+    manager_id = params.get("manager_id")
+    context.report(progress=0.1, message="Building portfolio workbook")
+    filename = _portfolio_export_filename()
+    path = context.result_path(filename)
+    with path.open("wb") as handle:
+        for chunk in stream_portfolio_export(db, manager_id=manager_id):
+            handle.write(chunk)
+    return JobOutcome(
+        result={"size_bytes": path.stat().st_size},
+        file_path=path,
+        filename=filename,
+        media_type=XLSX_MEDIA_TYPE,
     )
 
 
@@ -622,34 +703,90 @@ def export_portfolio_to_excel(db: Session = Depends(get_db)):
         }
     },
 )
-def export_project_to_excel(project_id: int, db: Session = Depends(get_db)):
+def export_project_to_excel(project_id: int, request: Request, db: Session = Depends(get_read_db)):
     """
     Export a specific project's allocation data to an Excel file.
     
     Supports US016: Export project data for sharing with stakeholders.
     """
-    # Validate project exists
-    db_project = crud.get_project(db, project_id=project_id)
-    if not db_project:
+    project = crud.get_project(db, project_id=project_id)
+    if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Project with ID {project_id} not found"
         )
-    logger.info("Exporting project data", project_id=project_id)
+    logger.info("Exporting project %s data to Excel", project_id)
 
-    project = crud.get_project(db, project_id=project_id)
-    if not project:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+    scopes = [project_scope(project_id)]
+    if project.manager_id is not None:
+        scopes.append(user_scope(project.manager_id))
+
+    def build() -> Iterator[bytes]:
+        buffer = project_workbook(project)
+        return iter(lambda: buffer.read(XLSX_CHUNK_BYTES), b"")
 
-    buffer = project_workbook(project)
-    filename = f"staffalloc-project-{project.code}-{date.today().isoformat()}.xlsx"
+    return cached_export(
+        request,
+        db,
+        kind="project",
+        tenant=manager_tenant(project.manager_id),
+        scopes=scopes,
+        build=build,
+        filename=f"staffalloc-project-{project.code}-{date.today().isoformat()}.xlsx",
+        media_type=XLSX_MEDIA_TYPE,
+    )
 
-    return StreamingResponse(
-        buffer,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={
-            "Content-Disposition": f"attachment; filename={filename}",
+
+@router.get(
+    "/export/allocations",
+    summary="Export the allocation fact table as CSV, Parquet or Arrow",
+    responses={
+        200: {
+            "content": {media_type: {} for media_type in FACT_MEDIA_TYPES.values()},
+            "description": "One row per assignment and month",
         },
+        501: {"description": "The format's encoder is not installed"},
+    },
+)
+def export_allocation_facts(
+    request: Request,
+    export_format: FactFormat = Query(FactFormat.CSV, alias="format", description="Output encoding"),
+    manager_id: Optional[int] = Query(None, description="Manager ID for data isolation (optional)"),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Export every allocation as a flat fact table for BI tools.
+
+    Columns: user_id, user, project_id, project, role, lcat, year, month and
+    hours. The file is streamed as it is encoded and kept on disk, so repeat
+    pulls are served from there until the manager's data changes.
+    """
+    try:
+        require_fact_format(export_format)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(exc)) from exc
+
+    suffix = FACT_FILE_SUFFIXES[export_format]
+    return cached_export(
+        request,
+        db,
+        kind=f"allocations-{export_format.value}",
+        tenant=manager_tenant(manager_id),
+        scopes=[manager_scope(manager_id)],
+        build=lambda: stream_allocation_facts(db, export_format, manager_id=manager_id),
+        filename=f"staffalloc-allocations-{date.today().isoformat()}{suffix}",
+        media_type=FACT_MEDIA_TYPES[export_format],
+    )
+
+
+def stream_allocation_facts(
+    db: Session, export_format: FactFormat, *, manager_id: Optional[int] = None
+) -> Iterator[bytes]:
+    """Stream the allocation fact table of a manager's projects (all when None)."""
+
+    labels = crud.get_allocation_fact_labels(db, manager_id=manager_id)
+    return stream_fact_table(
+        crud.iter_allocation_fact_batches(db, manager_id=manager_id), labels, export_format
     )
 
 
@@ -662,35 +799,44 @@ def export_project_to_excel(project_id: int, db: Session = Depends(get_db)):
     summary="Get utilization statistics by role",
 )
 def get_utilization_by_role(
+    request: Request,
     year: int = Query(..., description="Year for the report"),
     month: int = Query(..., ge=1, le=12, description="Month for the report"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get utilization statistics grouped by role for a specific month.
     
     Useful for identifying which roles are over/under-utilized.
-    Supports US011 and US020 (workload balancing).
+    Supports US011 and US020 (workload balancing). Responses are cached and
+    honour If-None-Match.
     """
+    return cached_report(
+        request,
+        db,
+        scopes=[manager_scope(None)],
+        build=lambda: build_utilization_by_role(db, year, month),
+    )
+
+
+def build_utilization_by_role(db: Session, year: int, month: int) -> Dict[str, object]:
+    """Assemble the organisation-wide utilization by role for one month."""
+
     logger.info(f"Generating utilization report by role for {year}-{month:02d}")
     
-    snapshot = crud.get_role_utilization_snapshot(db, year=year, month=month)
+    cube = get_allocation_cube(db)
     standard_hours = max(standard_month_hours(year, month), 1)
 
     items: List[Dict[str, object]] = []
-    for row in snapshot:
-        allocated_hours = float(row.get("allocated_hours") or 0.0)
-        funded_hours = float(row.get("funded_hours") or 0.0)
-        fte_percentage = round((allocated_hours / standard_hours) * 100, 2)
-
+    for row in cube.role_totals(month=(year, month)):
         items.append(
             {
-                "role_id": row.get("role_id"),
-                "role_name": row.get("role_name"),
-                "total_hours": int(allocated_hours),
-                "fte_percentage": fte_percentage,
-                "funded_hours": int(funded_hours),
-                "assignment_count": int(row.get("assignment_count") or 0),
+                "role_id": row.role_id,
+                "role_name": row.role_name,
+                "total_hours": row.allocated_hours,
+                "fte_percentage": round((row.allocated_hours / standard_hours) * 100, 2),
+                "funded_hours": row.funded_hours,
+                "assignment_count": row.assignment_count,
             }
         )
 
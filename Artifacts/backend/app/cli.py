@@ -0,0 +1,53 @@
+"""
+Maintenance commands for the StaffAlloc backend.
+
+Run from the backend directory:
+
+    python -m app.cli rebuild-rollups                 # every manager
+    python -m app.cli rebuild-rollups --manager-id 3  # one manager's rows
+
+Key commands:
+- ``rebuild-rollups``: re-aggregates the allocation rollup tables from
+  `allocations`. They are maintained on every write, so this is only needed
+  after editing the database outside the application.
+"""
+from __future__ import annotations
+
+import argparse
+from typing import List, Optional
+
+from app import crud, models
+from app.db.session import SessionLocal, create_db_and_tables
+
+
+def rebuild_rollups(manager_ids: Optional[List[int]] = None) -> dict:
+    """Rebuild the rollup rows of ``manager_ids`` (all managers when None) and commit."""
+
+    with SessionLocal() as db:
+        written = crud.rebuild_allocation_rollups(db, manager_ids=manager_ids)
+        db.commit()
+    return written
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser("rebuild-rollups", help="re-aggregate the allocation rollup tables")
+    rebuild.add_argument(
+        "--manager-id",
+        type=int,
+        action="append",
+        dest="manager_ids",
+        help=f"only rebuild this project manager's rows ({models.ROLLUP_UNMANAGED} = projects without a manager); repeatable",
+    )
+
+    args = parser.parse_args(argv)
+    create_db_and_tables()
+    if args.command == "rebuild-rollups":
+        for table, rows in rebuild_rollups(args.manager_ids).items():
+            print(f"{table}: {rows} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,12 +10,23 @@ All functions accept a SQLAlchemy Session and return model instances or lists.
 These functions are called by the API routers via dependency injection.
 """
 import datetime
-from typing import Any, Dict, List, Optional
+import hashlib
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
-from sqlalchemy import and_, func, or_
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, bindparam, column, delete, func, insert, or_, select, text, tuple_
+from sqlalchemy import table as sql_table
+from sqlalchemy.orm import Session, joinedload, selectinload
 
 from . import models, schemas
+from .core.config import settings
+from .db.changes import (
+    AllocationDelta,
+    ChangeSet,
+    mark_entities_changed,
+    record_allocation_deltas,
+    register_pre_commit_hook,
+)
+from .utils.pagination import Keyset, Page
 
 
 # --------------------------------------------------------------------------------
@@ -47,20 +58,49 @@ def get_user(db: Session, user_id: int) -> Optional[models.User]:
     return db.query(models.User).filter(models.User.id == user_id).first()
 
 
+def get_user_with_assignments(db: Session, user_id: int) -> Optional[models.User]:
+    """
+    Retrieves a user with their assignments and each assignment's project
+    (with manager), role and LCAT, in two queries however many there are.
+    """
+    return (
+        db.query(models.User)
+        .options(
+            selectinload(models.User.assignments).options(
+                joinedload(models.ProjectAssignment.project).joinedload(models.Project.manager),
+                joinedload(models.ProjectAssignment.role),
+                joinedload(models.ProjectAssignment.lcat),
+            )
+        )
+        .filter(models.User.id == user_id)
+        .first()
+    )
+
+
 def get_user_by_email(db: Session, email: str) -> Optional[models.User]:
     """Retrieves a single user by their email address."""
     return db.query(models.User).filter(models.User.email == email).first()
 
 
+USER_KEYSET = Keyset(models.User.full_name, models.User.id)
+
+
 def get_users(
     db: Session,
-    skip: int = 0,
     limit: int = 100,
     *,
+    after: Optional[str] = None,
+    skip: int = 0,
     manager_id: Optional[int] = None,
     system_role: Optional[models.SystemRole] = None,
-) -> List[models.User]:
-    """Retrieves a list of users filtered by manager (for employees) or all PM/Admin users."""
+    project_id: Optional[int] = None,
+    role_id: Optional[int] = None,
+) -> Page[models.User]:
+    """
+    Retrieves a page of users ordered by name, filtered by manager (for
+    employees), system role, or the project and role they are assigned to.
+    ``after`` is the cursor of the previous page.
+    """
     query = db.query(models.User)
 
     if system_role:
@@ -71,12 +111,44 @@ def get_users(
     if manager_id is not None:
         query = query.filter(models.User.manager_id == manager_id)
 
-    return (
-        query.order_by(models.User.full_name)
-        .offset(skip)
-        .limit(limit)
-        .all()
+    if project_id is not None or role_id is not None:
+        assigned = select(models.ProjectAssignment.user_id)
+        if project_id is not None:
+            assigned = assigned.where(models.ProjectAssignment.project_id == project_id)
+        if role_id is not None:
+            assigned = assigned.where(models.ProjectAssignment.role_id == role_id)
+        query = query.filter(models.User.id.in_(assigned))
+
+    return USER_KEYSET.page(query, after=after, skip=skip, limit=limit)
+
+
+def get_users_by_ids(
+    db: Session,
+    user_ids: Iterable[int],
+    *,
+    system_role: Optional[models.SystemRole] = None,
+) -> List[models.User]:
+    """Retrieves the given users (with their manager loaded), optionally by system role."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return []
+    query = (
+        db.query(models.User)
+        .filter(models.User.id.in_(user_ids))
+        .options(joinedload(models.User.manager))
     )
+    if system_role:
+        query = query.filter(models.User.system_role == system_role)
+    return query.all()
+
+
+def get_user_ids_managed_by(db: Session, manager_ids: Iterable[int]) -> List[int]:
+    """Return the IDs of users reporting to any of ``manager_ids``."""
+    manager_ids = list(manager_ids)
+    if not manager_ids:
+        return []
+    rows = db.query(models.User.id).filter(models.User.manager_id.in_(manager_ids)).all()
+    return [user_id for (user_id,) in rows]
 
 
 def update_user(
@@ -275,6 +347,27 @@ def get_project(db: Session, project_id: int) -> Optional[models.Project]:
     )
 
 
+def get_project_with_details(db: Session, project_id: int) -> Optional[models.Project]:
+    """
+    Retrieves a project with its manager, assignments (user/role/LCAT) and
+    monthly hour overrides, in three queries however many there are.
+    """
+    return (
+        db.query(models.Project)
+        .options(
+            joinedload(models.Project.manager),
+            selectinload(models.Project.assignments).options(
+                joinedload(models.ProjectAssignment.user),
+                joinedload(models.ProjectAssignment.role),
+                joinedload(models.ProjectAssignment.lcat),
+            ),
+            selectinload(models.Project.monthly_hour_overrides),
+        )
+        .filter(models.Project.id == project_id)
+        .first()
+    )
+
+
 def get_project_by_code(
     db: Session, code: str, *, manager_id: Optional[int] = None
 ) -> Optional[models.Project]:
@@ -285,20 +378,36 @@ def get_project_by_code(
     return query.first()
 
 
+PROJECT_KEYSET = Keyset(models.Project.name, models.Project.id)
+
+
 def get_projects(
     db: Session,
-    skip: int = 0,
     limit: int = 100,
     *,
+    after: Optional[str] = None,
+    skip: int = 0,
     manager_id: Optional[int] = None,
-) -> List[models.Project]:
-    """Retrieves a list of projects filtered by manager."""
+    status: Optional[models.ProjectStatus] = None,
+    start_from: Optional[datetime.date] = None,
+    start_to: Optional[datetime.date] = None,
+) -> Page[models.Project]:
+    """
+    Retrieves a page of projects ordered by name, filtered by manager, status
+    and start date range (inclusive). ``after`` is the cursor of the previous page.
+    """
     query = db.query(models.Project)
 
     if manager_id is not None:
         query = query.filter(models.Project.manager_id == manager_id)
+    if status is not None:
+        query = query.filter(models.Project.status == status)
+    if start_from is not None:
+        query = query.filter(models.Project.start_date >= start_from)
+    if start_to is not None:
+        query = query.filter(models.Project.start_date <= start_to)
 
-    return query.order_by(models.Project.name).offset(skip).limit(limit).all()
+    return PROJECT_KEYSET.page(query, after=after, skip=skip, limit=limit)
 
 
 def update_project(
@@ -328,6 +437,38 @@ def delete_project(db: Session, project_id: int) -> bool:
 # --- Project Specialized Queries ---
 
 
+def get_projects_with_assignment_details(
+    db: Session, project_ids: Iterable[int]
+) -> List[models.Project]:
+    """Load projects with manager, assignments (user/role/LCAT) and allocations eagerly."""
+    project_ids = list(project_ids)
+    if not project_ids:
+        return []
+    return (
+        db.query(models.Project)
+        .filter(models.Project.id.in_(project_ids))
+        .options(
+            joinedload(models.Project.manager),
+            selectinload(models.Project.assignments).options(
+                joinedload(models.ProjectAssignment.user),
+                joinedload(models.ProjectAssignment.role),
+                joinedload(models.ProjectAssignment.lcat),
+                selectinload(models.ProjectAssignment.allocations),
+            ),
+        )
+        .all()
+    )
+
+
+def get_project_ids_managed_by(db: Session, manager_ids: Iterable[int]) -> List[int]:
+    """Return the IDs of projects managed by any of ``manager_ids``."""
+    manager_ids = list(manager_ids)
+    if not manager_ids:
+        return []
+    rows = db.query(models.Project.id).filter(models.Project.manager_id.in_(manager_ids)).all()
+    return [project_id for (project_id,) in rows]
+
+
 def get_projects_for_user(db: Session, user_id: int) -> List[models.Project]:
     """Retrieves all projects a user is assigned to."""
     return (
@@ -371,11 +512,32 @@ def get_project_assignment(
     )
 
 
+ASSIGNMENT_KEYSET = Keyset(models.ProjectAssignment.id)
+
+
 def get_project_assignments(
-    db: Session, skip: int = 0, limit: int = 100
-) -> List[models.ProjectAssignment]:
-    """Retrieves a list of project assignments with pagination."""
-    return db.query(models.ProjectAssignment).offset(skip).limit(limit).all()
+    db: Session,
+    limit: int = 100,
+    *,
+    after: Optional[str] = None,
+    project_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    role_id: Optional[int] = None,
+) -> Page[models.ProjectAssignment]:
+    """Retrieves a page of project assignments by ID, filtered by project, user and role."""
+    query = db.query(models.ProjectAssignment).options(
+        joinedload(models.ProjectAssignment.project),
+        joinedload(models.ProjectAssignment.user),
+        joinedload(models.ProjectAssignment.role),
+        joinedload(models.ProjectAssignment.lcat),
+    )
+    if project_id is not None:
+        query = query.filter(models.ProjectAssignment.project_id == project_id)
+    if user_id is not None:
+        query = query.filter(models.ProjectAssignment.user_id == user_id)
+    if role_id is not None:
+        query = query.filter(models.ProjectAssignment.role_id == role_id)
+    return ASSIGNMENT_KEYSET.page(query, after=after, limit=limit)
 
 
 def update_project_assignment(
@@ -439,6 +601,82 @@ def get_assignments_for_user(
     )
 
 
+def get_existing_assignment_ids(db: Session, assignment_ids: Iterable[int]) -> Set[int]:
+    """Return the subset of ``assignment_ids`` that exist."""
+    ids = list(set(assignment_ids))
+    if not ids:
+        return set()
+    rows = (
+        db.query(models.ProjectAssignment.id)
+        .filter(models.ProjectAssignment.id.in_(ids))
+        .all()
+    )
+    return {row[0] for row in rows}
+
+
+def upsert_assignment_rows(db: Session, rows: Sequence[Dict[str, int]]) -> None:
+    """
+    Execute an ``ON CONFLICT(project_id, user_id) DO UPDATE`` batch of
+    assignments without committing. Rows must not repeat a project/user pair.
+    """
+    if not rows:
+        return
+    # Core statements bypass the ORM unit of work: report the roles being
+    # replaced so rollup maintenance can refresh their rows.
+    pairs = [(row["project_id"], row["user_id"]) for row in rows]
+    mark_entities_changed(
+        db,
+        role_ids={
+            role_id
+            for (role_id,) in db.query(models.ProjectAssignment.role_id).filter(
+                tuple_(models.ProjectAssignment.project_id, models.ProjectAssignment.user_id).in_(pairs)
+            )
+        },
+    )
+    _bulk_upsert(
+        db,
+        models.ProjectAssignment.__table__,
+        rows,
+        index_elements=["project_id", "user_id"],
+        set_=lambda excluded: {
+            "role_id": excluded.role_id,
+            "lcat_id": excluded.lcat_id,
+            "funded_hours": excluded.funded_hours,
+            "updated_at": func.now(),
+        },
+    )
+
+
+def get_assignment_pairs(
+    db: Session,
+    *,
+    assignment_ids: Iterable[int] = (),
+    project_ids: Iterable[int] = (),
+    user_ids: Iterable[int] = (),
+) -> Set[Tuple[int, int]]:
+    """
+    Return ``(project_id, user_id)`` for assignments matching any of the given
+    assignment, project or user IDs.
+    """
+    conditions = []
+    for key_column, values in (
+        (models.ProjectAssignment.id, assignment_ids),
+        (models.ProjectAssignment.project_id, project_ids),
+        (models.ProjectAssignment.user_id, user_ids),
+    ):
+        values = list(values)
+        if values:
+            conditions.append(key_column.in_(values))
+    if not conditions:
+        return set()
+    rows = (
+        db.query(models.ProjectAssignment.project_id, models.ProjectAssignment.user_id)
+        .filter(or_(*conditions))
+        .all()
+    )
+    return {(project_id, user_id) for project_id, user_id in rows}
+
+
 def get_assignment_by_user_and_project(
     db: Session, user_id: int, project_id: int
 ) -> Optional[models.ProjectAssignment]:
@@ -474,11 +712,42 @@ def get_allocation(db: Session, allocation_id: int) -> Optional[models.Allocatio
     )
 
 
+ALLOCATION_KEYSET = Keyset(models.Allocation.id)
+
+
 def get_allocations(
-    db: Session, skip: int = 0, limit: int = 1000
-) -> List[models.Allocation]:
-    """Retrieves a list of allocations with pagination."""
-    return db.query(models.Allocation).offset(skip).limit(limit).all()
+    db: Session,
+    limit: int = 1000,
+    *,
+    after: Optional[str] = None,
+    project_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    role_id: Optional[int] = None,
+    start: Optional[Tuple[int, int]] = None,
+    end: Optional[Tuple[int, int]] = None,
+) -> Page[models.Allocation]:
+    """
+    Retrieves a page of allocations by ID, filtered by the assignment's
+    project, user and role and by an inclusive ``(year, month)`` range.
+    """
+    query = db.query(models.Allocation)
+    if project_id is not None or user_id is not None or role_id is not None:
+        query = query.join(
+            models.ProjectAssignment,
+            models.ProjectAssignment.id == models.Allocation.project_assignment_id,
+        )
+        if project_id is not None:
+            query = query.filter(models.ProjectAssignment.project_id == project_id)
+        if user_id is not None:
+            query = query.filter(models.ProjectAssignment.user_id == user_id)
+        if role_id is not None:
+            query = query.filter(models.ProjectAssignment.role_id == role_id)
+    period = tuple_(models.Allocation.year, models.Allocation.month)
+    if start is not None:
+        query = query.filter(period >= tuple_(*start))
+    if end is not None:
+        query = query.filter(period <= tuple_(*end))
+    return ALLOCATION_KEYSET.page(query, after=after, limit=limit)
 
 
 def update_allocation(
@@ -505,6 +774,173 @@ def delete_allocation(db: Session, allocation_id: int) -> bool:
     return False
 
 
+def _upsert_insert(db: Session, table):
+    """Return a dialect-specific INSERT that supports ON CONFLICT clauses."""
+
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return dialect_insert(table)
+
+
+def _copy_upsert(db: Session, table, rows: Sequence[Dict[str, Any]], columns: List[str], build):
+    """Load ``rows`` into a temporary staging table with COPY and upsert from it."""
+
+    staging = f"_staging_{table.name}"
+    column_list = ", ".join(columns)
+    connection = db.connection()
+    connection.exec_driver_sql(
+        f"CREATE TEMP TABLE IF NOT EXISTS {staging} ON COMMIT DROP AS "
+        f"SELECT {column_list} FROM {table.name} WITH NO DATA"
+    )
+    connection.exec_driver_sql(f"TRUNCATE {staging}")
+    driver_connection = connection.connection.driver_connection
+    with driver_connection.cursor() as cursor:
+        with cursor.copy(f"COPY {staging} ({column_list}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row([row[column] for column in columns])
+
+    source = select(*(column(name) for name in columns)).select_from(
+        sql_table(staging, *(column(name) for name in columns))
+    )
+    db.execute(build(_upsert_insert(db, table).from_select(columns, source)))
+
+
+def _bulk_upsert(
+    db: Session,
+    table,
+    rows: Sequence[Dict[str, Any]],
+    *,
+    index_elements: Sequence[str],
+    set_: Callable[[Any], Dict[str, Any]],
+) -> None:
+    """
+    Run ``INSERT ... ON CONFLICT (index_elements) DO UPDATE SET set_(excluded)``
+    for a batch without committing. Rows must share their keys and must not
+    repeat a conflict key.
+
+    Rows are written in conflict-key order so concurrent batches lock shared
+    rows in the same order instead of deadlocking. On PostgreSQL with psycopg,
+    batches of at least ``settings.BULK_COPY_MIN_ROWS`` are streamed with COPY
+    into a staging table and upserted in one statement; smaller batches (and
+    SQLite) use executemany.
+    """
+    if not rows:
+        return
+    rows = sorted(rows, key=lambda row: tuple(row[key] for key in index_elements))
+
+    def build(statement):
+        return statement.on_conflict_do_update(
+            index_elements=list(index_elements), set_=set_(statement.excluded)
+        )
+
+    bind = db.get_bind()
+    if (
+        bind.dialect.name == "postgresql"
+        and bind.dialect.driver == "psycopg"
+        and len(rows) >= settings.BULK_COPY_MIN_ROWS
+    ):
+        columns = [c.name for c in table.columns if c.name in rows[0]]
+        _copy_upsert(db, table, rows, columns, build)
+        return
+    db.execute(build(_upsert_insert(db, table)), rows)
+
+
+def get_allocation_cells(
+    db: Session, assignment_ids: Iterable[int]
+) -> Dict[Tuple[int, int, int], Tuple[int, int]]:
+    """Return {(assignment_id, year, month): (allocation_id, hours)} for the assignments."""
+
+    ids = list(set(assignment_ids))
+    if not ids:
+        return {}
+    rows = (
+        db.query(
+            models.Allocation.project_assignment_id,
+            models.Allocation.year,
+            models.Allocation.month,
+            models.Allocation.id,
+            models.Allocation.allocated_hours,
+        )
+        .filter(models.Allocation.project_assignment_id.in_(ids))
+        .all()
+    )
+    return {(row[0], row[1], row[2]): (row[3], row[4]) for row in rows}
+
+
+def upsert_allocation_rows(db: Session, rows: Sequence[Dict[str, int]]) -> None:
+    """
+    Execute an ``ON CONFLICT(project_assignment_id, year, month) DO UPDATE``
+    batch without committing. Rows must not repeat a cell key.
+    """
+    _bulk_upsert(
+        db,
+        models.Allocation.__table__,
+        rows,
+        index_elements=["project_assignment_id", "year", "month"],
+        set_=lambda excluded: {"allocated_hours": excluded.allocated_hours},
+    )
+
+
+def bulk_upsert_allocations(
+    db: Session, cells: Sequence[schemas.AllocationBulkCell]
+) -> Dict[Tuple[int, int, int], Tuple[int, Optional[int]]]:
+    """
+    Create or update many allocation cells in a single transaction.
+
+    Uses ``INSERT ... ON CONFLICT(project_assignment_id, year, month) DO UPDATE``
+    so each cell is one statement in an executemany batch. Cells must already be
+    validated (existing assignments, no duplicate keys).
+
+    Returns {(assignment_id, year, month): (allocation_id, previous_hours)}, with
+    ``previous_hours`` set to None for newly created cells.
+    """
+    if not cells:
+        return {}
+
+    existing = get_allocation_cells(db, (cell.project_assignment_id for cell in cells))
+
+    upsert_allocation_rows(
+        db,
+        [
+            {
+                "project_assignment_id": cell.project_assignment_id,
+                "year": cell.year,
+                "month": cell.month,
+                "allocated_hours": cell.allocated_hours,
+            }
+            for cell in cells
+        ],
+    )
+
+    # Core statements bypass the ORM unit of work, so report the deltas for
+    # derived read models explicitly.
+    record_allocation_deltas(
+        db,
+        (
+            AllocationDelta(
+                assignment_id=cell.project_assignment_id,
+                year=cell.year,
+                month=cell.month,
+                delta_hours=cell.allocated_hours
+                - existing.get((cell.project_assignment_id, cell.year, cell.month), (None, 0))[1],
+            )
+            for cell in cells
+        ),
+    )
+
+    written = get_allocation_cells(db, (cell.project_assignment_id for cell in cells))
+    db.commit()
+
+    results: Dict[Tuple[int, int, int], Tuple[int, Optional[int]]] = {}
+    for cell in cells:
+        key = (cell.project_assignment_id, cell.year, cell.month)
+        previous = existing.get(key)
+        results[key] = (written[key][0], previous[1] if previous else None)
+    return results
+
+
 # --- Allocation Specialized Queries ---
 
 
@@ -548,87 +984,150 @@ def get_user_allocation_summary(db: Session, user_id: int) -> List[Dict[str, Any
 def get_role_capacity_summary(db: Session, *, manager_id: Optional[int] = None) -> List[Dict[str, Any]]:
     """Aggregate funded vs allocated hours per role across assignments for a specific manager."""
 
-    assignments_query = db.query(
-        models.ProjectAssignment.id.label("assignment_id"),
+    funded_query = db.query(
         models.ProjectAssignment.role_id.label("role_id"),
-        models.ProjectAssignment.funded_hours.label("funded_hours"),
+        func.sum(models.ProjectAssignment.funded_hours).label("funded_hours"),
     )
-    
+    allocated_query = db.query(
+        models.AllocationRoleMonthRollup.role_id.label("role_id"),
+        func.sum(models.AllocationRoleMonthRollup.total_hours).label("allocated_hours"),
+    )
+
     # Filter by manager_id for data isolation
     if manager_id is not None:
-        assignments_query = assignments_query.join(
+        funded_query = funded_query.join(
             models.Project,
             models.Project.id == models.ProjectAssignment.project_id
         ).filter(models.Project.manager_id == manager_id)
-    
-    assignments_sq = assignments_query.subquery()
-
-    allocations_sq = (
-        db.query(
-            models.Allocation.project_assignment_id.label("assignment_id"),
-            func.sum(models.Allocation.allocated_hours).label("allocated_hours"),
+        allocated_query = allocated_query.filter(
+            models.AllocationRoleMonthRollup.manager_id == manager_id
         )
-        .group_by(models.Allocation.project_assignment_id)
-        .subquery()
-    )
+
+    funded_sq = funded_query.group_by(models.ProjectAssignment.role_id).subquery()
+    allocated_sq = allocated_query.group_by(models.AllocationRoleMonthRollup.role_id).subquery()
 
     rows = (
         db.query(
             models.Role.id.label("role_id"),
             models.Role.name.label("role_name"),
-            func.coalesce(func.sum(assignments_sq.c.funded_hours), 0).label(
-                "funded_hours"
-            ),
-            func.coalesce(
-                func.sum(func.coalesce(allocations_sq.c.allocated_hours, 0)), 0
-            ).label("allocated_hours"),
-        )
-        .join(assignments_sq, assignments_sq.c.role_id == models.Role.id)
-        .outerjoin(
-            allocations_sq,
-            allocations_sq.c.assignment_id == assignments_sq.c.assignment_id,
+            func.coalesce(funded_sq.c.funded_hours, 0).label("funded_hours"),
+            func.coalesce(allocated_sq.c.allocated_hours, 0).label("allocated_hours"),
         )
-        .group_by(models.Role.id, models.Role.name)
+        .join(funded_sq, funded_sq.c.role_id == models.Role.id)
+        .outerjoin(allocated_sq, allocated_sq.c.role_id == models.Role.id)
         .all()
     )
 
     return [dict(row._mapping) for row in rows]
 
 
-def get_monthly_user_allocation_totals(db: Session, *, manager_id: Optional[int] = None) -> List[Dict[str, Any]]:
-    """Return total allocated hours per user/month for a specific manager's projects."""
+def get_monthly_user_allocation_totals(
+    db: Session,
+    *,
+    manager_id: Optional[int] = None,
+    start: Optional[Tuple[int, int]] = None,
+    end: Optional[Tuple[int, int]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Return total allocated hours per user/month for a specific manager's projects.
 
-    query = (
-        db.query(
-            models.ProjectAssignment.user_id.label("user_id"),
-            models.Allocation.year.label("year"),
-            models.Allocation.month.label("month"),
-            func.sum(models.Allocation.allocated_hours).label("total_hours"),
+    ``start`` and ``end`` are inclusive (year, month) bounds applied in SQL. Rows
+    come back ordered by user, year and month so callers can group them in a
+    single pass. Reads the user-month rollup, so months totalling zero hours
+    are omitted.
+    """
+
+    rollup = models.AllocationUserMonthRollup
+    query = db.query(
+        rollup.user_id.label("user_id"),
+        rollup.year.label("year"),
+        rollup.month.label("month"),
+        func.sum(rollup.total_hours).label("total_hours"),
+    )
+
+    # Filter by manager_id for data isolation
+    if manager_id is not None:
+        query = query.filter(rollup.manager_id == manager_id)
+
+    if start is not None:
+        start_year, start_month = start
+        query = query.filter(
+            or_(
+                rollup.year > start_year,
+                and_(rollup.year == start_year, rollup.month >= start_month),
+            )
         )
-        .join(
-            models.Allocation,
-            models.Allocation.project_assignment_id == models.ProjectAssignment.id,
+    if end is not None:
+        end_year, end_month = end
+        query = query.filter(
+            or_(
+                rollup.year < end_year,
+                and_(rollup.year == end_year, rollup.month <= end_month),
+            )
         )
+
+    rows = (
+        query.group_by(rollup.user_id, rollup.year, rollup.month)
+        .order_by(rollup.user_id, rollup.year, rollup.month)
+        .all()
     )
-    
+
+    return [dict(row._mapping) for row in rows]
+
+
+def get_user_funded_totals(db: Session, *, manager_id: Optional[int] = None) -> Dict[int, int]:
+    """Return total funded hours per user across a specific manager's projects."""
+
+    query = db.query(
+        models.ProjectAssignment.user_id,
+        func.sum(models.ProjectAssignment.funded_hours),
+    )
+
     # Filter by manager_id for data isolation
     if manager_id is not None:
         query = query.join(
             models.Project,
             models.Project.id == models.ProjectAssignment.project_id
         ).filter(models.Project.manager_id == manager_id)
-    
-    rows = query.group_by(
-        models.ProjectAssignment.user_id, models.Allocation.year, models.Allocation.month
-    ).all()
 
-    return [dict(row._mapping) for row in rows]
+    rows = query.group_by(models.ProjectAssignment.user_id).all()
+    return {user_id: int(total or 0) for user_id, total in rows}
+
+
+def get_employee_month_totals(
+    db: Session, *, manager_id: Optional[int] = None
+) -> List[Tuple[int, int, int]]:
+    """Return ``(user_id, month_ordinal, total_hours)`` for every employee-month with hours.
+
+    ``month_ordinal`` is ``year * 12 + month - 1``. Only users with the
+    Employee system role are included; ``manager_id`` limits them to that
+    manager's direct reports (hours on any project count).
+    """
+
+    rollup = models.AllocationUserMonthRollup
+    ordinal = (rollup.year * 12 + rollup.month - 1).label("ordinal")
+    query = (
+        db.query(rollup.user_id, ordinal, func.sum(rollup.total_hours))
+        .join(models.User, models.User.id == rollup.user_id)
+        .filter(models.User.system_role == models.SystemRole.EMPLOYEE)
+    )
+    if manager_id is not None:
+        query = query.filter(models.User.manager_id == manager_id)
+    return [tuple(row) for row in query.group_by(rollup.user_id, ordinal).all()]
 
 
 def get_monthly_user_project_allocations(
-    db: Session, *, user_id: Optional[int] = None, manager_id: Optional[int] = None
+    db: Session,
+    *,
+    user_id: Optional[int] = None,
+    manager_id: Optional[int] = None,
+    user_ids: Optional[Iterable[int]] = None,
+    months: Optional[Iterable[Tuple[int, int]]] = None,
 ) -> List[Dict[str, Any]]:
-    """Return allocated hours per user/project/month for detailed breakdowns, filtered by manager."""
+    """Return allocated hours per user/project/month for detailed breakdowns, filtered by manager.
+
+    ``months`` limits the rows to the given ``(year, month)`` pairs.
+    """
 
     query = (
         db.query(
@@ -648,6 +1147,13 @@ def get_monthly_user_project_allocations(
 
     if user_id is not None:
         query = query.filter(models.ProjectAssignment.user_id == user_id)
+    if user_ids is not None:
+        query = query.filter(models.ProjectAssignment.user_id.in_(list(user_ids)))
+    if months is not None:
+        ordinals = {year * 12 + month - 1 for year, month in months}
+        query = query.filter(
+            (models.Allocation.year * 12 + models.Allocation.month - 1).in_(sorted(ordinals))
+        )
     
     # Filter by manager_id for data isolation
     if manager_id is not None:
@@ -693,19 +1199,15 @@ def get_project_monthly_allocations(
 ) -> List[Dict[str, Any]]:
     """Return monthly allocated hours for a given project."""
 
+    rollup = models.AllocationProjectMonthRollup
     rows = (
         db.query(
-            models.Allocation.year.label("year"),
-            models.Allocation.month.label("month"),
-            func.sum(models.Allocation.allocated_hours).label("allocated_hours"),
-        )
-        .join(
-            models.ProjectAssignment,
-            models.ProjectAssignment.id == models.Allocation.project_assignment_id,
+            rollup.year.label("year"),
+            rollup.month.label("month"),
+            rollup.total_hours.label("allocated_hours"),
         )
-        .filter(models.ProjectAssignment.project_id == project_id)
-        .group_by(models.Allocation.year, models.Allocation.month)
-        .order_by(models.Allocation.year, models.Allocation.month)
+        .filter(rollup.project_id == project_id)
+        .order_by(rollup.year, rollup.month)
         .all()
     )
 
@@ -722,39 +1224,248 @@ def get_project_funded_and_allocated_totals(db: Session, project_id: int) -> Dic
     ) or 0
 
     allocated = (
-        db.query(func.coalesce(func.sum(models.Allocation.allocated_hours), 0))
-        .join(
-            models.ProjectAssignment,
-            models.ProjectAssignment.id == models.Allocation.project_assignment_id,
-        )
-        .filter(models.ProjectAssignment.project_id == project_id)
+        db.query(func.coalesce(func.sum(models.AllocationProjectMonthRollup.total_hours), 0))
+        .filter(models.AllocationProjectMonthRollup.project_id == project_id)
         .scalar()
     ) or 0
 
     return {"funded_hours": int(funded), "allocated_hours": int(allocated)}
 
 
-def get_role_utilization_snapshot(
-    db: Session, *, year: int, month: int
-) -> List[Dict[str, Any]]:
-    """Return allocated vs funded snapshots per role for a specific month."""
+def get_project_allocation_series(db: Session, project_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Return a project's dashboard figures in one statement, or None if it does not exist.
 
-    monthly_allocations_sq = (
+    ``{"project": (name, start_date, sprints), "funded_hours", "allocated_hours",
+    "months": [(year, month, hours), ...]}``. The allocated total is a window
+    sum over the monthly rollup rows rather than a second aggregate query.
+    """
+
+    rollup = models.AllocationProjectMonthRollup
+    funded = (
+        select(func.coalesce(func.sum(models.ProjectAssignment.funded_hours), 0))
+        .where(models.ProjectAssignment.project_id == models.Project.id)
+        .scalar_subquery()
+    )
+    rows = (
         db.query(
-            models.ProjectAssignment.role_id.label("role_id"),
-            func.sum(models.Allocation.allocated_hours).label("allocated_hours"),
+            models.Project.name,
+            models.Project.start_date,
+            models.Project.sprints,
+            funded.label("funded_hours"),
+            func.coalesce(func.sum(rollup.total_hours).over(), 0).label("allocated_hours"),
+            rollup.year,
+            rollup.month,
+            rollup.total_hours,
         )
-        .join(
-            models.Allocation,
-            and_(
-                models.Allocation.project_assignment_id
-                == models.ProjectAssignment.id,
-                models.Allocation.year == year,
-                models.Allocation.month == month,
-            ),
-        )
-        .group_by(models.ProjectAssignment.role_id)
-        .subquery()
+        .outerjoin(rollup, rollup.project_id == models.Project.id)
+        .filter(models.Project.id == project_id)
+        .order_by(rollup.year, rollup.month)
+        .all()
+    )
+    if not rows:
+        return None
+    first = rows[0]
+    return {
+        "project": (first.name, first.start_date, first.sprints),
+        "funded_hours": int(first.funded_hours or 0),
+        "allocated_hours": int(first.allocated_hours or 0),
+        "months": [
+            (row.year, row.month, int(row.total_hours or 0))
+            for row in rows
+            if row.year is not None
+        ],
+    }
+
+
+def get_employee_timeline_rows(
+    db: Session,
+    user_id: int,
+    *,
+    start: Optional[Tuple[int, int]] = None,
+    end: Optional[Tuple[int, int]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Return a user's allocated hours per month and project with each month's total.
+
+    One row per (year, month, project) carrying ``month_total_hours``, a window
+    sum over the month's projects, so the timeline needs no separate summary
+    query. ``start``/``end`` are inclusive (year, month) bounds applied in SQL.
+    Rows are ordered by month, then by hours (largest first).
+    """
+
+    year, month = models.Allocation.year, models.Allocation.month
+    hours = func.sum(models.Allocation.allocated_hours)
+    query = (
+        db.query(
+            year.label("year"),
+            month.label("month"),
+            models.Project.id.label("project_id"),
+            models.Project.name.label("project_name"),
+            hours.label("allocated_hours"),
+            func.sum(hours).over(partition_by=(year, month)).label("month_total_hours"),
+        )
+        .join(
+            models.ProjectAssignment,
+            models.ProjectAssignment.id == models.Allocation.project_assignment_id,
+        )
+        .join(models.Project, models.Project.id == models.ProjectAssignment.project_id)
+        .filter(models.ProjectAssignment.user_id == user_id)
+    )
+    ordinal = year * 12 + month - 1
+    if start is not None:
+        query = query.filter(ordinal >= start[0] * 12 + start[1] - 1)
+    if end is not None:
+        query = query.filter(ordinal <= end[0] * 12 + end[1] - 1)
+
+    rows = (
+        query.group_by(year, month, models.Project.id, models.Project.name)
+        .order_by(year, month, hours.desc(), models.Project.id)
+        .all()
+    )
+    return [dict(row._mapping) for row in rows]
+
+
+def get_portfolio_counts(db: Session, *, manager_id: Optional[int] = None) -> Dict[str, int]:
+    """Count a manager's projects and employees in one statement."""
+
+    projects = (
+        select(func.count(models.Project.id))
+        .where(models.Project.manager_id == manager_id)
+        .scalar_subquery()
+    )
+    row = (
+        db.query(
+            projects.label("total_projects"),
+            func.count(models.User.id)
+            .filter(models.User.system_role == models.SystemRole.EMPLOYEE)
+            .label("total_employees"),
+        )
+        .filter(models.User.manager_id == manager_id)
+        .one()
+    )
+    return {"total_projects": int(row.total_projects or 0), "total_employees": int(row.total_employees or 0)}
+
+
+def iter_portfolio_export_rows(
+    db: Session, *, manager_id: Optional[int] = None, batch_size: int = 500
+) -> Iterable[Tuple[Any, ...]]:
+    """
+    Stream one row per project for the portfolio export.
+
+    Yields ``(name, manager_name, status, funded_hours, allocated_hours,
+    start_date, sprints)`` ordered by project ID. Totals are aggregated in SQL
+    (allocated hours from the project-month rollup) and rows are fetched
+    ``batch_size`` at a time from a server-side cursor, so no assignment or
+    allocation objects are loaded.
+    """
+
+    rollup = models.AllocationProjectMonthRollup
+    funded = (
+        select(func.coalesce(func.sum(models.ProjectAssignment.funded_hours), 0))
+        .where(models.ProjectAssignment.project_id == models.Project.id)
+        .scalar_subquery()
+    )
+    allocated = (
+        select(func.coalesce(func.sum(rollup.total_hours), 0))
+        .where(rollup.project_id == models.Project.id)
+        .scalar_subquery()
+    )
+    query = (
+        db.query(
+            models.Project.name,
+            models.User.full_name,
+            models.Project.status,
+            funded,
+            allocated,
+            models.Project.start_date,
+            models.Project.sprints,
+        )
+        .outerjoin(models.User, models.User.id == models.Project.manager_id)
+        .order_by(models.Project.id)
+    )
+    if manager_id is not None:
+        query = query.filter(models.Project.manager_id == manager_id)
+    for row in query.yield_per(batch_size):
+        yield tuple(row)
+
+
+def _fact_assignments(manager_id: Optional[int]):
+    """Select the assignments in a manager's scope (all when ``manager_id`` is None)."""
+
+    assignments = select(models.ProjectAssignment)
+    if manager_id is not None:
+        assignments = assignments.join(
+            models.Project, models.Project.id == models.ProjectAssignment.project_id
+        ).where(models.Project.manager_id == manager_id)
+    return assignments.subquery()
+
+
+def iter_allocation_fact_batches(
+    db: Session, *, manager_id: Optional[int] = None, batch_size: int = 50_000
+) -> Iterable[Sequence[Sequence[int]]]:
+    """
+    Stream the allocation fact table in batches of up to ``batch_size`` rows.
+
+    Each row is ``(user_id, project_id, role_id, lcat_id, year, month,
+    hours)``, all integers, ordered by assignment and month. Labels for the
+    IDs come from `get_allocation_fact_labels`.
+    """
+
+    assignments = _fact_assignments(manager_id)
+    query = (
+        select(
+            assignments.c.user_id,
+            assignments.c.project_id,
+            assignments.c.role_id,
+            assignments.c.lcat_id,
+            models.Allocation.year,
+            models.Allocation.month,
+            models.Allocation.allocated_hours,
+        )
+        .join(assignments, assignments.c.id == models.Allocation.project_assignment_id)
+        .order_by(
+            models.Allocation.project_assignment_id, models.Allocation.year, models.Allocation.month
+        )
+        .execution_options(yield_per=batch_size)
+    )
+    yield from db.execute(query).partitions()
+
+
+def get_allocation_fact_labels(
+    db: Session, *, manager_id: Optional[int] = None
+) -> Dict[str, Dict[int, str]]:
+    """Return ID-to-name maps for the users, projects, roles and LCATs of the fact table."""
+
+    assignments = _fact_assignments(manager_id)
+    dimensions = {
+        "user": (models.User.id, models.User.full_name, assignments.c.user_id),
+        "project": (models.Project.id, models.Project.name, assignments.c.project_id),
+        "role": (models.Role.id, models.Role.name, assignments.c.role_id),
+        "lcat": (models.LCAT.id, models.LCAT.name, assignments.c.lcat_id),
+    }
+    return {
+        dimension: dict(db.execute(select(key, name).where(key.in_(select(column).distinct()))).all())
+        for dimension, (key, name, column) in dimensions.items()
+    }
+
+
+def get_role_utilization_snapshot(
+    db: Session, *, year: int, month: int
+) -> List[Dict[str, Any]]:
+    """Return allocated vs funded snapshots per role for a specific month."""
+
+    monthly_allocations_sq = (
+        db.query(
+            models.AllocationRoleMonthRollup.role_id.label("role_id"),
+            func.sum(models.AllocationRoleMonthRollup.total_hours).label("allocated_hours"),
+        )
+        .filter(
+            models.AllocationRoleMonthRollup.year == year,
+            models.AllocationRoleMonthRollup.month == month,
+        )
+        .group_by(models.AllocationRoleMonthRollup.role_id)
+        .subquery()
     )
 
     assignment_totals_sq = (
@@ -803,6 +1514,538 @@ def get_role_utilization_snapshot(
     return [dict(row._mapping) for row in rows]
 
 
+# --------------------------------------------------------------------------------
+# Allocation Rollup Maintenance
+# --------------------------------------------------------------------------------
+# The rollup tables are kept current by `_maintain_allocation_rollups`, which
+# runs inside every committing transaction: the rows covering changed
+# allocation cells are re-aggregated from `allocations`, and changes that move
+# hours between rows (re-keyed or deleted assignments, project manager changes,
+# bulk imports) re-aggregate the rows of the users, projects and roles they
+# touch. Renames and role/LCAT edits leave the rollups alone. Bulk writes that
+# do not say what they touched queue a full rebuild for the job runner's
+# maintenance tick (`rebuild_requested_allocation_rollups`).
+
+_ROLLUP_TABLES = (
+    models.AllocationUserMonthRollup,
+    models.AllocationProjectMonthRollup,
+    models.AllocationRoleMonthRollup,
+)
+
+
+# On PostgreSQL, rollup maintenance from concurrent transactions is ordered
+# with transaction-scoped advisory locks. Rebuilds hold their managers' keys,
+# (namespace, manager_id), exclusively. Cell refreshes hold them shared and
+# then lock just the rollup rows they rewrite, so writers for the same manager
+# only wait for each other when they touch the same rollup row.
+_ROLLUP_LOCK_NAMESPACE = 0x5A11
+_ROLLUP_LOCK_ALL_MANAGERS = -1
+
+
+def _rollup_manager():
+    return func.coalesce(models.Project.manager_id, models.ROLLUP_UNMANAGED)
+
+
+def _lock_rollup_managers(
+    db: Session, manager_ids: Optional[Iterable[int]], *, exclusive: bool
+) -> None:
+    """
+    Take the rollup advisory locks for ``manager_ids`` (None: every manager).
+
+    Keys are always acquired in the same order (the all-managers key first,
+    then managers ascending) so lock waits cannot deadlock. No-op on SQLite,
+    where the database write lock already serialises transactions.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return
+
+    def lock(key: int, exclusive: bool) -> None:
+        acquire = func.pg_advisory_xact_lock if exclusive else func.pg_advisory_xact_lock_shared
+        db.execute(select(acquire(_ROLLUP_LOCK_NAMESPACE, key)))
+
+    if manager_ids is None:
+        lock(_ROLLUP_LOCK_ALL_MANAGERS, True)
+        return
+    lock(_ROLLUP_LOCK_ALL_MANAGERS, False)
+    for manager_id in sorted(set(manager_ids)):
+        lock(manager_id, exclusive)
+
+
+def _rollup_row_lock_key(table, key: Tuple[int, ...]) -> int:
+    digest = hashlib.blake2b(repr((table.__tablename__, key)).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def _lock_rollup_rows(db: Session, keys_by_table: Dict[Any, Sequence[Tuple[int, ...]]]) -> None:
+    """
+    Take exclusive advisory locks on the rollup rows about to be rewritten.
+
+    The 64-bit keys do not overlap the (namespace, manager_id) keys and are
+    acquired in ascending order in one statement. A transaction that waited
+    sees the holder's commit in its next statement, so it re-aggregates over
+    it. No-op on SQLite.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    lock_keys = sorted(
+        {_rollup_row_lock_key(table, key) for table, keys in keys_by_table.items() for key in keys}
+    )
+    db.execute(
+        text(
+            "SELECT count(pg_advisory_xact_lock(key)) FROM "
+            "(SELECT unnest(CAST(:keys AS bigint[])) AS key ORDER BY key) AS ordered"
+        ),
+        {"keys": lock_keys},
+    )
+
+
+def _rollup_grouping(table) -> Tuple[List[str], List[Any]]:
+    """Return the key column names of a rollup table and the expressions they aggregate."""
+
+    manager = _rollup_manager()
+    year, month = models.Allocation.year, models.Allocation.month
+    assignment = models.ProjectAssignment
+    if table is models.AllocationUserMonthRollup:
+        return ["manager_id", "user_id", "year", "month"], [manager, assignment.user_id, year, month]
+    if table is models.AllocationProjectMonthRollup:
+        return ["project_id", "year", "month", "manager_id"], [assignment.project_id, year, month, manager]
+    return ["manager_id", "role_id", "year", "month"], [manager, assignment.role_id, year, month]
+
+
+def _write_rollup_rows(db: Session, table, criterion=None) -> int:
+    """Insert ``table``'s rows aggregated from `allocations`, optionally filtered."""
+
+    names, columns = _rollup_grouping(table)
+    hours = func.sum(models.Allocation.allocated_hours)
+    query = (
+        db.query(*columns, hours)
+        .join(
+            models.ProjectAssignment,
+            models.ProjectAssignment.id == models.Allocation.project_assignment_id,
+        )
+        .join(models.Project, models.Project.id == models.ProjectAssignment.project_id)
+    )
+    if criterion is not None:
+        query = query.filter(criterion(columns))
+    source = query.group_by(*columns).having(hours != 0).statement
+    result = db.execute(insert(table).from_select([*names, "total_hours"], source))
+    return max(result.rowcount or 0, 0)
+
+
+def rebuild_allocation_rollups(
+    db: Session,
+    *,
+    manager_ids: Optional[Iterable[int]] = None,
+    user_ids: Optional[Iterable[int]] = None,
+    project_ids: Optional[Iterable[int]] = None,
+    role_ids: Optional[Iterable[int]] = None,
+) -> Dict[str, int]:
+    """
+    Re-aggregate the rollup rows of the given project managers from `allocations`.
+
+    ``manager_ids=None`` rebuilds every row; use `models.ROLLUP_UNMANAGED` for
+    projects without a manager. ``user_ids``, ``project_ids`` and ``role_ids``
+    further limit the user, project and role tables to those IDs. Does not
+    commit. Returns the number of rows written per rollup table.
+    """
+    managers = None if manager_ids is None else sorted(set(manager_ids))
+    entity_ids = {
+        models.AllocationUserMonthRollup: ("user_id", user_ids),
+        models.AllocationProjectMonthRollup: ("project_id", project_ids),
+        models.AllocationRoleMonthRollup: ("role_id", role_ids),
+    }
+    entity_ids = {
+        table: (name, None if ids is None else sorted(set(ids)))
+        for table, (name, ids) in entity_ids.items()
+    }
+
+    _lock_rollup_managers(db, managers, exclusive=True)
+    written = {}
+    for table in _ROLLUP_TABLES:
+        name, ids = entity_ids[table]
+        if managers == [] or ids == []:
+            written[table.__tablename__] = 0
+            continue
+        statement = delete(table)
+        if managers is not None:
+            statement = statement.where(table.manager_id.in_(managers))
+        if ids is not None:
+            statement = statement.where(getattr(table, name).in_(ids))
+        db.execute(statement)
+
+        def criterion(columns, table=table, name=name, ids=ids):
+            names, _ = _rollup_grouping(table)
+            conditions = []
+            if managers is not None:
+                conditions.append(_rollup_manager().in_(managers))
+            if ids is not None:
+                conditions.append(columns[names.index(name)].in_(ids))
+            return and_(*conditions)
+
+        scoped = managers is not None or ids is not None
+        written[table.__tablename__] = _write_rollup_rows(db, table, criterion if scoped else None)
+    return written
+
+
+def refresh_allocation_rollup_cells(
+    db: Session, cells: Iterable[Tuple[int, int, int]]
+) -> bool:
+    """
+    Re-aggregate the rollup rows covering ``(assignment_id, year, month)`` cells.
+
+    The rows are recomputed from `allocations` as the transaction now sees
+    them rather than adjusted by the session's own deltas: those are taken
+    from values read earlier, which a concurrent commit may have changed in
+    the meantime. Does not commit. Returns False, writing nothing, when a
+    cell's assignment no longer exists; the caller must then rebuild instead.
+    """
+    cells = set(cells)
+    if not cells:
+        return True
+
+    assignment_ids = {assignment_id for assignment_id, _, _ in cells}
+    owners = {
+        row[0]: {"project_id": row[1], "user_id": row[2], "role_id": row[3], "manager_id": row[4]}
+        for row in db.query(
+            models.ProjectAssignment.id,
+            models.ProjectAssignment.project_id,
+            models.ProjectAssignment.user_id,
+            models.ProjectAssignment.role_id,
+            _rollup_manager(),
+        )
+        .join(models.Project, models.Project.id == models.ProjectAssignment.project_id)
+        .filter(models.ProjectAssignment.id.in_(assignment_ids))
+        .all()
+    }
+    if len(owners) != len(assignment_ids):
+        return False
+
+    keys_by_table = {}
+    for table in _ROLLUP_TABLES:
+        names, _ = _rollup_grouping(table)
+        keys_by_table[table] = sorted(
+            {
+                tuple(
+                    {**owners[assignment_id], "year": year, "month": month}[name]
+                    for name in names
+                )
+                for assignment_id, year, month in cells
+            }
+        )
+    # Shared, so only a rebuild of the same manager waits; concurrent
+    # refreshes are ordered by the row locks instead.
+    _lock_rollup_managers(
+        db, {owner["manager_id"] for owner in owners.values()}, exclusive=False
+    )
+    _lock_rollup_rows(db, keys_by_table)
+
+    for table, keys in keys_by_table.items():
+        names, _ = _rollup_grouping(table)
+        db.execute(
+            delete(table).where(tuple_(*(getattr(table, name) for name in names)).in_(keys))
+        )
+
+        def criterion(columns, keys=keys):
+            # The per-column filters let the database use its indexes; the
+            # tuple filter then keeps exactly the requested rows.
+            return and_(
+                *(
+                    expression.in_({key[index] for key in keys})
+                    for index, expression in enumerate(columns)
+                ),
+                tuple_(*columns).in_(keys),
+            )
+
+        _write_rollup_rows(db, table, criterion)
+    return True
+
+
+def get_allocation_cell_hours(
+    db: Session, cells: Iterable[Tuple[int, int, int]]
+) -> Dict[Tuple[int, int, int], int]:
+    """
+    Allocated hours of ``(assignment_id, year, month)`` cells as the
+    transaction sees them; cells without an allocation are 0.
+    """
+    hours = dict.fromkeys(set(cells), 0)
+    if not hours:
+        return hours
+    columns = (models.Allocation.project_assignment_id, models.Allocation.year, models.Allocation.month)
+    rows = (
+        db.query(*columns, models.Allocation.allocated_hours)
+        .filter(
+            columns[0].in_({assignment_id for assignment_id, _, _ in hours}),
+            tuple_(*columns).in_(sorted(hours)),
+        )
+        .all()
+    )
+    for assignment_id, year, month, allocated_hours in rows:
+        hours[(assignment_id, year, month)] = int(allocated_hours or 0)
+    return hours
+
+
+def get_rollup_managers_for_changes(db: Session, changes: ChangeSet) -> Optional[Set[int]]:
+    """
+    Return the project managers whose rollup rows a structural change may affect.
+
+    Includes each touched project's current manager and any manager that
+    still has rollup rows for the touched projects or users (covering
+    reassigned and deleted projects). None means the change set does not say
+    what it touched, so every manager is affected.
+    """
+    if not changes.touches_entities():
+        return None
+
+    pairs = get_assignment_pairs(
+        db,
+        assignment_ids=changes.assignment_ids,
+        project_ids=changes.project_ids,
+        user_ids=changes.user_ids,
+    )
+    project_ids = set(changes.project_ids) | {project_id for project_id, _ in pairs}
+    user_ids = set(changes.user_ids) | {user_id for _, user_id in pairs}
+
+    managers: Set[int] = set()
+    if project_ids:
+        managers.update(
+            manager_id
+            for (manager_id,) in db.query(_rollup_manager())
+            .filter(models.Project.id.in_(project_ids))
+            .distinct()
+        )
+        managers.update(
+            manager_id
+            for (manager_id,) in db.query(models.AllocationProjectMonthRollup.manager_id)
+            .filter(models.AllocationProjectMonthRollup.project_id.in_(project_ids))
+            .distinct()
+        )
+    if user_ids:
+        managers.update(
+            manager_id
+            for (manager_id,) in db.query(models.AllocationUserMonthRollup.manager_id)
+            .filter(models.AllocationUserMonthRollup.user_id.in_(user_ids))
+            .distinct()
+        )
+    return managers
+
+
+def rebuild_allocation_rollups_for_changes(db: Session, changes: ChangeSet) -> None:
+    """
+    Re-aggregate the rollup rows a change set may have moved hours between.
+
+    Limited to the touched users, projects and roles, under their current and
+    previous managers. Deleted users and projects take their assignments with
+    them unlisted, so their managers' rows are rebuilt in full. Change sets
+    that do not say what they touched queue a full rebuild for the
+    maintenance tick instead. Does not commit.
+    """
+    if not changes.touches_entities():
+        request_allocation_rollup_rebuild(db)
+        return
+
+    manager_ids = get_rollup_managers_for_changes(db, changes)
+    if changes.entities_deleted:
+        rebuild_allocation_rollups(db, manager_ids=manager_ids)
+        return
+
+    assignment = models.ProjectAssignment
+    conditions = []
+    if changes.assignment_ids:
+        conditions.append(assignment.id.in_(changes.assignment_ids))
+    if changes.project_ids:
+        conditions.append(assignment.project_id.in_(changes.project_ids))
+    rows = (
+        db.query(assignment.project_id, assignment.user_id, assignment.role_id)
+        .filter(or_(*conditions))
+        .all()
+        if conditions
+        else []
+    )
+    rebuild_allocation_rollups(
+        db,
+        manager_ids=manager_ids,
+        user_ids=set(changes.user_ids) | {user_id for _, user_id, _ in rows},
+        project_ids=set(changes.project_ids) | {project_id for project_id, _, _ in rows},
+        role_ids=set(changes.role_ids) | {role_id for _, _, role_id in rows},
+    )
+
+
+def request_allocation_rollup_rebuild(db: Session) -> None:
+    """Queue a full rollup rebuild in ``db``'s transaction, for the maintenance tick."""
+
+    db.execute(insert(models.AllocationRollupRebuildRequest).values(requested_at=func.now()))
+
+
+def rebuild_requested_allocation_rollups(db: Session) -> bool:
+    """
+    Rebuild every rollup row if a rebuild was requested, and commit.
+
+    Runs on the job runner's maintenance tick. Only the requests visible
+    before the rebuild are consumed: one committed meanwhile may describe
+    data the rebuild did not see. Returns whether a rebuild ran.
+    """
+    request = models.AllocationRollupRebuildRequest
+    request_ids = [request_id for (request_id,) in db.query(request.id)]
+    if not request_ids:
+        return False
+    rebuild_allocation_rollups(db)
+    db.execute(delete(request).where(request.id.in_(request_ids)))
+    db.commit()
+    return True
+
+
+@register_pre_commit_hook
+def _maintain_allocation_rollups(session: Session, changes: ChangeSet) -> None:
+    """Keep the allocation rollup tables in step with the committing transaction."""
+
+    if changes.rollup_keys_changed or not refresh_allocation_rollup_cells(
+        session, (delta.cell for delta in changes.allocation_deltas)
+    ):
+        rebuild_allocation_rollups_for_changes(session, changes)
+
+
+# --------------------------------------------------------------------------------
+# Report Data Versions
+# --------------------------------------------------------------------------------
+# `_bump_report_data_versions` runs inside every committing transaction and
+# increments the counter of each report scope the transaction wrote to. Cached
+# report responses carry the versions they were built from (see
+# `app.services.report_cache`). The all-managers scope has no counter of its
+# own, which every write would have to update: its version is the sum of the
+# manager counters, and writes to projects and users without a manager bump
+# the `models.ROLLUP_UNMANAGED` manager scope.
+
+ReportScope = Tuple[str, int]
+
+_ALL_SCOPE: ReportScope = (models.REPORT_SCOPE_ALL, 0)
+
+
+def _all_managers_version(db: Session) -> int:
+    return int(
+        db.query(func.coalesce(func.sum(models.ReportDataVersion.version), 0))
+        .filter(models.ReportDataVersion.scope == models.REPORT_SCOPE_MANAGER)
+        .scalar()
+    )
+
+
+def get_report_data_versions(db: Session, scopes: Iterable[ReportScope]) -> Dict[ReportScope, int]:
+    """Return {(scope, scope_id): version} for the scopes; unwritten scopes are 0."""
+
+    wanted = set(scopes)
+    versions = {scope: 0 for scope in wanted}
+    stored = wanted - {_ALL_SCOPE}
+    if stored:
+        rows = db.query(
+            models.ReportDataVersion.scope,
+            models.ReportDataVersion.scope_id,
+            models.ReportDataVersion.version,
+        ).filter(
+            tuple_(models.ReportDataVersion.scope, models.ReportDataVersion.scope_id).in_(list(stored))
+        )
+        for scope, scope_id, version in rows:
+            versions[(scope, scope_id)] = version
+    if _ALL_SCOPE in wanted:
+        versions[_ALL_SCOPE] = _all_managers_version(db)
+    return versions
+
+
+def report_version_step(scope: ReportScope, committed: Dict[ReportScope, int]) -> int:
+    """
+    How far one commit advanced ``scope``, given the versions it bumped.
+
+    Stored counters move by one; the all-managers version moves by the
+    number of manager scopes the commit bumped.
+    """
+    if scope == _ALL_SCOPE:
+        return sum(1 for name, _ in committed if name == models.REPORT_SCOPE_MANAGER)
+    return 1
+
+
+def bump_report_data_versions(
+    db: Session, scopes: Iterable[ReportScope]
+) -> Dict[ReportScope, int]:
+    """Increment the version of each scope, creating counters as needed.
+
+    Returns the new versions, including the derived all-managers version when
+    a manager scope was bumped. Scopes are written in sorted order so
+    concurrent transactions lock the counter rows in the same order.
+    """
+
+    rows = [
+        {"scope": scope, "scope_id": scope_id, "version": 1}
+        for scope, scope_id in sorted(set(scopes) - {_ALL_SCOPE})
+    ]
+    if not rows:
+        return {}
+    table = models.ReportDataVersion.__table__
+    stmt = _upsert_insert(db, table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.scope, table.c.scope_id],
+        set_={"version": table.c.version + 1},
+    ).returning(table.c.scope, table.c.scope_id, table.c.version)
+    versions = {(scope, scope_id): version for scope, scope_id, version in db.execute(stmt, rows)}
+    if any(scope == models.REPORT_SCOPE_MANAGER for scope, _ in versions):
+        versions[_ALL_SCOPE] = _all_managers_version(db)
+    return versions
+
+
+def get_report_scopes_for_changes(db: Session, changes: ChangeSet) -> Set[ReportScope]:
+    """
+    Return the report scopes a committing change set writes to.
+
+    Covers the touched projects, the users assigned to them, and the current
+    and previous managers of both (`models.ROLLUP_UNMANAGED` for those
+    without one). Changes that do not say what they touched (roles, LCATs,
+    Core bulk writes, deleted users or projects whose assignments the
+    database removes) bump the epoch, which every report depends on.
+    """
+    scopes: Set[ReportScope] = set()
+    if changes.entities_deleted or (changes.structural and not changes.touches_entities()):
+        scopes.add((models.REPORT_SCOPE_EPOCH, 0))
+
+    pairs = get_assignment_pairs(
+        db,
+        assignment_ids=changes.assignment_ids,
+        project_ids=changes.project_ids,
+        user_ids=changes.user_ids,
+    )
+    project_ids = set(changes.project_ids) | {project_id for project_id, _ in pairs}
+    user_ids = set(changes.user_ids) | {user_id for _, user_id in pairs}
+
+    manager_ids = set(changes.manager_ids)
+    if project_ids:
+        manager_ids.update(
+            manager_id
+            for (manager_id,) in db.query(models.Project.manager_id)
+            .filter(models.Project.id.in_(project_ids))
+            .distinct()
+        )
+    if user_ids:
+        manager_ids.update(
+            manager_id
+            for (manager_id,) in db.query(models.User.manager_id)
+            .filter(models.User.id.in_(user_ids))
+            .distinct()
+        )
+    if None in manager_ids:
+        manager_ids.discard(None)
+        manager_ids.add(models.ROLLUP_UNMANAGED)
+
+    scopes.update((models.REPORT_SCOPE_PROJECT, project_id) for project_id in project_ids)
+    scopes.update((models.REPORT_SCOPE_USER, user_id) for user_id in user_ids)
+    scopes.update((models.REPORT_SCOPE_MANAGER, manager_id) for manager_id in manager_ids)
+    return scopes
+
+
+@register_pre_commit_hook
+def _bump_report_data_versions(session: Session, changes: ChangeSet) -> None:
+    """Invalidate the cached reports that read what the committing transaction wrote."""
+
+    changes.report_versions = bump_report_data_versions(
+        session, get_report_scopes_for_changes(session, changes)
+    )
+
+
 # --------------------------------------------------------------------------------
 # MonthlyHourOverride CRUD
 # --------------------------------------------------------------------------------
@@ -903,17 +2146,33 @@ def get_ai_recommendation(
     )
 
 
+# Newest first. `generated_at` is always the database's insert time, so ID
+# order is generation order, and unlike timestamps IDs are unique.
+AI_RECOMMENDATION_KEYSET = Keyset(models.AIRecommendation.id, descending=True)
+
+
 def get_ai_recommendations(
-    db: Session, skip: int = 0, limit: int = 100
-) -> List[models.AIRecommendation]:
-    """Retrieves a list of AI recommendations with pagination."""
-    return (
-        db.query(models.AIRecommendation)
-        .order_by(models.AIRecommendation.generated_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+    db: Session,
+    limit: int = 100,
+    *,
+    after: Optional[str] = None,
+    skip: int = 0,
+    status: Optional[models.RecommendationStatus] = None,
+    recommendation_type: Optional[models.RecommendationType] = None,
+    generated_from: Optional[datetime.datetime] = None,
+    generated_to: Optional[datetime.datetime] = None,
+) -> Page[models.AIRecommendation]:
+    """Retrieves a page of AI recommendations, newest first, filtered by status, type and time."""
+    query = db.query(models.AIRecommendation)
+    if status is not None:
+        query = query.filter(models.AIRecommendation.status == status)
+    if recommendation_type is not None:
+        query = query.filter(models.AIRecommendation.recommendation_type == recommendation_type)
+    if generated_from is not None:
+        query = query.filter(models.AIRecommendation.generated_at >= generated_from)
+    if generated_to is not None:
+        query = query.filter(models.AIRecommendation.generated_at <= generated_to)
+    return AI_RECOMMENDATION_KEYSET.page(query, after=after, skip=skip, limit=limit)
 
 
 def update_ai_recommendation(
@@ -957,8 +2216,11 @@ def create_or_update_rag_cache(
         .first()
     )
     if db_item:
-        # Update existing
+        # Update existing; a changed text invalidates its index postings.
+        if db_item.document_text != cache_item.document_text:
+            db_item.token_count = None
         db_item.document_text = cache_item.document_text
+        db_item.owner_manager_id = cache_item.owner_manager_id
         db_item.last_indexed_at = func.now()
     else:
         # Create new
@@ -969,6 +2231,112 @@ def create_or_update_rag_cache(
     return db_item
 
 
+def upsert_rag_documents(
+    db: Session, documents: Sequence[schemas.AIRagCacheCreate]
+) -> None:
+    """
+    Create or update many RAG cache documents in one flush without committing.
+    Documents whose text changed are marked for re-indexing.
+    """
+    if not documents:
+        return
+    keys_by_entity: Dict[str, List[int]] = {}
+    for document in documents:
+        keys_by_entity.setdefault(document.source_entity, []).append(document.source_id)
+
+    existing: Dict[Tuple[str, int], models.AIRagCache] = {}
+    for entity, source_ids in keys_by_entity.items():
+        rows = (
+            db.query(models.AIRagCache)
+            .filter(
+                models.AIRagCache.source_entity == entity,
+                models.AIRagCache.source_id.in_(source_ids),
+            )
+            .all()
+        )
+        existing.update({(row.source_entity, row.source_id): row for row in rows})
+
+    for document in documents:
+        db_item = existing.get((document.source_entity, document.source_id))
+        if db_item is None:
+            db_item = models.AIRagCache(**document.model_dump())
+            db.add(db_item)
+            existing[(document.source_entity, document.source_id)] = db_item
+        else:
+            db_item.owner_manager_id = document.owner_manager_id
+            if db_item.document_text != document.document_text:
+                db_item.document_text = document.document_text
+                db_item.token_count = None
+                db_item.last_indexed_at = func.now()
+    db.flush()
+
+
+def delete_rag_documents_for_sources(
+    db: Session, source_entity: str, source_ids: Iterable[int]
+) -> int:
+    """Delete the RAG documents (and their postings) for the given sources without committing."""
+    source_ids = list(source_ids)
+    if not source_ids:
+        return 0
+    rows = (
+        db.query(models.AIRagCache)
+        .filter(
+            models.AIRagCache.source_entity == source_entity,
+            models.AIRagCache.source_id.in_(source_ids),
+        )
+        .all()
+    )
+    for row in rows:
+        db.delete(row)
+    return len(rows)
+
+
+def mark_rag_sources_dirty(db: Session, sources: Iterable[Tuple[str, int]]) -> None:
+    """Queue RAG documents for rebuilding without committing."""
+    rows = [{"source_entity": entity, "source_id": source_id} for entity, source_id in set(sources)]
+    if not rows:
+        return
+    table = models.AIRagDirtySource.__table__
+    statement = _upsert_insert(db, table)
+    statement = statement.on_conflict_do_update(
+        index_elements=["source_entity", "source_id"],
+        set_={"generation": table.c.generation + 1, "marked_at": func.now()},
+    )
+    db.execute(statement, rows)
+
+
+def get_dirty_rag_sources(db: Session, limit: int = 500) -> List[Tuple[str, int, int]]:
+    """Return up to ``limit`` queued ``(source_entity, source_id, generation)`` rows."""
+    rows = (
+        db.query(
+            models.AIRagDirtySource.source_entity,
+            models.AIRagDirtySource.source_id,
+            models.AIRagDirtySource.generation,
+        )
+        .order_by(models.AIRagDirtySource.marked_at, models.AIRagDirtySource.source_id)
+        .limit(limit)
+        .all()
+    )
+    return [tuple(row) for row in rows]
+
+
+def clear_dirty_rag_sources(db: Session, sources: Iterable[Tuple[str, int, int]]) -> None:
+    """Remove consumed dirty marks unless they were re-marked since being read."""
+    rows = [
+        {"entity": entity, "source": source_id, "seen": generation}
+        for entity, source_id, generation in sources
+    ]
+    if not rows:
+        return
+    table = models.AIRagDirtySource.__table__
+    statement = table.delete().where(
+        table.c.source_entity == bindparam("entity"),
+        table.c.source_id == bindparam("source"),
+        table.c.generation == bindparam("seen"),
+    )
+    db.execute(statement, rows)
+
+
 def get_rag_cache(db: Session, cache_id: int) -> Optional[models.AIRagCache]:
     """Retrieves a single RAG cache item by its ID."""
     return db.query(models.AIRagCache).filter(models.AIRagCache.id == cache_id).first()
@@ -989,6 +2357,84 @@ def delete_rag_cache(db: Session, cache_id: int) -> bool:
     return False
 
 
+# --------------------------------------------------------------------------------
+# AIResponseCache CRUD
+# --------------------------------------------------------------------------------
+
+
+def get_cached_ai_response(
+    db: Session, cache_key: str, *, not_before: datetime.datetime
+) -> Optional[str]:
+    """Return a cached completion created at or after ``not_before``. Read-only."""
+    row = (
+        db.query(models.AIResponseCache.response_text, models.AIResponseCache.created_at)
+        .filter(models.AIResponseCache.cache_key == cache_key)
+        .first()
+    )
+    if row is None or row.created_at < not_before:
+        return None
+    return row.response_text
+
+
+def touch_cached_ai_responses(db: Session, used: Dict[str, datetime.datetime]) -> None:
+    """Record when cached completions were last read, {cache_key: used_at}, without committing."""
+    if not used:
+        return
+    table = models.AIResponseCache.__table__
+    db.execute(
+        table.update()
+        .where(table.c.cache_key == bindparam("key"))
+        .values(last_used_at=bindparam("used_at")),
+        [{"key": key, "used_at": used_at} for key, used_at in used.items()],
+    )
+
+
+def store_cached_ai_response(
+    db: Session, cache_key: str, *, model: str, response_text: str, max_entries: int
+) -> None:
+    """Insert or refresh a cached completion, then evict least recently used entries."""
+    table = models.AIResponseCache.__table__
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    statement = _upsert_insert(db, table).values(
+        cache_key=cache_key,
+        model=model,
+        response_text=response_text,
+        created_at=now,
+        last_used_at=now,
+    )
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[table.c.cache_key],
+            set_={
+                "model": statement.excluded.model,
+                "response_text": statement.excluded.response_text,
+                "created_at": statement.excluded.created_at,
+                "last_used_at": statement.excluded.last_used_at,
+            },
+        )
+    )
+    keep = (
+        db.query(models.AIResponseCache.cache_key)
+        .order_by(models.AIResponseCache.last_used_at.desc())
+        .limit(max(max_entries, 0))
+    )
+    db.query(models.AIResponseCache).filter(
+        models.AIResponseCache.cache_key.notin_(keep.scalar_subquery())
+    ).delete(synchronize_session=False)
+    db.commit()
+
+
+def delete_expired_ai_responses(db: Session, *, created_before: datetime.datetime) -> int:
+    """Delete cached completions created before ``created_before``."""
+    deleted = (
+        db.query(models.AIResponseCache)
+        .filter(models.AIResponseCache.created_at < created_before)
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return deleted
+
+
 # --------------------------------------------------------------------------------
 # AuditLog CRUD (Create and Get only)
 # --------------------------------------------------------------------------------
@@ -1003,28 +2449,94 @@ def create_audit_log(db: Session, log_entry: schemas.AuditLogCreate) -> models.A
     return db_log
 
 
+# Most recent first. Timestamps are the database's insert time, so ID order
+# is time order, and unlike timestamps IDs are unique.
+AUDIT_LOG_KEYSET = Keyset(models.AuditLog.id, descending=True)
+
+
+def _filter_audit_logs(
+    query,
+    *,
+    since: Optional[datetime.datetime],
+    until: Optional[datetime.datetime],
+):
+    if since is not None:
+        query = query.filter(models.AuditLog.timestamp >= since)
+    if until is not None:
+        query = query.filter(models.AuditLog.timestamp <= until)
+    return query
+
+
 def get_audit_logs(
-    db: Session, skip: int = 0, limit: int = 100
-) -> List[models.AuditLog]:
-    """Retrieves a list of audit logs with pagination, most recent first."""
-    return (
-        db.query(models.AuditLog)
-        .order_by(models.AuditLog.timestamp.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+    db: Session,
+    limit: int = 100,
+    *,
+    after: Optional[str] = None,
+    skip: int = 0,
+    user_id: Optional[int] = None,
+    action: Optional[str] = None,
+    entity_type: Optional[str] = None,
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+) -> Page[models.AuditLog]:
+    """Retrieves a page of audit logs, most recent first, filtered by user, action, entity type and time."""
+    query = db.query(models.AuditLog)
+    if user_id is not None:
+        query = query.filter(models.AuditLog.user_id == user_id)
+    if action is not None:
+        query = query.filter(models.AuditLog.action == action)
+    if entity_type is not None:
+        query = query.filter(models.AuditLog.entity_type == entity_type)
+    query = _filter_audit_logs(query, since=since, until=until)
+    return AUDIT_LOG_KEYSET.page(query, after=after, skip=skip, limit=limit)
 
 
 def get_audit_logs_for_entity(
-    db: Session, entity_type: str, entity_id: int, skip: int = 0, limit: int = 100
-) -> List[models.AuditLog]:
-    """Retrieves audit logs for a specific entity."""
+    db: Session,
+    entity_type: str,
+    entity_id: int,
+    limit: int = 100,
+    *,
+    after: Optional[str] = None,
+    skip: int = 0,
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+) -> Page[models.AuditLog]:
+    """Retrieves a page of audit logs for a specific entity, most recent first."""
+    query = db.query(models.AuditLog).filter_by(entity_type=entity_type, entity_id=entity_id)
+    query = _filter_audit_logs(query, since=since, until=until)
+    return AUDIT_LOG_KEYSET.page(query, after=after, skip=skip, limit=limit)
+
+# --------------------------------------------------------------------------------
+# BackgroundJob CRUD (read only; jobs are written by app.services.jobs)
+# --------------------------------------------------------------------------------
+
+
+def get_background_job(db: Session, job_id: int) -> Optional[models.BackgroundJob]:
+    """Retrieves a single background job by ID."""
+    return db.get(models.BackgroundJob, job_id)
+
+
+def get_background_jobs(
+    db: Session,
+    *,
+    manager_id: Optional[int] = None,
+    status: Optional[models.JobStatus] = None,
+    kind: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+) -> List[models.BackgroundJob]:
+    """Retrieves background jobs, most recent first."""
+    query = db.query(models.BackgroundJob)
+    if manager_id is not None:
+        query = query.filter(models.BackgroundJob.manager_id == manager_id)
+    if status is not None:
+        query = query.filter(models.BackgroundJob.status == status)
+    if kind is not None:
+        query = query.filter(models.BackgroundJob.kind == kind)
     return (
-        db.query(models.AuditLog)
-        .filter_by(entity_type=entity_type, entity_id=entity_id)
-        .order_by(models.AuditLog.timestamp.desc())
+        query.order_by(models.BackgroundJob.id.desc())
         .offset(skip)
         .limit(limit)
         .all()
-    )
\ No newline at end of file
+    )
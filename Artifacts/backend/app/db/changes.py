@@ -0,0 +1,368 @@
+"""
+Session-level change tracking for allocation data.
+
+Derived read models (the in-memory allocation cube, caches, summaries) need to
+know what a transaction changed without every write path reporting it by hand.
+This module hooks SQLAlchemy session events to build a `ChangeSet` per
+transaction and hands it to registered subscribers once the transaction
+commits. Rolled-back work is discarded. Subscribers that persist derived state
+can instead run just before commit, inside the same transaction.
+
+Key components:
+- `AllocationDelta`: a signed hour change for one assignment/month cell.
+- `ChangeSet`: everything a transaction touched.
+- `register_commit_hook`: subscribe to committed change sets.
+- `register_pre_commit_hook`: subscribe inside the committing transaction.
+- `record_allocation_deltas` / `mark_structural_change` /
+  `mark_entities_changed`: used by bulk write paths that bypass the ORM unit
+  of work (Core `INSERT`/`UPDATE` statements).
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app import models
+
+logger = logging.getLogger(__name__)
+
+_SESSION_INFO_KEY = "staffalloc_changes"
+
+
+@dataclass(frozen=True)
+class AllocationDelta:
+    """A signed change in allocated hours for one assignment/month cell."""
+
+    assignment_id: int
+    year: int
+    month: int
+    delta_hours: int
+
+    @property
+    def cell(self) -> Tuple[int, int, int]:
+        return self.assignment_id, self.year, self.month
+
+
+@dataclass
+class ChangeSet:
+    """Accumulated changes for a single transaction."""
+
+    allocation_deltas: List[AllocationDelta] = field(default_factory=list)
+    # True when assignments, projects, roles, LCATs or users were added, removed or
+    # re-keyed, i.e. when an incremental cell update is not enough.
+    structural: bool = False
+    # True when hours may have moved between allocation rollup rows: an
+    # assignment changed project, user or role, a project changed manager, a
+    # project, user or assignment was deleted, or a bulk write did not say
+    # what it changed. Renames and role/LCAT edits leave it unset.
+    rollup_keys_changed: bool = False
+    assignment_ids: Set[int] = field(default_factory=set)
+    project_ids: Set[int] = field(default_factory=set)
+    user_ids: Set[int] = field(default_factory=set)
+    # Roles (old and new) of the assignments that were written.
+    role_ids: Set[int] = field(default_factory=set)
+    # Managers (old and new) of the projects and users that were written.
+    manager_ids: Set[int] = field(default_factory=set)
+    # True when users or projects were deleted. The database removes their
+    # assignments and allocations, so those rows are not itemised above.
+    entities_deleted: bool = False
+    # New report data versions, {(scope, scope_id): version}, set by the
+    # pre-commit hook that bumps them (see `crud.bump_report_data_versions`).
+    report_versions: Dict[Tuple[str, int], int] = field(default_factory=dict)
+    # Hours each touched allocation cell holds as of the commit, keyed by
+    # (assignment_id, year, month). Filled inside the transaction for
+    # subscribers that need absolute values: a delta is relative to what the
+    # session read, which another commit may have changed since.
+    allocation_hours: Dict[Tuple[int, int, int], int] = field(default_factory=dict)
+
+    def is_empty(self) -> bool:
+        return not self.allocation_deltas and not self.structural
+
+    def touches_entities(self) -> bool:
+        return bool(self.assignment_ids or self.project_ids or self.user_ids or self.manager_ids)
+
+
+CommitHook = Callable[[Engine, ChangeSet], None]
+PreCommitHook = Callable[[Session, ChangeSet], None]
+
+_COMMIT_HOOKS: List[CommitHook] = []
+_PRE_COMMIT_HOOKS: List[PreCommitHook] = []
+
+
+def register_commit_hook(hook: CommitHook) -> CommitHook:
+    """Register a callable invoked with ``(engine, changes)`` after each commit."""
+
+    if hook not in _COMMIT_HOOKS:
+        _COMMIT_HOOKS.append(hook)
+    return hook
+
+
+def register_pre_commit_hook(hook: PreCommitHook) -> PreCommitHook:
+    """Register a callable invoked with ``(session, changes)`` before each commit.
+
+    The session is flushed first, so ``changes`` is complete, and anything the
+    hook writes commits (or rolls back) together with the tracked changes.
+    """
+
+    if hook not in _PRE_COMMIT_HOOKS:
+        _PRE_COMMIT_HOOKS.append(hook)
+    return hook
+
+
+def _pending(session: Session) -> ChangeSet:
+    changes = session.info.get(_SESSION_INFO_KEY)
+    if changes is None:
+        changes = ChangeSet()
+        session.info[_SESSION_INFO_KEY] = changes
+    return changes
+
+
+def record_allocation_deltas(session: Session, deltas: Iterable[AllocationDelta]) -> None:
+    """Queue allocation deltas written outside the ORM unit of work."""
+
+    changes = _pending(session)
+    for delta in deltas:
+        if delta.delta_hours:
+            changes.allocation_deltas.append(delta)
+            changes.assignment_ids.add(delta.assignment_id)
+
+
+def mark_structural_change(session: Session) -> None:
+    """Flag the current transaction as changing assignments/projects/users."""
+
+    changes = _pending(session)
+    changes.structural = True
+    changes.rollup_keys_changed = True
+
+
+def mark_entities_changed(
+    session: Session,
+    *,
+    assignment_ids: Iterable[int] = (),
+    project_ids: Iterable[int] = (),
+    user_ids: Iterable[int] = (),
+    role_ids: Iterable[int] = (),
+) -> None:
+    """Record entities written outside the ORM unit of work."""
+
+    changes = _pending(session)
+    changes.assignment_ids.update(assignment_ids)
+    changes.project_ids.update(project_ids)
+    changes.user_ids.update(user_ids)
+    changes.role_ids.update(role_ids)
+
+
+def _scalar_history(state, key: str):
+    history = state.attrs[key].history
+    old = history.deleted[0] if history.deleted else None
+    new = history.added[0] if history.added else None
+    return history.has_changes(), old, new
+
+
+def _track_allocation(changes: ChangeSet, allocation: models.Allocation, *, sign: int) -> None:
+    if allocation.project_assignment_id is None:
+        changes.structural = True
+        changes.rollup_keys_changed = True
+        return
+    changes.allocation_deltas.append(
+        AllocationDelta(
+            assignment_id=allocation.project_assignment_id,
+            year=allocation.year,
+            month=allocation.month,
+            delta_hours=sign * int(allocation.allocated_hours or 0),
+        )
+    )
+    changes.assignment_ids.add(allocation.project_assignment_id)
+
+
+def _track_dirty_allocation(changes: ChangeSet, allocation: models.Allocation) -> None:
+    state = inspect(allocation)
+    for key in ("project_assignment_id", "year", "month"):
+        changed, old, _ = _scalar_history(state, key)
+        if changed:
+            # The cell moved; cheaper to let consumers rebuild than to guess.
+            changes.structural = True
+            changes.rollup_keys_changed = True
+            changes.assignment_ids.add(allocation.project_assignment_id)
+            if key == "project_assignment_id" and old is not None:
+                changes.assignment_ids.add(old)
+            return
+
+    changed, old, new = _scalar_history(state, "allocated_hours")
+    if not changed:
+        return
+    changes.assignment_ids.add(allocation.project_assignment_id)
+    if old is None:
+        # The previous value was never loaded, so the delta is unknown.
+        changes.structural = True
+        changes.rollup_keys_changed = True
+        return
+    delta = int(new or 0) - int(old)
+    if delta:
+        changes.allocation_deltas.append(
+            AllocationDelta(
+                assignment_id=allocation.project_assignment_id,
+                year=allocation.year,
+                month=allocation.month,
+                delta_hours=delta,
+            )
+        )
+        changes.assignment_ids.add(allocation.project_assignment_id)
+
+
+_STRUCTURAL_MODELS = (
+    models.ProjectAssignment,
+    models.Project,
+    models.User,
+    models.Role,
+    models.LCAT,
+)
+
+
+# Columns whose edits move allocation hours between rollup rows.
+_ROLLUP_KEY_COLUMNS = (
+    (models.ProjectAssignment, ("project_id", "user_id", "role_id")),
+    (models.Project, ("manager_id",)),
+)
+
+
+def _history_values(obj, key: str) -> Set:
+    history = inspect(obj).attrs[key].history
+    return {value for value in (*history.deleted, *history.unchanged, *history.added) if value is not None}
+
+
+def _track_managers(changes: ChangeSet, obj) -> None:
+    """Record the current and previous manager of a project or user."""
+
+    if "manager_id" in inspect(obj).attrs:
+        changes.manager_ids.update(_history_values(obj, "manager_id"))
+
+
+def _track_rollup_keys(changes: ChangeSet, obj, *, deleted: bool) -> None:
+    """Flag edits and deletes that move hours between allocation rollup rows."""
+
+    if isinstance(obj, models.ProjectAssignment):
+        changes.role_ids.update(_history_values(obj, "role_id"))
+    if deleted:
+        # The database removes a deleted user's or project's assignments.
+        if isinstance(obj, (models.ProjectAssignment, models.Project, models.User)):
+            changes.rollup_keys_changed = True
+        return
+    state = inspect(obj)
+    for model, keys in _ROLLUP_KEY_COLUMNS:
+        if isinstance(obj, model) and any(state.attrs[key].history.has_changes() for key in keys):
+            changes.rollup_keys_changed = True
+
+
+def _track_structural(changes: ChangeSet, obj) -> None:
+    changes.structural = True
+    if isinstance(obj, (models.Project, models.User)):
+        _track_managers(changes, obj)
+    if isinstance(obj, models.ProjectAssignment):
+        if obj.id is not None:
+            changes.assignment_ids.add(obj.id)
+        if obj.project_id is not None:
+            changes.project_ids.add(obj.project_id)
+        if obj.user_id is not None:
+            changes.user_ids.add(obj.user_id)
+    elif isinstance(obj, models.Project) and obj.id is not None:
+        changes.project_ids.add(obj.id)
+    elif isinstance(obj, models.User) and obj.id is not None:
+        changes.user_ids.add(obj.id)
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_changes(session: Session, flush_context, instances) -> None:
+    changes = _pending(session)
+
+    for obj in session.new:
+        if isinstance(obj, models.Allocation):
+            _track_allocation(changes, obj, sign=1)
+        elif isinstance(obj, models.ProjectAssignment):
+            # New users, projects and roles carry no allocation data until an
+            # assignment references them.
+            _track_structural(changes, obj)
+        elif isinstance(obj, (models.Project, models.User)):
+            _track_managers(changes, obj)
+        elif isinstance(obj, models.MonthlyHourOverride):
+            changes.project_ids.add(obj.project_id)
+
+    for obj in session.deleted:
+        if isinstance(obj, models.Allocation):
+            _track_allocation(changes, obj, sign=-1)
+        elif isinstance(obj, _STRUCTURAL_MODELS):
+            _track_structural(changes, obj)
+            _track_rollup_keys(changes, obj, deleted=True)
+            if isinstance(obj, (models.Project, models.User)):
+                changes.entities_deleted = True
+        elif isinstance(obj, models.MonthlyHourOverride):
+            changes.project_ids.add(obj.project_id)
+
+    for obj in session.dirty:
+        if not session.is_modified(obj, include_collections=False):
+            continue
+        if isinstance(obj, models.Allocation):
+            _track_dirty_allocation(changes, obj)
+        elif isinstance(obj, _STRUCTURAL_MODELS):
+            _track_structural(changes, obj)
+            _track_rollup_keys(changes, obj, deleted=False)
+        elif isinstance(obj, models.MonthlyHourOverride):
+            changes.project_ids.add(obj.project_id)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_new_keys(session: Session, flush_context) -> None:
+    # Primary keys of new rows only exist once the flush has run; the session
+    # still lists them as new at this point.
+    changes = _pending(session)
+    for obj in session.new:
+        if isinstance(obj, models.ProjectAssignment):
+            changes.assignment_ids.add(obj.id)
+            changes.project_ids.add(obj.project_id)
+            changes.user_ids.add(obj.user_id)
+        elif isinstance(obj, models.Project):
+            changes.project_ids.add(obj.id)
+        elif isinstance(obj, models.User):
+            changes.user_ids.add(obj.id)
+
+
+@event.listens_for(Session, "before_commit")
+def _prepare_changes(session: Session) -> None:
+    if not _PRE_COMMIT_HOOKS:
+        return
+    if _SESSION_INFO_KEY not in session.info and not (
+        session.new or session.dirty or session.deleted
+    ):
+        return
+
+    session.flush()
+    changes = session.info.get(_SESSION_INFO_KEY)
+    if changes is None or (changes.is_empty() and not changes.touches_entities()):
+        return
+    for hook in list(_PRE_COMMIT_HOOKS):
+        hook(session, changes)
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_changes(session: Session) -> None:
+    changes = session.info.pop(_SESSION_INFO_KEY, None)
+    if changes is None or (changes.is_empty() and not changes.report_versions):
+        return
+
+    bind = session.get_bind()
+    engine = bind.engine if hasattr(bind, "engine") else bind
+    for hook in list(_COMMIT_HOOKS):
+        try:
+            hook(engine, changes)
+        except Exception:  # pragma: no cover - subscribers must not break commits
+            logger.exception("Change subscriber %r failed", hook)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session: Session) -> None:
+    session.info.pop(_SESSION_INFO_KEY, None)
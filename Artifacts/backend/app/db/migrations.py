@@ -0,0 +1,54 @@
+"""
+Alembic schema migrations.
+
+SQLite databases keep being created with `Base.metadata.create_all` plus the
+in-place column migrations in `app.db.session`; PostgreSQL (and any other
+server database) is created and upgraded by the Alembic revisions under
+``alembic/``. Alembic is only imported when a migration actually runs.
+
+Key components:
+- `ALEMBIC_INI`: Path to the backend's alembic.ini.
+- `alembic_config`: An Alembic `Config` bound to an engine's connection.
+- `upgrade_database`: Upgrades a database to the latest revision.
+"""
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+
+def alembic_config(connection: Optional[Connection] = None):
+    """Return the Alembic config, running against ``connection`` when given."""
+
+    try:
+        from alembic.config import Config
+    except ImportError as exc:  # pragma: no cover - depends on the environment
+        raise RuntimeError(
+            "Alembic is required to manage non-SQLite databases; install it with "
+            "'pip install alembic'."
+        ) from exc
+
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "alembic"))
+    # The application configures logging itself.
+    config.attributes["configure_logger"] = False
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def upgrade_database(engine: Engine, revision: str = "head") -> None:
+    """Apply all migrations up to ``revision`` to ``engine``'s database."""
+
+    from alembic import command
+
+    with engine.begin() as connection:
+        logger.info("Upgrading %s database schema to %s", engine.dialect.name, revision)
+        command.upgrade(alembic_config(connection), revision)
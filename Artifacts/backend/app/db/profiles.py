@@ -0,0 +1,122 @@
+"""
+Database connection profiles.
+
+A profile bundles the connection pool sizes and SQLite pragmas the engines in
+`app.db.session` are built with, so deployments can trade durability and
+memory for concurrency without code changes. ``settings.DATABASE_PROFILE``
+selects one; the ``DB_*``/``SQLITE_*`` settings override single values.
+
+- ``standard``: one engine and pool for reads and writes. Concurrent writers
+  contend for SQLite's write lock and spin in its busy handler.
+- ``concurrent``: writes go through one dedicated connection, so writers wait
+  their turn in the pool's FIFO queue instead of busy-waiting. Read-only
+  sessions (``get_read_db``) use a separate pool of read-only connections,
+  which WAL mode lets run alongside the writer. Also ``synchronous=NORMAL`` (safe with WAL; a power loss can
+  drop the last commits but not corrupt the file), a larger page cache,
+  memory-mapped I/O and in-memory temp tables.
+
+Key components:
+- `DatabaseProfile`: pool and pragma settings for the engines.
+- `register_database_profile`: adds a named profile.
+- `get_database_profile`: the configured profile with settings overrides.
+- `sqlite_pragmas`: PRAGMA statements run on each new SQLite connection.
+"""
+from __future__ import annotations
+
+import dataclasses
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class DatabaseProfile:
+    """Pool sizes and SQLite pragmas for the application's engines."""
+
+    name: str
+    # Connections shared by reads (and by writes unless `single_writer`).
+    pool_size: int = 5
+    max_overflow: int = 10
+    # Seconds a request waits for a pooled connection before failing.
+    pool_timeout: float = 30.0
+    # Route writes through one dedicated connection and reads through a
+    # separate pool of read-only connections (file-backed SQLite only).
+    single_writer: bool = False
+    busy_timeout_ms: int = 5000
+    # None keeps SQLite's default for the pragma.
+    synchronous: Optional[str] = None
+    cache_size_kib: Optional[int] = None
+    mmap_size_bytes: Optional[int] = None
+    temp_store: Optional[str] = None
+
+
+_PROFILES: Dict[str, DatabaseProfile] = {}
+
+
+def register_database_profile(profile: DatabaseProfile) -> DatabaseProfile:
+    _PROFILES[profile.name] = profile
+    return profile
+
+
+register_database_profile(DatabaseProfile(name="standard"))
+register_database_profile(
+    DatabaseProfile(
+        name="concurrent",
+        pool_size=8,
+        max_overflow=8,
+        single_writer=True,
+        synchronous="NORMAL",
+        cache_size_kib=64 * 1024,
+        mmap_size_bytes=256 * 1024 * 1024,
+        temp_store="MEMORY",
+    )
+)
+
+# Settings that override a single field of the selected profile when set.
+_OVERRIDES = {
+    "pool_size": "DB_POOL_SIZE",
+    "max_overflow": "DB_MAX_OVERFLOW",
+    "pool_timeout": "DB_POOL_TIMEOUT_SECONDS",
+    "cache_size_kib": "SQLITE_CACHE_SIZE_KIB",
+    "mmap_size_bytes": "SQLITE_MMAP_SIZE_BYTES",
+}
+
+
+def get_database_profile(name: Optional[str] = None) -> DatabaseProfile:
+    """Return the named (default: configured) profile with settings overrides applied."""
+
+    name = name or settings.DATABASE_PROFILE
+    try:
+        profile = _PROFILES[name]
+    except KeyError:
+        known = ", ".join(sorted(_PROFILES))
+        raise ValueError(f"Unknown database profile '{name}' (known: {known})") from None
+    overrides = {
+        field: getattr(settings, setting)
+        for field, setting in _OVERRIDES.items()
+        if getattr(settings, setting, None) is not None
+    }
+    return dataclasses.replace(profile, **overrides) if overrides else profile
+
+
+def sqlite_pragmas(profile: DatabaseProfile, *, read_only: bool = False) -> List[str]:
+    """Return the PRAGMA statements for a new connection under ``profile``."""
+
+    pragmas = [
+        "PRAGMA journal_mode=WAL",
+        f"PRAGMA busy_timeout = {int(profile.busy_timeout_ms)}",
+        "PRAGMA foreign_keys=ON",
+    ]
+    if profile.synchronous:
+        pragmas.append(f"PRAGMA synchronous={profile.synchronous}")
+    if profile.cache_size_kib:
+        # Negative values are a size in KiB rather than a page count.
+        pragmas.append(f"PRAGMA cache_size=-{int(profile.cache_size_kib)}")
+    if profile.mmap_size_bytes:
+        pragmas.append(f"PRAGMA mmap_size={int(profile.mmap_size_bytes)}")
+    if profile.temp_store:
+        pragmas.append(f"PRAGMA temp_store={profile.temp_store}")
+    if read_only:
+        pragmas.append("PRAGMA query_only=ON")
+    return pragmas
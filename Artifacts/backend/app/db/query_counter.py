@@ -0,0 +1,89 @@
+"""
+Per-request SQL statement counting.
+
+Lazy relationship loads issue one query per row they are triggered from, so an
+endpoint that looks like "fetch a project" can run dozens of statements once
+its response is serialized. This module counts the statements each unit of
+work sends to the database so those regressions are visible and testable.
+
+A `before_cursor_execute` listener on every engine increments the counter of
+the current context, if any. The counter lives in a context variable, which
+threadpool workers and tasks inherit from the request that started them, so
+statements run while serializing the response are counted too.
+
+Key components:
+- `QueryCount`: the statement count of one unit of work.
+- `count_queries`: context manager that counts the statements run inside it.
+- `QueryCountMiddleware`: counts each HTTP request and, when
+  `settings.QUERY_COUNT_HEADERS` is on, reports it in `X-Query-Count`.
+"""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+QUERY_COUNT_HEADER = "X-Query-Count"
+
+
+class QueryCount:
+    """Number of SQL statements executed while the counter was active."""
+
+    __slots__ = ("count",)
+
+    def __init__(self) -> None:
+        self.count = 0
+
+
+_current: ContextVar[Optional[QueryCount]] = ContextVar("staffalloc_query_count", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany) -> None:
+    counter = _current.get()
+    if counter is not None:
+        counter.count += 1
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryCount]:
+    """Count the statements executed in this context until the block exits."""
+    counter = QueryCount()
+    token = _current.set(counter)
+    try:
+        yield counter
+    finally:
+        _current.reset(token)
+
+
+class QueryCountMiddleware:
+    """
+    ASGI middleware that counts the statements of each HTTP request.
+
+    The header is added when the response starts, so statements a streaming
+    body runs afterwards are not included.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.QUERY_COUNT_HEADERS:
+            await self.app(scope, receive, send)
+            return
+
+        with count_queries() as counter:
+
+            async def send_with_count(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    MutableHeaders(scope=message).append(QUERY_COUNT_HEADER, str(counter.count))
+                await send(message)
+
+            await self.app(scope, receive, send_with_count)
@@ -1,68 +1,149 @@
 """
 Database session management for the StaffAlloc application.
 
-This module sets up the SQLAlchemy synchronous engine and session factory for the
-SQLite database. It includes configuration for enabling Write-Ahead Logging (WAL)
-mode to improve concurrency, which is crucial for a responsive local-first
-application.
+This module sets up the SQLAlchemy synchronous engines and session factories
+for the SQLite database. Connections run in Write-Ahead Logging (WAL) mode to
+improve concurrency, which is crucial for a responsive local-first
+application. Pool sizes and pragmas come from the configured database profile
+(see `app.db.profiles`); the ``concurrent`` profile adds a separate pool of
+read-only connections next to a single writer connection. A PostgreSQL
+``DATABASE_URL`` is also supported; its schema is managed by the Alembic
+migrations (see `app.db.migrations`).
 
 Key components:
-- `engine`: The core SQLAlchemy synchronous engine connected to the database.
-- `SessionLocal`: A factory for creating new database sessions.
+- `engine`: The SQLAlchemy engine that all writes go through.
+- `read_engine`: The read-only engine, or None when the profile does not split reads.
+- `RoutingSession`: Sends a read-only session's queries to `read_engine`.
+- `SessionLocal`: A factory for creating new database sessions; always on `engine`.
+- `ReadSessionLocal`: A factory for read-only sessions on `read_engine` (if any).
 - `get_db`: A FastAPI dependency to provide a database session to API endpoints,
   ensuring the session is properly closed after the request is handled.
+- `get_read_db`: Like `get_db`, for endpoints that only read (reports).
 - `create_db_and_tables`: A utility function to initialize the database schema,
-  useful for initial setup or testing.
+  useful for initial setup or testing. Runs the Alembic migrations for
+  non-SQLite databases.
 """
 import os
-from typing import Generator
+from typing import Generator, Optional, Tuple
 
 from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql.dml import UpdateBase
 
 from app.core.config import settings
+from app.db.profiles import DatabaseProfile, get_database_profile, sqlite_pragmas
 from app.models import Base  # Import Base from models
 
 # The DATABASE_URL is taken from the central settings configuration.
 # Using synchronous sqlite driver for simplicity in the prototype.
 DATABASE_URL = settings.DATABASE_URL
 
-# Create the SQLAlchemy synchronous engine.
-# `echo=False` for production; set to True for debugging SQL queries.
-engine = create_engine(
-    DATABASE_URL,
-    echo=False,
-    connect_args={"check_same_thread": False}  # Needed for SQLite
-)
-
-
-# This event listener ensures that WAL (Write-Ahead Logging) mode is enabled
-# every time a new connection is made to the SQLite database. WAL mode allows
-# for concurrent reads and writes, which is essential for a responsive API
-# and UI, especially when background jobs might be writing to the DB while
-# the user is reading data.
-@event.listens_for(engine, "connect")
-def set_sqlite_pragma(dbapi_connection, connection_record):
+
+def _is_memory_sqlite(url: str) -> bool:
+    return url.startswith("sqlite") and (":memory:" in url or url.rstrip("/") == "sqlite:")
+
+
+def _install_sqlite_pragmas(engine: Engine, profile: DatabaseProfile, *, read_only: bool = False) -> None:
+    # WAL mode allows for concurrent reads and writes, which is essential for
+    # a responsive API and UI, especially when background jobs might be
+    # writing to the DB while the user is reading data.
+    pragmas = sqlite_pragmas(profile, read_only=read_only)
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def create_database_engines(
+    url: str, profile: DatabaseProfile, *, echo: bool = False
+) -> Tuple[Engine, Optional[Engine]]:
     """
-    Enables WAL mode for SQLite connections to improve concurrency.
+    Create the write engine and, if the profile splits reads, the read-only engine.
+
+    With ``profile.single_writer`` the write engine holds one connection: a
+    writer waits in the pool's queue (up to ``profile.pool_timeout``) rather
+    than in SQLite's busy handler. Reads are only split for file-backed
+    SQLite, where WAL lets other connections read while one writes.
     """
-    cursor = dbapi_connection.cursor()
-    try:
-        cursor.execute("PRAGMA journal_mode=WAL")
-        cursor.execute("PRAGMA busy_timeout = 5000")  # 5 seconds
-        cursor.execute("PRAGMA foreign_keys=ON")
-    finally:
-        cursor.close()
+    is_sqlite = url.startswith("sqlite")
+    connect_args = {"check_same_thread": False} if is_sqlite else {}  # Needed for SQLite
+    pooled = not _is_memory_sqlite(url)
+
+    def build(pool_size: int, max_overflow: int, *, read_only: bool = False) -> Engine:
+        pool_args = (
+            {"pool_size": pool_size, "max_overflow": max_overflow, "pool_timeout": profile.pool_timeout}
+            if pooled
+            else {}
+        )
+        if not is_sqlite:
+            # Server connections can be dropped while idle in the pool.
+            pool_args["pool_pre_ping"] = True
+        new_engine = create_engine(url, echo=echo, connect_args=connect_args, **pool_args)
+        if is_sqlite:
+            _install_sqlite_pragmas(new_engine, profile, read_only=read_only)
+        return new_engine
+
+    if not (profile.single_writer and is_sqlite and pooled):
+        return build(profile.pool_size, profile.max_overflow), None
+    write_engine = build(1, 0)
+    return write_engine, build(profile.pool_size, profile.max_overflow, read_only=True)
+
+
+_READ_ENGINE_KEY = "read_engine"
+
+
+class RoutingSession(Session):
+    """
+    Session that runs its queries on the read-only engine, if it was given one.
+
+    Only read-only sessions get a read engine. A session that may write keeps
+    its whole transaction on the write engine, so rows it reads and then
+    updates come from the same snapshot it writes to. ``get_bind()`` without
+    a mapper or statement always names the write engine, which identifies
+    the database for caches and change hooks.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        read_engine = self.info.get(_READ_ENGINE_KEY)
+        if read_engine is None or (mapper is None and clause is None):
+            return super().get_bind(mapper=mapper, clause=clause, **kw)
+        return read_engine
+
+
+def make_sessionmaker(write_engine: Engine, read_engine: Optional[Engine] = None) -> sessionmaker:
+    """
+    Return a session factory on ``write_engine``.
+
+    With ``read_engine`` the sessions are read-only and query that engine
+    instead; it refuses writes.
+    """
+
+    info = {_READ_ENGINE_KEY: read_engine} if read_engine is not None else {}
+    # `autocommit=False` and `autoflush=False` are standard settings for using
+    # SQLAlchemy sessions with FastAPI.
+    return sessionmaker(
+        bind=write_engine,
+        class_=RoutingSession,
+        autocommit=False,
+        autoflush=False,
+        info=info,
+    )
 
 
+DATABASE_PROFILE = get_database_profile()
+
+# `echo=False` for production; set to True for debugging SQL queries.
+engine, read_engine = create_database_engines(DATABASE_URL, DATABASE_PROFILE)
+
 # Create a configured "Session" class.
-# `autocommit=False` and `autoflush=False` are standard settings for using
-# SQLAlchemy sessions with FastAPI.
-SessionLocal = sessionmaker(
-    bind=engine,
-    autocommit=False,
-    autoflush=False,
-)
+SessionLocal = make_sessionmaker(engine)
+ReadSessionLocal = make_sessionmaker(engine, read_engine)
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -83,24 +164,62 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+def get_read_db() -> Generator[Session, None, None]:
+    """
+    FastAPI dependency that provides a session for read-only endpoints.
+
+    Under a profile with a read-only pool, every query runs on a read-only
+    connection and never waits for the writer; otherwise this is the same
+    session `get_db` provides. Endpoints that may write must use `get_db`.
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
 def create_db_and_tables():
     """
-    Utility function to create all database tables defined by the SQLAlchemy models.
+    Utility function to create or upgrade the database schema.
 
     This function should be called once at application startup or via a CLI
-    command. For production environments with existing data, Alembic migrations
-    are the recommended approach for schema management.
+    command. SQLite databases are created from the models and patched in
+    place by `_run_sqlite_migrations`; other databases (PostgreSQL) are
+    upgraded to the latest Alembic revision.
     """
+    url = make_url(DATABASE_URL)
+    if url.get_backend_name() != "sqlite":
+        from app.db.migrations import upgrade_database
+
+        upgrade_database(engine)
+        _backfill_allocation_rollups()
+        return
+
     # Ensure the directory for the database file exists
-    db_path = DATABASE_URL.replace("sqlite:///", "")
-    db_dir = os.path.dirname(db_path)
-    if db_dir:
+    db_dir = os.path.dirname(url.database or "")
+    if db_dir and not _is_memory_sqlite(DATABASE_URL):
         os.makedirs(db_dir, exist_ok=True)
 
     # This will create all tables that inherit from the Base declarative class.
     Base.metadata.create_all(bind=engine)
 
     _run_sqlite_migrations()
+    _backfill_allocation_rollups()
+
+
+def _backfill_allocation_rollups() -> None:
+    """Populate the allocation rollup tables for databases created before they existed."""
+
+    from app import crud, models
+
+    with SessionLocal() as db:
+        if db.query(models.AllocationUserMonthRollup.user_id).first() is not None:
+            return
+        if db.query(models.Allocation.id).first() is None:
+            return
+        crud.rebuild_allocation_rollups(db)
+        db.commit()
 
 
 def _run_sqlite_migrations() -> None:
@@ -123,9 +242,51 @@ def _run_sqlite_migrations() -> None:
         if not column_exists(conn, "lcats", "owner_id"):
             conn.execute(text("ALTER TABLE lcats ADD COLUMN owner_id INTEGER"))
 
+        if not column_exists(conn, "ai_rag_cache", "token_count"):
+            conn.execute(text("ALTER TABLE ai_rag_cache ADD COLUMN token_count INTEGER"))
+
+        if not column_exists(conn, "ai_rag_cache", "owner_manager_id"):
+            conn.execute(text("ALTER TABLE ai_rag_cache ADD COLUMN owner_manager_id INTEGER"))
+            # Existing documents have no owner yet; queue them for rebuilding.
+            conn.execute(
+                text(
+                    "INSERT OR IGNORE INTO ai_rag_dirty_sources (source_entity, source_id, generation, marked_at) "
+                    "SELECT source_entity, source_id, 1, CURRENT_TIMESTAMP FROM ai_rag_cache"
+                )
+            )
+        for column, column_type in (
+            ("owner_host", "VARCHAR"),
+            ("owner_pid", "INTEGER"),
+            ("heartbeat_at", "DATETIME"),
+        ):
+            if not column_exists(conn, "background_jobs", column):
+                conn.execute(text(f"ALTER TABLE background_jobs ADD COLUMN {column} {column_type}"))
+
+        conn.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS idx_ai_rag_cache_owner ON ai_rag_cache (owner_manager_id)"
+            )
+        )
+
         conn.execute(
             text(
                 "CREATE INDEX IF NOT EXISTS idx_allocations_assignment ON allocations (project_assignment_id)"
             )
         )
 
+        # Keyset pagination indexes; they replace the entity and user indexes
+        # of the audit log.
+        for statement in (
+            "CREATE INDEX IF NOT EXISTS idx_users_full_name ON users (full_name, id)",
+            "CREATE INDEX IF NOT EXISTS idx_users_manager_full_name ON users (manager_id, full_name, id)",
+            "CREATE INDEX IF NOT EXISTS idx_projects_name ON projects (name, id)",
+            "CREATE INDEX IF NOT EXISTS idx_projects_manager_name ON projects (manager_id, name, id)",
+            "CREATE INDEX IF NOT EXISTS idx_projects_status_name ON projects (status, name, id)",
+            "CREATE INDEX IF NOT EXISTS idx_ai_recommendations_status ON ai_recommendations (status, id)",
+            "CREATE INDEX IF NOT EXISTS idx_ai_recommendations_generated_at ON ai_recommendations (generated_at)",
+            "CREATE INDEX IF NOT EXISTS idx_audit_log_entity_id ON audit_log (entity_type, entity_id, id)",
+            "CREATE INDEX IF NOT EXISTS idx_audit_log_user ON audit_log (user_id, id)",
+            "DROP INDEX IF EXISTS idx_audit_log_entity",
+            "DROP INDEX IF EXISTS ix_audit_log_user_id",
+        ):
+            conn.execute(text(statement))
@@ -18,10 +18,17 @@ from sqlalchemy.orm import Session
 from sqlalchemy.sql import text
 
 # Import routers from the api package
-from app.api import admin, ai, allocations, auth, employees, projects, reports
+from app.api import admin, ai, allocations, auth, employees, jobs, projects, reports
 from app.core.config import settings
 from app.core.exceptions import AppException
-from app.db.session import create_db_and_tables, get_db
+from app.db.query_counter import QueryCountMiddleware
+from app.db.session import SessionLocal, create_db_and_tables, get_db
+from app.services.jobs import (
+    purge_expired_job_files,
+    recover_interrupted_jobs,
+    shutdown_job_runner,
+    start_job_maintenance,
+)
 
 # --- Logging Configuration (as per Architecture Document) ---
 
@@ -63,6 +70,9 @@ def create_app() -> FastAPI:
     )
 
     # --- Middleware Configuration ---
+    # Per-request SQL statement counts (X-Query-Count when QUERY_COUNT_HEADERS is on)
+    app.add_middleware(QueryCountMiddleware)
+
     # Configure CORS to allow requests from the frontend
     cors_origins = [str(origin) for origin in settings.BACKEND_CORS_ORIGINS]
     app.add_middleware(
@@ -95,6 +105,12 @@ def create_app() -> FastAPI:
         Path(settings.VECTOR_STORE_PATH).mkdir(parents=True, exist_ok=True)
         Path(settings.REPORTS_PATH).mkdir(parents=True, exist_ok=True)
         create_db_and_tables()
+        with SessionLocal() as db:
+            interrupted = recover_interrupted_jobs(db)
+            purge_expired_job_files(db)
+        if interrupted:
+            logger.warning("Marked interrupted background jobs as failed", count=interrupted)
+        start_job_maintenance(SessionLocal)
         logger.info(
             "Data directories ensured",
             db=str(Path(settings.SQLITE_DB_PATH).parent),
@@ -107,6 +123,7 @@ def create_app() -> FastAPI:
     async def shutdown_event():
         """Application shutdown logic."""
         logger.info("Shutting down StaffAlloc API...")
+        shutdown_job_runner(wait=False)
 
     # --- Exception Handlers ---
     @app.exception_handler(AppException)
@@ -149,6 +166,7 @@ def create_app() -> FastAPI:
     app.include_router(admin.router, prefix=api_v1_prefix, tags=["Admin (Roles/LCATs)"])
     app.include_router(reports.router, prefix=api_v1_prefix, tags=["Reports"])
     app.include_router(ai.router, prefix=api_v1_prefix, tags=["AI"])
+    app.include_router(jobs.router, prefix=api_v1_prefix, tags=["Background Jobs"])
 
     return app
 
@@ -7,10 +7,12 @@ from sqlalchemy import (
     CheckConstraint,
     Date,
     DateTime,
+    Float,
     ForeignKey,
     Index,
     Integer,
     JSON,
+    LargeBinary,
     String,
     UniqueConstraint,
     func,
@@ -56,6 +58,13 @@ class RecommendationStatus(str, enum.Enum):
     DISMISSED = "Dismissed"
 
 
+class JobStatus(str, enum.Enum):
+    QUEUED = "Queued"
+    RUNNING = "Running"
+    SUCCEEDED = "Succeeded"
+    FAILED = "Failed"
+
+
 # --------------------------------------------------------------------------------
 # CORE ENTITIES
 # --------------------------------------------------------------------------------
@@ -100,6 +109,7 @@ class User(Base):
     assignments: Mapped[List["ProjectAssignment"]] = relationship(
         "ProjectAssignment",
         back_populates="user",
+        order_by="ProjectAssignment.id",
         cascade="all, delete-orphan",
         passive_deletes=True,
     )
@@ -128,6 +138,12 @@ class User(Base):
         foreign_keys="LCAT.owner_id",
     )
 
+    # Keyset pagination order (see crud.USER_KEYSET), overall and per manager.
+    __table_args__ = (
+        Index("idx_users_full_name", "full_name", "id"),
+        Index("idx_users_manager_full_name", "manager_id", "full_name", "id"),
+    )
+
     def __repr__(self) -> str:
         return f"<User(id={self.id}, email='{self.email}', role='{self.system_role.value}')>"
 
@@ -241,12 +257,14 @@ class Project(Base):
     assignments: Mapped[List["ProjectAssignment"]] = relationship(
         "ProjectAssignment",
         back_populates="project",
+        order_by="ProjectAssignment.id",
         cascade="all, delete-orphan",
         passive_deletes=True,
     )
     monthly_hour_overrides: Mapped[List["MonthlyHourOverride"]] = relationship(
         "MonthlyHourOverride",
         back_populates="project",
+        order_by="(MonthlyHourOverride.year, MonthlyHourOverride.month)",
         cascade="all, delete-orphan",
         passive_deletes=True,
     )
@@ -254,6 +272,10 @@ class Project(Base):
     __table_args__ = (
         CheckConstraint("sprints > 0", name="ck_project_sprints_positive"),
         UniqueConstraint("manager_id", "code", name="uq_projects_manager_code"),
+        # Keyset pagination order (see crud.PROJECT_KEYSET), overall, per manager and per status.
+        Index("idx_projects_name", "name", "id"),
+        Index("idx_projects_manager_name", "manager_id", "name", "id"),
+        Index("idx_projects_status_name", "status", "name", "id"),
     )
 
     def __repr__(self) -> str:
@@ -390,6 +412,114 @@ class MonthlyHourOverride(Base):
         return f"<MonthlyHourOverride(id={self.id}, project_id={self.project_id}, date={self.year}-{self.month:02d}, hours={self.overridden_hours})>"
 
 
+# --------------------------------------------------------------------------------
+# ALLOCATION ROLLUP TABLES
+# --------------------------------------------------------------------------------
+# Pre-aggregated monthly totals of `allocations`, maintained in the same
+# transaction as every allocation write (see the rollup section of `app.crud`)
+# and rebuildable with ``python -m app.cli rebuild-rollups``. Bulk writes that
+# do not say what they changed queue an `AllocationRollupRebuildRequest`
+# instead. ``manager_id`` is
+# the owning project's manager, or `ROLLUP_UNMANAGED` for projects without one.
+# Cells that sum to zero hours have no row.
+
+ROLLUP_UNMANAGED = 0
+
+
+class AllocationUserMonthRollup(Base):
+    """Allocated hours per (project manager, user, month)."""
+
+    __tablename__ = "allocation_rollup_user_month"
+
+    manager_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    year: Mapped[int] = mapped_column(Integer, primary_key=True)
+    month: Mapped[int] = mapped_column(Integer, primary_key=True)
+    total_hours: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    __table_args__ = (Index("idx_rollup_user_month_user", "user_id", "year", "month"),)
+
+    def __repr__(self) -> str:
+        return f"<AllocationUserMonthRollup(manager_id={self.manager_id}, user_id={self.user_id}, date={self.year}-{self.month:02d}, hours={self.total_hours})>"
+
+
+class AllocationProjectMonthRollup(Base):
+    """Allocated hours per (project, month)."""
+
+    __tablename__ = "allocation_rollup_project_month"
+
+    project_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    year: Mapped[int] = mapped_column(Integer, primary_key=True)
+    month: Mapped[int] = mapped_column(Integer, primary_key=True)
+    manager_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    total_hours: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<AllocationProjectMonthRollup(project_id={self.project_id}, date={self.year}-{self.month:02d}, hours={self.total_hours})>"
+
+
+class AllocationRoleMonthRollup(Base):
+    """Allocated hours per (project manager, role, month)."""
+
+    __tablename__ = "allocation_rollup_role_month"
+
+    manager_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    role_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    year: Mapped[int] = mapped_column(Integer, primary_key=True)
+    month: Mapped[int] = mapped_column(Integer, primary_key=True)
+    total_hours: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    __table_args__ = (Index("idx_rollup_role_month_period", "year", "month"),)
+
+    def __repr__(self) -> str:
+        return f"<AllocationRoleMonthRollup(manager_id={self.manager_id}, role_id={self.role_id}, date={self.year}-{self.month:02d}, hours={self.total_hours})>"
+
+
+class AllocationRollupRebuildRequest(Base):
+    """
+    A pending rebuild of every allocation rollup row.
+
+    Written in the same transaction as a bulk change that does not say which
+    rollup rows it moved, and consumed on the job runner's maintenance tick
+    (see `app.crud.rebuild_requested_allocation_rollups`).
+    """
+
+    __tablename__ = "allocation_rollup_rebuild_requests"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    requested_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime, nullable=False, server_default=func.now()
+    )
+
+    def __repr__(self) -> str:
+        return f"<AllocationRollupRebuildRequest(id={self.id}, requested_at={self.requested_at})>"
+
+
+# Report data versions are counters bumped in the same transaction as the
+# writes they describe (see the report data version section of `app.crud`).
+# Cached report responses are tagged with the versions of the scopes they
+# read, so a bump makes exactly those responses stale.
+
+REPORT_SCOPE_ALL = "all"  # Reports spanning all managers; derived, never stored.
+REPORT_SCOPE_EPOCH = "epoch"  # Writes that cannot be attributed to a scope.
+REPORT_SCOPE_MANAGER = "manager"  # `ROLLUP_UNMANAGED` for entities without a manager.
+REPORT_SCOPE_PROJECT = "project"
+REPORT_SCOPE_USER = "user"
+
+
+class ReportDataVersion(Base):
+    """Write counter for one report scope, e.g. ("manager", 7)."""
+
+    __tablename__ = "report_data_versions"
+
+    scope: Mapped[str] = mapped_column(String, primary_key=True)
+    scope_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"<ReportDataVersion(scope='{self.scope}:{self.scope_id}', version={self.version})>"
+
+
 # --------------------------------------------------------------------------------
 # AI & METADATA TABLES
 # --------------------------------------------------------------------------------
@@ -405,20 +535,127 @@ class AIRagCache(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     source_entity: Mapped[str] = mapped_column(String, nullable=False)
     source_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Manager whose data the document describes (the project's manager or the
+    # employee's manager); retrieval for a manager only reads this partition.
+    owner_manager_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     document_text: Mapped[str] = mapped_column(String, nullable=False)
+    # Number of tokens in document_text; NULL until the inverted index has
+    # (re)built postings for the current text.
+    token_count: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     last_indexed_at: Mapped[datetime.datetime] = mapped_column(
         DateTime, nullable=False, server_default=func.now()
     )
 
+    postings: Mapped[List["AIRagPosting"]] = relationship(
+        back_populates="document", cascade="all, delete-orphan"
+    )
+    chunks: Mapped[List["AIRagChunk"]] = relationship(
+        back_populates="document", cascade="all, delete-orphan"
+    )
+
     __table_args__ = (
         UniqueConstraint("source_entity", "source_id", name="uq_rag_source"),
         Index("idx_ai_rag_cache_source", "source_entity", "source_id"),
+        Index("idx_ai_rag_cache_owner", "owner_manager_id"),
     )
 
     def __repr__(self) -> str:
         return f"<AIRagCache(id={self.id}, source='{self.source_entity}:{self.source_id}')>"
 
 
+class AIRagPosting(Base):
+    """
+    Inverted-index entry for RAG retrieval: how often a term occurs in one cached document.
+    """
+
+    __tablename__ = "ai_rag_postings"
+
+    term: Mapped[str] = mapped_column(String, primary_key=True)
+    document_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("ai_rag_cache.id", ondelete="CASCADE"), primary_key=True
+    )
+    frequency: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    document: Mapped["AIRagCache"] = relationship(back_populates="postings")
+
+    __table_args__ = (Index("idx_ai_rag_postings_document", "document_id"),)
+
+    def __repr__(self) -> str:
+        return f"<AIRagPosting(term='{self.term}', document_id={self.document_id})>"
+
+
+class AIRagChunk(Base):
+    """
+    Embedding of one chunk of a RAG cache document, for vector retrieval.
+
+    Row IDs are never reused, so (row count, max ID) identifies the current set
+    of vectors and tells the memory-mapped search matrix when to rebuild.
+    """
+
+    __tablename__ = "ai_rag_chunks"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    document_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("ai_rag_cache.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    chunk_index: Mapped[int] = mapped_column(Integer, nullable=False)
+    embedder: Mapped[str] = mapped_column(String, nullable=False)
+    vector: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+
+    document: Mapped["AIRagCache"] = relationship(back_populates="chunks")
+
+    __table_args__ = ({"sqlite_autoincrement": True},)
+
+    def __repr__(self) -> str:
+        return f"<AIRagChunk(document_id={self.document_id}, chunk={self.chunk_index})>"
+
+
+class AIRagDirtySource(Base):
+    """
+    An entity whose RAG cache document must be rebuilt before the next retrieval.
+
+    Rows are written in the same transaction as the data change and bumped
+    (``generation``) when marked again, so a concurrent rebuild only clears
+    the marks it actually consumed.
+    """
+
+    __tablename__ = "ai_rag_dirty_sources"
+
+    source_entity: Mapped[str] = mapped_column(String, primary_key=True)
+    source_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    generation: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    marked_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime, nullable=False, server_default=func.now()
+    )
+
+    def __repr__(self) -> str:
+        return f"<AIRagDirtySource(source='{self.source_entity}:{self.source_id}')>"
+
+
+class AIResponseCache(Base):
+    """
+    A cached Gemini completion, keyed by a hash of the prompt, model, sampling
+    settings and the data version of the scope the prompt was built from.
+
+    Entries expire after ``settings.AI_RESPONSE_CACHE_TTL_SECONDS`` and the
+    least recently used ones are evicted beyond
+    ``settings.AI_RESPONSE_CACHE_MAX_ENTRIES``.
+    """
+
+    __tablename__ = "ai_response_cache"
+
+    cache_key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    model: Mapped[str] = mapped_column(String, nullable=False)
+    response_text: Mapped[str] = mapped_column(String, nullable=False)
+    created_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False)
+    last_used_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False)
+
+    __table_args__ = (Index("idx_ai_response_cache_last_used", "last_used_at"),)
+
+    def __repr__(self) -> str:
+        return f"<AIResponseCache(key='{self.cache_key[:12]}', model='{self.model}')>"
+
+
 class AIRecommendation(Base):
     """
     A generic table to store outputs from the AI agent, such as staffing recommendations.
@@ -442,6 +679,12 @@ class AIRecommendation(Base):
         DateTime, nullable=True
     )
 
+    # Newest-first pages per status (see crud.AI_RECOMMENDATION_KEYSET) and time ranges.
+    __table_args__ = (
+        Index("idx_ai_recommendations_status", "status", "id"),
+        Index("idx_ai_recommendations_generated_at", "generated_at"),
+    )
+
     def __repr__(self) -> str:
         return f"<AIRecommendation(id={self.id}, type='{self.recommendation_type.value}', status='{self.status.value}')>"
 
@@ -453,7 +696,7 @@ class AuditLog(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[Optional[int]] = mapped_column(
-        Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True
+        Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True
     )
     action: Mapped[str] = mapped_column(String, nullable=False)
     entity_type: Mapped[Optional[str]] = mapped_column(String, nullable=True)
@@ -466,7 +709,47 @@ class AuditLog(Base):
     # --- Relationships ---
     user: Mapped[Optional["User"]] = relationship("User", back_populates="audit_logs")
 
-    __table_args__ = (Index("idx_audit_log_entity", "entity_type", "entity_id"),)
+    # Most-recent-first pages per entity and per user (see crud.AUDIT_LOG_KEYSET).
+    __table_args__ = (
+        Index("idx_audit_log_entity_id", "entity_type", "entity_id", "id"),
+        Index("idx_audit_log_user", "user_id", "id"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<AuditLog(id={self.id}, action='{self.action}', user_id={self.user_id}, timestamp='{self.timestamp}')>"
+
+
+class BackgroundJob(Base):
+    """A long-running operation (import, export, reindex) executed off the request thread."""
+
+    __tablename__ = "background_jobs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    kind: Mapped[str] = mapped_column(String, nullable=False)
+    status: Mapped[JobStatus] = mapped_column(
+        String, nullable=False, default=JobStatus.QUEUED
+    )
+    manager_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True, index=True)
+    params: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    progress: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    message: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    result: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    result_path: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    result_filename: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    result_media_type: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    # The process whose worker pool holds the job, and when it last confirmed
+    # it still does; jobs of dead owners are failed by the other workers.
+    owner_host: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    owner_pid: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    heartbeat_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime, nullable=True)
+    created_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime, nullable=False, server_default=func.now()
+    )
+    started_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime, nullable=True)
+
+    __table_args__ = (Index("idx_background_jobs_status", "status"),)
 
     def __repr__(self) -> str:
-        return f"<AuditLog(id={self.id}, action='{self.action}', user_id={self.user_id}, timestamp='{self.timestamp}')>"
\ No newline at end of file
+        return f"<BackgroundJob(id={self.id}, kind='{self.kind}', status='{self.status}')>"
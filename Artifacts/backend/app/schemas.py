@@ -27,6 +27,20 @@ class ProjectStatus(str, enum.Enum):
     ON_HOLD = "On Hold"
 
 
+class AllocationBulkStatus(str, enum.Enum):
+    CREATED = "created"
+    UPDATED = "updated"
+    UNCHANGED = "unchanged"
+    ERROR = "error"
+
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "Queued"
+    RUNNING = "Running"
+    SUCCEEDED = "Succeeded"
+    FAILED = "Failed"
+
+
 class RecommendationType(str, enum.Enum):
     STAFFING = "STAFFING"
     CONFLICT_RESOLUTION = "CONFLICT_RESOLUTION"
@@ -212,6 +226,30 @@ class AllocationResponse(AllocationInDB):
     pass
 
 
+class AllocationBulkCell(AllocationBase):
+    pass
+
+
+class AllocationBulkRequest(APIBaseModel):
+    cells: List[AllocationBulkCell] = Field(
+        ..., min_length=1, max_length=5000, description="Grid cells to create or update"
+    )
+
+
+class AllocationBulkResult(AllocationBase):
+    id: Optional[int] = Field(None, description="Allocation ID, when the cell was written")
+    status: AllocationBulkStatus
+    detail: Optional[str] = None
+
+
+class AllocationBulkResponse(APIBaseModel):
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    results: List[AllocationBulkResult] = Field(default_factory=list)
+
+
 class AllocationDistributionRequest(APIBaseModel):
     start_year: int = Field(..., ge=2020, le=2050)
     start_month: int = Field(..., ge=1, le=12)
@@ -351,6 +389,7 @@ class AuditLogResponse(AuditLogInDB):
 class AIRagCacheBase(APIBaseModel):
     source_entity: str = Field(..., description="The source entity type, e.g., 'project'")
     source_id: int = Field(..., description="The ID of the source entity")
+    owner_manager_id: Optional[int] = Field(None, description="Manager whose data the document describes")
     document_text: str = Field(..., description="The pre-computed text document for RAG")
 
 
@@ -389,4 +428,23 @@ class ProjectWithDetailsResponse(ProjectResponse):
 
 class ProjectImportResponse(APIBaseModel):
     created_projects: List[ProjectResponse] = []
-    skipped_codes: List[str] = []
\ No newline at end of file
+    skipped_codes: List[str] = []
+
+
+# ======================================================================================
+# Background Job Schemas
+# ======================================================================================
+
+class BackgroundJobResponse(APIBaseModel):
+    id: int
+    kind: str
+    status: JobStatus
+    manager_id: Optional[int] = None
+    progress: Optional[float] = Field(None, ge=0, le=1, description="Fraction complete, when known")
+    message: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    result_filename: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime.datetime
+    started_at: Optional[datetime.datetime] = None
+    finished_at: Optional[datetime.datetime] = None
@@ -1,23 +1,43 @@
 """AI service utilities for StaffAlloc."""
 
 from .gemini import (
+    AIResponseDraft,
     GeminiConfigurationError,
     GeminiInvocationError,
+    complete_draft,
+    complete_draft_async,
+    draft_balance_suggestions,
+    draft_chat_response,
+    draft_conflict_scan,
+    draft_forecast_insights,
+    ensure_gemini_available,
     generate_chat_response,
     generate_forecast_insights,
     generate_workload_balance_suggestions,
     scan_allocation_conflicts,
+    stream_draft_async,
     suggest_header_mapping,
 )
-from .rag import retrieve_rag_context, reindex_rag_cache
+from .rag import refresh_dirty_rag_documents, refresh_rag_index, retrieve_rag_context, reindex_rag_cache
 
 __all__ = [
     "generate_chat_response",
     "scan_allocation_conflicts",
     "generate_forecast_insights",
     "generate_workload_balance_suggestions",
+    "AIResponseDraft",
+    "draft_chat_response",
+    "draft_conflict_scan",
+    "draft_forecast_insights",
+    "draft_balance_suggestions",
+    "complete_draft",
+    "complete_draft_async",
+    "stream_draft_async",
+    "ensure_gemini_available",
     "retrieve_rag_context",
     "reindex_rag_cache",
+    "refresh_dirty_rag_documents",
+    "refresh_rag_index",
     "GeminiConfigurationError",
     "GeminiInvocationError",
     "suggest_header_mapping",
@@ -0,0 +1,258 @@
+"""Pluggable LLM backends behind the Gemini helpers.
+
+Every AI prompt goes through `gemini._call_gemini` (or its async and streaming
+variants). Google Gemini remains the default; `settings.AI_LLM_BACKEND` can
+route prompts to one of the backends registered here instead:
+
+- ``fake``: deterministic in-process replies with simulated latency and token
+  rate, so the AI endpoints can be load-tested offline and without quota.
+- ``ollama``: any server speaking Ollama's ``/api/generate`` protocol at
+  ``settings.OLLAMA_API_URL`` (a real Ollama install, or ``ollama_stub.py``).
+
+Key components:
+- `LLMBackend`: the interface a backend implements.
+- `register_llm_backend`: registers a backend factory under a name.
+- `get_llm_backend`: the configured non-Gemini backend, or None for Gemini.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+
+
+class LLMBackendError(RuntimeError):
+    """Raised when a non-Gemini backend cannot produce a reply."""
+
+
+class LLMBackend:
+    """Interface for LLM providers.
+
+    Implementations must be safe to share between threads and event loops.
+    """
+
+    name = "base"
+    model = ""
+
+    def generate(self, prompt: str, *, temperature: float, max_output_tokens: int) -> str:
+        raise NotImplementedError
+
+    async def agenerate(self, prompt: str, *, temperature: float, max_output_tokens: int) -> str:
+        chunks = [
+            chunk
+            async for chunk in self.astream(
+                prompt, temperature=temperature, max_output_tokens=max_output_tokens
+            )
+        ]
+        return "".join(chunks).strip()
+
+    def astream(
+        self, prompt: str, *, temperature: float, max_output_tokens: int
+    ) -> AsyncIterator[str]:
+        raise NotImplementedError
+
+
+_FACTORIES: Dict[str, Callable[[], LLMBackend]] = {}
+_INSTANCES: Dict[Tuple, LLMBackend] = {}
+_LOCK = threading.Lock()
+
+
+def register_llm_backend(name: str) -> Callable[[Callable[[], LLMBackend]], Callable[[], LLMBackend]]:
+    """Register ``factory`` as the constructor of the backend called ``name``."""
+
+    def decorator(factory: Callable[[], LLMBackend]) -> Callable[[], LLMBackend]:
+        _FACTORIES[name] = factory
+        return factory
+
+    return decorator
+
+
+def get_llm_backend() -> Optional[LLMBackend]:
+    """Return the backend selected by ``settings.AI_LLM_BACKEND``.
+
+    ``None`` means the built-in Gemini client. Instances are cached per
+    backend settings, so changing the settings picks up a fresh instance.
+    """
+
+    name = settings.AI_LLM_BACKEND.lower()
+    if name == "gemini":
+        return None
+    factory = _FACTORIES.get(name)
+    if factory is None:
+        raise LLMBackendError(
+            f"Unknown AI_LLM_BACKEND '{settings.AI_LLM_BACKEND}'. "
+            f"Use 'gemini' or one of: {', '.join(sorted(_FACTORIES))}."
+        )
+    key = (
+        name,
+        settings.AI_FAKE_LATENCY_SECONDS,
+        settings.AI_FAKE_TOKENS_PER_SECOND,
+        settings.AI_FAKE_RESPONSE_TOKENS,
+        settings.OLLAMA_API_URL,
+        settings.LLM_MODEL_NAME,
+    )
+    with _LOCK:
+        backend = _INSTANCES.get(key)
+        if backend is None:
+            backend = factory()
+            _INSTANCES[key] = backend
+        return backend
+
+
+# --------------------------------------------------------------------------------
+# Fake backend
+# --------------------------------------------------------------------------------
+
+_FAKE_VOCABULARY = (
+    "staffing", "capacity", "allocation", "project", "sprint", "review", "shift",
+    "hours", "team", "balance", "forecast", "risk", "reassign", "priority",
+    "utilisation", "schedule", "monitor", "hire", "defer", "month",
+)
+
+
+class FakeLLMBackend(LLMBackend):
+    """Deterministic stand-in that simulates a remote model's timing.
+
+    The reply is a pseudo-random word sequence seeded by the prompt, so the
+    same prompt always gets the same answer. Each call waits ``latency``
+    seconds (time to first token), then emits tokens at ``tokens_per_second``
+    (0 means instantly).
+    """
+
+    name = "fake"
+
+    def __init__(self, *, latency: float, tokens_per_second: float, response_tokens: int) -> None:
+        self.model = "fake-llm"
+        self.latency = max(latency, 0.0)
+        self.tokens_per_second = max(tokens_per_second, 0.0)
+        self.response_tokens = max(response_tokens, 1)
+
+    def tokens(self, prompt: str, max_output_tokens: int) -> List[str]:
+        digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+        count = min(self.response_tokens, max(max_output_tokens, 1))
+        words = [
+            _FAKE_VOCABULARY[(digest[index % len(digest)] ^ index) % len(_FAKE_VOCABULARY)]
+            for index in range(count)
+        ]
+        return [("" if index == 0 else " ") + word for index, word in enumerate(words)]
+
+    def _token_delay(self) -> float:
+        return 1.0 / self.tokens_per_second if self.tokens_per_second else 0.0
+
+    def generate(self, prompt: str, *, temperature: float, max_output_tokens: int) -> str:
+        tokens = self.tokens(prompt, max_output_tokens)
+        time.sleep(self.latency + self._token_delay() * len(tokens))
+        return "".join(tokens)
+
+    async def astream(
+        self, prompt: str, *, temperature: float, max_output_tokens: int
+    ) -> AsyncIterator[str]:
+        await asyncio.sleep(self.latency)
+        delay = self._token_delay()
+        for token in self.tokens(prompt, max_output_tokens):
+            if delay:
+                await asyncio.sleep(delay)
+            yield token
+
+
+@register_llm_backend("fake")
+def _fake_backend() -> LLMBackend:
+    return FakeLLMBackend(
+        latency=settings.AI_FAKE_LATENCY_SECONDS,
+        tokens_per_second=settings.AI_FAKE_TOKENS_PER_SECOND,
+        response_tokens=settings.AI_FAKE_RESPONSE_TOKENS,
+    )
+
+
+# --------------------------------------------------------------------------------
+# Ollama backend
+# --------------------------------------------------------------------------------
+
+
+class OllamaBackend(LLMBackend):
+    """Client for the Ollama ``/api/generate`` endpoint.
+
+    ``transport`` is used for the async calls when given (e.g. an in-process
+    ASGI transport serving the stub); by default requests go over HTTP.
+    """
+
+    name = "ollama"
+
+    def __init__(
+        self,
+        *,
+        base_url: str,
+        model: str,
+        timeout: float,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.timeout = timeout
+        self.transport = transport
+
+    def _payload(self, prompt: str, temperature: float, max_output_tokens: int, stream: bool) -> dict:
+        return {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": stream,
+            "options": {"temperature": temperature, "num_predict": max_output_tokens},
+        }
+
+    def generate(self, prompt: str, *, temperature: float, max_output_tokens: int) -> str:
+        try:
+            with httpx.Client(base_url=self.base_url, timeout=self.timeout) as client:
+                response = client.post(
+                    "/api/generate", json=self._payload(prompt, temperature, max_output_tokens, False)
+                )
+                response.raise_for_status()
+        except httpx.HTTPError as exc:
+            raise LLMBackendError(f"Ollama request failed: {exc!s}") from exc
+        try:
+            message = response.json()
+        except json.JSONDecodeError as exc:
+            raise LLMBackendError("Ollama returned a response that is not JSON") from exc
+        return str(message.get("response", "")).strip()
+
+    async def astream(
+        self, prompt: str, *, temperature: float, max_output_tokens: int
+    ) -> AsyncIterator[str]:
+        payload = self._payload(prompt, temperature, max_output_tokens, True)
+        try:
+            async with httpx.AsyncClient(
+                base_url=self.base_url, timeout=self.timeout, transport=self.transport
+            ) as client:
+                async with client.stream("POST", "/api/generate", json=payload) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if not line.strip():
+                            continue
+                        try:
+                            message = json.loads(line)
+                        except json.JSONDecodeError as exc:
+                            raise LLMBackendError(f"Ollama sent an invalid stream line: {line[:200]!r}") from exc
+                        if message.get("error"):
+                            raise LLMBackendError(f"Ollama error: {message['error']}")
+                        if message.get("response"):
+                            yield message["response"]
+                        if message.get("done"):
+                            break
+        except httpx.HTTPError as exc:
+            raise LLMBackendError(f"Ollama request failed: {exc!s}") from exc
+
+
+@register_llm_backend("ollama")
+def _ollama_backend() -> LLMBackend:
+    return OllamaBackend(
+        base_url=settings.OLLAMA_API_URL,
+        model=settings.LLM_MODEL_NAME,
+        timeout=settings.AI_REQUEST_TIMEOUT_SECONDS,
+    )
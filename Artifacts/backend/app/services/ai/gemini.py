@@ -2,19 +2,28 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import os
+import weakref
 from collections import defaultdict
+from dataclasses import dataclass, replace
 from datetime import date, datetime
-from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
 
 from dotenv import load_dotenv
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session
 
 from app import crud, models
+from app.core.config import settings
+from app.services.conflicts import find_allocation_conflicts
 from app.utils.reporting import month_label, standard_month_hours
 
+from . import response_cache
+from .backends import LLMBackend, LLMBackendError, get_llm_backend
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -29,6 +38,11 @@ genai_types = None
 
 _CLIENT: Optional["genai.Client"] = None
 
+# One semaphore per event loop: asyncio primitives cannot be shared across loops.
+_SEMAPHORES: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
 
 class GeminiConfigurationError(RuntimeError):
     """Raised when the Gemini client cannot be configured."""
@@ -70,12 +84,35 @@ def _ensure_client() -> "genai.Client":
     return _CLIENT
 
 
+def _configured_backend() -> Optional[LLMBackend]:
+    """The non-Gemini backend prompts are routed to, or None for Gemini."""
+
+    try:
+        return get_llm_backend()
+    except LLMBackendError as exc:
+        raise GeminiConfigurationError(str(exc)) from exc
+
+
+def _model_name() -> str:
+    backend = _configured_backend()
+    return GEMINI_MODEL if backend is None else f"{backend.name}:{backend.model}"
+
+
 def _call_gemini(
     prompt: str,
     *,
     temperature: float = 0.25,
     max_output_tokens: int = 2048,
 ) -> str:
+    backend = _configured_backend()
+    if backend is not None:
+        try:
+            return backend.generate(
+                prompt, temperature=temperature, max_output_tokens=max_output_tokens
+            )
+        except LLMBackendError as exc:
+            raise GeminiInvocationError(str(exc)) from exc
+
     client = _ensure_client()
     
     max_retries = 1  # Reduced retries to fail faster
@@ -87,11 +124,7 @@ def _call_gemini(
             response = client.models.generate_content(
                 model=GEMINI_MODEL,
                 contents=[prompt],
-                config=genai_types.GenerateContentConfig(
-                    temperature=temperature,
-                    max_output_tokens=max_output_tokens,
-                    response_modalities=["TEXT"],
-                ),
+                config=_generation_config(temperature, max_output_tokens),
             )
             logger.info("Gemini API call successful")
             break
@@ -114,6 +147,168 @@ def _call_gemini(
             logger.info(f"Retrying in {wait_time} second...")
             time.sleep(wait_time)
 
+    return _response_text(response)
+
+
+async def _call_gemini_async(
+    prompt: str,
+    *,
+    temperature: float = 0.25,
+    max_output_tokens: int = 2048,
+) -> str:
+    """Non-blocking variant of `_call_gemini` for the async API endpoints.
+
+    At most ``settings.AI_MAX_CONCURRENCY`` calls run at once per event loop,
+    each bounded by ``settings.AI_REQUEST_TIMEOUT_SECONDS``. Cancelling the
+    awaiting task (e.g. because the client disconnected) abandons the call.
+    """
+
+    timeout = settings.AI_REQUEST_TIMEOUT_SECONDS
+    backend = _configured_backend()
+    if backend is not None:
+        async with _semaphore():
+            try:
+                return await asyncio.wait_for(
+                    backend.agenerate(
+                        prompt, temperature=temperature, max_output_tokens=max_output_tokens
+                    ),
+                    timeout=timeout,
+                )
+            except asyncio.TimeoutError as exc:
+                raise GeminiInvocationError(
+                    f"{backend.name} request timed out after {timeout:g} seconds."
+                ) from exc
+            except LLMBackendError as exc:
+                raise GeminiInvocationError(str(exc)) from exc
+
+    client = _ensure_client()
+
+    max_retries = 1
+    retry_count = 0
+
+    async with _semaphore():
+        while retry_count <= max_retries:
+            try:
+                logger.info(
+                    "Calling Gemini API (async): model=%s, max_tokens=%s, attempt=%s",
+                    GEMINI_MODEL,
+                    max_output_tokens,
+                    retry_count + 1,
+                )
+                response = await asyncio.wait_for(
+                    client.aio.models.generate_content(
+                        model=GEMINI_MODEL,
+                        contents=[prompt],
+                        config=_generation_config(temperature, max_output_tokens),
+                    ),
+                    timeout=timeout,
+                )
+                break
+            except asyncio.TimeoutError as exc:
+                # A retry would double the wait; give up on the first timeout.
+                raise GeminiInvocationError(
+                    f"Gemini request timed out after {timeout:g} seconds."
+                ) from exc
+            except Exception as exc:  # pragma: no cover - network/client dependent
+                retry_count += 1
+                error_str = str(exc).lower()
+                logger.error(
+                    "Gemini API call failed: %s (attempt %s/%s)", exc, retry_count, max_retries + 1
+                )
+                if 'rate limit' in error_str or 'quota' in error_str:
+                    raise GeminiInvocationError(f"API quota exceeded: {exc!s}. Please wait a moment before trying again.") from exc
+                if retry_count > max_retries:
+                    raise GeminiInvocationError(f"Gemini request failed: {exc!s}. Try a simpler question or wait a moment.") from exc
+                await asyncio.sleep(1)
+
+    return _response_text(response)
+
+
+async def _stream_gemini_async(
+    prompt: str,
+    *,
+    temperature: float = 0.25,
+    max_output_tokens: int = 2048,
+) -> AsyncIterator[str]:
+    """Yield Gemini's answer to ``prompt`` as text chunks as they are generated.
+
+    Shares the concurrency limit of `_call_gemini_async`; the timeout applies
+    to the wait for each chunk. There is no retry, since part of the answer
+    may already have been delivered.
+    """
+
+    backend = _configured_backend()
+    client = _ensure_client() if backend is None else None
+    timeout = settings.AI_REQUEST_TIMEOUT_SECONDS
+
+    async with _semaphore():
+        logger.info("Streaming LLM reply: model=%s, max_tokens=%s", _model_name(), max_output_tokens)
+        try:
+            if backend is not None:
+                texts = backend.astream(
+                    prompt, temperature=temperature, max_output_tokens=max_output_tokens
+                ).__aiter__()
+            else:
+                stream = await asyncio.wait_for(
+                    client.aio.models.generate_content_stream(
+                        model=GEMINI_MODEL,
+                        contents=[prompt],
+                        config=_generation_config(temperature, max_output_tokens),
+                    ),
+                    timeout=timeout,
+                )
+                texts = _chunk_texts(stream).__aiter__()
+            while True:
+                try:
+                    text = await asyncio.wait_for(texts.__anext__(), timeout=timeout)
+                except StopAsyncIteration:
+                    break
+                yield text
+        except asyncio.TimeoutError as exc:
+            raise GeminiInvocationError(
+                f"LLM stream stalled for more than {timeout:g} seconds."
+            ) from exc
+        except LLMBackendError as exc:
+            raise GeminiInvocationError(str(exc)) from exc
+        except (GeminiConfigurationError, GeminiInvocationError):
+            raise
+        except Exception as exc:  # pragma: no cover - network/client dependent
+            logger.error("Gemini streaming call failed: %s", exc)
+            raise GeminiInvocationError(f"Gemini request failed: {exc!s}. Try a simpler question or wait a moment.") from exc
+
+
+async def _chunk_texts(stream: Any) -> AsyncIterator[str]:
+    async for chunk in stream:
+        text = getattr(chunk, "text", None)
+        if text:
+            yield text
+
+
+def ensure_gemini_available() -> None:
+    """Raise `GeminiConfigurationError` unless the configured LLM can be used."""
+
+    if _configured_backend() is None:
+        _ensure_client()
+
+
+def _semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _SEMAPHORES.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(max(settings.AI_MAX_CONCURRENCY, 1))
+        _SEMAPHORES[loop] = semaphore
+    return semaphore
+
+
+def _generation_config(temperature: float, max_output_tokens: int):
+    return genai_types.GenerateContentConfig(
+        temperature=temperature,
+        max_output_tokens=max_output_tokens,
+        response_modalities=["TEXT"],
+    )
+
+
+def _response_text(response: Any) -> str:
     if hasattr(response, "text") and response.text:
         return response.text.strip()
 
@@ -131,6 +326,113 @@ def _call_gemini(
     raise GeminiInvocationError("Gemini did not return any text output.")
 
 
+@dataclass
+class AIResponseDraft:
+    """Everything needed to finish an AI response once the database work is done.
+
+    The ``draft_*`` functions do the (blocking) data gathering and prompt
+    building; `complete_draft` or `complete_draft_async` then asks Gemini and
+    appends its reasoning to ``message``. When Gemini is unavailable the
+    ``fallback`` text is appended instead, or the error is raised if there is
+    no fallback. A draft without a ``prompt`` is already complete. Drafts
+    with a ``cache_key`` store Gemini's reply in the response cache.
+    """
+
+    items: List[Any]
+    message: str = ""
+    prompt: Optional[str] = None
+    fallback: Optional[str] = None
+    temperature: float = 0.25
+    max_output_tokens: int = 2048
+    cache_key: Optional[str] = None
+    cache_bind: Optional[Engine] = None
+
+
+def _with_cached_reasoning(
+    db: Session, draft: AIResponseDraft, *, manager_id: Optional[int]
+) -> AIResponseDraft:
+    """Complete ``draft`` from the response cache, or tag it for caching."""
+
+    if draft.prompt is None or not response_cache.enabled():
+        return draft
+    key = response_cache.cache_key(
+        draft.prompt,
+        model=_model_name(),
+        temperature=draft.temperature,
+        max_output_tokens=draft.max_output_tokens,
+        data_version=response_cache.data_version(db, manager_id=manager_id),
+    )
+    cached = response_cache.lookup(db, key)
+    if cached is not None:
+        logger.info("Serving AI narrative from the response cache")
+        return replace(draft, message=draft.message + cached, prompt=None)
+    return replace(draft, cache_key=key, cache_bind=db.get_bind())
+
+
+def _remember_reasoning(draft: AIResponseDraft, reasoning: str) -> None:
+    if draft.cache_key is not None and draft.cache_bind is not None:
+        response_cache.store(
+            draft.cache_bind, draft.cache_key, model=_model_name(), response_text=reasoning
+        )
+
+
+def complete_draft(draft: AIResponseDraft) -> Tuple[List[Any], str]:
+    """Finish ``draft`` with a blocking Gemini call."""
+
+    if draft.prompt is None:
+        return draft.items, draft.message
+    try:
+        reasoning = _call_gemini(
+            draft.prompt, temperature=draft.temperature, max_output_tokens=draft.max_output_tokens
+        )
+    except (GeminiConfigurationError, GeminiInvocationError):
+        if draft.fallback is None:
+            raise
+        reasoning = draft.fallback
+    else:
+        _remember_reasoning(draft, reasoning)
+    return draft.items, draft.message + reasoning
+
+
+async def complete_draft_async(draft: AIResponseDraft) -> Tuple[List[Any], str]:
+    """Finish ``draft`` without blocking the event loop."""
+
+    if draft.prompt is None:
+        return draft.items, draft.message
+    try:
+        reasoning = await _call_gemini_async(
+            draft.prompt, temperature=draft.temperature, max_output_tokens=draft.max_output_tokens
+        )
+    except (GeminiConfigurationError, GeminiInvocationError):
+        if draft.fallback is None:
+            raise
+        reasoning = draft.fallback
+    else:
+        await asyncio.to_thread(_remember_reasoning, draft, reasoning)
+    return draft.items, draft.message + reasoning
+
+
+async def stream_draft_async(draft: AIResponseDraft) -> AsyncIterator[str]:
+    """Yield the text `complete_draft_async` would append, chunk by chunk.
+
+    The fallback is only used when Gemini fails before producing any output.
+    """
+
+    if draft.prompt is None:
+        return
+    produced = False
+    try:
+        async for text in _stream_gemini_async(
+            draft.prompt, temperature=draft.temperature, max_output_tokens=draft.max_output_tokens
+        ):
+            produced = True
+            yield text
+    except (GeminiConfigurationError, GeminiInvocationError):
+        if draft.fallback is None or produced:
+            raise
+        yield draft.fallback
+
+
 def _format_context_for_prompt(context: Iterable[Tuple[str, str]]) -> str:
     sections = []
     for source, chunk in context:
@@ -176,14 +478,26 @@ def generate_chat_response(
     manager_id: Optional[int] = None,
 ) -> Tuple[str, List[str]]:
     """Return an answer and the supporting sources for an AI chat query."""
+
+    sources, answer = complete_draft(
+        draft_chat_response(db, query=query, context_limit=context_limit, manager_id=manager_id)
+    )
+    return answer, sources
+
+
+def draft_chat_response(
+    db: Session,
+    *,
+    query: str,
+    context_limit: int,
+    manager_id: Optional[int] = None,
+) -> AIResponseDraft:
+    """Retrieve RAG context and build the chat prompt; items are the sources."""
     from .rag import retrieve_rag_context
 
     context = retrieve_rag_context(db, query, limit=context_limit, manager_id=manager_id)
     if not context:
-        logger.info("No RAG context available for query; rebuilding cache for manager %s", manager_id)
-        from .rag import reindex_rag_cache
-        reindex_rag_cache(db, manager_id=manager_id)
-        context = retrieve_rag_context(db, query, limit=context_limit, manager_id=manager_id)
+        logger.info("No RAG context indexed yet for manager %s", manager_id)
 
     prompt_context = _format_context_for_prompt(context)
     
@@ -210,9 +524,8 @@ def generate_chat_response(
         "Answer:"
     )
 
-    answer = _call_gemini(prompt, max_output_tokens=1024, temperature=0.3)
     sources = [source for source, _ in context]
-    return answer, sources
+    return AIResponseDraft(items=sources, prompt=prompt, temperature=0.3, max_output_tokens=1024)
 
 
 def _monthly_totals_for(db: Session, year: int, month: int) -> Dict[int, int]:
@@ -224,113 +537,51 @@ def _monthly_totals_for(db: Session, year: int, month: int) -> Dict[int, int]:
     }
 
 
-def _collect_conflict_data(db: Session, *, manager_id: Optional[int] = None) -> Tuple[Dict[Tuple[int, int], Dict[int, int]], Dict[int, models.User]]:
-    monthly_totals = crud.get_monthly_user_project_allocations(db)
-    
-    # Get users filtered by manager if specified
-    users = crud.get_users(
-        db, limit=2000, system_role=models.SystemRole.EMPLOYEE, manager_id=manager_id
-    )
-    user_ids = {user.id for user in users}
-    
-    # Filter monthly totals to only include users belonging to this manager
-    totals: Dict[Tuple[int, int], Dict[int, int]] = defaultdict(lambda: defaultdict(int))
-    for row in monthly_totals:
-        user_id = int(row["user_id"])
-        if manager_id is None or user_id in user_ids:
-            key = (int(row["year"]), int(row["month"]))
-            user_totals = totals[key]
-            user_totals[user_id] += int(row.get("allocated_hours") or 0)
-
-    return totals, {user.id: user for user in users}
-
-
 def scan_allocation_conflicts(db: Session, *, manager_id: Optional[int] = None) -> Tuple[List[Dict[str, object]], str]:
-    monthly_totals, user_lookup = _collect_conflict_data(db, manager_id=manager_id)
-    
-    # Get user IDs for filtering
-    user_ids = set(user_lookup.keys())
+    return complete_draft(draft_conflict_scan(db, manager_id=manager_id))
 
-    project_breakdown_rows = crud.get_monthly_user_project_allocations(db)
-    breakdown: Dict[Tuple[int, int, int], List[Dict[str, object]]] = defaultdict(list)
-    for row in project_breakdown_rows:
-        user_id = int(row["user_id"])
-        # Only include breakdown for manager's employees
-        if manager_id is None or user_id in user_ids:
-            key = (user_id, int(row["year"]), int(row["month"]))
-            breakdown[key].append(row)
 
-    conflicts: List[Dict[str, object]] = []
-    today = date.today()
-    for (year, month), totals in monthly_totals.items():
-        standard_hours = max(standard_month_hours(year, month), 1)
-        for user_id, total_hours in totals.items():
-            if total_hours <= standard_hours:
-                continue
-            user = user_lookup.get(user_id)
-            if not user:
-                continue
-
-            conflict_key = (user_id, year, month)
-            project_rows = breakdown.get(conflict_key, [])
-            project_rows.sort(key=lambda row: int(row.get("allocated_hours") or 0), reverse=True)
-            project_details = [
-                {
-                    "project_id": int(row.get("project_id") or 0),
-                    "project_name": row.get("project_name") or "Unknown",
-                    "hours": int(row.get("allocated_hours") or 0),
-                }
-                for row in project_rows
-            ]
-
-            conflicts.append(
-                {
-                    "user_id": user_id,
-                    "employee": user.full_name,
-                    "month": month_label(year, month),
-                    "total_hours": total_hours,
-                    "fte": round(total_hours / standard_hours, 3),
-                    "projects": project_details,
-                }
-            )
+def draft_conflict_scan(db: Session, *, manager_id: Optional[int] = None) -> AIResponseDraft:
+    conflicts = find_allocation_conflicts(db, manager_id=manager_id)
 
     if not conflicts:
         message = "No over-allocations detected across active projects."
-        return [], message
-
-    conflicts.sort(key=lambda item: item["fte"], reverse=True)
+        return AIResponseDraft(items=[], message=message)
 
     # Generate basic message even without AI
     conflict_count = len(conflicts)
     max_fte = max(c["fte"] for c in conflicts) * 100
     message = f"Found {conflict_count} over-allocation{'s' if conflict_count != 1 else ''} (max {max_fte:.1f}% FTE). "
 
-    # Try to get AI reasoning, but don't fail if unavailable
-    try:
-        prompt_lines = [
-            "The following employees exceed 100% FTE. Provide actionable remediation steps, "
-            "suggesting which project allocations to reduce or shift, and highlight any follow-up required.",
-            "Conflicts:",
-        ]
-        for conflict in conflicts[:5]:
-            projects = ", ".join(
-                f"{proj['project_name']} ({proj['hours']}h)" for proj in conflict["projects"]
-            )
-            prompt_lines.append(
-                f"- {conflict['employee']} · {conflict['month']} · {conflict['fte'] * 100:.1f}% FTE · {projects}"
-            )
-
-        prompt = "\n".join(prompt_lines) + "\n\nMitigation guidance:"
-        reasoning = _call_gemini(prompt, temperature=0.2)
-        message += reasoning
-    except (GeminiConfigurationError, GeminiInvocationError):
-        # Provide basic guidance without AI
-        message += "Review allocations and consider: (1) Reducing hours on lower-priority projects, (2) Redistributing work to available team members, or (3) Adjusting project timelines."
+    # AI reasoning is appended when available; the fallback gives basic guidance without it
+    prompt_lines = [
+        "The following employees exceed 100% FTE. Provide actionable remediation steps, "
+        "suggesting which project allocations to reduce or shift, and highlight any follow-up required.",
+        "Conflicts:",
+    ]
+    for conflict in conflicts[:5]:
+        projects = ", ".join(
+            f"{proj['project_name']} ({proj['hours']}h)" for proj in conflict["projects"]
+        )
+        prompt_lines.append(
+            f"- {conflict['employee']} · {conflict['month']} · {conflict['fte'] * 100:.1f}% FTE · {projects}"
+        )
 
-    return conflicts, message
+    draft = AIResponseDraft(
+        items=conflicts,
+        message=message,
+        prompt="\n".join(prompt_lines) + "\n\nMitigation guidance:",
+        fallback="Review allocations and consider: (1) Reducing hours on lower-priority projects, (2) Redistributing work to available team members, or (3) Adjusting project timelines.",
+        temperature=0.2,
+    )
+    return _with_cached_reasoning(db, draft, manager_id=manager_id)
 
 
 def generate_forecast_insights(db: Session, *, months_ahead: int = 3, manager_id: Optional[int] = None) -> Tuple[List[Dict[str, object]], str]:
+    return complete_draft(draft_forecast_insights(db, months_ahead=months_ahead, manager_id=manager_id))
+
+
+def draft_forecast_insights(db: Session, *, months_ahead: int = 3, manager_id: Optional[int] = None) -> AIResponseDraft:
     today = date.today()
     employees = crud.get_users(
         db, limit=2000, system_role=models.SystemRole.EMPLOYEE, manager_id=manager_id
@@ -378,36 +629,34 @@ def generate_forecast_insights(db: Session, *, months_ahead: int = 3, manager_id
     else:
         message = "Forecast shows balanced capacity for the next months. "
 
-    # Try to get AI reasoning
-    try:
-        context = [
-            "Provide staffing forecast guidance based on capacity vs projected allocation.",
-            f"Total employees considered: {employee_count}",
-        ]
-        for item in predictions:
-            context.append(
-                f"- {item['month']}: capacity {item['projected_capacity_hours']}h, allocations {item['projected_allocated_hours']}h, surplus {item['surplus_hours']}h ({item['risk']})"
-            )
-
-        prompt = (
-            "You are advising a portfolio manager on staffing outlook. Summarise the key risks for the upcoming months, "
-            "highlight shortages or underutilisation, and recommend proactive steps (hiring, reassignments, etc.).\n\n"
-            + "\n".join(context)
-            + "\n\nOutlook:"
+    # AI reasoning is appended when available; the fallback gives basic guidance without it
+    context = [
+        "Provide staffing forecast guidance based on capacity vs projected allocation.",
+        f"Total employees considered: {employee_count}",
+    ]
+    for item in predictions:
+        context.append(
+            f"- {item['month']}: capacity {item['projected_capacity_hours']}h, allocations {item['projected_allocated_hours']}h, surplus {item['surplus_hours']}h ({item['risk']})"
         )
 
-        reasoning = _call_gemini(prompt, temperature=0.3)
-        message += reasoning
-    except (GeminiConfigurationError, GeminiInvocationError):
-        # Provide basic guidance without AI
-        if shortages:
-            message += "Consider hiring additional staff or adjusting project timelines to meet demand."
-        elif underutilized:
-            message += "Consider taking on new projects or reassigning staff to higher-priority work."
-        else:
-            message += "Continue monitoring allocations and adjust as new projects are added."
+    prompt = (
+        "You are advising a portfolio manager on staffing outlook. Summarise the key risks for the upcoming months, "
+        "highlight shortages or underutilisation, and recommend proactive steps (hiring, reassignments, etc.).\n\n"
+        + "\n".join(context)
+        + "\n\nOutlook:"
+    )
 
-    return predictions, message
+    if shortages:
+        fallback = "Consider hiring additional staff or adjusting project timelines to meet demand."
+    elif underutilized:
+        fallback = "Consider taking on new projects or reassigning staff to higher-priority work."
+    else:
+        fallback = "Continue monitoring allocations and adjust as new projects are added."
+
+    draft = AIResponseDraft(
+        items=predictions, message=message, prompt=prompt, fallback=fallback, temperature=0.3
+    )
+    return _with_cached_reasoning(db, draft, manager_id=manager_id)
 
 
 def generate_workload_balance_suggestions(
@@ -416,6 +665,17 @@ def generate_workload_balance_suggestions(
     project_id: Optional[int] = None,
     manager_id: Optional[int] = None,
 ) -> Tuple[List[Dict[str, object]], str]:
+    return complete_draft(
+        draft_balance_suggestions(db, project_id=project_id, manager_id=manager_id)
+    )
+
+
+def draft_balance_suggestions(
+    db: Session,
+    *,
+    project_id: Optional[int] = None,
+    manager_id: Optional[int] = None,
+) -> AIResponseDraft:
     today = date.today()
     standard_hours = max(standard_month_hours(today.year, today.month), 1)
 
@@ -535,29 +795,27 @@ def generate_workload_balance_suggestions(
 
     if not suggestions:
         message = "No obvious workload imbalances detected for the selected scope."
-        return [], message
+        return AIResponseDraft(items=[], message=message)
 
     scope_label = "project" if project_id is not None else "portfolio"
     suggestion_count = len(suggestions)
     message = f"Found {suggestion_count} workload balancing opportunit{'ies' if suggestion_count != 1 else 'y'} in the {scope_label}. "
 
-    # Try to get AI reasoning, but provide basic guidance if unavailable
-    try:
-        prompt_lines = [
-            f"Workload balancing opportunities detected within the {scope_label}.",
-            "Recommendations:",
-        ]
-        for suggestion in suggestions[:5]:
-            prompt_lines.append(
-                f"- Shift {suggestion['recommended_hours']}h from {suggestion['from_employee']} to {suggestion['to_employee']}"
-            )
-
-        prompt = "\n".join(prompt_lines) + "\n\nRationale:"
-        reasoning = _call_gemini(prompt, temperature=0.2)
-        message += reasoning
-    except (GeminiConfigurationError, GeminiInvocationError):
-        # Provide basic guidance without AI
-        message += "Consider redistributing work from overloaded employees to those with capacity. This will improve team morale and reduce burnout risk."
-
-    return suggestions, message
+    # AI reasoning is appended when available; the fallback gives basic guidance without it
+    prompt_lines = [
+        f"Workload balancing opportunities detected within the {scope_label}.",
+        "Recommendations:",
+    ]
+    for suggestion in suggestions[:5]:
+        prompt_lines.append(
+            f"- Shift {suggestion['recommended_hours']}h from {suggestion['from_employee']} to {suggestion['to_employee']}"
+        )
 
+    draft = AIResponseDraft(
+        items=suggestions,
+        message=message,
+        prompt="\n".join(prompt_lines) + "\n\nRationale:",
+        fallback="Consider redistributing work from overloaded employees to those with capacity. This will improve team morale and reduce burnout risk.",
+        temperature=0.2,
+    )
+    return _with_cached_reasoning(db, draft, manager_id=manager_id)
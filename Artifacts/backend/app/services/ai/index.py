@@ -0,0 +1,177 @@
+"""Persistent inverted index and BM25 ranking over the AI RAG cache.
+
+Each cached document is tokenized once when its text changes and stored as
+``term -> (document, frequency)`` postings alongside its token count. Queries
+then touch only the postings of their own terms, so retrieval cost grows with
+the number of matching documents rather than the size of the cache.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, func, insert, update
+from sqlalchemy.orm import Session
+
+from app import models
+
+_WORD_PATTERN = re.compile(r"[A-Za-z0-9']+")
+
+# Standard Okapi BM25 parameters.
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Documents re-indexed per flush when refreshing stale postings.
+_INDEX_BATCH_SIZE = 500
+
+
+def tokenize(text: str) -> List[str]:
+    return _WORD_PATTERN.findall(text.lower())
+
+
+def index_stale_documents(db: Session, *, commit: bool = True) -> int:
+    """Build postings for every cached document whose text is not yet indexed.
+
+    Documents are marked stale by a NULL ``token_count`` (new rows, or rows
+    whose text changed). Returns the number of documents indexed; unless
+    ``commit`` is false the transaction is committed when anything changed.
+    """
+
+    Document = models.AIRagCache
+    stale = (
+        db.query(Document.id, Document.document_text)
+        .filter(Document.token_count.is_(None))
+        .all()
+    )
+    if not stale:
+        return 0
+
+    for start in range(0, len(stale), _INDEX_BATCH_SIZE):
+        batch = stale[start : start + _INDEX_BATCH_SIZE]
+        document_ids = [document_id for document_id, _ in batch]
+        db.execute(
+            delete(models.AIRagPosting).where(models.AIRagPosting.document_id.in_(document_ids))
+        )
+        # Chunk vectors describe the old text; they are re-embedded on demand.
+        db.execute(
+            delete(models.AIRagChunk).where(models.AIRagChunk.document_id.in_(document_ids))
+        )
+
+        postings: List[Dict[str, object]] = []
+        token_counts: List[Dict[str, int]] = []
+        for document_id, text in batch:
+            counts = Counter(tokenize(text or ""))
+            postings.extend(
+                {"term": term, "document_id": document_id, "frequency": frequency}
+                for term, frequency in counts.items()
+            )
+            token_counts.append({"id": document_id, "token_count": sum(counts.values())})
+
+        if postings:
+            db.execute(insert(models.AIRagPosting), postings)
+        db.execute(update(Document), token_counts)
+
+    if commit:
+        db.commit()
+    return len(stale)
+
+
+def search(
+    db: Session,
+    query_tokens: Sequence[str],
+    *,
+    limit: int,
+    criteria: Sequence = (),
+) -> List[Tuple[int, float]]:
+    """Rank cached documents against ``query_tokens`` with BM25.
+
+    ``criteria`` are extra SQL filters on ``AIRagCache`` selecting the
+    partition to search (e.g. one manager's documents). Corpus statistics
+    (document count, average length, document frequencies) are computed over
+    that partition too, so neither scores nor statistics depend on other
+    tenants' data. Returns up to ``limit`` ``(document_id, score)`` pairs,
+    best first, with positive scores.
+    """
+
+    query_counts = Counter(query_tokens)
+    if not query_counts or limit <= 0:
+        return []
+
+    Document = models.AIRagCache
+    Posting = models.AIRagPosting
+    terms = list(query_counts)
+
+    total_documents, average_length = (
+        db.query(func.count(Document.id), func.avg(Document.token_count))
+        .filter(Document.token_count.isnot(None), *criteria)
+        .one()
+    )
+    if not total_documents:
+        return []
+    average_length = float(average_length or 0.0) or 1.0
+
+    document_frequency_query = db.query(Posting.term, func.count(Posting.document_id)).filter(
+        Posting.term.in_(terms)
+    )
+    if criteria:
+        document_frequency_query = document_frequency_query.join(
+            Document, Document.id == Posting.document_id
+        ).filter(*criteria)
+    document_frequency = dict(document_frequency_query.group_by(Posting.term).all())
+    idf = {
+        term: math.log(1.0 + (total_documents - df + 0.5) / (df + 0.5))
+        for term, df in document_frequency.items()
+    }
+    if not idf:
+        return []
+
+    postings = (
+        db.query(Posting.document_id, Posting.term, Posting.frequency, Document.token_count)
+        .join(Document, Document.id == Posting.document_id)
+        .filter(Posting.term.in_(list(idf)), *criteria)
+        .all()
+    )
+
+    scores: Dict[int, float] = {}
+    for document_id, term, frequency, length in postings:
+        norm = BM25_K1 * (1.0 - BM25_B + BM25_B * (length or 0) / average_length)
+        weight = idf[term] * frequency * (BM25_K1 + 1.0) / (frequency + norm)
+        scores[document_id] = scores.get(document_id, 0.0) + query_counts[term] * weight
+
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    return [(document_id, score) for document_id, score in ranked[:limit] if score > 0]
+
+
+def lookup_documents(
+    db: Session, document_ids: Sequence[int]
+) -> Dict[int, models.AIRagCache]:
+    """Load cached documents by id."""
+
+    if not document_ids:
+        return {}
+    rows = db.query(models.AIRagCache).filter(models.AIRagCache.id.in_(list(document_ids))).all()
+    return {row.id: row for row in rows}
+
+
+def fill_documents(
+    db: Session,
+    *,
+    exclude: Sequence[int],
+    limit: int,
+    criteria: Sequence = (),
+) -> List[models.AIRagCache]:
+    """Return up to ``limit`` other documents to pad a short result list."""
+
+    if limit <= 0:
+        return []
+    query = db.query(models.AIRagCache).filter(*criteria)
+    if exclude:
+        query = query.filter(models.AIRagCache.id.notin_(list(exclude)))
+    return query.order_by(models.AIRagCache.id).limit(limit).all()
+
+
+def has_documents(db: Session, criteria: Optional[Sequence] = None) -> bool:
+    return db.query(models.AIRagCache.id).filter(*(criteria or ())).first() is not None
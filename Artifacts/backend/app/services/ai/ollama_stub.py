@@ -0,0 +1,110 @@
+"""Ollama-compatible HTTP stub backed by the fake LLM.
+
+Serves the subset of the Ollama API that StaffAlloc uses: ``GET /`` (the
+health probe in ``app.main``), ``GET /api/tags`` and ``POST /api/generate``,
+streamed as NDJSON or not. Replies come from `FakeLLMBackend`, so they are
+deterministic and follow its latency and token-rate simulation.
+
+Run it locally and point the API at it::
+
+    python -m app.services.ai.ollama_stub --port 11434 --latency 0.4 --tokens-per-second 60
+    AI_LLM_BACKEND=ollama OLLAMA_API_URL=http://127.0.0.1:11434 uvicorn app.main:app
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import time
+from typing import Any, AsyncIterator, Dict
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from .backends import FakeLLMBackend
+
+
+class GenerateRequest(BaseModel):
+    model: str
+    prompt: str
+    stream: bool = True
+    options: Dict[str, Any] = Field(default_factory=dict)
+
+
+def _timestamp() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+def create_app(backend: FakeLLMBackend) -> FastAPI:
+    """Build the stub application around ``backend``."""
+
+    app = FastAPI(title="Ollama stub", docs_url=None, redoc_url=None)
+
+    @app.get("/", response_class=PlainTextResponse)
+    def root() -> str:
+        return "Ollama is running"
+
+    @app.get("/api/tags")
+    def tags() -> Dict[str, Any]:
+        return {"models": [{"name": backend.model, "model": backend.model}]}
+
+    @app.post("/api/generate")
+    async def generate(request: GenerateRequest):
+        options = request.options
+        temperature = float(options.get("temperature", 0.25))
+        max_output_tokens = int(options.get("num_predict", 2048))
+        started = time.perf_counter()
+
+        def final(extra: Dict[str, Any]) -> Dict[str, Any]:
+            return {
+                "model": request.model,
+                "created_at": _timestamp(),
+                "done": True,
+                "total_duration": int((time.perf_counter() - started) * 1e9),
+                **extra,
+            }
+
+        if not request.stream:
+            text = await backend.agenerate(
+                request.prompt, temperature=temperature, max_output_tokens=max_output_tokens
+            )
+            return JSONResponse(final({"response": text}))
+
+        async def lines() -> AsyncIterator[str]:
+            count = 0
+            async for token in backend.astream(
+                request.prompt, temperature=temperature, max_output_tokens=max_output_tokens
+            ):
+                count += 1
+                chunk = {"model": request.model, "created_at": _timestamp(), "response": token, "done": False}
+                yield json.dumps(chunk) + "\n"
+            yield json.dumps(final({"response": "", "eval_count": count})) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency", type=float, default=0.4, help="seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=60.0, help="0 emits all tokens at once")
+    parser.add_argument("--response-tokens", type=int, default=120)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    backend = FakeLLMBackend(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        response_tokens=args.response_tokens,
+    )
+    uvicorn.run(create_app(backend), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
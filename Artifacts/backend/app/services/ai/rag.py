@@ -3,24 +3,24 @@
 from __future__ import annotations
 
 import logging
-import math
-import re
-from collections import Counter, defaultdict
-from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
+from app.core.config import settings
+from app.db.changes import ChangeSet, register_pre_commit_hook
+from app.services.jobs import maintenance_task
+from app.utils.pagination import iter_pages
 from app.utils.reporting import month_label
 
-logger = logging.getLogger(__name__)
-
-_WORD_PATTERN = re.compile(r"[A-Za-z0-9']+")
+from . import index, vectors
 
+logger = logging.getLogger(__name__)
 
-def _tokenize(text: str) -> List[str]:
-    return _WORD_PATTERN.findall(text.lower())
-
+# Sources re-summarized per transaction during reindexing.
+RAG_REINDEX_BATCH_SIZE = 200
 
 def _truncate(text: str, max_length: int = 3800) -> str:
     if len(text) <= max_length:
@@ -99,129 +99,236 @@ def _employee_summary(
     return "\n".join(lines)
 
 
-def reindex_rag_cache(db: Session, *, manager_id: Optional[int] = None) -> int:
-    """Populate the AI RAG cache with project and employee summaries."""
+def _build_documents(
+    db: Session,
+    *,
+    project_ids: Iterable[int] = (),
+    employee_ids: Iterable[int] = (),
+) -> int:
+    """Rebuild the cached documents for the given sources in the current transaction.
 
-    created = 0
+    Sources that no longer exist (or are no longer employees) lose their
+    document. Nothing is committed; returns the number of documents written.
+    """
 
-    projects = crud.get_projects(db, limit=500, manager_id=manager_id)
+    project_ids = set(project_ids)
+    employee_ids = set(employee_ids)
+    documents: List[schemas.AIRagCacheCreate] = []
+
+    projects = crud.get_projects_with_assignment_details(db, project_ids)
     for project in projects:
-        assignments = crud.get_assignments_for_project(db, project_id=project.id)
+        assignments = sorted(project.assignments, key=lambda assignment: assignment.id)
         document_text = _truncate(_project_summary(project, assignments))
-        if not document_text:
-            continue
-        payload = schemas.AIRagCacheCreate(
-            source_entity="project",
-            source_id=project.id,
-            document_text=document_text,
-        )
-        crud.create_or_update_rag_cache(db, payload)
-        created += 1
+        if document_text:
+            documents.append(
+                schemas.AIRagCacheCreate(
+                    source_entity="project",
+                    source_id=project.id,
+                    owner_manager_id=project.manager_id,
+                    document_text=document_text,
+                )
+            )
+    crud.delete_rag_documents_for_sources(
+        db, "project", project_ids - {project.id for project in projects}
+    )
 
-    monthly_rows = crud.get_monthly_user_project_allocations(db)
+    employees = crud.get_users_by_ids(db, employee_ids, system_role=models.SystemRole.EMPLOYEE)
     rows_by_user: Dict[int, List[Dict[str, object]]] = defaultdict(list)
-    for row in monthly_rows:
-        rows_by_user[int(row["user_id"])].append(row)
-
-    employees = crud.get_users(
-        db,
-        limit=2000,
-        manager_id=manager_id,
-        system_role=models.SystemRole.EMPLOYEE,
-    )
+    if employees:
+        monthly_rows = crud.get_monthly_user_project_allocations(
+            db, user_ids=[employee.id for employee in employees]
+        )
+        for row in monthly_rows:
+            rows_by_user[int(row["user_id"])].append(row)
     for employee in employees:
-        document_text = _truncate(
-            _employee_summary(employee, rows_by_user.get(employee.id, []))
+        documents.append(
+            schemas.AIRagCacheCreate(
+                source_entity="employee",
+                source_id=employee.id,
+                owner_manager_id=employee.manager_id,
+                document_text=_truncate(_employee_summary(employee, rows_by_user.get(employee.id, []))),
+            )
         )
-        payload = schemas.AIRagCacheCreate(
-            source_entity="employee",
-            source_id=employee.id,
-            document_text=document_text,
+    crud.delete_rag_documents_for_sources(
+        db, "employee", employee_ids - {employee.id for employee in employees}
+    )
+
+    crud.upsert_rag_documents(db, documents)
+    return len(documents)
+
+
+def reindex_rag_cache(db: Session, *, manager_id: Optional[int] = None) -> int:
+    """Populate the AI RAG cache with summaries of every project and employee in scope."""
+
+    project_ids = [
+        project.id
+        for project in iter_pages(
+            lambda cursor: crud.get_projects(
+                db, limit=RAG_REINDEX_BATCH_SIZE, after=cursor, manager_id=manager_id
+            )
         )
-        crud.create_or_update_rag_cache(db, payload)
-        created += 1
+    ]
+    employee_ids = [
+        employee.id
+        for employee in iter_pages(
+            lambda cursor: crud.get_users(
+                db,
+                limit=RAG_REINDEX_BATCH_SIZE,
+                after=cursor,
+                manager_id=manager_id,
+                system_role=models.SystemRole.EMPLOYEE,
+            )
+        )
+    ]
 
-    logger.info("RAG reindex complete", created_documents=created)
+    created = 0
+    for start in range(0, max(len(project_ids), len(employee_ids)), RAG_REINDEX_BATCH_SIZE):
+        created += _build_documents(
+            db,
+            project_ids=project_ids[start : start + RAG_REINDEX_BATCH_SIZE],
+            employee_ids=employee_ids[start : start + RAG_REINDEX_BATCH_SIZE],
+        )
+    index.index_stale_documents(db, commit=False)
+    db.commit()
+
+    logger.info("RAG reindex complete: %d documents", created)
     return created
 
 
+def refresh_dirty_rag_documents(db: Session, *, batch_size: Optional[int] = None) -> int:
+    """Rebuild only the documents whose sources changed since they were indexed.
+
+    Each batch of dirty sources is re-summarized, re-indexed and cleared in a
+    single transaction. Returns the number of sources processed.
+    """
+
+    batch_size = batch_size or RAG_REINDEX_BATCH_SIZE
+    processed = 0
+    while True:
+        dirty = crud.get_dirty_rag_sources(db, limit=batch_size)
+        if not dirty:
+            break
+        _build_documents(
+            db,
+            project_ids=[source_id for entity, source_id, _ in dirty if entity == "project"],
+            employee_ids=[source_id for entity, source_id, _ in dirty if entity == "employee"],
+        )
+        crud.clear_dirty_rag_sources(db, dirty)
+        index.index_stale_documents(db, commit=False)
+        db.commit()
+        processed += len(dirty)
+
+    if processed:
+        logger.info("Refreshed %d changed RAG sources", processed)
+    return processed
+
+
+@maintenance_task
+def refresh_rag_index(db: Session) -> int:
+    """Bring the RAG cache up to date: build it when empty, else refresh changed sources.
+
+    Runs on the job runner's maintenance tick so chat requests only read the
+    index. Returns the number of sources rebuilt.
+    """
+
+    if not index.has_documents(db):
+        return reindex_rag_cache(db)
+    processed = refresh_dirty_rag_documents(db)
+    index.index_stale_documents(db)
+    return processed
+
+
+@register_pre_commit_hook
+def _mark_changed_sources(session: Session, changes: ChangeSet) -> None:
+    """Queue the RAG documents affected by a transaction's data changes."""
+
+    if not changes.touches_entities():
+        return
+
+    project_ids: Set[int] = set(changes.project_ids)
+    employee_ids: Set[int] = set(changes.user_ids)
+
+    # Allocation and assignment changes affect the project and employee on the
+    # assignment; project and user edits (names, managers) also show up in the
+    # documents of the people and projects that mention them.
+    pairs = crud.get_assignment_pairs(
+        session,
+        assignment_ids=changes.assignment_ids,
+        project_ids=changes.project_ids,
+        user_ids=changes.user_ids,
+    )
+    for project_id, user_id in pairs:
+        project_ids.add(project_id)
+        employee_ids.add(user_id)
+    if changes.user_ids:
+        project_ids.update(crud.get_project_ids_managed_by(session, changes.user_ids))
+        employee_ids.update(crud.get_user_ids_managed_by(session, changes.user_ids))
+
+    crud.mark_rag_sources_dirty(
+        session,
+        [("project", project_id) for project_id in project_ids]
+        + [("employee", user_id) for user_id in employee_ids],
+    )
+
+
 def retrieve_rag_context(
     db: Session, query: str, limit: int = 5, manager_id: Optional[int] = None
 ) -> List[Tuple[str, str]]:
-    """Return the most relevant cached documents for the supplied query."""
-
-    documents = crud.get_all_rag_cache_documents(db)
-    if not documents:
-        logger.info("AI RAG cache empty; rebuilding before retrieval")
-        reindex_rag_cache(db, manager_id=manager_id)
-        documents = crud.get_all_rag_cache_documents(db)
-    
-    # Filter documents by manager if specified
-    if manager_id is not None:
-        # Get manager's employees and projects to filter context
-        manager_employees = crud.get_users(db, limit=2000, manager_id=manager_id, system_role=models.SystemRole.EMPLOYEE)
-        manager_projects = crud.get_projects(db, limit=500, manager_id=manager_id)
-        
-        employee_ids = {emp.id for emp in manager_employees}
-        project_ids = {proj.id for proj in manager_projects}
-        
-        # Filter to only documents related to this manager's data
-        documents = [
-            doc for doc in documents
-            if (doc.source_entity == "employee" and doc.source_id in employee_ids) or
-               (doc.source_entity == "project" and doc.source_id in project_ids)
-        ]
-
-    if not documents:
+    """Return the most relevant cached documents for the supplied query.
+
+    Documents are ranked with BM25 over the persisted inverted index; when
+    fewer than ``limit`` documents match, the rest are padded with other
+    documents in the caller's scope so prompts keep some general context.
+
+    Retrieval only reads: sources changed since the last `refresh_rag_index`
+    tick (or explicit reindex) are served from their previous summaries.
+    """
+
+    criteria = _manager_criteria(manager_id)
+    if not index.has_documents(db, criteria):
         return []
 
-    query_tokens = _tokenize(query)
-    if not query_tokens:
-        query_tokens = query.lower().split()
-    query_counts = Counter(query_tokens)
-
-    scored: List[Tuple[float, models.AIRagCache]] = []
-    for document in documents:
-        doc_tokens = _tokenize(document.document_text)
-        if not doc_tokens:
-            continue
-        doc_counts = Counter(doc_tokens)
-        score = sum(query_counts[token] * doc_counts.get(token, 0) for token in query_counts)
-        # bonus for entity-specific matches
-        key = document.source_entity
-        if key == "project" and any(project_token in document.document_text.lower() for project_token in query_tokens):
-            score += 1.5
-        if key == "employee" and any(employee_token in document.document_text.lower() for employee_token in query_tokens):
-            score += 1.25
-        # Normalize by document length to avoid bias toward long docs
-        normalization = math.sqrt(sum(count * count for count in doc_counts.values())) or 1.0
-        score = score / normalization
-        scored.append((score, document))
-
-    scored.sort(key=lambda pair: pair[0], reverse=True)
-
-    context: List[Tuple[str, str]] = []
-    seen_sources: set[str] = set()
-    for score, document in scored:
-        source_key = f"{document.source_entity}:{document.source_id}"
-        if source_key in seen_sources:
-            continue
-        if score <= 0 and len(context) >= max(1, limit // 2):
-            break
-        seen_sources.add(source_key)
-        context.append((source_key, document.document_text))
-        if len(context) >= limit:
-            break
+    ranked = _rank_documents(db, query, limit=limit, criteria=criteria)
+    ranked_ids = [document_id for document_id, _ in ranked]
+
+    documents = index.lookup_documents(db, ranked_ids)
+    ordered = [documents[document_id] for document_id in ranked_ids if document_id in documents]
+    ordered.extend(
+        index.fill_documents(db, exclude=ranked_ids, limit=limit - len(ordered), criteria=criteria)
+    )
+
+    return [
+        (f"{document.source_entity}:{document.source_id}", document.document_text)
+        for document in ordered[:limit]
+    ]
 
-    if len(context) < limit:
-        for _, document in scored:
-            source_key = f"{document.source_entity}:{document.source_id}"
-            if source_key in seen_sources:
-                continue
-            seen_sources.add(source_key)
-            context.append((source_key, document.document_text))
-            if len(context) >= limit:
-                break
 
-    return context[:limit]
+def _rank_documents(db: Session, query: str, *, limit: int, criteria: Sequence) -> List[Tuple[int, float]]:
+    """Rank documents with the retrieval mode chosen by ``settings.RAG_RETRIEVAL_MODE``."""
 
+    mode = settings.RAG_RETRIEVAL_MODE.lower()
+    if mode == "vector":
+        return vectors.search(db, query, limit=limit, criteria=criteria)
+
+    query_tokens = index.tokenize(query) or query.lower().split()
+    if mode != "hybrid":
+        return index.search(db, query_tokens, limit=limit, criteria=criteria)
+
+    # Fuse deeper candidate lists so documents ranked moderately by both
+    # retrievers can overtake ones ranked highly by just one.
+    depth = limit * 4
+    return vectors.reciprocal_rank_fusion(
+        [
+            index.search(db, query_tokens, limit=depth, criteria=criteria),
+            vectors.search(db, query, limit=depth, criteria=criteria),
+        ],
+        limit=limit,
+    )
+
+
+def _manager_criteria(manager_id: Optional[int]) -> List:
+    """SQL filters restricting RAG documents to one manager's partition."""
+
+    if manager_id is None:
+        return []
+    return [models.AIRagCache.owner_manager_id == manager_id]
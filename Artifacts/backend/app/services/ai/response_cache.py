@@ -0,0 +1,122 @@
+"""Persistent cache of Gemini completions for the AI insight endpoints.
+
+The narratives for conflicts, forecasts and balance suggestions only change
+when the manager's staffing data does, so completions are stored in the
+``ai_response_cache`` table under a key derived from the prompt, the model and
+its sampling settings, and the report data versions of the manager's scope
+(see `crud.get_report_data_versions`). While the data is unchanged a repeat
+request is answered from the table without calling Gemini.
+
+Lookups only read: the time of each hit is kept in memory and written by the
+next `store`, which runs in a session of its own, just before it evicts the
+least recently used entries.
+
+Key components:
+- `data_version`: stamp of a manager's staffing data.
+- `cache_key`: hash of prompt, model, sampling settings and data version.
+- `lookup`: a fresh cached completion, if any.
+- `store`: saves a completion in its own session and applies LRU eviction.
+"""
+
+from __future__ import annotations
+
+import datetime
+import hashlib
+import json
+import logging
+import threading
+from typing import Dict, Optional
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, sessionmaker
+
+from app import crud, models
+from app.core.config import settings
+from app.services.report_cache import manager_scope
+
+logger = logging.getLogger(__name__)
+
+# Cache hits not yet written to ``last_used_at``, {cache_key: used_at}.
+_PENDING_USES: Dict[str, datetime.datetime] = {}
+_PENDING_LOCK = threading.Lock()
+
+
+def enabled() -> bool:
+    return settings.AI_RESPONSE_CACHE_TTL_SECONDS > 0
+
+
+def data_version(db: Session, *, manager_id: Optional[int] = None) -> str:
+    """Return a short stamp that changes whenever the manager's staffing data does."""
+
+    versions = crud.get_report_data_versions(
+        db, [manager_scope(manager_id), (models.REPORT_SCOPE_EPOCH, 0)]
+    )
+    payload = json.dumps([manager_id, sorted(versions.items())])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def cache_key(
+    prompt: str,
+    *,
+    model: str,
+    temperature: float,
+    max_output_tokens: int,
+    data_version: str,
+) -> str:
+    payload = json.dumps([model, temperature, max_output_tokens, data_version, prompt])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def _oldest_fresh() -> datetime.datetime:
+    return _utcnow() - datetime.timedelta(seconds=settings.AI_RESPONSE_CACHE_TTL_SECONDS)
+
+
+def lookup(db: Session, key: str) -> Optional[str]:
+    """Return the cached completion for ``key`` unless it has expired.
+
+    Only reads through ``db``; the hit is recorded for the next `store`.
+    """
+
+    try:
+        cached = crud.get_cached_ai_response(db, key, not_before=_oldest_fresh())
+    except SQLAlchemyError:
+        db.rollback()
+        logger.warning("AI response cache lookup failed", exc_info=True)
+        return None
+    if cached is not None:
+        with _PENDING_LOCK:
+            _PENDING_USES[key] = _utcnow()
+    return cached
+
+
+def store(bind: Engine, key: str, *, model: str, response_text: str) -> None:
+    """Save a completion using a session of its own.
+
+    A separate session keeps the write independent of the request's session,
+    which may already be closed when an async caller gets here. Failures are
+    logged and otherwise ignored: the cache is an optimisation only.
+    """
+
+    with _PENDING_LOCK:
+        used = dict(_PENDING_USES)
+        _PENDING_USES.clear()
+    session_factory = sessionmaker(bind=bind, autocommit=False, autoflush=False)
+    with session_factory() as db:
+        try:
+            crud.touch_cached_ai_responses(db, used)
+            crud.store_cached_ai_response(
+                db,
+                key,
+                model=model,
+                response_text=response_text,
+                max_entries=settings.AI_RESPONSE_CACHE_MAX_ENTRIES,
+            )
+            crud.delete_expired_ai_responses(db, created_before=_oldest_fresh())
+        except SQLAlchemyError:
+            db.rollback()
+            logger.warning("Failed to store AI response in cache", exc_info=True)
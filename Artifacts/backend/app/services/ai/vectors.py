@@ -0,0 +1,313 @@
+"""Embedding-based vector retrieval over the AI RAG cache.
+
+Cached documents are split into line-aligned chunks and embedded with a local
+model: a signed feature-hashing embedder by default (no download, no network),
+or a sentence-transformers model when configured and installed. Chunk vectors
+are persisted in ``ai_rag_chunks`` and served from a memory-mapped NumPy matrix
+under ``settings.VECTOR_STORE_PATH``, so top-k retrieval is a single
+matrix-vector product.
+
+Key components:
+- `get_embedder`: the configured embedder (cached per process).
+- `sync_document_vectors`: embeds documents that have no chunks yet.
+- `search`: cosine top-k over the memory-mapped matrix.
+- `reciprocal_rank_fusion`: merges lexical and vector rankings for hybrid mode.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import os
+import re
+import threading
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import delete, func, insert
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core.config import settings
+
+from .index import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Approximate maximum tokens per embedded chunk.
+CHUNK_TOKENS = 96
+
+# Documents embedded per insert batch when syncing vectors.
+_EMBED_BATCH_SIZE = 256
+
+# Rank constant for reciprocal-rank fusion (Cormack et al. use 60).
+RRF_K = 60
+
+
+class HashingEmbedder:
+    """Signed feature-hashing embedder over unigrams and bigrams.
+
+    Deterministic across processes (CRC32 rather than Python's salted
+    ``hash``), so persisted vectors stay valid after a restart.
+    """
+
+    def __init__(self, dim: int) -> None:
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text: str) -> Counter:
+        tokens = tokenize(text)
+        features = Counter(tokens)
+        features.update(f"{left} {right}" for left, right in zip(tokens, tokens[1:]))
+        return features
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, count in self._features(text).items():
+                digest = zlib.crc32(feature.encode("utf-8"))
+                sign = 1.0 if (digest >> 31) & 1 else -1.0
+                matrix[row, digest % self.dim] += sign * (1.0 + math.log(count))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+
+class SentenceTransformerEmbedder:
+    """Wraps a locally cached sentence-transformers model."""
+
+    def __init__(self, model_name: str) -> None:
+        from sentence_transformers import SentenceTransformer
+
+        self._model = SentenceTransformer(model_name, device="cpu")
+        self.name = "st-" + re.sub(r"[^A-Za-z0-9._-]+", "_", model_name)
+        self.dim = int(self._model.get_sentence_embedding_dimension())
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = self._model.encode(list(texts), normalize_embeddings=True, show_progress_bar=False)
+        return np.asarray(vectors, dtype=np.float32)
+
+
+_EMBEDDERS: Dict[Tuple[str, str, int], object] = {}
+_LOCK = threading.Lock()
+
+
+def get_embedder():
+    """Return the embedder selected by ``settings.RAG_EMBEDDING_BACKEND``."""
+
+    backend = settings.RAG_EMBEDDING_BACKEND.lower()
+    key = (backend, settings.EMBEDDING_MODEL_NAME, settings.RAG_EMBEDDING_DIM)
+    with _LOCK:
+        embedder = _EMBEDDERS.get(key)
+        if embedder is None:
+            if backend == "sentence-transformers":
+                try:
+                    embedder = SentenceTransformerEmbedder(settings.EMBEDDING_MODEL_NAME)
+                except Exception as exc:  # ImportError or a missing local model
+                    logger.warning("Falling back to hashing embeddings: %s", exc)
+                    embedder = HashingEmbedder(settings.RAG_EMBEDDING_DIM)
+            else:
+                embedder = HashingEmbedder(settings.RAG_EMBEDDING_DIM)
+            _EMBEDDERS[key] = embedder
+        return embedder
+
+
+def chunk_text(text: str, max_tokens: int = CHUNK_TOKENS) -> List[str]:
+    """Split a document into chunks of whole lines of about ``max_tokens`` tokens."""
+
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for line in (text or "").splitlines():
+        line_tokens = len(tokenize(line))
+        if current and size + line_tokens > max_tokens:
+            chunks.append("\n".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += line_tokens
+    if current:
+        chunks.append("\n".join(current))
+    return chunks or [text or ""]
+
+
+def sync_document_vectors(db: Session) -> int:
+    """Embed every cached document that has no chunk vectors for the current embedder.
+
+    Vectors from a different embedder are discarded first. Returns the number
+    of documents embedded and commits when anything changed.
+    """
+
+    embedder = get_embedder()
+    Chunk = models.AIRagChunk
+    Document = models.AIRagCache
+
+    changed = False
+    if db.query(Chunk.id).filter(Chunk.embedder != embedder.name).first() is not None:
+        db.execute(delete(Chunk))
+        changed = True
+
+    missing = (
+        db.query(Document.id, Document.document_text)
+        .filter(~db.query(Chunk.id).filter(Chunk.document_id == Document.id).exists())
+        .all()
+    )
+    for start in range(0, len(missing), _EMBED_BATCH_SIZE):
+        batch = missing[start : start + _EMBED_BATCH_SIZE]
+        owners: List[int] = []
+        texts: List[str] = []
+        positions: List[int] = []
+        for document_id, text in batch:
+            for position, chunk in enumerate(chunk_text(text)):
+                owners.append(document_id)
+                texts.append(chunk)
+                positions.append(position)
+        vectors = embedder.embed(texts)
+        db.execute(
+            insert(Chunk),
+            [
+                {
+                    "document_id": document_id,
+                    "chunk_index": position,
+                    "embedder": embedder.name,
+                    "vector": vector.tobytes(),
+                }
+                for document_id, position, vector in zip(owners, positions, vectors)
+            ],
+        )
+        changed = True
+
+    if changed:
+        db.commit()
+    return len(missing)
+
+
+_MATRICES: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+
+def _store_prefix(db: Session, embedder_name: str) -> str:
+    database = hashlib.sha1(str(db.get_bind().engine.url).encode("utf-8")).hexdigest()[:12]
+    return f"rag-{database}-{embedder_name}"
+
+
+def _load_matrix(db: Session, embedder) -> Tuple[np.ndarray, np.ndarray]:
+    """Return ``(vectors, document_ids)`` for the current chunk set, memory-mapped."""
+
+    Chunk = models.AIRagChunk
+    count, max_id = db.query(func.count(Chunk.id), func.max(Chunk.id)).one()
+    if not count:
+        return np.zeros((0, embedder.dim), dtype=np.float32), np.zeros(0, dtype=np.int64)
+
+    directory = Path(settings.VECTOR_STORE_PATH)
+    prefix = _store_prefix(db, embedder.name)
+    base = directory / f"{prefix}-{count}-{max_id}"
+    key = str(base)
+    with _LOCK:
+        cached = _MATRICES.get(key)
+    if cached is not None:
+        return cached
+
+    vectors_path = base.with_name(base.name + ".vectors.npy")
+    ids_path = base.with_name(base.name + ".ids.npy")
+    if not (vectors_path.exists() and ids_path.exists()):
+        rows = db.query(Chunk.document_id, Chunk.vector).order_by(Chunk.id).all()
+        document_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        vectors = np.frombuffer(b"".join(row[1] for row in rows), dtype=np.float32)
+        vectors = vectors.reshape(len(rows), embedder.dim)
+
+        directory.mkdir(parents=True, exist_ok=True)
+        for path, array in ((vectors_path, vectors), (ids_path, document_ids)):
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            with tmp_path.open("wb") as handle:
+                np.save(handle, array)
+            os.replace(tmp_path, path)
+        for stale in directory.glob(f"{prefix}-*.npy"):
+            if stale not in (vectors_path, ids_path):
+                stale.unlink(missing_ok=True)
+
+    loaded = (np.load(vectors_path, mmap_mode="r"), np.load(ids_path))
+    with _LOCK:
+        for stale_key in [k for k in _MATRICES if k.startswith(str(directory / prefix))]:
+            _MATRICES.pop(stale_key, None)
+        _MATRICES[key] = loaded
+    return loaded
+
+
+def search(
+    db: Session,
+    query: str,
+    *,
+    limit: int,
+    criteria: Sequence = (),
+) -> List[Tuple[int, float]]:
+    """Rank cached documents by cosine similarity to ``query``.
+
+    A document scores as its best-matching chunk. ``criteria`` are SQL filters
+    on ``AIRagCache`` limiting which documents may be returned.
+    """
+
+    if limit <= 0 or not query.strip():
+        return []
+
+    sync_document_vectors(db)
+    embedder = get_embedder()
+    vectors, document_ids = _load_matrix(db, embedder)
+    if not len(document_ids):
+        return []
+
+    if criteria:
+        # Score only the rows of the requested partition.
+        allowed = [
+            document_id
+            for (document_id,) in db.query(models.AIRagCache.id).filter(*criteria).all()
+        ]
+        rows = np.flatnonzero(np.isin(document_ids, allowed))
+        if not len(rows):
+            return []
+        vectors, document_ids = vectors[rows], document_ids[rows]
+
+    scores = vectors @ embedder.embed([query])[0]
+
+    # Partial selection keeps the common case O(n); fall back to a full sort
+    # only when chunks of the same documents crowd out the candidate window.
+    window = min(len(scores), max(limit * 8, 32))
+    candidates = np.argpartition(-scores, window - 1)[:window]
+    ranked = _unique_documents(scores, document_ids, candidates, limit)
+    if len(ranked) < limit and window < len(scores):
+        ranked = _unique_documents(scores, document_ids, np.arange(len(scores)), limit)
+    return ranked
+
+
+def _unique_documents(
+    scores: np.ndarray, document_ids: np.ndarray, candidates: np.ndarray, limit: int
+) -> List[Tuple[int, float]]:
+    ranked: List[Tuple[int, float]] = []
+    seen: set[int] = set()
+    for position in candidates[np.argsort(-scores[candidates], kind="stable")]:
+        score = float(scores[position])
+        if not score > 0:
+            break
+        document_id = int(document_ids[position])
+        if document_id in seen:
+            continue
+        seen.add(document_id)
+        ranked.append((document_id, score))
+        if len(ranked) >= limit:
+            break
+    return ranked
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Tuple[int, float]]], *, limit: Optional[int] = None
+) -> List[Tuple[int, float]]:
+    """Merge several ``(document_id, score)`` rankings by reciprocal rank."""
+
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, (document_id, _) in enumerate(ranking, start=1):
+            fused[document_id] = fused.get(document_id, 0.0) + 1.0 / (RRF_K + rank)
+    ordered = sorted(fused.items(), key=lambda item: (-item[1], item[0]))
+    return ordered[:limit] if limit is not None else ordered
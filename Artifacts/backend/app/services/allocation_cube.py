@@ -0,0 +1,492 @@
+"""In-memory (user × project × month) allocation cube for dashboard reads.
+
+The portfolio dashboard, manager rollup and utilization reports all answer
+questions of the form "sum allocated hours over some users/projects/months".
+Instead of re-running several GROUP BY queries per request, each manager scope
+gets a dense NumPy array built once from the database and then kept current by
+setting the cells each commit touched to the hours it committed (see
+`app.db.changes`). Structural edits (assignments, projects, roles, users) drop
+the cube so the next read rebuilds it.
+
+Cubes live in process memory and are keyed by engine, so separate databases
+(and test fixtures) never share state. Deployments that run several API worker
+processes keep one cube per worker. Each cube is stamped with the report data
+versions of its scope (see `app.services.report_cache`) as of its build; a
+worker's own commits advance the stamp along with the deltas, and a read that
+finds the stored versions ahead of the stamp (another worker wrote) rebuilds
+the cube.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.crud import ReportScope
+from app.db.changes import ChangeSet, register_commit_hook, register_pre_commit_hook
+from app.services.report_cache import manager_scope
+
+logger = logging.getLogger(__name__)
+
+MonthKey = Tuple[int, int]
+
+
+def _month_ordinal(year: int, month: int) -> int:
+    return year * 12 + (month - 1)
+
+
+def _ordinal_to_month(ordinal: int) -> MonthKey:
+    return ordinal // 12, ordinal % 12 + 1
+
+
+@dataclass(frozen=True)
+class RoleTotals:
+    """Funded vs allocated totals for one role within a cube."""
+
+    role_id: int
+    role_name: str
+    funded_hours: int
+    allocated_hours: int
+    assignment_count: int
+
+
+class AllocationCube:
+    """Dense allocated-hours array indexed by (user, project, month).
+
+    ``manager_id`` scopes the cube to that manager's projects; ``None`` covers
+    every project. Each assignment maps to exactly one (user, project) cell
+    because a user can only be assigned to a project once.
+    """
+
+    def __init__(
+        self,
+        *,
+        manager_id: Optional[int],
+        assignments: Sequence[Tuple[int, int, int, int, int]],
+        project_names: Dict[int, str],
+        role_names: Dict[int, str],
+        allocations: Sequence[Tuple[int, int, int, int]],
+    ) -> None:
+        self.manager_id = manager_id
+        # Report data versions of `data_scopes` the cube reflects; empty when
+        # unknown, which never matches the database.
+        self.data_versions: Dict[ReportScope, int] = {}
+        self._lock = threading.RLock()
+
+        assignment_array = (
+            np.asarray(assignments, dtype=np.int64).reshape(-1, 5)
+        )
+        # columns: assignment_id, user_id, project_id, role_id, funded_hours
+        order = np.argsort(assignment_array[:, 0], kind="stable")
+        assignment_array = assignment_array[order]
+
+        self.user_ids = np.unique(assignment_array[:, 1])
+        self.project_ids = np.unique(assignment_array[:, 2])
+        self.role_ids = np.unique(assignment_array[:, 3])
+        self.user_index: Dict[int, int] = {int(uid): i for i, uid in enumerate(self.user_ids)}
+        self.project_index: Dict[int, int] = {int(pid): i for i, pid in enumerate(self.project_ids)}
+        self.project_names: List[str] = [project_names.get(int(pid), "") for pid in self.project_ids]
+        self.role_names: List[str] = [role_names.get(int(rid), "") for rid in self.role_ids]
+
+        self._assignment_ids = assignment_array[:, 0]
+        self._assignment_user = np.searchsorted(self.user_ids, assignment_array[:, 1])
+        self._assignment_project = np.searchsorted(self.project_ids, assignment_array[:, 2])
+        self._assignment_role = np.searchsorted(self.role_ids, assignment_array[:, 3])
+        self._assignment_funded = assignment_array[:, 4]
+        self._assignment_cells: Dict[int, Tuple[int, int]] = {
+            int(aid): (int(u), int(p))
+            for aid, u, p in zip(
+                self._assignment_ids, self._assignment_user, self._assignment_project
+            )
+        }
+
+        allocation_array = np.asarray(allocations, dtype=np.int64).reshape(-1, 4)
+        # columns: assignment_id, year, month, allocated_hours
+        if len(allocation_array):
+            ordinals = allocation_array[:, 1] * 12 + (allocation_array[:, 2] - 1)
+            self.month_origin = int(ordinals.min())
+            month_count = int(ordinals.max()) - self.month_origin + 1
+        else:
+            ordinals = np.empty(0, dtype=np.int64)
+            self.month_origin = 0
+            month_count = 0
+
+        self.hours = np.zeros(
+            (len(self.user_ids), len(self.project_ids), month_count), dtype=np.int64
+        )
+        if len(allocation_array):
+            rows = np.searchsorted(self._assignment_ids, allocation_array[:, 0])
+            rows = np.clip(rows, 0, max(len(self._assignment_ids) - 1, 0))
+            known = self._assignment_ids[rows] == allocation_array[:, 0]
+            rows = rows[known]
+            np.add.at(
+                self.hours,
+                (
+                    self._assignment_user[rows],
+                    self._assignment_project[rows],
+                    ordinals[known] - self.month_origin,
+                ),
+                allocation_array[known, 3],
+            )
+
+    # ------------------------------------------------------------------
+    # Month axis helpers
+    # ------------------------------------------------------------------
+
+    @property
+    def month_count(self) -> int:
+        return self.hours.shape[2]
+
+    def _month_slot(self, year: int, month: int) -> Optional[int]:
+        slot = _month_ordinal(year, month) - self.month_origin
+        if 0 <= slot < self.month_count:
+            return slot
+        return None
+
+    def _month_range(self, start: MonthKey, end: MonthKey) -> Tuple[int, int]:
+        """Return a clipped [lo, hi) slot range for the inclusive month window."""
+
+        lo = _month_ordinal(*start) - self.month_origin
+        hi = _month_ordinal(*end) - self.month_origin + 1
+        return max(lo, 0), min(max(hi, 0), self.month_count)
+
+    def _grow_to(self, ordinal: int) -> int:
+        if self.month_count == 0:
+            self.month_origin = ordinal
+            self.hours = np.zeros((*self.hours.shape[:2], 1), dtype=np.int64)
+            return 0
+        slot = ordinal - self.month_origin
+        if slot < 0:
+            self.hours = np.pad(self.hours, ((0, 0), (0, 0), (-slot, 0)))
+            self.month_origin = ordinal
+            return 0
+        if slot >= self.month_count:
+            self.hours = np.pad(self.hours, ((0, 0), (0, 0), (0, slot - self.month_count + 1)))
+        return slot
+
+    # ------------------------------------------------------------------
+    # Incremental maintenance
+    # ------------------------------------------------------------------
+
+    def advance_versions(self, committed: Dict[ReportScope, int]) -> bool:
+        """
+        Move the version stamp past one committed transaction.
+
+        Returns False when ``committed`` skips a version, i.e. another
+        connection (or worker) wrote since the cube was stamped.
+        """
+
+        with self._lock:
+            if not self.data_versions:
+                return False
+            advanced = dict(self.data_versions)
+            for scope, version in self.data_versions.items():
+                new_version = committed.get(scope)
+                if new_version is None:
+                    continue
+                if new_version != version + crud.report_version_step(scope, committed):
+                    return False
+                advanced[scope] = new_version
+            self.data_versions = advanced
+        return True
+
+    def owns_assignment(self, assignment_id: int) -> bool:
+        return assignment_id in self._assignment_cells
+
+    def set_cell(self, assignment_id: int, year: int, month: int, hours: int) -> bool:
+        """Set a cell to ``hours``. Returns False if the assignment is unknown."""
+
+        cell = self._assignment_cells.get(assignment_id)
+        if cell is None:
+            return False
+        with self._lock:
+            slot = self._grow_to(_month_ordinal(year, month))
+            self.hours[cell[0], cell[1], slot] = hours
+        return True
+
+    # ------------------------------------------------------------------
+    # Read-side slices
+    # ------------------------------------------------------------------
+
+    def user_month_hours(self, year: int, month: int) -> Dict[int, int]:
+        """Total hours per user for one month (users with no hours omitted)."""
+
+        slot = self._month_slot(year, month)
+        if slot is None:
+            return {}
+        with self._lock:
+            totals = self.hours[:, :, slot].sum(axis=1)
+        nonzero = np.nonzero(totals)[0]
+        return {int(self.user_ids[i]): int(totals[i]) for i in nonzero}
+
+    def user_project_hours(self, user_id: int, year: int, month: int) -> List[Tuple[int, str, int]]:
+        """(project_id, project_name, hours) for one user/month, largest first."""
+
+        u = self.user_index.get(user_id)
+        slot = self._month_slot(year, month)
+        if u is None or slot is None:
+            return []
+        with self._lock:
+            row = self.hours[u, :, slot].copy()
+        nonzero = np.nonzero(row)[0]
+        ordered = nonzero[np.argsort(-row[nonzero], kind="stable")]
+        return [
+            (int(self.project_ids[p]), self.project_names[p], int(row[p]))
+            for p in ordered
+        ]
+
+    def user_monthly_totals(
+        self, start: MonthKey, end: MonthKey
+    ) -> Dict[int, List[Tuple[int, int, int]]]:
+        """(year, month, hours) per user across an inclusive month window."""
+
+        lo, hi = self._month_range(start, end)
+        if lo >= hi:
+            return {}
+        with self._lock:
+            window = self.hours[:, :, lo:hi].sum(axis=1)
+        users, slots = np.nonzero(window)
+        result: Dict[int, List[Tuple[int, int, int]]] = {}
+        for u, s in zip(users.tolist(), slots.tolist()):
+            year, month = _ordinal_to_month(self.month_origin + lo + s)
+            result.setdefault(int(self.user_ids[u]), []).append((year, month, int(window[u, s])))
+        return result
+
+    def funded_hours_by_user(self) -> Dict[int, int]:
+        totals = np.bincount(
+            self._assignment_user,
+            weights=self._assignment_funded,
+            minlength=len(self.user_ids),
+        )
+        return {int(uid): int(total) for uid, total in zip(self.user_ids, totals)}
+
+    def primary_roles(self) -> Dict[int, str]:
+        """The role name carrying the most funded hours for each user."""
+
+        if not len(self._assignment_ids):
+            return {}
+        name_keys = sorted(set(self.role_names))
+        name_index = {name: i for i, name in enumerate(name_keys)}
+        role_to_name = np.array([name_index[name] for name in self.role_names], dtype=np.int64)
+        funded = np.zeros((len(self.user_ids), len(name_keys)), dtype=np.int64)
+        np.add.at(
+            funded,
+            (self._assignment_user, role_to_name[self._assignment_role]),
+            self._assignment_funded,
+        )
+        best = funded.argmax(axis=1)
+        best_hours = funded[np.arange(len(self.user_ids)), best]
+        return {
+            int(self.user_ids[u]): name_keys[best[u]]
+            for u in np.nonzero(best_hours > 0)[0]
+            if name_keys[best[u]]
+        }
+
+    def role_totals(self, month: Optional[MonthKey] = None) -> List[RoleTotals]:
+        """Funded vs allocated hours per role, over all months or a single one."""
+
+        with self._lock:
+            if month is None:
+                cell_hours = self.hours.sum(axis=2)
+            else:
+                slot = self._month_slot(*month)
+                cell_hours = (
+                    self.hours[:, :, slot]
+                    if slot is not None
+                    else np.zeros(self.hours.shape[:2], dtype=np.int64)
+                )
+            allocated_per_assignment = cell_hours[self._assignment_user, self._assignment_project]
+
+        role_count = len(self.role_ids)
+        funded = np.bincount(self._assignment_role, weights=self._assignment_funded, minlength=role_count)
+        allocated = np.bincount(
+            self._assignment_role, weights=allocated_per_assignment, minlength=role_count
+        )
+        counts = np.bincount(self._assignment_role, minlength=role_count)
+        return [
+            RoleTotals(
+                role_id=int(self.role_ids[r]),
+                role_name=self.role_names[r],
+                funded_hours=int(funded[r]),
+                allocated_hours=int(allocated[r]),
+                assignment_count=int(counts[r]),
+            )
+            for r in range(role_count)
+        ]
+
+
+# ----------------------------------------------------------------------
+# Registry
+# ----------------------------------------------------------------------
+
+_REGISTRY: "weakref.WeakKeyDictionary[Engine, Dict[Optional[int], AllocationCube]]" = (
+    weakref.WeakKeyDictionary()
+)
+_REGISTRY_LOCK = threading.Lock()
+
+
+def _engine_for(db: Session) -> Engine:
+    bind = db.get_bind()
+    return bind.engine if hasattr(bind, "engine") else bind
+
+
+def data_scopes(manager_id: Optional[int]) -> Tuple[ReportScope, ...]:
+    """The report data version scopes a manager's cube depends on."""
+
+    return (manager_scope(manager_id), (models.REPORT_SCOPE_EPOCH, 0))
+
+
+def build_allocation_cube(db: Session, *, manager_id: Optional[int] = None) -> AllocationCube:
+    """Load a fresh cube for the manager scope with three flat queries."""
+
+    scopes = data_scopes(manager_id)
+    # Read before the data, so the stamp is never newer than what was loaded.
+    versions = crud.get_report_data_versions(db, scopes)
+
+    assignment_query = (
+        db.query(
+            models.ProjectAssignment.id,
+            models.ProjectAssignment.user_id,
+            models.ProjectAssignment.project_id,
+            models.ProjectAssignment.role_id,
+            models.ProjectAssignment.funded_hours,
+            models.Project.name,
+            models.Role.name,
+        )
+        .join(models.Project, models.Project.id == models.ProjectAssignment.project_id)
+        .join(models.Role, models.Role.id == models.ProjectAssignment.role_id)
+    )
+    allocation_query = (
+        db.query(
+            models.Allocation.project_assignment_id,
+            models.Allocation.year,
+            models.Allocation.month,
+            models.Allocation.allocated_hours,
+        )
+        .join(
+            models.ProjectAssignment,
+            models.ProjectAssignment.id == models.Allocation.project_assignment_id,
+        )
+    )
+    if manager_id is not None:
+        assignment_query = assignment_query.filter(models.Project.manager_id == manager_id)
+        allocation_query = allocation_query.join(
+            models.Project, models.Project.id == models.ProjectAssignment.project_id
+        ).filter(models.Project.manager_id == manager_id)
+
+    assignments = []
+    project_names: Dict[int, str] = {}
+    role_names: Dict[int, str] = {}
+    for assignment_id, user_id, project_id, role_id, funded, project_name, role_name in assignment_query:
+        assignments.append((assignment_id, user_id, project_id, role_id, funded or 0))
+        project_names[project_id] = project_name
+        role_names[role_id] = role_name
+
+    allocations = allocation_query.all()
+    cube = AllocationCube(
+        manager_id=manager_id,
+        assignments=assignments,
+        project_names=project_names,
+        role_names=role_names,
+        allocations=[tuple(row) for row in allocations],
+    )
+    # Without a snapshot spanning the queries (PostgreSQL's READ COMMITTED),
+    # a commit in between may already be in the data; leave such a cube
+    # unstamped so it is rebuilt rather than given that commit's deltas twice.
+    if crud.get_report_data_versions(db, scopes) == versions:
+        cube.data_versions = versions
+    logger.debug(
+        "Built allocation cube for manager %s: %s", manager_id, cube.hours.shape
+    )
+    return cube
+
+
+def _is_current(db: Session, cube: AllocationCube) -> bool:
+    versions = crud.get_report_data_versions(db, data_scopes(cube.manager_id))
+    return bool(cube.data_versions) and cube.data_versions == versions
+
+
+def get_allocation_cube(db: Session, *, manager_id: Optional[int] = None) -> AllocationCube:
+    """Return the cached cube for this database and manager, building it if needed."""
+
+    engine = _engine_for(db)
+    with _REGISTRY_LOCK:
+        cube = _REGISTRY.get(engine, {}).get(manager_id)
+    if cube is not None and _is_current(db, cube):
+        return cube
+
+    cube = build_allocation_cube(db, manager_id=manager_id)
+    with _REGISTRY_LOCK:
+        _REGISTRY.setdefault(engine, {})[manager_id] = cube
+    return cube
+
+
+def peek_allocation_cube(db: Session, *, manager_id: Optional[int] = None) -> Optional[AllocationCube]:
+    """Return the cached cube without building one, or None if it is missing or stale."""
+
+    with _REGISTRY_LOCK:
+        cube = _REGISTRY.get(_engine_for(db), {}).get(manager_id)
+    if cube is None or not _is_current(db, cube):
+        return None
+    return cube
+
+
+def invalidate_allocation_cubes(engine: Engine) -> None:
+    """Drop every cube built from ``engine``."""
+
+    with _REGISTRY_LOCK:
+        _REGISTRY.pop(engine, None)
+
+
+def _discard_cube(engine: Engine, cube: AllocationCube) -> None:
+    with _REGISTRY_LOCK:
+        cubes = _REGISTRY.get(engine, {})
+        if cubes.get(cube.manager_id) is cube:
+            del cubes[cube.manager_id]
+
+
+@register_pre_commit_hook
+def _read_committed_cells(session: Session, changes: ChangeSet) -> None:
+    """Record the hours the transaction commits for each allocation cell it touched.
+
+    Read after the final flush, when the transaction holds the rows it wrote,
+    so the values are exactly what the commit leaves behind. Skipped while
+    this database has no cubes to update.
+    """
+
+    if changes.structural or not changes.allocation_deltas:
+        return
+    with _REGISTRY_LOCK:
+        if not _REGISTRY.get(_engine_for(session)):
+            return
+    changes.allocation_hours = crud.get_allocation_cell_hours(
+        session, (delta.cell for delta in changes.allocation_deltas)
+    )
+
+
+@register_commit_hook
+def _apply_committed_changes(engine: Engine, changes: ChangeSet) -> None:
+    if changes.structural:
+        invalidate_allocation_cubes(engine)
+        return
+
+    with _REGISTRY_LOCK:
+        cubes = list(_REGISTRY.get(engine, {}).values())
+    for cube in cubes:
+        if changes.report_versions and not cube.advance_versions(changes.report_versions):
+            _discard_cube(engine, cube)
+            continue
+        if changes.allocation_deltas and not changes.allocation_hours:
+            # Built after the transaction read its cells; nothing to set it from.
+            _discard_cube(engine, cube)
+            continue
+        for (assignment_id, year, month), hours in changes.allocation_hours.items():
+            cube.set_cell(assignment_id, year, month, hours)
@@ -0,0 +1,150 @@
+"""Vectorized over-allocation detection across employees and months.
+
+Monthly allocation totals are loaded with one grouped query into a dense
+(employee × month) NumPy array. Dividing by a per-month capacity vector gives
+every FTE figure at once, and a single boolean mask picks out the
+over-allocated cells. Project breakdowns and employee names are then fetched
+only for the flagged cells, so the cost of a scan no longer grows with
+per-row Python work.
+
+Key components:
+- `UtilizationMatrix`: hours and capacity for one manager scope.
+- `load_utilization_matrix`: builds the matrix from the database.
+- `rank_over_allocations`: the over-allocated cells of a matrix, worst first.
+- `find_allocation_conflicts`: over-allocated employee-months, worst first.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.utils.capacity import get_capacity_table
+from app.utils.reporting import month_label
+
+
+def capacity_vector(month_origin: int, month_count: int) -> np.ndarray:
+    """Standard working hours for ``month_count`` consecutive months from ``month_origin``."""
+
+    hours = get_capacity_table().hours_for_range(month_origin, month_count)
+    return np.maximum(hours, 1).astype(np.float64)
+
+
+@dataclass
+class UtilizationMatrix:
+    """Allocated hours per (employee, month) with the matching capacity.
+
+    Row ``i`` belongs to ``user_ids[i]``; column ``j`` is the month with
+    ordinal ``month_origin + j`` (``year * 12 + month - 1``).
+    """
+
+    user_ids: np.ndarray
+    month_origin: int
+    hours: np.ndarray
+    capacity: np.ndarray
+
+    def fte(self) -> np.ndarray:
+        return self.hours / self.capacity
+
+    def over_allocated(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Row and column indices of the cells above 100% FTE."""
+
+        return np.nonzero(self.hours > self.capacity)
+
+    def month(self, column: int) -> Tuple[int, int]:
+        ordinal = self.month_origin + int(column)
+        return ordinal // 12, ordinal % 12 + 1
+
+
+def load_utilization_matrix(db: Session, *, manager_id: Optional[int] = None) -> UtilizationMatrix:
+    """Load employee-month totals for the manager scope into a dense matrix."""
+
+    rows = crud.get_employee_month_totals(db, manager_id=manager_id)
+    if not rows:
+        return UtilizationMatrix(
+            user_ids=np.zeros(0, dtype=np.int64),
+            month_origin=0,
+            hours=np.zeros((0, 0), dtype=np.int64),
+            capacity=np.zeros(0, dtype=np.float64),
+        )
+
+    table = np.array(rows, dtype=np.int64).reshape(-1, 3)
+    user_ids, user_rows = np.unique(table[:, 0], return_inverse=True)
+    month_origin = int(table[:, 1].min())
+    month_count = int(table[:, 1].max()) - month_origin + 1
+
+    hours = np.zeros((len(user_ids), month_count), dtype=np.int64)
+    # (user, month) pairs are unique after GROUP BY, so plain assignment suffices.
+    hours[user_rows, table[:, 1] - month_origin] = table[:, 2]
+    return UtilizationMatrix(
+        user_ids=user_ids,
+        month_origin=month_origin,
+        hours=hours,
+        capacity=capacity_vector(month_origin, month_count),
+    )
+
+
+def rank_over_allocations(matrix: UtilizationMatrix) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return row indices, column indices and FTE of over-allocated cells, highest FTE first."""
+
+    rows, columns = matrix.over_allocated()
+    fte = matrix.hours[rows, columns] / matrix.capacity[columns]
+    order = np.argsort(-fte, kind="stable")
+    return rows[order], columns[order], fte[order]
+
+
+def find_allocation_conflicts(
+    db: Session, *, manager_id: Optional[int] = None
+) -> List[Dict[str, object]]:
+    """Return every over-allocated employee-month, highest FTE first.
+
+    Each conflict carries the employee, month label, total hours, FTE ratio and
+    a per-project breakdown (largest first).
+    """
+
+    matrix = load_utilization_matrix(db, manager_id=manager_id)
+    rows, columns, fte = rank_over_allocations(matrix)
+    if not len(rows):
+        return []
+
+    flagged_users = {int(user_id) for user_id in matrix.user_ids[rows]}
+    flagged_months = {matrix.month(column) for column in set(columns.tolist())}
+    names = {
+        user.id: user.full_name
+        for user in crud.get_users_by_ids(db, flagged_users, system_role=models.SystemRole.EMPLOYEE)
+    }
+
+    breakdown: Dict[Tuple[int, int, int], List[Dict[str, object]]] = {}
+    for row in crud.get_monthly_user_project_allocations(
+        db, user_ids=flagged_users, months=flagged_months
+    ):
+        key = (int(row["user_id"]), int(row["year"]), int(row["month"]))
+        breakdown.setdefault(key, []).append(
+            {
+                "project_id": int(row.get("project_id") or 0),
+                "project_name": row.get("project_name") or "Unknown",
+                "hours": int(row.get("allocated_hours") or 0),
+            }
+        )
+
+    conflicts: List[Dict[str, object]] = []
+    for row, column, ratio in zip(rows.tolist(), columns.tolist(), fte.tolist()):
+        user_id = int(matrix.user_ids[row])
+        year, month = matrix.month(column)
+        projects = breakdown.get((user_id, year, month), [])
+        projects.sort(key=lambda item: item["hours"], reverse=True)
+        conflicts.append(
+            {
+                "user_id": user_id,
+                "employee": names.get(user_id, "Unknown"),
+                "month": month_label(year, month),
+                "total_hours": int(matrix.hours[row, column]),
+                "fte": round(ratio, 3),
+                "projects": projects,
+            }
+        )
+    return conflicts
@@ -0,0 +1,183 @@
+"""On-disk cache of generated export files.
+
+Exports are downloaded far more often than their data changes. Each
+generated file is stored under ``REPORTS_PATH/exports/<tenant>/`` with a name
+derived from a hash of the export kind, its inputs, the database and the
+report data versions of the scopes it reads (see `app.services.report_cache`).
+Until one of those scopes is written, repeat downloads - from any worker - are
+served from disk as file responses, which servers can send with ``sendfile``.
+The first download streams to the client while it is written to disk. The
+directory is kept under ``EXPORT_CACHE_MAX_BYTES`` by evicting the least
+recently downloaded files.
+
+In-memory SQLite databases do not outlive the process, so their exports are
+never stored. Delete ``REPORTS_PATH/exports`` after replacing a database file
+with a different one at the same path.
+
+Key components:
+- `exports_directory`: where cached exports live.
+- `manager_tenant`: the tenant directory for a manager's exports.
+- `export_digest`: content address of an export.
+- `evict_exports`: enforces the size limit.
+- `cached_export`: serves an export from disk or builds and stores it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Sequence
+
+from fastapi import Request, Response, status
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.core.config import settings
+from app.crud import ReportScope
+from app.services.report_cache import CACHE_CONTROL, etag_matches
+
+logger = logging.getLogger(__name__)
+
+_EVICTION_LOCK = threading.Lock()
+# Exports still being written; never evicted.
+_PARTIAL_SUFFIX = ".part"
+
+
+def exports_directory() -> Path:
+    """Directory holding cached export files, one subdirectory per tenant."""
+
+    path = Path(settings.REPORTS_PATH) / "exports"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def manager_tenant(manager_id: Optional[int]) -> str:
+    return "all" if manager_id is None else f"manager-{manager_id}"
+
+
+def _database_identity(db: Session) -> Optional[str]:
+    """Identify the database behind ``db``; None when it is in memory."""
+
+    bind = db.get_bind()
+    url = (bind.engine if hasattr(bind, "engine") else bind).url
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return None
+    return url.render_as_string(hide_password=True)
+
+
+def export_digest(
+    *, kind: str, database: str, vary: Sequence[Any], versions: Dict[ReportScope, int]
+) -> str:
+    payload = json.dumps([kind, database, list(vary), sorted(versions.items())], default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def evict_exports(max_bytes: int, *, keep: Iterable[Path] = ()) -> int:
+    """Delete the least recently used exports until they fit ``max_bytes``.
+
+    Files in ``keep`` are never removed. Returns the number of files deleted.
+    """
+
+    keep = {Path(path) for path in keep}
+    with _EVICTION_LOCK:
+        entries = []
+        for path in exports_directory().glob("*/*"):
+            if path.suffix == _PARTIAL_SUFFIX:
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= max_bytes:
+                break
+            if path in keep:
+                continue
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+    if removed:
+        logger.info("Evicted %s cached exports", removed)
+    return removed
+
+
+def _store_while_streaming(chunks: Iterable[bytes], path: Path) -> Iterator[bytes]:
+    """Yield ``chunks`` while writing them to ``path``; keep the file only if complete."""
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=path.parent, suffix=_PARTIAL_SUFFIX)
+    completed = False
+    try:
+        with os.fdopen(handle, "wb") as output:
+            for chunk in chunks:
+                output.write(chunk)
+                yield chunk
+        os.replace(temporary, path)
+        completed = True
+        evict_exports(settings.EXPORT_CACHE_MAX_BYTES, keep=[path])
+    finally:
+        if not completed:
+            Path(temporary).unlink(missing_ok=True)
+
+
+def cached_export(
+    request: Request,
+    db: Session,
+    *,
+    kind: str,
+    tenant: str,
+    scopes: Iterable[ReportScope],
+    build: Callable[[], Iterable[bytes]],
+    filename: str,
+    media_type: str,
+    vary: Sequence[Any] = (),
+) -> Response:
+    """
+    Serve an export from the disk cache, or stream ``build()`` and store it.
+
+    ``vary`` lists inputs besides the scopes the file depends on, such as the
+    query parameters and today's date. Versions are read before building, so
+    a write committed meanwhile can only make a stored file newer than its
+    address, never older. Responses carry the address as ETag and honour
+    If-None-Match.
+    """
+    versions = crud.get_report_data_versions(db, [*scopes, (models.REPORT_SCOPE_EPOCH, 0)])
+    database = _database_identity(db)
+    digest = export_digest(
+        kind=kind,
+        database=database or "",
+        vary=[settings.CAPACITY_HOLIDAY_CALENDAR, *vary],
+        versions=versions,
+    )
+    etag = '"%s"' % digest[:32]
+    headers = {
+        "ETag": etag,
+        "Cache-Control": CACHE_CONTROL,
+        "Content-Disposition": f"attachment; filename={filename}",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if database is None or settings.EXPORT_CACHE_MAX_BYTES <= 0:
+        return StreamingResponse(build(), media_type=media_type, headers=headers)
+
+    path = exports_directory() / tenant / f"{digest}{Path(filename).suffix}"
+    if path.is_file():
+        # Recently downloaded files are evicted last.
+        os.utime(path)
+        return FileResponse(path, media_type=media_type, headers=headers)
+    return StreamingResponse(
+        _store_while_streaming(build(), path), media_type=media_type, headers=headers
+    )
@@ -1,11 +1,27 @@
-"""Excel export helpers for StaffAlloc reports."""
+"""Export helpers for StaffAlloc reports.
+
+Key components:
+- `project_workbook`: a project's workbook, built in memory with openpyxl.
+- `stream_xlsx`: writes sheets of lazily produced rows as a chunked .xlsx.
+- `stream_portfolio_workbook`: the portfolio workbook, streamed.
+- `stream_fact_table`: the allocation fact table as CSV, Parquet or Arrow IPC.
+"""
 
 from __future__ import annotations
 
+import csv
+import enum
 import io
-from datetime import date
-from typing import Dict, Iterable, List
+import itertools
+import re
+import tempfile
+import zipfile
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+from xml.sax.saxutils import escape
 
+import numpy as np
 from openpyxl import Workbook
 from openpyxl.styles import Alignment, Font, PatternFill
 from openpyxl.utils import get_column_letter
@@ -29,75 +45,263 @@ def _header(row) -> None:
         cell.alignment = Alignment(horizontal="center", vertical="center")
 
 
-def portfolio_workbook(*, projects: Iterable[models.Project], over_allocated: List, bench: List) -> io.BytesIO:
-    wb = Workbook()
-    ws_summary = wb.active
-    ws_summary.title = "Portfolio"
+# --------------------------------------------------------------------------------
+# Streaming writer
+# --------------------------------------------------------------------------------
+# openpyxl keeps the whole workbook in memory and its write-only mode needs
+# column widths before the first row. The portfolio export instead writes the
+# SpreadsheetML parts itself: each sheet's rows are serialized into a spooled
+# temporary file while the column widths are measured, then the sheet is
+# copied into a zip that is written straight to the response in chunks.
 
-    ws_summary.append([
-        "Project",
-        "Manager",
-        "Status",
-        "Funded Hours",
-        "Allocated Hours",
-        "Utilization %",
-        "Start",
-        "Sprints",
-    ])
-    _header(ws_summary[1])
-
-    for project in projects:
-        funded = sum(a.funded_hours for a in project.assignments)
-        allocated = sum(
-            allocation.allocated_hours
-            for assignment in project.assignments
-            for allocation in assignment.allocations or []
-        )
-        utilization = (allocated / funded * 100) if funded else 0
-        ws_summary.append([
-            project.name,
-            project.manager.full_name if project.manager else "—",
-            project.status,
-            funded,
-            allocated,
-            round(utilization, 2),
-            project.start_date.isoformat(),
-            project.sprints,
-        ])
+XLSX_CHUNK_BYTES = 64 * 1024
+# Rows spill from memory to a temporary file past this many bytes of XML.
+_SPOOL_MAX_BYTES = 1024 * 1024
 
-    _auto_size(ws_summary)
+_MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+_XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+_ILLEGAL_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
 
-    ws_over = wb.create_sheet("Over-allocated")
-    ws_over.append(["Employee", "Role", "FTE %", "Projects"])
-    _header(ws_over[1])
-    for employee in over_allocated:
-        projects_str = ", ".join(
-            f"{p.project_name} ({p.allocated_hours}h)" for p in getattr(employee, "projects", [])
-        )
-        ws_over.append([
+_STYLES_XML = (
+    f'<styleSheet xmlns="{_MAIN_NS}">'
+    '<fonts count="2">'
+    '<font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><color rgb="FFFFFFFF"/><name val="Calibri"/></font>'
+    "</fonts>"
+    '<fills count="3">'
+    '<fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill>'
+    '<fill><patternFill patternType="solid"><fgColor rgb="FF2563EB"/><bgColor rgb="FF2563EB"/></patternFill></fill>'
+    "</fills>"
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="2">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="2" borderId="0" xfId="0" applyFont="1" applyFill="1" applyAlignment="1">'
+    '<alignment horizontal="center" vertical="center"/></xf>'
+    "</cellXfs>"
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    "</styleSheet>"
+)
+_HEADER_STYLE = 1
+
+
+@dataclass
+class SheetSpec:
+    """A worksheet for `stream_xlsx`: a header row and lazily produced rows."""
+
+    title: str
+    header: Sequence[str]
+    rows: Iterable[Sequence[Any]]
+
+
+class _ChunkSink(io.RawIOBase):
+    """Unseekable file object that buffers written output until it is drained."""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+        self.size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        self.size = 0
+        return data
+
+
+def _xml_text(value: str) -> str:
+    return escape(_ILLEGAL_XML_CHARS.sub("", value))
+
+
+def _cell_xml(ref: str, value: Any, style: int = 0) -> str:
+    style_attr = f' s="{style}"' if style else ""
+    if isinstance(value, bool):
+        return f'<c r="{ref}"{style_attr} t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c r="{ref}"{style_attr}><v>{value}</v></c>'
+    if isinstance(value, enum.Enum):
+        value = value.value
+    if isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    return (
+        f'<c r="{ref}"{style_attr} t="inlineStr">'
+        f'<is><t xml:space="preserve">{_xml_text(str(value))}</t></is></c>'
+    )
+
+
+def _row_xml(number: int, values: Sequence[Any], widths: List[int], style: int = 0) -> str:
+    cells = []
+    for index, value in enumerate(values):
+        if value is None:
+            continue
+        if index >= len(widths):
+            widths.extend([0] * (index + 1 - len(widths)))
+        widths[index] = max(widths[index], len(str(value)))
+        cells.append(_cell_xml(f"{get_column_letter(index + 1)}{number}", value, style))
+    return f'<row r="{number}">{"".join(cells)}</row>'
+
+
+def _package_parts(sheets: Sequence[SheetSpec]) -> List[Tuple[str, str]]:
+    overrides = "".join(
+        f'<Override PartName="/xl/worksheets/sheet{index}.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        for index in range(1, len(sheets) + 1)
+    )
+    content_types = (
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        f"{overrides}</Types>"
+    )
+    root_rels = (
+        f'<Relationships xmlns="{_PKG_REL_NS}">'
+        f'<Relationship Id="rId1" Type="{_REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+        "</Relationships>"
+    )
+    sheet_entries = "".join(
+        f'<sheet name="{_xml_text(sheet.title[:31])}" sheetId="{index}" r:id="rId{index}"/>'
+        for index, sheet in enumerate(sheets, start=1)
+    )
+    workbook = (
+        f'<workbook xmlns="{_MAIN_NS}" xmlns:r="{_REL_NS}">'
+        f"<sheets>{sheet_entries}</sheets></workbook>"
+    )
+    sheet_rels = "".join(
+        f'<Relationship Id="rId{index}" Type="{_REL_NS}/worksheet" Target="worksheets/sheet{index}.xml"/>'
+        for index in range(1, len(sheets) + 1)
+    )
+    styles_id = len(sheets) + 1
+    workbook_rels = (
+        f'<Relationships xmlns="{_PKG_REL_NS}">{sheet_rels}'
+        f'<Relationship Id="rId{styles_id}" Type="{_REL_NS}/styles" Target="styles.xml"/>'
+        "</Relationships>"
+    )
+    return [
+        ("[Content_Types].xml", content_types),
+        ("_rels/.rels", root_rels),
+        ("xl/workbook.xml", workbook),
+        ("xl/_rels/workbook.xml.rels", workbook_rels),
+        ("xl/styles.xml", _STYLES_XML),
+    ]
+
+
+def stream_xlsx(sheets: Sequence[SheetSpec], *, chunk_size: int = XLSX_CHUNK_BYTES) -> Iterator[bytes]:
+    """
+    Yield an .xlsx file in chunks of roughly ``chunk_size`` bytes.
+
+    Each sheet's rows are consumed once. Memory stays bounded by the spool
+    limit and the chunk size, however many rows there are. Column widths
+    follow the longest value, as in `_auto_size`.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, xml in _package_parts(sheets):
+            archive.writestr(name, _XML_DECLARATION + xml)
+        yield sink.drain()
+
+        for index, sheet in enumerate(sheets, start=1):
+            widths: List[int] = []
+            with tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_BYTES, mode="w+b") as spool:
+                spool.write(_row_xml(1, sheet.header, widths, _HEADER_STYLE).encode())
+                for number, row in enumerate(sheet.rows, start=2):
+                    spool.write(_row_xml(number, row, widths).encode())
+                spool.seek(0)
+
+                columns = "".join(
+                    f'<col min="{column}" max="{column}" width="{min(width + 4, 60)}" customWidth="1"/>'
+                    for column, width in enumerate(widths, start=1)
+                )
+                with archive.open(f"xl/worksheets/sheet{index}.xml", "w") as part:
+                    part.write(
+                        f'{_XML_DECLARATION}<worksheet xmlns="{_MAIN_NS}">'
+                        f"{f'<cols>{columns}</cols>' if columns else ''}<sheetData>".encode()
+                    )
+                    while True:
+                        data = spool.read(chunk_size)
+                        if not data:
+                            break
+                        part.write(data)
+                        if sink.size >= chunk_size:
+                            yield sink.drain()
+                    part.write(b"</sheetData></worksheet>")
+            if sink.size >= chunk_size:
+                yield sink.drain()
+    remainder = sink.drain()
+    if remainder:
+        yield remainder
+
+
+def stream_portfolio_workbook(
+    *, project_rows: Iterable[Sequence[Any]], over_allocated: List, bench: List
+) -> Iterator[bytes]:
+    """
+    Stream the portfolio workbook.
+
+    ``project_rows`` yields ``(name, manager_name, status, funded_hours,
+    allocated_hours, start_date, sprints)`` per project (see
+    `crud.iter_portfolio_export_rows`) and is read while the file is sent.
+    """
+
+    def portfolio():
+        for name, manager_name, status, funded, allocated, start_date, sprints in project_rows:
+            funded, allocated = int(funded or 0), int(allocated or 0)
+            utilization = (allocated / funded * 100) if funded else 0
+            yield [
+                name,
+                manager_name or "—",
+                status,
+                funded,
+                allocated,
+                round(utilization, 2),
+                start_date.isoformat(),
+                sprints,
+            ]
+
+    over_rows = (
+        [
             employee.full_name,
             getattr(employee, "role", None) or "—",
             round(employee.fte_percentage, 2),
-            projects_str,
-        ])
-    _auto_size(ws_over)
-
-    ws_bench = wb.create_sheet("Bench")
-    ws_bench.append(["Employee", "Role", "FTE %", "Available Hours"])
-    _header(ws_bench[1])
-    for employee in bench:
-        ws_bench.append([
+            ", ".join(
+                f"{p.project_name} ({p.allocated_hours}h)" for p in getattr(employee, "projects", [])
+            ),
+        ]
+        for employee in over_allocated
+    )
+    bench_rows = (
+        [
             employee.full_name,
             getattr(employee, "role", None) or "—",
             round(employee.fte_percentage, 2),
             getattr(employee, "available_hours", 0),
-        ])
-    _auto_size(ws_bench)
-
-    buffer = io.BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
-    return buffer
+        ]
+        for employee in bench
+    )
+    return stream_xlsx(
+        [
+            SheetSpec(
+                "Portfolio",
+                ["Project", "Manager", "Status", "Funded Hours", "Allocated Hours", "Utilization %", "Start", "Sprints"],
+                portfolio(),
+            ),
+            SheetSpec("Over-allocated", ["Employee", "Role", "FTE %", "Projects"], over_rows),
+            SheetSpec("Bench", ["Employee", "Role", "FTE %", "Available Hours"], bench_rows),
+        ]
+    )
 
 
 def project_workbook(project: models.Project) -> io.BytesIO:
@@ -167,3 +371,207 @@ def project_workbook(project: models.Project) -> io.BytesIO:
     buffer.seek(0)
     return buffer
 
+
+
+# --------------------------------------------------------------------------------
+# Allocation fact table
+# --------------------------------------------------------------------------------
+# The fact table is read in batches of integer rows, each converted to NumPy
+# columns in a single pass. Names are never materialized per row: the label
+# columns are positions into their dimension's names, which Arrow and Parquet
+# store as dictionaries and the CSV writer resolves with one take per batch.
+# pyarrow is only needed (and imported) for the Arrow and Parquet formats.
+
+
+class FactFormat(str, enum.Enum):
+    CSV = "csv"
+    PARQUET = "parquet"
+    ARROW = "arrow"
+
+
+FACT_COLUMNS = ("user_id", "user", "project_id", "project", "role", "lcat", "year", "month", "hours")
+# Columns of `crud.iter_allocation_fact_batches` rows, in order.
+_FACT_ROW_WIDTH = 7
+_FACT_DIMENSIONS = ("user", "project", "role", "lcat")
+
+FACT_MEDIA_TYPES = {
+    FactFormat.CSV: "text/csv; charset=utf-8",
+    FactFormat.PARQUET: "application/vnd.apache.parquet",
+    FactFormat.ARROW: "application/vnd.apache.arrow.stream",
+}
+FACT_FILE_SUFFIXES = {
+    FactFormat.CSV: ".csv",
+    FactFormat.PARQUET: ".parquet",
+    FactFormat.ARROW: ".arrows",
+}
+
+
+def require_fact_format(fmt: FactFormat) -> None:
+    """Raise RuntimeError when the libraries ``fmt`` is encoded with are missing."""
+
+    if fmt is not FactFormat.CSV:
+        _pyarrow()
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError as exc:  # pragma: no cover - depends on the environment
+        raise RuntimeError(
+            "pyarrow is required for Parquet and Arrow exports; install it with "
+            "'pip install pyarrow'."
+        ) from exc
+    return pyarrow
+
+
+@dataclass
+class FactLabels:
+    """Sorted IDs of one dimension and their names; the last name (None) is the CSV value for unknown IDs."""
+
+    ids: np.ndarray
+    names: np.ndarray
+
+    @classmethod
+    def from_mapping(cls, mapping: Dict[int, str]) -> "FactLabels":
+        ids = np.fromiter(sorted(mapping), dtype=np.int64, count=len(mapping))
+        names = np.empty(len(ids) + 1, dtype=object)
+        names[:-1] = [mapping[key] for key in ids.tolist()]
+        return cls(ids=ids, names=names)
+
+    def positions(self, keys: np.ndarray) -> np.ndarray:
+        slots = np.searchsorted(self.ids, keys)
+        known = slots < len(self.ids)
+        known[known] = self.ids[slots[known]] == keys[known]
+        return np.where(known, slots, len(self.ids)).astype(np.int32)
+
+    def indices(self, pa, keys: np.ndarray):
+        """Arrow dictionary indices for ``keys``; unknown IDs are null, not a dictionary entry."""
+
+        positions = self.positions(keys)
+        return pa.array(positions, mask=positions == len(self.ids))
+
+
+def _fact_columns(batch: Sequence[Sequence[int]]) -> np.ndarray:
+    """Convert a batch of fact rows to a (column, row) int64 array."""
+
+    values = np.fromiter(
+        itertools.chain.from_iterable(batch), dtype=np.int64, count=len(batch) * _FACT_ROW_WIDTH
+    )
+    return np.ascontiguousarray(values.reshape(-1, _FACT_ROW_WIDTH).T)
+
+
+def _stream_fact_csv(
+    columns: Iterable[np.ndarray], labels: Dict[str, FactLabels]
+) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(FACT_COLUMNS)
+    for data in columns:
+        user, project, role, lcat = (
+            labels[name].names[labels[name].positions(data[index])]
+            for index, name in enumerate(_FACT_DIMENSIONS)
+        )
+        writer.writerows(
+            zip(
+                data[0].tolist(),
+                user,
+                data[1].tolist(),
+                project,
+                role,
+                lcat,
+                data[4].tolist(),
+                data[5].tolist(),
+                data[6].tolist(),
+            )
+        )
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    remainder = buffer.getvalue()
+    if remainder:
+        yield remainder.encode("utf-8")
+
+
+def _fact_schema(pa):
+    label = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema(
+        [
+            ("user_id", pa.int64()),
+            ("user", label),
+            ("project_id", pa.int64()),
+            ("project", label),
+            ("role", label),
+            ("lcat", label),
+            ("year", pa.int16()),
+            ("month", pa.int8()),
+            ("hours", pa.int32()),
+        ]
+    )
+
+
+def _fact_record_batch(pa, schema, data: np.ndarray, labels: Dict[str, FactLabels], dictionaries):
+    user, project, role, lcat = (
+        pa.DictionaryArray.from_arrays(
+            labels[name].indices(pa, data[index]), dictionaries[name]
+        )
+        for index, name in enumerate(_FACT_DIMENSIONS)
+    )
+    return pa.RecordBatch.from_arrays(
+        [
+            pa.array(data[0]),
+            user,
+            pa.array(data[1]),
+            project,
+            role,
+            lcat,
+            pa.array(data[4].astype(np.int16)),
+            pa.array(data[5].astype(np.int8)),
+            pa.array(data[6].astype(np.int32)),
+        ],
+        schema=schema,
+    )
+
+
+def stream_fact_table(
+    batches: Iterable[Sequence[Sequence[int]]],
+    labels: Dict[str, Dict[int, str]],
+    fmt: FactFormat,
+    *,
+    chunk_size: int = XLSX_CHUNK_BYTES,
+) -> Iterator[bytes]:
+    """
+    Encode the allocation fact table as CSV, Parquet or an Arrow IPC stream.
+
+    ``batches`` yields lists of ``(user_id, project_id, role_id, lcat_id,
+    year, month, hours)`` rows (see `crud.iter_allocation_fact_batches`) and
+    ``labels`` maps each dimension's IDs to names (see
+    `crud.get_allocation_fact_labels`). Output is produced batch by batch;
+    Parquet gets one row group per batch.
+    """
+    dimensions = {name: FactLabels.from_mapping(labels[name]) for name in _FACT_DIMENSIONS}
+    columns = (_fact_columns(batch) for batch in batches if len(batch))
+    if fmt is FactFormat.CSV:
+        yield from _stream_fact_csv(columns, dimensions)
+        return
+
+    pa = _pyarrow()
+    schema = _fact_schema(pa)
+    dictionaries = {
+        name: pa.array(dimension.names[:-1].tolist(), type=pa.string())
+        for name, dimension in dimensions.items()
+    }
+    sink = _ChunkSink()
+    if fmt is FactFormat.PARQUET:
+        import pyarrow.parquet as pq
+
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+    for data in columns:
+        writer.write_batch(_fact_record_batch(pa, schema, data, dimensions, dictionaries))
+        if sink.size >= chunk_size:
+            yield sink.drain()
+    writer.close()
+    remainder = sink.drain()
+    if remainder:
+        yield remainder
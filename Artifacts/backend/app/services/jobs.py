@@ -0,0 +1,429 @@
+"""
+Background job runner for long operations (imports, exports, RAG reindex).
+
+Jobs are persisted in the `background_jobs` table so their status survives the
+request that created them, and executed on a small thread pool so the request
+returns a job id immediately. Each job runs in its own database session bound
+to the same engine as the request that submitted it.
+
+Key components:
+- `job_handler`: registers the function that performs a job kind.
+- `submit_job`: persists a job and schedules it on the worker pool.
+- `JobContext`: passed to handlers for progress reporting and result files.
+- `live_progress`: in-process progress of running jobs, for status polling.
+- `recover_interrupted_jobs`: marks jobs whose owner process is gone as failed.
+- `purge_expired_job_files`: deletes old result files and leftover uploads.
+- `start_job_maintenance`: heartbeats this process's jobs and runs both sweeps
+  periodically.
+- `maintenance_task`: registers other upkeep (e.g. RAG indexing) to run on the
+  same periodic tick, off the request path.
+
+Several processes (e.g. ``uvicorn --workers N``) may share one database. Each
+job records the host and process ID whose pool holds it plus a heartbeat, so
+one process starting up or sweeping never fails a job a sibling is running.
+"""
+from __future__ import annotations
+
+import datetime
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from sqlalchemy.orm import Session, sessionmaker
+
+from app import models
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class JobOutcome:
+    """What a handler produced: a JSON summary and optionally a downloadable file."""
+
+    result: Dict[str, Any] = field(default_factory=dict)
+    file_path: Optional[Path] = None
+    filename: Optional[str] = None
+    media_type: Optional[str] = None
+
+
+class JobContext:
+    """Handle given to job handlers for progress updates and result storage."""
+
+    def __init__(self, job_id: int) -> None:
+        self.job_id = job_id
+
+    def report(self, progress: Optional[float] = None, message: Optional[str] = None) -> None:
+        """Publish progress (0-1) and/or a status message for status polling.
+
+        Progress is kept in process memory rather than written to the job row:
+        the handler's own transaction may be holding SQLite's write lock, and a
+        second connection waiting on it would deadlock the job.
+        """
+
+        with _LOCK:
+            current = _PROGRESS.get(self.job_id, {})
+            if progress is not None:
+                current["progress"] = max(0.0, min(progress, 1.0))
+            if message is not None:
+                current["message"] = message
+            _PROGRESS[self.job_id] = current
+
+    def result_path(self, filename: str) -> Path:
+        """Return a path under the jobs directory for this job's result file."""
+
+        return jobs_directory() / f"{self.job_id}-{filename}"
+
+
+JobHandler = Callable[[Session, Dict[str, Any], JobContext], JobOutcome]
+MaintenanceTask = Callable[[Session], Any]
+
+_HANDLERS: Dict[str, JobHandler] = {}
+_MAINTENANCE_TASKS: List[MaintenanceTask] = []
+_FUTURES: Dict[int, Future] = {}
+_PROGRESS: Dict[int, Dict[str, Any]] = {}
+_LOCK = threading.Lock()
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_MAINTENANCE_THREAD: Optional[threading.Thread] = None
+_MAINTENANCE_STOP: Optional[threading.Event] = None
+_MAINTENANCE_FACTORY: Optional[sessionmaker] = None
+_OWNER_HOST = socket.gethostname()
+
+_ACTIVE_STATUSES = (models.JobStatus.QUEUED, models.JobStatus.RUNNING)
+
+
+def job_handler(kind: str) -> Callable[[JobHandler], JobHandler]:
+    """Register ``func`` as the handler for jobs of ``kind``."""
+
+    def decorator(func: JobHandler) -> JobHandler:
+        _HANDLERS[kind] = func
+        return func
+
+    return decorator
+
+
+def maintenance_task(func: MaintenanceTask) -> MaintenanceTask:
+    """Register ``func`` to run with its own session on every maintenance tick."""
+
+    _MAINTENANCE_TASKS.append(func)
+    return func
+
+
+def jobs_directory() -> Path:
+    """Directory holding job uploads and result files."""
+
+    path = Path(settings.REPORTS_PATH) / "jobs"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _get_executor_locked() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        _EXECUTOR = ThreadPoolExecutor(
+            max_workers=max(settings.JOB_WORKER_COUNT, 1),
+            thread_name_prefix="staffalloc-job",
+        )
+    return _EXECUTOR
+
+
+def submit_job(
+    db: Session,
+    kind: str,
+    params: Optional[Dict[str, Any]] = None,
+    *,
+    manager_id: Optional[int] = None,
+) -> models.BackgroundJob:
+    """Persist a queued job and schedule it on the worker pool."""
+
+    if kind not in _HANDLERS:
+        raise ValueError(f"Unknown job kind '{kind}'")
+
+    job = models.BackgroundJob(
+        kind=kind,
+        status=models.JobStatus.QUEUED,
+        manager_id=manager_id,
+        params=params or {},
+        owner_host=_OWNER_HOST,
+        owner_pid=os.getpid(),
+        heartbeat_at=_utcnow(),
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    session_factory = sessionmaker(bind=db.get_bind(), autocommit=False, autoflush=False)
+    with _LOCK:
+        # Registered before it can run, so this process's heartbeats and
+        # sweeps always count the job as its own.
+        future = _get_executor_locked().submit(_run_job, session_factory, job.id)
+        _FUTURES[job.id] = future
+    start_job_maintenance(session_factory)
+    future.add_done_callback(lambda _: _forget_future(job.id))
+    logger.info("Queued %s job %s", kind, job.id)
+    return job
+
+
+def _forget_future(job_id: int) -> None:
+    with _LOCK:
+        _FUTURES.pop(job_id, None)
+        _PROGRESS.pop(job_id, None)
+
+
+def live_progress(job_id: int) -> Dict[str, Any]:
+    """Progress/message last reported by a job running in this process, if any."""
+
+    with _LOCK:
+        return dict(_PROGRESS.get(job_id, {}))
+
+
+def wait_for_job(job_id: int, timeout: Optional[float] = None) -> None:
+    """Block until the job scheduled in this process finishes (no-op otherwise)."""
+
+    with _LOCK:
+        future = _FUTURES.get(job_id)
+    if future is not None:
+        future.result(timeout=timeout)
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def _run_job(session_factory: sessionmaker, job_id: int) -> None:
+    with session_factory() as db:
+        job = db.get(models.BackgroundJob, job_id)
+        if job is None:
+            return
+        job.status = models.JobStatus.RUNNING
+        job.started_at = job.heartbeat_at = _utcnow()
+        job.owner_host, job.owner_pid = _OWNER_HOST, os.getpid()
+        db.commit()
+
+        handler = _HANDLERS[job.kind]
+        params = dict(job.params or {})
+        context = JobContext(job_id)
+
+        try:
+            outcome = handler(db, params, context)
+        except Exception as exc:
+            db.rollback()
+            logger.exception("Job %s (%s) failed", job_id, job.kind)
+            job = db.get(models.BackgroundJob, job_id)
+            job.status = models.JobStatus.FAILED
+            job.error = str(exc) or exc.__class__.__name__
+            job.finished_at = _utcnow()
+            db.commit()
+            return
+
+        job = db.get(models.BackgroundJob, job_id)
+        job.status = models.JobStatus.SUCCEEDED
+        job.progress = 1.0
+        job.result = outcome.result
+        if outcome.file_path is not None:
+            job.result_path = str(outcome.file_path)
+            job.result_filename = outcome.filename or outcome.file_path.name
+            job.result_media_type = outcome.media_type or "application/octet-stream"
+        job.finished_at = _utcnow()
+        db.commit()
+        logger.info("Job %s (%s) succeeded", job_id, job.kind)
+
+
+def _held_job_ids() -> Set[int]:
+    with _LOCK:
+        return set(_FUTURES)
+
+
+def _process_exists(pid: int) -> bool:
+    if os.name == "nt":
+        # os.kill(pid, 0) sends CTRL_C_EVENT on Windows; rely on the heartbeat.
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _owner_alive(job: models.BackgroundJob, stale_before: datetime.datetime, held: Set[int]) -> bool:
+    if job.owner_pid is None or job.heartbeat_at is None or job.heartbeat_at < stale_before:
+        return False
+    if job.owner_host != _OWNER_HOST:
+        return True
+    if job.owner_pid == os.getpid():
+        # Our PID, but a restarted process (PIDs are reused, e.g. PID 1 in a
+        # container) does not hold the previous one's jobs.
+        return job.id in held
+    return _process_exists(job.owner_pid)
+
+
+def heartbeat_jobs(db: Session) -> int:
+    """Refresh the heartbeat of the queued/running jobs this process holds."""
+
+    held = _held_job_ids()
+    if not held:
+        return 0
+    updated = (
+        db.query(models.BackgroundJob)
+        .filter(
+            models.BackgroundJob.id.in_(held),
+            models.BackgroundJob.status.in_(_ACTIVE_STATUSES),
+        )
+        .update({models.BackgroundJob.heartbeat_at: _utcnow()}, synchronize_session=False)
+    )
+    db.commit()
+    return updated
+
+
+def recover_interrupted_jobs(db: Session) -> int:
+    """Mark queued/running jobs whose owner process is gone as failed.
+
+    A job is orphaned when it records no owner, its owner's heartbeat is older
+    than `JOB_STALE_AFTER_SECONDS`, or its owner on this host has exited (or is
+    this process, which does not hold it). Jobs of live processes, including
+    sibling workers, are left alone.
+    """
+
+    now = _utcnow()
+    stale_before = now - datetime.timedelta(seconds=settings.JOB_STALE_AFTER_SECONDS)
+    held = _held_job_ids()
+    interrupted = [
+        job
+        for job in db.query(models.BackgroundJob)
+        .filter(models.BackgroundJob.status.in_(_ACTIVE_STATUSES))
+        .all()
+        if not _owner_alive(job, stale_before, held)
+    ]
+    for job in interrupted:
+        job.status = models.JobStatus.FAILED
+        job.error = "Interrupted: the worker process running it stopped"
+        job.finished_at = now
+        logger.warning("Job %s (%s) lost its worker process; marked as failed", job.id, job.kind)
+    if interrupted:
+        db.commit()
+    return len(interrupted)
+
+
+def purge_expired_job_files(db: Session) -> int:
+    """Delete job files older than `JOB_RETENTION_HOURS`; returns how many were removed.
+
+    Results of jobs that finished before the cutoff are deleted and the jobs
+    no longer offer a download. Other files in the jobs directory (uploads
+    left behind by a crashed import, results of deleted jobs) are deleted
+    once their modification time passes the cutoff, unless a queued or
+    running job still refers to them.
+    """
+
+    if settings.JOB_RETENTION_HOURS <= 0:
+        return 0
+    retention = datetime.timedelta(hours=settings.JOB_RETENTION_HOURS)
+    directory = jobs_directory()
+
+    expired = (
+        db.query(models.BackgroundJob)
+        .filter(
+            models.BackgroundJob.result_path.isnot(None),
+            models.BackgroundJob.finished_at < _utcnow() - retention,
+        )
+        .all()
+    )
+    for job in expired:
+        job.result_path = None
+    if expired:
+        db.commit()
+
+    keep = {
+        Path(path).resolve()
+        for (path,) in db.query(models.BackgroundJob.result_path).filter(
+            models.BackgroundJob.result_path.isnot(None)
+        )
+    }
+    keep.update(
+        Path(str(job.params["path"])).resolve()
+        for job in db.query(models.BackgroundJob).filter(
+            models.BackgroundJob.status.in_(_ACTIVE_STATUSES)
+        )
+        if job.params and job.params.get("path")
+    )
+    cutoff = time.time() - retention.total_seconds()
+    removed = 0
+    for path in directory.iterdir():
+        try:
+            if not path.is_file() or path.resolve() in keep or path.stat().st_mtime >= cutoff:
+                continue
+            path.unlink()
+        except FileNotFoundError:
+            continue
+        removed += 1
+    if removed:
+        logger.info("Deleted %d expired job files from %s", removed, directory)
+    return removed
+
+
+def run_job_maintenance(session_factory: sessionmaker) -> None:
+    """Heartbeat this process's jobs, fail orphaned ones, purge expired files and
+    run the registered maintenance tasks."""
+
+    with session_factory() as db:
+        heartbeat_jobs(db)
+        recover_interrupted_jobs(db)
+        purge_expired_job_files(db)
+    for task in list(_MAINTENANCE_TASKS):
+        with session_factory() as db:
+            try:
+                task(db)
+            except Exception:
+                db.rollback()
+                logger.exception("Maintenance task %s failed", task.__name__)
+
+
+def _maintenance_loop(stop: threading.Event) -> None:
+    while not stop.wait(max(settings.JOB_HEARTBEAT_SECONDS, 1)):
+        with _LOCK:
+            session_factory = _MAINTENANCE_FACTORY
+        if session_factory is None:
+            continue
+        try:
+            run_job_maintenance(session_factory)
+        except Exception:
+            # Usually a busy database; the next tick retries.
+            logger.exception("Background job maintenance failed")
+
+
+def start_job_maintenance(session_factory: sessionmaker) -> None:
+    """Run `run_job_maintenance` every `JOB_HEARTBEAT_SECONDS` against ``session_factory``."""
+
+    global _MAINTENANCE_THREAD, _MAINTENANCE_STOP, _MAINTENANCE_FACTORY
+    with _LOCK:
+        _MAINTENANCE_FACTORY = session_factory
+        if _MAINTENANCE_THREAD is not None and _MAINTENANCE_THREAD.is_alive():
+            return
+        _MAINTENANCE_STOP = threading.Event()
+        _MAINTENANCE_THREAD = threading.Thread(
+            target=_maintenance_loop,
+            args=(_MAINTENANCE_STOP,),
+            name="staffalloc-job-maintenance",
+            daemon=True,
+        )
+        _MAINTENANCE_THREAD.start()
+
+
+def shutdown_job_runner(wait: bool = False) -> None:
+    """Stop accepting jobs; optionally wait for running ones to finish."""
+
+    global _EXECUTOR, _MAINTENANCE_THREAD, _MAINTENANCE_STOP, _MAINTENANCE_FACTORY
+    with _LOCK:
+        executor, _EXECUTOR = _EXECUTOR, None
+        stop, _MAINTENANCE_STOP = _MAINTENANCE_STOP, None
+        _MAINTENANCE_THREAD = _MAINTENANCE_FACTORY = None
+    if stop is not None:
+        stop.set()
+    if executor is not None:
+        executor.shutdown(wait=wait, cancel_futures=not wait)
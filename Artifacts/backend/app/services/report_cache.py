@@ -0,0 +1,173 @@
+"""Server-side cache of report responses with ETag revalidation.
+
+Dashboards are polled far more often than the data behind them changes, so
+report endpoints keep their serialized responses in memory, keyed by
+endpoint and query parameters (which include ``manager_id``). Each response
+is tagged with an ETag derived from that key and the data versions of the
+scopes the report reads (a manager, a project, a user, or everything). The
+versions are bumped in the same transaction as the writes they describe
+(see the report data version section of `app.crud`), so a cached response is
+reused exactly until something it depends on is written, and clients that
+send the ETag back in ``If-None-Match`` get a 304 without the report being
+built or sent.
+
+Key components:
+- `ReportCache`: bounded LRU of rendered responses for one database.
+- `manager_scope`, `project_scope`, `user_scope`: the scopes reports read.
+- `report_etag`: ETag of a request key and its scope versions.
+- `cached_report`: serves a report from the cache or builds and stores it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+from fastapi import Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.core.config import settings
+from app.crud import ReportScope
+
+# Clients must revalidate before reusing a response, which is what makes the
+# conditional request (and its 304) happen on every poll.
+CACHE_CONTROL = "private, no-cache"
+
+
+def manager_scope(manager_id: Optional[int]) -> ReportScope:
+    """Scope of a manager's reports; without a manager the report spans everything."""
+
+    if manager_id is None:
+        return (models.REPORT_SCOPE_ALL, 0)
+    return (models.REPORT_SCOPE_MANAGER, manager_id)
+
+
+def project_scope(project_id: int) -> ReportScope:
+    return (models.REPORT_SCOPE_PROJECT, project_id)
+
+
+def user_scope(user_id: int) -> ReportScope:
+    return (models.REPORT_SCOPE_USER, user_id)
+
+
+class ReportCache:
+    """Rendered report bodies by request key, evicting the least recently used."""
+
+    def __init__(self) -> None:
+        self._entries: "OrderedDict[str, Tuple[str, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, etag: str) -> Optional[bytes]:
+        """Return the body stored for ``key`` if it was rendered for ``etag``."""
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != etag:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: str, etag: str, body: bytes) -> None:
+        max_entries = settings.REPORT_CACHE_MAX_ENTRIES
+        if max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (etag, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_CACHES: "weakref.WeakKeyDictionary[Engine, ReportCache]" = weakref.WeakKeyDictionary()
+_CACHES_LOCK = threading.Lock()
+
+
+def get_report_cache(db: Session) -> ReportCache:
+    """Return the report cache for the session's database."""
+
+    bind = db.get_bind()
+    engine = bind.engine if hasattr(bind, "engine") else bind
+    with _CACHES_LOCK:
+        cache = _CACHES.get(engine)
+        if cache is None:
+            cache = _CACHES[engine] = ReportCache()
+        return cache
+
+
+def request_key(request: Request, vary: Sequence[Any] = ()) -> str:
+    """Identify a report request by path, sorted query parameters and ``vary``."""
+
+    params = sorted(request.query_params.multi_items())
+    return json.dumps([request.url.path, params, list(vary)], default=str)
+
+
+def report_etag(key: str, versions: Dict[ReportScope, int]) -> str:
+    payload = json.dumps([key, sorted(versions.items())])
+    return '"%s"' % hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def render_report(result: Any) -> bytes:
+    """Serialize a report to the JSON bytes stored in the cache."""
+
+    return JSONResponse(content=jsonable_encoder(result)).body
+
+
+def cached_report(
+    request: Request,
+    db: Session,
+    *,
+    scopes: Iterable[ReportScope],
+    build: Callable[[], Any],
+    vary: Sequence[Any] = (),
+) -> Response:
+    """
+    Answer a report request from the cache when its scopes are unchanged.
+
+    ``build`` produces the report (a Pydantic model or plain data) on a miss.
+    ``vary`` lists inputs other than the query string the report depends on,
+    such as today's date. The versions are read before the report is built,
+    so a write committed in between can only make a body newer than its
+    ETag, never older.
+    """
+    # Month capacity comes from the configured holiday calendar.
+    key = request_key(request, [settings.CAPACITY_HOLIDAY_CALENDAR, *vary])
+    versions = crud.get_report_data_versions(db, [*scopes, (models.REPORT_SCOPE_EPOCH, 0)])
+    etag = report_etag(key, versions)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    cache = get_report_cache(db)
+    body = cache.get(key, etag)
+    if body is None:
+        body = render_report(build())
+        cache.put(key, etag, body)
+    return Response(content=body, media_type="application/json", headers=headers)
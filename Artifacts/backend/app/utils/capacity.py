@@ -0,0 +1,216 @@
+"""Precomputed business-calendar capacity table.
+
+Standard monthly capacity is 8 hours per business day (Monday-Friday, minus
+holidays from a pluggable holiday calendar). Rather than walking the calendar
+on every call, `CapacityTable` computes every month from `FIRST_YEAR` through
+`LAST_YEAR` once with NumPy and serves scalar and array lookups from that
+table. Project `MonthlyHourOverride` values can be layered on top of an array
+lookup in one vectorized pass.
+
+Months are addressed by ordinal (``year * 12 + month - 1``) in the array
+functions, matching `app.services.conflicts`.
+
+Key components:
+- `register_holiday_calendar`: registers a holiday calendar under a name.
+- `CapacityTable`: cached standard hours per month for one holiday calendar.
+- `get_capacity_table`: the table for ``settings.CAPACITY_HOLIDAY_CALENDAR``.
+"""
+
+from __future__ import annotations
+
+import calendar
+import threading
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterable, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+FIRST_YEAR = 2020
+LAST_YEAR = 2050
+HOURS_PER_DAY = 8
+
+MonthKey = Tuple[int, int]
+HolidayCalendar = Callable[[int], Iterable[date]]
+
+
+def month_ordinal(year: int, month: int) -> int:
+    return year * 12 + month - 1
+
+
+# --------------------------------------------------------------------------------
+# Holiday calendars
+# --------------------------------------------------------------------------------
+
+_CALENDARS: Dict[str, HolidayCalendar] = {}
+
+
+def register_holiday_calendar(name: str) -> Callable[[HolidayCalendar], HolidayCalendar]:
+    """Register ``func(year) -> dates`` as the holiday calendar called ``name``."""
+
+    def decorator(func: HolidayCalendar) -> HolidayCalendar:
+        _CALENDARS[name] = func
+        return func
+
+    return decorator
+
+
+@register_holiday_calendar("none")
+def _no_holidays(year: int) -> Iterable[date]:
+    return ()
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """The ``n``-th ``weekday`` (0=Monday) of the month; ``n=-1`` for the last one."""
+
+    if n < 0:
+        last = date(year, month, calendar.monthrange(year, month)[1])
+        return last - timedelta(days=(last.weekday() - weekday) % 7)
+    first = date(year, month, 1)
+    return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+
+
+def _observed(day: date) -> date:
+    """Move Saturday holidays to Friday and Sunday holidays to Monday."""
+
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+@register_holiday_calendar("us_federal")
+def _us_federal_holidays(year: int) -> Iterable[date]:
+    fixed = [date(year, 1, 1), date(year, 7, 4), date(year, 11, 11), date(year, 12, 25)]
+    if year >= 2021:
+        fixed.append(date(year, 6, 19))
+    holidays = [_observed(day) for day in fixed]
+    holidays += [
+        _nth_weekday(year, 1, 0, 3),  # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),  # Washington's Birthday
+        _nth_weekday(year, 5, 0, -1),  # Memorial Day
+        _nth_weekday(year, 9, 0, 1),  # Labor Day
+        _nth_weekday(year, 10, 0, 2),  # Columbus Day
+        _nth_weekday(year, 11, 3, 4),  # Thanksgiving
+    ]
+    # New Year's Day falling on a Saturday is observed on Dec 31 of the prior year.
+    if date(year + 1, 1, 1).weekday() == 5:
+        holidays.append(date(year, 12, 31))
+    return [day for day in holidays if day.year == year]
+
+
+# --------------------------------------------------------------------------------
+# Capacity table
+# --------------------------------------------------------------------------------
+
+
+def _business_hours(first_ordinal: int, count: int, holidays: HolidayCalendar) -> np.ndarray:
+    # datetime64[M] counts months from January 1970.
+    months = np.arange(first_ordinal, first_ordinal + count + 1) - month_ordinal(1970, 1)
+    bounds = months.astype("datetime64[M]").astype("datetime64[D]")
+    years = range(first_ordinal // 12, (first_ordinal + count) // 12 + 1)
+    holiday_days = np.array(
+        sorted({day for year in years for day in holidays(year)}), dtype="datetime64[D]"
+    )
+    business_days = np.busday_count(bounds[:-1], bounds[1:], holidays=holiday_days)
+    return business_days.astype(np.int64) * HOURS_PER_DAY
+
+
+class CapacityTable:
+    """Standard working hours per month for one holiday calendar.
+
+    Months between ``FIRST_YEAR`` and ``LAST_YEAR`` are served from the
+    precomputed table; others are computed on demand.
+    """
+
+    def __init__(self, holidays: HolidayCalendar) -> None:
+        self.holidays = holidays
+        self.first_ordinal = month_ordinal(FIRST_YEAR, 1)
+        self.hours = _business_hours(self.first_ordinal, (LAST_YEAR - FIRST_YEAR + 1) * 12, holidays)
+        self.hours.setflags(write=False)
+
+    def month_hours(self, year: int, month: int) -> int:
+        index = month_ordinal(year, month) - self.first_ordinal
+        if 0 <= index < len(self.hours):
+            return int(self.hours[index])
+        return int(_business_hours(month_ordinal(year, month), 1, self.holidays)[0])
+
+    def hours_for_ordinals(self, ordinals: np.ndarray) -> np.ndarray:
+        """Standard hours for each month ordinal in ``ordinals``."""
+
+        ordinals = np.asarray(ordinals, dtype=np.int64)
+        index = ordinals - self.first_ordinal
+        inside = (index >= 0) & (index < len(self.hours))
+        if inside.all():
+            return self.hours[index]
+        result = np.empty(ordinals.shape, dtype=np.int64)
+        result[inside] = self.hours[index[inside]]
+        for position in np.flatnonzero(~inside):
+            ordinal = int(ordinals.flat[position])
+            result.flat[position] = self.month_hours(ordinal // 12, ordinal % 12 + 1)
+        return result
+
+    def hours_for_range(self, first_ordinal: int, count: int) -> np.ndarray:
+        """Standard hours for ``count`` consecutive months starting at ``first_ordinal``."""
+
+        return self.hours_for_ordinals(np.arange(first_ordinal, first_ordinal + count))
+
+    def hours_for_months(
+        self,
+        months: Sequence[MonthKey],
+        overrides: Optional[Mapping[MonthKey, int]] = None,
+    ) -> np.ndarray:
+        """Capacity for each ``(year, month)``, with positive overrides taking precedence."""
+
+        ordinals = np.fromiter(
+            (month_ordinal(year, month) for year, month in months), dtype=np.int64, count=len(months)
+        )
+        return apply_overrides(ordinals, self.hours_for_ordinals(ordinals), overrides)
+
+
+def apply_overrides(
+    ordinals: np.ndarray,
+    hours: np.ndarray,
+    overrides: Optional[Mapping[MonthKey, int]],
+) -> np.ndarray:
+    """Replace ``hours`` with the positive override for the same month ordinal."""
+
+    if not overrides:
+        return hours
+    pairs = sorted(
+        (month_ordinal(year, month), value)
+        for (year, month), value in overrides.items()
+        if value is not None and value > 0
+    )
+    if not pairs:
+        return hours
+    keys = np.array([key for key, _ in pairs], dtype=np.int64)
+    values = np.array([value for _, value in pairs], dtype=np.int64)
+    slots = np.clip(np.searchsorted(keys, ordinals), 0, len(keys) - 1)
+    return np.where(keys[slots] == ordinals, values[slots], hours)
+
+
+_TABLES: Dict[str, CapacityTable] = {}
+_LOCK = threading.Lock()
+
+
+def get_capacity_table(calendar_name: Optional[str] = None) -> CapacityTable:
+    """Return the (cached) table for ``calendar_name`` or the configured calendar."""
+
+    name = (calendar_name or settings.CAPACITY_HOLIDAY_CALENDAR).lower()
+    table = _TABLES.get(name)
+    if table is not None:
+        return table
+    holidays = _CALENDARS.get(name)
+    if holidays is None:
+        raise ValueError(
+            f"Unknown holiday calendar '{name}'. Use one of: {', '.join(sorted(_CALENDARS))}."
+        )
+    with _LOCK:
+        table = _TABLES.get(name)
+        if table is None:
+            table = CapacityTable(holidays)
+            _TABLES[name] = table
+        return table
@@ -0,0 +1,151 @@
+"""Keyset (cursor) pagination for list queries.
+
+OFFSET pagination reads and discards every skipped row, and rows inserted or
+deleted between requests shift later pages. List queries are instead ordered
+by a unique key such as ``(full_name, id)``, and each page starts strictly
+after the last key of the previous one. With an index on the key's columns
+(after any equality filters) every page is a seek plus ``limit`` rows,
+however deep it is. Clients get the key back as an opaque cursor.
+
+Key components:
+- `Keyset`: the ordering of a list query and its cursor encoding.
+- `Page`: a page of results that knows the cursor of the next one.
+- `InvalidCursorError`: raised for cursors that do not decode for a keyset.
+- `NEXT_CURSOR_HEADER`: the response header list endpoints return it in.
+- `paginate`: runs a list endpoint's query and sets that header.
+- `iter_pages`: follows the cursors of a list query to its last page.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import datetime
+import json
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, TypeVar
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import literal, tuple_
+from sqlalchemy.orm import Query
+
+T = TypeVar("T")
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursorError(ValueError):
+    """A pagination cursor that was not issued for this list."""
+
+
+class Page(List[T]):
+    """A list of results plus the cursor of the following page (None on the last one)."""
+
+    def __init__(self, items: Iterable[T] = (), next_cursor: Optional[str] = None) -> None:
+        super().__init__(items)
+        self.next_cursor = next_cursor
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+
+def _decode_value(column, value: Any) -> Any:
+    python_type = column.type.python_type
+    if python_type is datetime.datetime and isinstance(value, str):
+        return datetime.datetime.fromisoformat(value)
+    if python_type is datetime.date and isinstance(value, str):
+        return datetime.date.fromisoformat(value)
+    # JSON true/false would otherwise pass as integer keys.
+    if isinstance(value, python_type) and not isinstance(value, bool):
+        return value
+    raise ValueError(f"expected {python_type.__name__} for {column.key}")
+
+
+class Keyset:
+    """
+    Ascending or descending order over ``columns``, the last of which is unique.
+
+    All columns sort in the same direction, so "after the cursor" is a single
+    row-value comparison that the database can answer from an index.
+    """
+
+    def __init__(self, *columns, descending: bool = False) -> None:
+        self.columns = columns
+        self.descending = descending
+
+    def order_by(self) -> List[Any]:
+        return [column.desc() if self.descending else column.asc() for column in self.columns]
+
+    def encode(self, item: Any) -> str:
+        values = [getattr(item, column.key) for column in self.columns]
+        payload = json.dumps(values, default=_encode_value, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+    def decode(self, cursor: str) -> List[Any]:
+        try:
+            payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            values = json.loads(payload)
+            if not isinstance(values, list) or len(values) != len(self.columns):
+                raise ValueError("wrong number of values")
+            return [_decode_value(column, value) for column, value in zip(self.columns, values)]
+        except (ValueError, TypeError, binascii.Error) as exc:
+            raise InvalidCursorError(f"Invalid pagination cursor: {exc}") from exc
+
+    def _after(self, values: Sequence[Any]):
+        if len(self.columns) == 1:
+            key, bound = self.columns[0], literal(values[0], self.columns[0].type)
+        else:
+            key = tuple_(*self.columns)
+            bound = tuple_(*(literal(value, column.type) for column, value in zip(self.columns, values)))
+        return key < bound if self.descending else key > bound
+
+    def page(
+        self, query: Query, *, after: Optional[str] = None, skip: int = 0, limit: int = 100
+    ) -> Page:
+        """
+        Return up to ``limit`` rows of ``query`` following the cursor ``after``.
+
+        One extra row is fetched to tell whether a next page exists. ``skip``
+        is the legacy offset, applied after the cursor; prefer the cursor.
+        """
+        if after is not None:
+            query = query.filter(self._after(self.decode(after)))
+        rows = query.order_by(*self.order_by()).offset(skip).limit(limit + 1).all()
+        if len(rows) <= limit:
+            return Page(rows)
+        items = rows[:limit]
+        return Page(items, next_cursor=self.encode(items[-1]))
+
+
+def paginate(response: Response, fetch: Callable[[], Page[T]]) -> Page[T]:
+    """
+    Fetch a page for a list endpoint.
+
+    A cursor that does not decode is a 400; the next page's cursor, if any,
+    is returned in the ``X-Next-Cursor`` header so the body stays a list.
+    """
+    try:
+        page = fetch()
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    if page.next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page
+
+
+def iter_pages(fetch: Callable[[Optional[str]], Page[T]]) -> Iterator[T]:
+    """
+    Yield every row of a keyset-paged list.
+
+    ``fetch`` is called with the cursor of the page to load (None for the
+    first) until a page comes back without a next cursor.
+    """
+    cursor: Optional[str] = None
+    while True:
+        page = fetch(cursor)
+        yield from page
+        if page.next_cursor is None:
+            return
+        cursor = page.next_cursor
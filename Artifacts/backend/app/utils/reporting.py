@@ -6,17 +6,16 @@ import calendar
 from datetime import date, timedelta
 from typing import Dict, List, Mapping, Sequence, Tuple
 
+from app.utils.capacity import get_capacity_table
+
 
 def standard_month_hours(year: int, month: int) -> int:
-    """Return the number of working hours in a month assuming 8h weekdays."""
+    """Return the working hours in a month: 8h per weekday, minus configured holidays.
 
-    cal = calendar.Calendar()
-    business_days = sum(
-        1
-        for day, weekday in cal.itermonthdays2(year, month)
-        if day != 0 and weekday < 5
-    )
-    return business_days * 8
+    Served from the cached capacity table (see `app.utils.capacity`).
+    """
+
+    return get_capacity_table().month_hours(year, month)
 
 
 def month_label(year: int, month: int) -> str:
@@ -92,6 +91,16 @@ def month_capacity_hours(
     return max(hours, 1)
 
 
+def month_capacity_series(
+    month_windows: Sequence[MonthKey],
+    overrides: Mapping[MonthKey, int] | None = None,
+) -> List[int]:
+    """Return `month_capacity_hours` for every month in one vectorized lookup."""
+
+    capacities = get_capacity_table().hours_for_months(month_windows, overrides)
+    return [max(int(hours), 1) for hours in capacities]
+
+
 def planned_hours_distribution(
     total_hours: float,
     month_windows: Sequence[MonthKey],
@@ -102,7 +111,7 @@ def planned_hours_distribution(
     if not month_windows:
         return []
 
-    capacities = [month_capacity_hours(year, month, overrides) for year, month in month_windows]
+    capacities = month_capacity_series(month_windows, overrides)
     total_capacity = sum(capacities)
 
     if total_capacity <= 0:
@@ -142,12 +151,13 @@ def build_burn_down_series(
             len(month_windows) - len(planned_distribution)
         )
 
+    capacities = month_capacity_series(month_windows, overrides)
     planned_remaining = float(total_hours)
     actual_remaining = float(total_hours)
     series: List[Dict[str, object]] = []
 
-    for index, (month, planned_burn) in enumerate(
-        zip(month_windows, planned_distribution), start=1
+    for index, (month, planned_burn, capacity) in enumerate(
+        zip(month_windows, planned_distribution, capacities), start=1
     ):
         year, month_num = month
         actual_burn = float(actual_allocations.get(month, 0.0))
@@ -161,7 +171,7 @@ def build_burn_down_series(
                 "actual_hours": round(actual_remaining, 2),
                 "planned_burn_hours": round(planned_burn, 2),
                 "actual_burn_hours": round(actual_burn, 2),
-                "capacity_hours": month_capacity_hours(year, month_num, overrides),
+                "capacity_hours": capacity,
                 "sprint_index": index,
                 "date": date(year, month_num, 1).isoformat(),
             }
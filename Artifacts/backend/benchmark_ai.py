@@ -0,0 +1,259 @@
+"""
+Load benchmark for the AI endpoints.
+
+Drives concurrent chat, conflict and forecast requests and reports p50/p95/p99
+latency, error counts and throughput per scenario. By default the API runs
+in-process with the fake LLM backend against a temporary copy of the
+configured SQLite database (an empty one for other databases), so no server,
+network or Gemini quota is needed and the real database and AI response cache
+are never written; pass --base-url to benchmark a running server instead (start it with
+AI_LLM_BACKEND=fake, or =ollama against app/services/ai/ollama_stub.py).
+
+Examples:
+    python benchmark_ai.py --requests 200 --concurrency 20
+    python benchmark_ai.py --scenarios chat,projects --latency 1.5 --tokens-per-second 40
+    python benchmark_ai.py --base-url http://127.0.0.1:8000 --manager-id 1 --json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import httpx
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent))
+
+API_PREFIX = "/api/v1"
+
+CHAT_QUERIES = (
+    "Who has capacity next month?",
+    "Which employees are over-allocated?",
+    "Summarise staffing on the largest project.",
+    "Who could pick up extra analyst work?",
+)
+
+# Scenario name -> (method, path). "projects" is a non-AI probe that shows
+# whether AI traffic slows down the rest of the API.
+SCENARIOS = {
+    "chat": ("POST", "/ai/chat"),
+    "conflicts": ("GET", "/ai/conflicts"),
+    "forecast": ("GET", "/ai/forecast"),
+    "projects": ("GET", "/projects/"),
+}
+
+
+@dataclass
+class ScenarioResult:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+
+    def summary(self, elapsed: float) -> Dict[str, float]:
+        ordered = sorted(self.latencies)
+        return {
+            "requests": len(ordered) + self.errors,
+            "errors": self.errors,
+            "p50_ms": percentile(ordered, 50) * 1000,
+            "p95_ms": percentile(ordered, 95) * 1000,
+            "p99_ms": percentile(ordered, 99) * 1000,
+            "throughput_rps": len(ordered) / elapsed if elapsed else 0.0,
+        }
+
+
+def percentile(ordered: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending sequence (0.0 when empty)."""
+
+    if not ordered:
+        return 0.0
+    rank = max(math.ceil(q / 100 * len(ordered)), 1)
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+async def _send(
+    client: httpx.AsyncClient,
+    scenario: str,
+    sequence: int,
+    manager_id: Optional[int],
+    api_prefix: str,
+) -> httpx.Response:
+    method, path = SCENARIOS[scenario]
+    url = f"{api_prefix}{path}"
+    if method == "POST":
+        body = {"query": CHAT_QUERIES[sequence % len(CHAT_QUERIES)], "manager_id": manager_id}
+        return await client.post(url, json=body)
+    params = {"manager_id": manager_id} if manager_id is not None and scenario != "projects" else None
+    return await client.get(url, params=params)
+
+
+async def run_benchmark(
+    client: httpx.AsyncClient,
+    *,
+    scenarios: Sequence[str],
+    total_requests: int,
+    concurrency: int,
+    manager_id: Optional[int] = None,
+    api_prefix: str = API_PREFIX,
+) -> Dict[str, object]:
+    """Issue ``total_requests`` round-robin across ``scenarios`` with ``concurrency`` workers."""
+
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        raise ValueError(f"Unknown scenarios: {', '.join(unknown)}")
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for sequence, scenario in zip(range(total_requests), itertools.cycle(scenarios)):
+        queue.put_nowait((sequence, scenario))
+    results = {name: ScenarioResult() for name in scenarios}
+
+    async def worker() -> None:
+        while True:
+            try:
+                sequence, scenario = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            started = time.perf_counter()
+            try:
+                response = await _send(client, scenario, sequence, manager_id, api_prefix)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                results[scenario].latencies.append(time.perf_counter() - started)
+            else:
+                results[scenario].errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(concurrency, 1))))
+    elapsed = time.perf_counter() - started
+
+    combined = ScenarioResult(
+        latencies=[latency for result in results.values() for latency in result.latencies],
+        errors=sum(result.errors for result in results.values()),
+    )
+    return {
+        "elapsed_seconds": elapsed,
+        "concurrency": concurrency,
+        "scenarios": {name: result.summary(elapsed) for name, result in results.items()},
+        "overall": combined.summary(elapsed),
+    }
+
+
+def _print_report(report: Dict[str, object]) -> None:
+    header = f"{'scenario':<12}{'requests':>9}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}"
+    print(f"Completed in {report['elapsed_seconds']:.2f}s with concurrency {report['concurrency']}")
+    print(header)
+    print("-" * len(header))
+    rows = list(report["scenarios"].items()) + [("overall", report["overall"])]
+    for name, stats in rows:
+        print(
+            f"{name:<12}{stats['requests']:>9}{stats['errors']:>8}"
+            f"{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}"
+            f"{stats['throughput_rps']:>9.1f}"
+        )
+
+
+def _use_scratch_storage(settings, directory: Path) -> None:
+    """Point the database, reports and vector store at ``directory``.
+
+    A configured SQLite database is copied first (through SQLite's backup
+    API, so a live WAL database copies consistently) to benchmark on real
+    data; other databases start empty.
+    """
+
+    directory.mkdir(parents=True, exist_ok=True)
+    target = directory / "staffalloc.db"
+    url = settings.DATABASE_URL
+    if url.startswith("sqlite:///") and ":memory:" not in url:
+        source_path = Path(url[len("sqlite:///"):])
+        if source_path.is_file():
+            source = sqlite3.connect(f"file:{source_path}?mode=ro", uri=True)
+            copy = sqlite3.connect(target)
+            try:
+                source.backup(copy)
+            finally:
+                copy.close()
+                source.close()
+    settings.DATABASE_URL = f"sqlite:///{target}"
+    settings.SQLITE_DB_PATH = str(target)
+    settings.REPORTS_PATH = settings.REPORTS_DIR = str(directory / "reports")
+    settings.VECTOR_STORE_PATH = settings.VECTOR_STORE_DIR = str(directory / "vector_store")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the StaffAlloc AI endpoints.")
+    parser.add_argument("--base-url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--scenarios", default="chat,conflicts,forecast")
+    parser.add_argument("--requests", type=int, default=120, help="total requests across scenarios")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--manager-id", type=int)
+    parser.add_argument("--latency", type=float, help="in-process fake LLM time to first token (s)")
+    parser.add_argument("--tokens-per-second", type=float, help="in-process fake LLM token rate")
+    parser.add_argument(
+        "--keep-cache",
+        action="store_true",
+        help="leave the AI response cache on (by default it is disabled so every request reaches the LLM)",
+    )
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+
+    async def run() -> Dict[str, object]:
+        if args.base_url:
+            async with httpx.AsyncClient(base_url=args.base_url, timeout=120) as client:
+                return await run_benchmark(
+                    client,
+                    scenarios=scenarios,
+                    total_requests=args.requests,
+                    concurrency=args.concurrency,
+                    manager_id=args.manager_id,
+                )
+
+        # In-process: configure the fake LLM and a scratch database before the
+        # app reads its settings and creates its engines.
+        os.environ.setdefault("AI_LLM_BACKEND", "fake")
+        from app.core.config import settings
+
+        _use_scratch_storage(settings, Path(scratch))
+        from app.db.session import create_db_and_tables
+        from app.main import app
+
+        if args.latency is not None:
+            settings.AI_FAKE_LATENCY_SECONDS = args.latency
+        if args.tokens_per_second is not None:
+            settings.AI_FAKE_TOKENS_PER_SECOND = args.tokens_per_second
+        if not args.keep_cache:
+            settings.AI_RESPONSE_CACHE_TTL_SECONDS = 0
+        create_db_and_tables()
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=120) as client:
+            return await run_benchmark(
+                client,
+                scenarios=scenarios,
+                total_requests=args.requests,
+                concurrency=args.concurrency,
+                manager_id=args.manager_id,
+                api_prefix=settings.API_V1_STR,
+            )
+
+    with tempfile.TemporaryDirectory(prefix="staffalloc-ai-bench-", ignore_cleanup_errors=True) as scratch:
+        report = asyncio.run(run())
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+
+
+if __name__ == "__main__":
+    main()
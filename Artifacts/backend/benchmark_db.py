@@ -0,0 +1,313 @@
+"""
+Concurrency benchmark for the database profiles.
+
+Seeds a scratch SQLite file per profile, then runs threads that issue a mix
+of dashboard reads (rollup queries) and allocation writes (ORM updates, so
+the rollup and report-version hooks run as in the API) for a fixed time.
+Reports throughput, p50/p95/p99 latency and errors such as "database is
+locked" per operation and profile, so the "standard" and "concurrent"
+profiles (see app/db/profiles.py) can be compared on the same machine.
+
+Examples:
+    python benchmark_db.py
+    python benchmark_db.py --threads 32 --duration 15 --write-ratio 0.3
+    python benchmark_db.py --profiles concurrent --json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeoutError
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app import crud, models  # noqa: E402
+from app.db.changes import mark_structural_change  # noqa: E402
+from app.db.profiles import get_database_profile  # noqa: E402
+from app.db.session import create_database_engines, make_sessionmaker  # noqa: E402
+
+START_YEAR = 2025
+
+
+@dataclass
+class OperationResult:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+
+    def summary(self, elapsed: float) -> Dict[str, float]:
+        ordered = sorted(self.latencies)
+        return {
+            "operations": len(ordered) + self.errors,
+            "errors": self.errors,
+            "p50_ms": percentile(ordered, 50) * 1000,
+            "p95_ms": percentile(ordered, 95) * 1000,
+            "p99_ms": percentile(ordered, 99) * 1000,
+            "throughput_ops": len(ordered) / elapsed if elapsed else 0.0,
+        }
+
+
+def percentile(ordered: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending sequence (0.0 when empty)."""
+
+    if not ordered:
+        return 0.0
+    rank = max(math.ceil(q / 100 * len(ordered)), 1)
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def seed_database(session_factory, *, managers: int, employees: int, months: int) -> Dict[str, List[int]]:
+    """Seed managers with one project each, their employees and monthly allocations."""
+
+    with session_factory() as db:
+        conn = db.connection()
+        role_id = conn.execute(insert(models.Role).returning(models.Role.id), {"name": "Engineer"}).scalar_one()
+        lcat_id = conn.execute(insert(models.LCAT).returning(models.LCAT.id), {"name": "Level 2"}).scalar_one()
+        manager_ids = list(range(1, managers + 1))
+        conn.execute(
+            insert(models.User),
+            [
+                {
+                    "id": manager_id,
+                    "email": f"bench.manager{manager_id}@example.com",
+                    "full_name": f"Manager {manager_id}",
+                    "password_hash": "hashed",
+                    "system_role": models.SystemRole.PM,
+                    "is_active": True,
+                }
+                for manager_id in manager_ids
+            ],
+        )
+        conn.execute(
+            insert(models.Project),
+            [
+                {
+                    "id": manager_id,
+                    "name": f"Project {manager_id}",
+                    "code": f"BENCH-{manager_id}",
+                    "start_date": date(START_YEAR, 1, 1),
+                    "sprints": 26,
+                    "manager_id": manager_id,
+                }
+                for manager_id in manager_ids
+            ],
+        )
+        employee_rows, assignment_rows = [], []
+        for index in range(employees):
+            user_id = managers + 1 + index
+            manager_id = manager_ids[index % managers]
+            employee_rows.append(
+                {
+                    "id": user_id,
+                    "email": f"bench.employee{index}@example.com",
+                    "full_name": f"Employee {index:04d}",
+                    "password_hash": "hashed",
+                    "system_role": models.SystemRole.EMPLOYEE,
+                    "is_active": True,
+                    "manager_id": manager_id,
+                }
+            )
+            assignment_rows.append(
+                {
+                    "id": index + 1,
+                    "project_id": manager_id,
+                    "user_id": user_id,
+                    "role_id": role_id,
+                    "lcat_id": lcat_id,
+                    "funded_hours": 1500,
+                }
+            )
+        conn.execute(insert(models.User), employee_rows)
+        conn.execute(insert(models.ProjectAssignment), assignment_rows)
+        conn.execute(
+            insert(models.Allocation),
+            [
+                {
+                    "project_assignment_id": row["id"],
+                    "year": START_YEAR + month // 12,
+                    "month": month % 12 + 1,
+                    "allocated_hours": 80,
+                }
+                for row in assignment_rows
+                for month in range(months)
+            ],
+        )
+        mark_structural_change(db)
+        db.commit()
+        # Seeding is not a request: run the queued rollup rebuild right away.
+        crud.rebuild_requested_allocation_rollups(db)
+        allocation_ids = [allocation_id for (allocation_id,) in db.query(models.Allocation.id)]
+    return {"managers": manager_ids, "allocations": allocation_ids}
+
+
+def run_profile(
+    profile_name: str,
+    directory: Path,
+    *,
+    threads: int,
+    duration: float,
+    write_ratio: float,
+    managers: int,
+    employees: int,
+    months: int,
+) -> Dict[str, object]:
+    """Benchmark one profile against a freshly seeded database file."""
+
+    profile = get_database_profile(profile_name)
+    url = f"sqlite:///{directory / f'bench-{profile_name}.db'}"
+    engine, read_engine = create_database_engines(url, profile)
+    models.Base.metadata.create_all(bind=engine)
+    session_factory = make_sessionmaker(engine)
+    read_factory = make_sessionmaker(engine, read_engine)
+    seed = seed_database(session_factory, managers=managers, employees=employees, months=months)
+
+    results = {"read": OperationResult(), "write": OperationResult()}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def read(rng: random.Random) -> None:
+        manager_id = rng.choice(seed["managers"])
+        with read_factory() as db:
+            crud.get_monthly_user_allocation_totals(db, manager_id=manager_id)
+            crud.get_role_capacity_summary(db, manager_id=manager_id)
+
+    def write(rng: random.Random) -> None:
+        with session_factory() as db:
+            allocation = db.get(models.Allocation, rng.choice(seed["allocations"]))
+            allocation.allocated_hours = rng.randint(0, 160)
+            db.commit()
+
+    def worker(index: int) -> None:
+        rng = random.Random(index)
+        local = {"read": OperationResult(), "write": OperationResult()}
+        while time.perf_counter() < deadline:
+            kind = "write" if rng.random() < write_ratio else "read"
+            started = time.perf_counter()
+            try:
+                (write if kind == "write" else read)(rng)
+            except (OperationalError, PoolTimeoutError):
+                local[kind].errors += 1
+                continue
+            local[kind].latencies.append(time.perf_counter() - started)
+        with lock:
+            for kind, result in local.items():
+                results[kind].latencies.extend(result.latencies)
+                results[kind].errors += result.errors
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    engine.dispose()
+    if read_engine is not None:
+        read_engine.dispose()
+
+    operations = {kind: result.summary(elapsed) for kind, result in results.items()}
+    completed = sum(len(result.latencies) for result in results.values())
+    return {
+        "profile": profile_name,
+        "elapsed_seconds": elapsed,
+        "throughput_ops": completed / elapsed if elapsed else 0.0,
+        "operations": operations,
+    }
+
+
+def run_benchmark(
+    profiles: Sequence[str],
+    *,
+    threads: int = 16,
+    duration: float = 10.0,
+    write_ratio: float = 0.2,
+    managers: int = 10,
+    employees: int = 500,
+    months: int = 24,
+) -> Dict[str, object]:
+    with tempfile.TemporaryDirectory(prefix="staffalloc-bench-") as directory:
+        reports = [
+            run_profile(
+                name,
+                Path(directory),
+                threads=threads,
+                duration=duration,
+                write_ratio=write_ratio,
+                managers=managers,
+                employees=employees,
+                months=months,
+            )
+            for name in profiles
+        ]
+    return {
+        "config": {
+            "threads": threads,
+            "duration_seconds": duration,
+            "write_ratio": write_ratio,
+            "managers": managers,
+            "employees": employees,
+            "months": months,
+        },
+        "profiles": reports,
+    }
+
+
+def _print_report(report: Dict[str, object]) -> None:
+    config = report["config"]
+    print(
+        f"{config['threads']} threads, {config['duration_seconds']:.0f}s per profile, "
+        f"{config['write_ratio']:.0%} writes, {config['employees']} employees x {config['months']} months"
+    )
+    print(f"{'profile':<12}{'op':<7}{'ops':>8}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'ops/s':>9}")
+    for profile in report["profiles"]:
+        for kind, stats in profile["operations"].items():
+            print(
+                f"{profile['profile']:<12}{kind:<7}{stats['operations']:>8}{stats['errors']:>8}"
+                f"{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}"
+                f"{stats['throughput_ops']:>9.1f}"
+            )
+        print(f"{profile['profile']:<12}{'total':<7}{'':>51}{profile['throughput_ops']:>9.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark mixed read/write load per database profile.")
+    parser.add_argument("--profiles", default="standard,concurrent")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per profile")
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--managers", type=int, default=10)
+    parser.add_argument("--employees", type=int, default=500)
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = run_benchmark(
+        [name.strip() for name in args.profiles.split(",") if name.strip()],
+        threads=args.threads,
+        duration=args.duration,
+        write_ratio=args.write_ratio,
+        managers=args.managers,
+        employees=args.employees,
+        months=args.months,
+    )
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+
+
+if __name__ == "__main__":
+    main()
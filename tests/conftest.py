@@ -32,7 +32,7 @@ BACKEND_PATH = ROOT_PATH / "Artifacts" / "backend"
 if str(BACKEND_PATH) not in sys.path:
     sys.path.insert(0, str(BACKEND_PATH))
 
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.main import app as fastapi_app
 from app.models import Base
 
@@ -87,10 +87,12 @@ def app(session_factory: sessionmaker) -> Generator[FastAPI, None, None]:
             db.close()
 
     fastapi_app.dependency_overrides[get_db] = _get_test_db
+    fastapi_app.dependency_overrides[get_read_db] = _get_test_db
     try:
         yield fastapi_app
     finally:
         fastapi_app.dependency_overrides.pop(get_db, None)
+        fastapi_app.dependency_overrides.pop(get_read_db, None)
 
 
 @pytest.fixture
@@ -2,8 +2,17 @@
 
 from __future__ import annotations
 
+import asyncio
+import datetime
+import json
+from types import SimpleNamespace
+
 import pytest
 
+from app import crud, models
+from app.core.config import settings
+from app.services.ai import GeminiInvocationError, gemini, response_cache
+
 
 @pytest.fixture
 def ai_setup(client, api_prefix):
@@ -75,3 +84,230 @@ def test_conflict_forecast_balance_and_reindex(client, api_prefix, ai_setup):
     assert "message" in data
 
 
+
+
+class _FakeAsyncModels:
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.stream_chunks = ["Dana ", "has ", "capacity."]
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+
+    async def generate_content(self, *, model, contents, config):
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        return SimpleNamespace(text=f"echo: {contents[0][:20]}")
+
+    async def generate_content_stream(self, *, model, contents, config):
+        async def chunks():
+            for text in self.stream_chunks:
+                await asyncio.sleep(self.delay)
+                yield SimpleNamespace(text=text)
+
+        return chunks()
+
+
+@pytest.fixture
+def fake_gemini(monkeypatch):
+    models = _FakeAsyncModels()
+    client = SimpleNamespace(aio=SimpleNamespace(models=models))
+    monkeypatch.setattr(gemini, "_ensure_client", lambda: client)
+    monkeypatch.setattr(gemini, "genai_types", SimpleNamespace(GenerateContentConfig=dict))
+    return models
+
+
+def test_async_calls_respect_concurrency_limit(fake_gemini, monkeypatch):
+    monkeypatch.setattr(settings, "AI_MAX_CONCURRENCY", 2)
+    fake_gemini.delay = 0.05
+
+    async def run():
+        return await asyncio.gather(*(gemini._call_gemini_async(f"prompt {i}") for i in range(6)))
+
+    answers = asyncio.run(run())
+    assert answers == [f"echo: prompt {i}" for i in range(6)]
+    assert fake_gemini.peak == 2
+
+
+def test_async_call_times_out(fake_gemini, monkeypatch):
+    monkeypatch.setattr(settings, "AI_REQUEST_TIMEOUT_SECONDS", 0.01)
+    fake_gemini.delay = 1.0
+
+    with pytest.raises(GeminiInvocationError, match="timed out"):
+        asyncio.run(gemini._call_gemini_async("slow prompt"))
+    assert fake_gemini.active == 0
+
+
+def test_ai_endpoints_await_async_gemini(client, api_prefix, ai_setup, fake_gemini):
+    response = client.post(
+        f"{api_prefix}/ai/chat",
+        json={"query": "Who works on AI Project?", "context_limit": 3},
+    )
+    assert response.status_code == 200
+    assert response.json()["answer"].startswith("echo: ")
+
+    forecast = client.get(f"{api_prefix}/ai/forecast", params={"months_ahead": 1})
+    assert forecast.status_code == 200
+    assert "echo: " in forecast.json()["message"]
+
+
+def test_disconnected_client_cancels_pending_call(monkeypatch):
+    from fastapi import HTTPException
+
+    from app.api import ai as ai_api
+
+    monkeypatch.setattr(ai_api, "_DISCONNECT_POLL_SECONDS", 0.01)
+    cancelled = asyncio.Event()
+
+    async def never_finishes():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def is_disconnected():
+        return True
+
+    request = SimpleNamespace(is_disconnected=is_disconnected, url=SimpleNamespace(path="/ai/chat"))
+
+    async def run():
+        with pytest.raises(HTTPException) as excinfo:
+            await ai_api._unless_disconnected(request, never_finishes())
+        await asyncio.sleep(0)
+        return excinfo.value.status_code, cancelled.is_set()
+
+    assert asyncio.run(run()) == (499, True)
+
+
+def _events(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_chat_stream_sends_sources_then_tokens(client, api_prefix, ai_setup, fake_gemini):
+    assert client.post(f"{api_prefix}/ai/reindex").status_code == 202
+    response = client.post(
+        f"{api_prefix}/ai/chat/stream",
+        json={"query": "Who works on AI Project?", "context_limit": 3},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = _events(response.text)
+    assert events[0][0] == "sources"
+    assert any(source.startswith("project:") for source in events[0][1]["sources"])
+    assert events[1:] == [
+        ("token", {"text": "Dana "}),
+        ("token", {"text": "has "}),
+        ("token", {"text": "capacity."}),
+        ("done", {}),
+    ]
+
+
+def test_chat_stream_reports_midstream_failure(client, api_prefix, fake_gemini, monkeypatch):
+    monkeypatch.setattr(settings, "AI_REQUEST_TIMEOUT_SECONDS", 0.01)
+    fake_gemini.delay = 1.0
+
+    response = client.post(f"{api_prefix}/ai/chat/stream", json={"query": "Anything new?"})
+    assert response.status_code == 200
+    events = _events(response.text)
+    assert [name for name, _ in events] == ["sources", "error"]
+
+
+def test_chat_stream_requires_configured_gemini(client, api_prefix, monkeypatch):
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    monkeypatch.setattr(gemini, "_CLIENT", None)
+
+    response = client.post(f"{api_prefix}/ai/chat/stream", json={"query": "Anything new?"})
+    assert response.status_code == 503
+
+
+def test_insight_narratives_are_cached_until_data_changes(client, api_prefix, fake_gemini):
+    first = client.get(f"{api_prefix}/ai/forecast", params={"months_ahead": 2})
+    second = client.get(f"{api_prefix}/ai/forecast", params={"months_ahead": 2})
+    assert first.status_code == second.status_code == 200
+    assert first.json()["message"] == second.json()["message"]
+    assert fake_gemini.calls == 1
+
+    # New staffing data changes the data version, so the narrative is regenerated.
+    client.post(
+        f"{api_prefix}/projects/",
+        json={"name": "Cache Buster", "code": "CB-1", "start_date": "2025-01-01", "sprints": 2},
+    )
+    client.get(f"{api_prefix}/ai/forecast", params={"months_ahead": 2})
+    assert fake_gemini.calls == 2
+
+
+def test_response_cache_version_ignores_other_managers(client, api_prefix, db_session):
+    def create_manager(email):
+        response = client.post(
+            f"{api_prefix}/employees/",
+            json={
+                "email": email,
+                "full_name": email,
+                "password": "Password1!",
+                "system_role": "PM",
+                "is_active": True,
+            },
+        )
+        return response.json()["id"]
+
+    mine, theirs = create_manager("mine@example.com"), create_manager("theirs@example.com")
+    before = response_cache.data_version(db_session, manager_id=mine)
+    db_session.rollback()
+
+    client.post(
+        f"{api_prefix}/projects/",
+        json={"name": "Theirs", "code": "TH-1", "start_date": "2025-01-01", "sprints": 2, "manager_id": theirs},
+    )
+    assert response_cache.data_version(db_session, manager_id=mine) == before
+    db_session.rollback()
+
+    client.post(
+        f"{api_prefix}/projects/",
+        json={"name": "Mine", "code": "MI-1", "start_date": "2025-01-01", "sprints": 2, "manager_id": mine},
+    )
+    assert response_cache.data_version(db_session, manager_id=mine) != before
+
+
+def test_response_cache_can_be_disabled(client, api_prefix, fake_gemini, monkeypatch):
+    monkeypatch.setattr(settings, "AI_RESPONSE_CACHE_TTL_SECONDS", 0)
+    client.get(f"{api_prefix}/ai/forecast")
+    client.get(f"{api_prefix}/ai/forecast")
+    assert fake_gemini.calls == 2
+
+
+def test_response_cache_expires_and_evicts_least_recently_used(db_session):
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    bind = db_session.get_bind()
+    for key in ("a", "b"):
+        response_cache.store(bind, key, model="m", response_text=key)
+    last_used = {entry.cache_key: entry.last_used_at for entry in db_session.query(models.AIResponseCache)}
+    db_session.rollback()
+
+    # A hit only reads; the request session is left without writes.
+    assert response_cache.lookup(db_session, "a") == "a"
+    assert not db_session.dirty
+    db_session.rollback()
+    assert db_session.get(models.AIResponseCache, "a").last_used_at == last_used["a"]
+
+    # The next store records the hit, so "b" is the least recently used entry.
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(settings, "AI_RESPONSE_CACHE_MAX_ENTRIES", 2)
+        response_cache.store(bind, "c", model="m", response_text="c")
+    db_session.expire_all()
+    keys = {entry.cache_key for entry in db_session.query(models.AIResponseCache)}
+    assert keys == {"a", "c"}
+
+    later = now + datetime.timedelta(hours=1)
+    assert crud.get_cached_ai_response(db_session, "c", not_before=later) is None
+    assert crud.delete_expired_ai_responses(db_session, created_before=later) == 2
@@ -0,0 +1,153 @@
+"""Tests for the pluggable LLM backends, the Ollama stub and the AI benchmark."""
+
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+import benchmark_ai
+from app.core.config import settings
+from app.services.ai.backends import FakeLLMBackend, LLMBackendError, OllamaBackend, get_llm_backend
+from app.services.ai.ollama_stub import create_app
+
+
+@pytest.fixture
+def fake_backend(monkeypatch):
+    monkeypatch.setattr(settings, "AI_LLM_BACKEND", "fake")
+    monkeypatch.setattr(settings, "AI_FAKE_LATENCY_SECONDS", 0.0)
+    monkeypatch.setattr(settings, "AI_FAKE_TOKENS_PER_SECOND", 0.0)
+    monkeypatch.setattr(settings, "AI_FAKE_RESPONSE_TOKENS", 12)
+    return get_llm_backend()
+
+
+def test_fake_backend_is_deterministic_and_capped():
+    backend = FakeLLMBackend(latency=0.0, tokens_per_second=0.0, response_tokens=20)
+    first = backend.generate("same prompt", temperature=0.2, max_output_tokens=5)
+    assert first == backend.generate("same prompt", temperature=0.9, max_output_tokens=5)
+    assert len(first.split()) == 5
+    assert first != backend.generate("other prompt", temperature=0.2, max_output_tokens=5)
+
+    async def stream():
+        return [token async for token in backend.astream("same prompt", temperature=0.2, max_output_tokens=5)]
+
+    assert "".join(asyncio.run(stream())) == first
+
+
+def test_fake_backend_simulates_latency_and_token_rate():
+    backend = FakeLLMBackend(latency=0.05, tokens_per_second=100.0, response_tokens=5)
+
+    async def timed():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await backend.agenerate("prompt", temperature=0.2, max_output_tokens=100)
+        return loop.time() - started
+
+    assert asyncio.run(timed()) >= 0.05 + 5 / 100.0 - 0.01
+
+
+def test_ai_endpoints_use_configured_backend(client, api_prefix, fake_backend):
+    response = client.post(f"{api_prefix}/ai/chat", json={"query": "Who has capacity?"})
+    assert response.status_code == 200
+    answer = response.json()["answer"]
+    assert len(answer.split()) == 12
+    assert client.post(f"{api_prefix}/ai/chat", json={"query": "Who has capacity?"}).json()["answer"] == answer
+
+    stream = client.post(f"{api_prefix}/ai/chat/stream", json={"query": "Who has capacity?"})
+    assert stream.status_code == 200
+    assert stream.text.count("event: token") == 12
+
+
+def test_unknown_backend_is_a_configuration_error(client, api_prefix, monkeypatch):
+    monkeypatch.setattr(settings, "AI_LLM_BACKEND", "nonexistent")
+    response = client.post(f"{api_prefix}/ai/chat", json={"query": "Who has capacity?"})
+    assert response.status_code == 503
+    assert "AI_LLM_BACKEND" in response.json()["detail"]
+
+
+def test_ollama_backend_against_stub():
+    fake = FakeLLMBackend(latency=0.0, tokens_per_second=0.0, response_tokens=8)
+    backend = OllamaBackend(
+        base_url="http://ollama-stub",
+        model="phi3:mini",
+        timeout=5.0,
+        transport=httpx.ASGITransport(app=create_app(fake)),
+    )
+
+    async def run():
+        chunks = [
+            chunk async for chunk in backend.astream("hello", temperature=0.1, max_output_tokens=3)
+        ]
+        answer = await backend.agenerate("hello", temperature=0.1, max_output_tokens=3)
+        return chunks, answer
+
+    chunks, answer = asyncio.run(run())
+    expected = fake.generate("hello", temperature=0.1, max_output_tokens=3)
+    assert "".join(chunks) == expected
+    assert answer == expected
+
+
+def test_ollama_backend_rejects_malformed_stream_lines():
+    def reply(request):
+        return httpx.Response(200, text='{"response": "Hel"}\nnot json\n')
+
+    backend = OllamaBackend(
+        base_url="http://ollama-stub", model="phi3:mini", timeout=5.0, transport=httpx.MockTransport(reply)
+    )
+
+    async def run():
+        return [chunk async for chunk in backend.astream("hello", temperature=0.1, max_output_tokens=3)]
+
+    with pytest.raises(LLMBackendError, match="invalid stream line"):
+        asyncio.run(run())
+
+
+def test_benchmark_runs_on_a_copy_of_the_database(tmp_path):
+    source = tmp_path / "real.db"
+    with sqlite3.connect(source) as connection:
+        connection.execute("CREATE TABLE ai_response_cache (cache_key TEXT)")
+        connection.execute("INSERT INTO ai_response_cache VALUES ('kept')")
+    fake_settings = SimpleNamespace(DATABASE_URL=f"sqlite:///{source}")
+
+    benchmark_ai._use_scratch_storage(fake_settings, tmp_path / "scratch")
+
+    copy = tmp_path / "scratch" / "staffalloc.db"
+    assert fake_settings.DATABASE_URL == f"sqlite:///{copy}"
+    assert fake_settings.REPORTS_PATH.startswith(str(tmp_path / "scratch"))
+    with sqlite3.connect(copy) as connection:
+        connection.execute("DELETE FROM ai_response_cache")
+    with sqlite3.connect(source) as connection:
+        assert connection.execute("SELECT cache_key FROM ai_response_cache").fetchall() == [("kept",)]
+
+
+def test_percentile_uses_nearest_rank():
+    values = [float(value) for value in range(1, 101)]
+    assert benchmark_ai.percentile(values, 50) == 50.0
+    assert benchmark_ai.percentile(values, 95) == 95.0
+    assert benchmark_ai.percentile(values, 99) == 99.0
+    assert benchmark_ai.percentile([], 99) == 0.0
+
+
+def test_benchmark_reports_latency_percentiles(app, api_prefix, fake_backend):
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            return await benchmark_ai.run_benchmark(
+                client,
+                scenarios=["chat", "conflicts", "forecast"],
+                total_requests=6,
+                concurrency=1,
+                api_prefix=api_prefix,
+            )
+
+    report = asyncio.run(run())
+    assert set(report["scenarios"]) == {"chat", "conflicts", "forecast"}
+    for stats in report["scenarios"].values():
+        assert stats["requests"] == 2
+        assert stats["errors"] == 0
+        assert 0 < stats["p50_ms"] <= stats["p95_ms"] <= stats["p99_ms"]
+    assert report["overall"]["requests"] == 6
+    assert report["overall"]["throughput_rps"] > 0
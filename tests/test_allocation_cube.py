@@ -0,0 +1,295 @@
+"""Tests for the in-memory allocation cube behind the dashboard reports."""
+
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+
+import benchmark_db
+from app import models
+from app.db.profiles import get_database_profile
+from app.db.session import create_database_engines, make_sessionmaker
+from app.services.allocation_cube import get_allocation_cube, peek_allocation_cube
+from app.utils.reporting import standard_month_hours
+
+
+@pytest.fixture
+def cube_seed(client, api_prefix):
+    manager_id = client.post(
+        f"{api_prefix}/employees/",
+        json={
+            "email": "cube.manager@example.com",
+            "full_name": "Cube Manager",
+            "password": "SecurePass9!",
+            "system_role": "PM",
+            "is_active": True,
+        },
+    ).json()["id"]
+
+    role_id = client.post(
+        f"{api_prefix}/admin/roles/",
+        json={"name": "Engineer", "description": "Builds things"},
+    ).json()["id"]
+    lcat_id = client.post(
+        f"{api_prefix}/admin/lcats/",
+        json={"name": "Level 2", "description": "Mid-level"},
+    ).json()["id"]
+
+    user_ids = []
+    for index, name in enumerate(["Avery Busy", "Blake Idle"]):
+        user_ids.append(
+            client.post(
+                f"{api_prefix}/employees/",
+                json={
+                    "email": f"cube.user{index}@example.com",
+                    "full_name": name,
+                    "password": "SecurePass9!",
+                    "system_role": "Employee",
+                    "is_active": True,
+                    "manager_id": manager_id,
+                },
+            ).json()["id"]
+        )
+
+    project_ids = []
+    for code in ("CUBE-A", "CUBE-B"):
+        project_ids.append(
+            client.post(
+                f"{api_prefix}/projects/",
+                json={
+                    "name": f"Project {code}",
+                    "code": code,
+                    "start_date": "2025-01-01",
+                    "sprints": 6,
+                    "manager_id": manager_id,
+                },
+            ).json()["id"]
+        )
+
+    assignments = {}
+    for project_id, funded in zip(project_ids, (400, 200)):
+        assignments[project_id] = client.post(
+            f"{api_prefix}/allocations/assignments",
+            json={
+                "project_id": project_id,
+                "user_id": user_ids[0],
+                "role_id": role_id,
+                "lcat_id": lcat_id,
+                "funded_hours": funded,
+            },
+        ).json()["id"]
+
+    today = date.today()
+    allocation_ids = {}
+    for project_id, hours in zip(project_ids, (150, 100)):
+        allocation_ids[project_id] = client.post(
+            f"{api_prefix}/allocations/",
+            json={
+                "project_assignment_id": assignments[project_id],
+                "year": today.year,
+                "month": today.month,
+                "allocated_hours": hours,
+            },
+        ).json()["id"]
+
+    return {
+        "manager_id": manager_id,
+        "user_ids": user_ids,
+        "project_ids": project_ids,
+        "assignments": assignments,
+        "allocation_ids": allocation_ids,
+        "today": today,
+    }
+
+
+def test_portfolio_dashboard_reads_from_cube(client, api_prefix, cube_seed):
+    manager_id = cube_seed["manager_id"]
+    response = client.get(
+        f"{api_prefix}/reports/portfolio-dashboard", params={"manager_id": manager_id}
+    )
+    assert response.status_code == 200
+    data = response.json()
+
+    assert data["total_projects"] == 2
+    assert data["overall_utilization_pct"] == pytest.approx(250 / 600 * 100, rel=1e-3)
+    assert data["fte_by_role"]["Engineer"] == pytest.approx(250 / 600 * 100, rel=1e-3)
+
+    today = cube_seed["today"]
+    expected_fte = round(250 / standard_month_hours(today.year, today.month) * 100, 2)
+    assert [e["user_id"] for e in data["over_allocated_employees"]] == [cube_seed["user_ids"][0]]
+    busy = data["over_allocated_employees"][0]
+    assert busy["fte_percentage"] == expected_fte
+    assert busy["role"] == "Engineer"
+    assert [p["allocated_hours"] for p in busy["projects"]] == [150, 100]
+
+    idle = [e for e in data["bench_employees"] if e["user_id"] == cube_seed["user_ids"][1]]
+    assert idle and idle[0]["total_hours"] == 0
+
+
+def test_cube_applies_allocation_updates_incrementally(client, api_prefix, db_session, cube_seed):
+    manager_id = cube_seed["manager_id"]
+    client.get(f"{api_prefix}/reports/portfolio-dashboard", params={"manager_id": manager_id})
+    cube = peek_allocation_cube(db_session, manager_id=manager_id)
+    assert cube is not None
+
+    project_id = cube_seed["project_ids"][0]
+    response = client.put(
+        f"{api_prefix}/allocations/{cube_seed['allocation_ids'][project_id]}",
+        json={"allocated_hours": 40},
+    )
+    assert response.status_code == 200
+
+    # Same cube object, updated in place rather than rebuilt.
+    assert peek_allocation_cube(db_session, manager_id=manager_id) is cube
+    today = cube_seed["today"]
+    assert cube.user_month_hours(today.year, today.month) == {cube_seed["user_ids"][0]: 140}
+
+    response = client.delete(
+        f"{api_prefix}/allocations/{cube_seed['allocation_ids'][cube_seed['project_ids'][1]]}"
+    )
+    assert response.status_code == 204
+    assert cube.user_month_hours(today.year, today.month) == {cube_seed["user_ids"][0]: 40}
+
+
+def test_all_managers_cube_is_updated_in_place(client, api_prefix, db_session, cube_seed):
+    cube = get_allocation_cube(db_session)
+    project_id = cube_seed["project_ids"][0]
+    response = client.put(
+        f"{api_prefix}/allocations/{cube_seed['allocation_ids'][project_id]}",
+        json={"allocated_hours": 40},
+    )
+    assert response.status_code == 200
+
+    assert peek_allocation_cube(db_session) is cube
+    today = cube_seed["today"]
+    assert cube.user_month_hours(today.year, today.month) == {cube_seed["user_ids"][0]: 140}
+
+
+def test_interleaved_allocation_edits_do_not_drift_the_cube(db_session, session_factory, cube_seed):
+    manager_id = cube_seed["manager_id"]
+    allocation_id = cube_seed["allocation_ids"][cube_seed["project_ids"][1]]
+    cube = get_allocation_cube(db_session, manager_id=manager_id)
+
+    stale, other = session_factory(), session_factory()
+    try:
+        stale_row = stale.get(models.Allocation, allocation_id)
+        assert stale_row.allocated_hours == 100
+        other.get(models.Allocation, allocation_id).allocated_hours = 80
+        other.commit()
+        # Based on the 100 read before the other commit; the database ends up at 60.
+        stale_row.allocated_hours = 60
+        stale.commit()
+    finally:
+        stale.close()
+        other.close()
+
+    assert peek_allocation_cube(db_session, manager_id=manager_id) is cube
+    today = cube_seed["today"]
+    assert cube.user_month_hours(today.year, today.month) == {cube_seed["user_ids"][0]: 150 + 60}
+
+
+def test_cube_rebuilds_after_structural_change(client, api_prefix, db_session, cube_seed):
+    manager_id = cube_seed["manager_id"]
+    cube = get_allocation_cube(db_session, manager_id=manager_id)
+
+    response = client.delete(
+        f"{api_prefix}/allocations/assignments/{cube_seed['assignments'][cube_seed['project_ids'][1]]}"
+    )
+    assert response.status_code == 204
+    assert peek_allocation_cube(db_session, manager_id=manager_id) is None
+
+    rebuilt = get_allocation_cube(db_session, manager_id=manager_id)
+    assert rebuilt is not cube
+    assert rebuilt.funded_hours_by_user() == {cube_seed["user_ids"][0]: 400}
+
+
+def test_manager_allocations_rollup_window(client, api_prefix, cube_seed):
+    today = cube_seed["today"]
+    response = client.get(
+        f"{api_prefix}/reports/manager-allocations",
+        params={
+            "manager_id": cube_seed["manager_id"],
+            "start_year": today.year,
+            "start_month": today.month,
+            "end_year": today.year,
+            "end_month": today.month,
+        },
+    )
+    assert response.status_code == 200
+    employees = {row["employee_id"]: row for row in response.json()["employees"]}
+
+    busy = employees[cube_seed["user_ids"][0]]
+    assert busy["total_funded_hours"] == 600
+    assert [(m["year"], m["month"], m["total_hours"]) for m in busy["monthly_totals"]] == [
+        (today.year, today.month, 250)
+    ]
+    assert employees[cube_seed["user_ids"][1]]["monthly_totals"] == []
+
+
+def test_cube_tracks_bulk_upserts(client, api_prefix, db_session, cube_seed):
+    manager_id = cube_seed["manager_id"]
+    cube = get_allocation_cube(db_session, manager_id=manager_id)
+    today = cube_seed["today"]
+    assignment_id = cube_seed["assignments"][cube_seed["project_ids"][0]]
+
+    response = client.post(
+        f"{api_prefix}/allocations/bulk",
+        json={
+            "cells": [
+                {
+                    "project_assignment_id": assignment_id,
+                    "year": today.year,
+                    "month": today.month,
+                    "allocated_hours": 10,
+                },
+                {
+                    "project_assignment_id": assignment_id,
+                    "year": today.year + 1,
+                    "month": today.month,
+                    "allocated_hours": 30,
+                },
+            ]
+        },
+    )
+    assert response.status_code == 200
+
+    assert peek_allocation_cube(db_session, manager_id=manager_id) is cube
+    user_id = cube_seed["user_ids"][0]
+    assert cube.user_month_hours(today.year, today.month) == {user_id: 110}
+    assert cube.user_month_hours(today.year + 1, today.month) == {user_id: 30}
+
+
+def test_cube_sees_writes_from_other_workers(tmp_path):
+    # Two engines on one database file stand in for two API worker processes.
+    url = f"sqlite:///{tmp_path / 'workers.db'}"
+    engine_a, _ = create_database_engines(url, get_database_profile("standard"))
+    engine_b, _ = create_database_engines(url, get_database_profile("standard"))
+    models.Base.metadata.create_all(bind=engine_a)
+    worker_a, worker_b = make_sessionmaker(engine_a), make_sessionmaker(engine_b)
+    try:
+        seed = benchmark_db.seed_database(worker_a, managers=1, employees=2, months=1)
+        manager_id, allocation_id = seed["managers"][0], seed["allocations"][0]
+
+        with worker_b() as db:
+            cube = get_allocation_cube(db, manager_id=manager_id)
+            assert sum(cube.user_month_hours(2025, 1).values()) == 160
+
+        with worker_a() as db:
+            db.get(models.Allocation, allocation_id).allocated_hours = 10
+            db.commit()
+
+        with worker_b() as db:
+            assert peek_allocation_cube(db, manager_id=manager_id) is None
+            rebuilt = get_allocation_cube(db, manager_id=manager_id)
+            assert rebuilt is not cube
+            assert sum(rebuilt.user_month_hours(2025, 1).values()) == 90
+
+            # The worker's own commits still update its cube in place.
+            db.get(models.Allocation, allocation_id).allocated_hours = 20
+            db.commit()
+            assert peek_allocation_cube(db, manager_id=manager_id) is rebuilt
+            assert sum(rebuilt.user_month_hours(2025, 1).values()) == 100
+    finally:
+        engine_a.dispose()
+        engine_b.dispose()
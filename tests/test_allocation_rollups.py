@@ -0,0 +1,301 @@
+"""Tests for the allocation rollup tables maintained on write."""
+
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import insert
+
+from app import cli, crud, models
+from app.db.changes import mark_structural_change
+
+ROLLUPS = (
+    models.AllocationUserMonthRollup,
+    models.AllocationProjectMonthRollup,
+    models.AllocationRoleMonthRollup,
+)
+
+
+def _rollup_rows(db):
+    db.expire_all()
+    return {
+        table.__tablename__: sorted(
+            tuple(getattr(row, column.name) for column in table.__table__.columns)
+            for row in db.query(table).all()
+        )
+        for table in ROLLUPS
+    }
+
+
+def _assert_rollups_match_allocations(db):
+    maintained = _rollup_rows(db)
+    crud.rebuild_allocation_rollups(db)
+    rebuilt = _rollup_rows(db)
+    db.rollback()
+    assert maintained == rebuilt
+
+
+@pytest.fixture
+def rollup_seed(client, api_prefix):
+    def post(path, payload):
+        response = client.post(f"{api_prefix}{path}", json=payload)
+        assert response.status_code in (200, 201), response.text
+        return response.json()["id"]
+
+    managers = [
+        post(
+            "/employees/",
+            {
+                "email": f"rollup.manager{index}@example.com",
+                "full_name": f"Rollup Manager {index}",
+                "password": "SecurePass9!",
+                "system_role": "PM",
+                "is_active": True,
+            },
+        )
+        for index in range(2)
+    ]
+    role_ids = [post("/admin/roles/", {"name": name}) for name in ("Engineer", "Analyst")]
+    lcat_id = post("/admin/lcats/", {"name": "Level 2"})
+    users = [
+        post(
+            "/employees/",
+            {
+                "email": f"rollup.user{index}@example.com",
+                "full_name": f"Rollup User {index}",
+                "password": "SecurePass9!",
+                "system_role": "Employee",
+                "is_active": True,
+                "manager_id": managers[0],
+            },
+        )
+        for index in range(2)
+    ]
+    projects = [
+        post(
+            "/projects/",
+            {
+                "name": f"Rollup Project {code}",
+                "code": code,
+                "start_date": "2025-01-01",
+                "sprints": 6,
+                "manager_id": managers[0],
+            },
+        )
+        for code in ("RU-A", "RU-B")
+    ]
+    assignments = {
+        (project_id, user_id): post(
+            "/allocations/assignments",
+            {
+                "project_id": project_id,
+                "user_id": user_id,
+                "role_id": role_ids[index % 2],
+                "lcat_id": lcat_id,
+                "funded_hours": 500,
+            },
+        )
+        for index, (project_id, user_id) in enumerate(
+            [(projects[0], users[0]), (projects[0], users[1]), (projects[1], users[0])]
+        )
+    }
+    return {
+        "post": post,
+        "managers": managers,
+        "roles": role_ids,
+        "users": users,
+        "projects": projects,
+        "assignments": assignments,
+    }
+
+
+def test_allocation_writes_keep_rollups_current(client, api_prefix, db_session, rollup_seed):
+    post = rollup_seed["post"]
+    projects, users = rollup_seed["projects"], rollup_seed["users"]
+    first, second, third = rollup_seed["assignments"].values()
+
+    allocation_id = post(
+        "/allocations/",
+        {"project_assignment_id": first, "year": 2025, "month": 1, "allocated_hours": 60},
+    )
+    post("/allocations/", {"project_assignment_id": third, "year": 2025, "month": 1, "allocated_hours": 40})
+    post("/allocations/", {"project_assignment_id": second, "year": 2025, "month": 2, "allocated_hours": 30})
+
+    user_month = models.AllocationUserMonthRollup
+    row = db_session.get(user_month, (rollup_seed["managers"][0], users[0], 2025, 1))
+    assert row.total_hours == 100
+    _assert_rollups_match_allocations(db_session)
+
+    assert client.put(f"{api_prefix}/allocations/{allocation_id}", json={"allocated_hours": 10}).status_code == 200
+    row = db_session.get(user_month, (rollup_seed["managers"][0], users[0], 2025, 1))
+    db_session.refresh(row)
+    assert row.total_hours == 50
+
+    bulk = client.post(
+        f"{api_prefix}/allocations/bulk",
+        json={
+            "cells": [
+                {"project_assignment_id": first, "year": 2025, "month": 1, "allocated_hours": 0},
+                {"project_assignment_id": first, "year": 2025, "month": 3, "allocated_hours": 25},
+            ]
+        },
+    )
+    assert bulk.status_code == 200
+    distributed = client.post(
+        f"{api_prefix}/allocations/assignments/{second}/distribute",
+        json={"start_year": 2025, "start_month": 2, "end_year": 2025, "end_month": 4, "total_hours": 90},
+    )
+    assert distributed.status_code == 200
+    _assert_rollups_match_allocations(db_session)
+
+    assert client.delete(f"{api_prefix}/allocations/{allocation_id}").status_code in (200, 204)
+    _assert_rollups_match_allocations(db_session)
+
+    project_rows = crud.get_project_monthly_allocations(db_session, projects[0])
+    assert [(row["year"], row["month"], row["allocated_hours"]) for row in project_rows] == [
+        (2025, 2, 30),
+        (2025, 3, 55),
+        (2025, 4, 30),
+    ]
+
+
+def test_overlapping_allocation_edits_do_not_drift_rollups(db_session, session_factory, rollup_seed):
+    first = next(iter(rollup_seed["assignments"].values()))
+    allocation = models.Allocation(project_assignment_id=first, year=2025, month=6, allocated_hours=40)
+    db_session.add(allocation)
+    db_session.commit()
+
+    stale, other = session_factory(), session_factory()
+    try:
+        stale_row = stale.get(models.Allocation, allocation.id)
+        assert stale_row.allocated_hours == 40
+        other.get(models.Allocation, allocation.id).allocated_hours = 80
+        other.commit()
+        stale_row.allocated_hours = 60
+        stale.commit()
+    finally:
+        stale.close()
+        other.close()
+
+    row = db_session.get(
+        models.AllocationProjectMonthRollup, (rollup_seed["projects"][0], 2025, 6)
+    )
+    db_session.refresh(row)
+    assert row.total_hours == 60
+    _assert_rollups_match_allocations(db_session)
+
+
+def test_structural_changes_move_rollup_rows(client, api_prefix, db_session, rollup_seed):
+    post = rollup_seed["post"]
+    old_manager, new_manager = rollup_seed["managers"]
+    projects = rollup_seed["projects"]
+    first, second, third = rollup_seed["assignments"].values()
+    for assignment_id, hours in ((first, 80), (second, 20), (third, 40)):
+        post("/allocations/", {"project_assignment_id": assignment_id, "year": 2025, "month": 5, "allocated_hours": hours})
+
+    response = client.put(f"{api_prefix}/projects/{projects[0]}", json={"manager_id": new_manager})
+    assert response.status_code == 200
+    _assert_rollups_match_allocations(db_session)
+    totals = {
+        row["user_id"]: row["total_hours"]
+        for row in crud.get_monthly_user_allocation_totals(db_session, manager_id=new_manager)
+    }
+    assert totals == {rollup_seed["users"][0]: 80, rollup_seed["users"][1]: 20}
+
+    response = client.put(
+        f"{api_prefix}/allocations/assignments/{second}", json={"role_id": rollup_seed["roles"][0]}
+    )
+    assert response.status_code == 200
+    _assert_rollups_match_allocations(db_session)
+
+    assert client.delete(f"{api_prefix}/allocations/assignments/{third}").status_code in (200, 204)
+    assert client.delete(f"{api_prefix}/projects/{projects[0]}").status_code in (200, 204)
+    _assert_rollups_match_allocations(db_session)
+    assert crud.get_monthly_user_allocation_totals(db_session) == []
+    assert old_manager not in {
+        manager_id for (manager_id,) in db_session.query(models.AllocationRoleMonthRollup.manager_id)
+    }
+
+
+def test_renames_leave_rollups_alone(client, api_prefix, db_session, rollup_seed, monkeypatch):
+    post = rollup_seed["post"]
+    first = next(iter(rollup_seed["assignments"].values()))
+    post("/allocations/", {"project_assignment_id": first, "year": 2025, "month": 7, "allocated_hours": 30})
+    rebuilds = []
+    monkeypatch.setattr(crud, "rebuild_allocation_rollups", lambda db, **scope: rebuilds.append(scope))
+
+    response = client.put(f"{api_prefix}/projects/{rollup_seed['projects'][0]}", json={"name": "Renamed"})
+    assert response.status_code == 200
+    response = client.put(f"{api_prefix}/admin/roles/{rollup_seed['roles'][0]}", json={"name": "Engineer II"})
+    assert response.status_code == 200
+    response = client.put(f"{api_prefix}/employees/{rollup_seed['users'][0]}", json={"full_name": "Renamed User"})
+    assert response.status_code == 200
+
+    assert rebuilds == []
+    monkeypatch.undo()
+    _assert_rollups_match_allocations(db_session)
+
+
+def test_rekeyed_assignments_rebuild_only_their_rows(client, api_prefix, db_session, rollup_seed, monkeypatch):
+    post = rollup_seed["post"]
+    projects, users, roles = rollup_seed["projects"], rollup_seed["users"], rollup_seed["roles"]
+    first, second, third = rollup_seed["assignments"].values()
+    for assignment_id in (first, second, third):
+        post("/allocations/", {"project_assignment_id": assignment_id, "year": 2025, "month": 8, "allocated_hours": 20})
+    rebuilds = []
+    rebuild = crud.rebuild_allocation_rollups
+
+    def spy(db, **scope):
+        rebuilds.append(scope)
+        return rebuild(db, **scope)
+
+    monkeypatch.setattr(crud, "rebuild_allocation_rollups", spy)
+    response = client.put(f"{api_prefix}/allocations/assignments/{third}", json={"role_id": roles[1]})
+    assert response.status_code == 200
+
+    [scope] = rebuilds
+    assert set(scope["user_ids"]) == {users[0]}
+    assert set(scope["project_ids"]) == {projects[1]}
+    assert set(scope["role_ids"]) == set(roles)
+    monkeypatch.undo()
+    _assert_rollups_match_allocations(db_session)
+
+
+def test_core_writes_marked_structural_queue_a_rollup_rebuild(db_session, rollup_seed):
+    first = next(iter(rollup_seed["assignments"].values()))
+    db_session.execute(
+        insert(models.Allocation),
+        [{"project_assignment_id": first, "year": 2026, "month": month, "allocated_hours": 8} for month in (1, 2)],
+    )
+    mark_structural_change(db_session)
+    db_session.commit()
+
+    # Not rebuilt inside the writing transaction; the maintenance tick does it.
+    assert db_session.query(models.AllocationRollupRebuildRequest).count() == 1
+    assert crud.get_project_funded_and_allocated_totals(db_session, rollup_seed["projects"][0])["allocated_hours"] == 0
+    assert crud.rebuild_requested_allocation_rollups(db_session)
+    assert not crud.rebuild_requested_allocation_rollups(db_session)
+
+    _assert_rollups_match_allocations(db_session)
+    assert crud.get_project_funded_and_allocated_totals(db_session, rollup_seed["projects"][0]) == {
+        "funded_hours": 1000,
+        "allocated_hours": 16,
+    }
+
+
+def test_cli_rebuild_repairs_drifted_rollups(db_session, session_factory, rollup_seed, monkeypatch, capsys):
+    post = rollup_seed["post"]
+    first = next(iter(rollup_seed["assignments"].values()))
+    post("/allocations/", {"project_assignment_id": first, "year": 2025, "month": 7, "allocated_hours": 45})
+    expected = _rollup_rows(db_session)
+
+    db_session.query(models.AllocationUserMonthRollup).update({"total_hours": 1})
+    db_session.query(models.AllocationRoleMonthRollup).delete()
+    db_session.commit()
+    assert _rollup_rows(db_session) != expected
+
+    monkeypatch.setattr(cli, "SessionLocal", session_factory)
+    monkeypatch.setattr(cli, "create_db_and_tables", lambda: None)
+    cli.main(["rebuild-rollups"])
+
+    assert _rollup_rows(db_session) == expected
+    assert "allocation_rollup_user_month: 1 rows" in capsys.readouterr().out
@@ -0,0 +1,85 @@
+"""Tests for the cached business-calendar capacity table."""
+
+from __future__ import annotations
+
+import calendar
+from datetime import date
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.utils.capacity import (
+    FIRST_YEAR,
+    LAST_YEAR,
+    get_capacity_table,
+    month_ordinal,
+    register_holiday_calendar,
+)
+from app.utils.reporting import build_burn_down_series, standard_month_hours
+
+
+def _weekday_hours(year: int, month: int) -> int:
+    days = calendar.Calendar().itermonthdays2(year, month)
+    return 8 * sum(1 for day, weekday in days if day and weekday < 5)
+
+
+def test_table_matches_weekday_calendar_without_holidays():
+    table = get_capacity_table("none")
+    expected = [
+        _weekday_hours(year, month) for year in range(FIRST_YEAR, LAST_YEAR + 1) for month in range(1, 13)
+    ]
+    assert table.hours.tolist() == expected
+    # Months outside the precomputed range are computed on demand.
+    assert table.month_hours(2019, 12) == _weekday_hours(2019, 12)
+    assert table.hours_for_ordinals(np.array([month_ordinal(2060, 2)])).tolist() == [
+        _weekday_hours(2060, 2)
+    ]
+
+
+def test_us_federal_calendar_removes_observed_holidays():
+    table = get_capacity_table("us_federal")
+    # Jan 2025: New Year's Day and MLK Day.
+    assert table.month_hours(2025, 1) == _weekday_hours(2025, 1) - 16
+    # Jul 2026: Independence Day falls on a Saturday and is observed on Friday the 3rd.
+    assert table.month_hours(2026, 7) == _weekday_hours(2026, 7) - 8
+    # Dec 2021: Christmas observed Friday the 24th, New Year's 2022 observed Friday the 31st.
+    assert table.month_hours(2021, 12) == _weekday_hours(2021, 12) - 16
+    # Nov 2025: Veterans Day and Thanksgiving.
+    assert table.month_hours(2025, 11) == _weekday_hours(2025, 11) - 16
+
+
+def test_range_lookup_and_overrides_are_vectorized():
+    table = get_capacity_table("none")
+    origin = month_ordinal(2025, 11)
+    assert table.hours_for_range(origin, 3).tolist() == [
+        _weekday_hours(2025, 11),
+        _weekday_hours(2025, 12),
+        _weekday_hours(2026, 1),
+    ]
+    months = [(2025, 11), (2025, 12), (2026, 1)]
+    overrides = {(2025, 12): 40, (2026, 1): 0, (2030, 1): 12}
+    assert table.hours_for_months(months, overrides).tolist() == [
+        _weekday_hours(2025, 11),
+        40,
+        _weekday_hours(2026, 1),
+    ]
+
+
+def test_configured_calendar_drives_reporting(monkeypatch):
+    @register_holiday_calendar("test_first_of_month")
+    def _first_of_month(year):
+        return [date(year, month, 1) for month in range(1, 13)]
+
+    monkeypatch.setattr(settings, "CAPACITY_HOLIDAY_CALENDAR", "test_first_of_month")
+    # Oct 1 2025 is a Wednesday; Nov 1 2025 is a Saturday.
+    assert standard_month_hours(2025, 10) == _weekday_hours(2025, 10) - 8
+    assert standard_month_hours(2025, 11) == _weekday_hours(2025, 11)
+
+    series = build_burn_down_series(100.0, [(2025, 10), (2025, 11)], {}, {(2025, 11): 50})
+    assert [point["capacity_hours"] for point in series] == [_weekday_hours(2025, 10) - 8, 50]
+
+
+def test_unknown_calendar_is_rejected():
+    with pytest.raises(ValueError, match="holiday calendar"):
+        get_capacity_table("atlantis")
@@ -0,0 +1,116 @@
+"""Tests for the database profiles, read/write routing and the DB benchmark."""
+
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+from sqlalchemy import insert, text
+from sqlalchemy.exc import OperationalError
+
+import benchmark_db
+from app import models
+from app.core.config import settings
+from app.db.profiles import get_database_profile, sqlite_pragmas
+from app.db.session import create_database_engines, make_sessionmaker
+
+
+@pytest.fixture
+def concurrent_engines(tmp_path):
+    url = f"sqlite:///{tmp_path / 'profile.db'}"
+    engine, read_engine = create_database_engines(url, get_database_profile("concurrent"))
+    models.Base.metadata.create_all(bind=engine)
+    try:
+        yield engine, read_engine
+    finally:
+        engine.dispose()
+        read_engine.dispose()
+
+
+def test_profiles_resolve_with_settings_overrides(monkeypatch):
+    standard = get_database_profile("standard")
+    assert not standard.single_writer
+    assert sqlite_pragmas(standard) == [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA busy_timeout = 5000",
+        "PRAGMA foreign_keys=ON",
+    ]
+
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 3)
+    monkeypatch.setattr(settings, "SQLITE_CACHE_SIZE_KIB", 2048)
+    concurrent = get_database_profile("concurrent")
+    assert concurrent.pool_size == 3
+    assert "PRAGMA cache_size=-2048" in sqlite_pragmas(concurrent)
+    assert sqlite_pragmas(concurrent, read_only=True)[-1] == "PRAGMA query_only=ON"
+
+    with pytest.raises(ValueError, match="database profile"):
+        get_database_profile("turbo")
+
+
+def test_concurrent_profile_splits_writer_and_read_only_pool(concurrent_engines):
+    engine, read_engine = concurrent_engines
+    assert engine.pool.size() == 1
+    assert read_engine.pool.size() == 8
+
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA temp_store")).scalar() == 2  # MEMORY
+        assert conn.execute(text("PRAGMA query_only")).scalar() == 0
+    with read_engine.connect() as conn:
+        with pytest.raises(OperationalError, match="readonly"):
+            conn.execute(insert(models.Role).values(name="Blocked"))
+
+    memory_engine, memory_read = create_database_engines(
+        "sqlite:///:memory:", get_database_profile("concurrent")
+    )
+    assert memory_read is None
+    memory_engine.dispose()
+
+
+def test_write_sessions_stay_on_the_writer_and_read_sessions_on_the_pool(concurrent_engines):
+    engine, read_engine = concurrent_engines
+    session_factory = make_sessionmaker(engine)
+    read_factory = make_sessionmaker(engine, read_engine)
+
+    with session_factory() as db:
+        db.add(models.Role(name="Engineer"))
+        db.commit()
+
+    with session_factory() as db:
+        # A transaction that may write reads from the writer before and after
+        # its first write, so both see the same snapshot.
+        assert db.get_bind(mapper=models.Role) is engine
+        role = db.query(models.Role).filter_by(name="Engineer").one()
+        role.description = "Builds things"
+        db.flush()
+        assert db.get_bind(mapper=models.Role) is engine
+        db.commit()
+
+    with read_factory() as db:
+        assert db.get_bind() is engine
+        assert db.get_bind(mapper=models.Role) is read_engine
+        assert db.query(models.Role).one().description == "Builds things"
+        db.add(
+            models.Project(name="Blocked", code="RO-1", start_date=date(2025, 1, 1), sprints=1)
+        )
+        with pytest.raises(OperationalError, match="readonly"):
+            db.flush()
+
+
+def test_benchmark_reports_both_profiles():
+    report = benchmark_db.run_benchmark(
+        ["standard", "concurrent"],
+        threads=4,
+        duration=0.5,
+        write_ratio=0.5,
+        managers=2,
+        employees=20,
+        months=3,
+    )
+    assert [profile["profile"] for profile in report["profiles"]] == ["standard", "concurrent"]
+    for profile in report["profiles"]:
+        operations = profile["operations"]
+        assert operations["read"]["operations"] > 0
+        assert operations["write"]["operations"] > 0
+        assert operations["read"]["errors"] == operations["write"]["errors"] == 0
+    assert benchmark_db.percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.0
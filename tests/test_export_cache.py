@@ -0,0 +1,126 @@
+"""Tests for the on-disk export cache."""
+
+from __future__ import annotations
+
+import io
+import os
+
+import pytest
+from openpyxl import load_workbook
+from sqlalchemy import create_engine
+
+import benchmark_db
+from app import models
+from app.api import reports
+from app.core.config import settings
+from app.services.export_cache import evict_exports, exports_directory
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """File-backed engine; exports of in-memory databases are never stored."""
+
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'exports.db'}",
+        connect_args={"check_same_thread": False, "timeout": 30},
+    )
+    models.Base.metadata.create_all(bind=engine)
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def reports_path(tmp_path, monkeypatch):
+    reports_dir = tmp_path / "reports"
+    monkeypatch.setattr(settings, "REPORTS_PATH", str(reports_dir))
+    return reports_dir
+
+
+@pytest.fixture
+def seed(session_factory):
+    return benchmark_db.seed_database(session_factory, managers=2, employees=4, months=2)
+
+
+def _fail(*args, **kwargs):
+    raise AssertionError("the export should have been served from disk")
+
+
+def test_repeat_portfolio_downloads_are_served_from_disk(client, api_prefix, session_factory, seed, monkeypatch):
+    url = f"{api_prefix}/reports/export/portfolio?manager_id=1"
+    first = client.get(url)
+    assert first.status_code == 200
+    stored = list((exports_directory() / "manager-1").glob("*.xlsx"))
+    assert len(stored) == 1
+    assert stored[0].read_bytes() == first.content
+    assert load_workbook(io.BytesIO(first.content))["Portfolio"]["A2"].value == "Project 1"
+
+    with monkeypatch.context() as patch:
+        patch.setattr(reports, "stream_portfolio_export", _fail)
+        second = client.get(url)
+        assert second.status_code == 200
+        assert second.content == first.content
+        assert second.headers["etag"] == first.headers["etag"]
+        assert "staffalloc-portfolio-" in second.headers["content-disposition"]
+
+        revalidated = client.get(url, headers={"If-None-Match": first.headers["etag"]})
+        assert revalidated.status_code == 304
+
+        # Another manager's data changing leaves this export in place.
+        with session_factory() as db:
+            other = db.query(models.Allocation).join(models.ProjectAssignment).filter(
+                models.ProjectAssignment.project_id == 2
+            ).first()
+            other.allocated_hours = 10
+            db.commit()
+        assert client.get(url).content == first.content
+
+    with session_factory() as db:
+        allocation = db.query(models.Allocation).join(models.ProjectAssignment).filter(
+            models.ProjectAssignment.project_id == 1
+        ).first()
+        allocation.allocated_hours = 120
+        db.commit()
+
+    third = client.get(url)
+    assert third.status_code == 200
+    assert third.headers["etag"] != first.headers["etag"]
+    assert len(list((exports_directory() / "manager-1").glob("*.xlsx"))) == 2
+
+
+def test_project_export_is_invalidated_by_lcat_renames(client, api_prefix, session_factory, seed, monkeypatch):
+    url = f"{api_prefix}/reports/export/project/1"
+    first = client.get(url)
+    assert first.status_code == 200
+    sheet = load_workbook(io.BytesIO(first.content))["Assignments"]
+    assert sheet["C2"].value == "Level 2"
+
+    with monkeypatch.context() as patch:
+        patch.setattr(reports, "project_workbook", _fail)
+        assert client.get(url).content == first.content
+
+    with session_factory() as db:
+        db.query(models.LCAT).one().name = "Level 3"
+        db.commit()
+
+    renamed = client.get(url)
+    assert renamed.headers["etag"] != first.headers["etag"]
+    assert load_workbook(io.BytesIO(renamed.content))["Assignments"]["C2"].value == "Level 3"
+    assert client.get(f"{api_prefix}/reports/export/project/999").status_code == 404
+
+
+def test_eviction_removes_least_recently_used_exports():
+    directory = exports_directory() / "all"
+    directory.mkdir()
+    paths = []
+    for index in range(4):
+        path = directory / f"{index}.xlsx"
+        path.write_bytes(b"x" * 100)
+        os.utime(path, (1_000 + index, 1_000 + index))
+        paths.append(path)
+    # Touching a file on download makes it the most recently used.
+    os.utime(paths[0], (2_000, 2_000))
+
+    assert evict_exports(250, keep=[paths[1]]) == 2
+    assert [path.exists() for path in paths] == [True, True, False, False]
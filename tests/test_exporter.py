@@ -0,0 +1,88 @@
+"""Tests for the streaming XLSX writer and the allocation fact table encoders."""
+
+from __future__ import annotations
+
+import io
+from datetime import date
+
+import openpyxl
+import pytest
+
+from app.services.exporter import FactFormat, SheetSpec, stream_fact_table, stream_xlsx
+
+FACT_LABELS = {
+    "user": {7: "Ada, Lovelace", 3: "Grace Hopper"},
+    "project": {1: "Apollo"},
+    "role": {2: "Engineer"},
+    "lcat": {5: "Level 2"},
+}
+# Two batches of (user_id, project_id, role_id, lcat_id, year, month, hours);
+# user 9 is unknown to the labels.
+FACT_BATCHES = [
+    [(7, 1, 2, 5, 2025, 1, 160), (3, 1, 2, 5, 2025, 1, 80)],
+    [(9, 1, 2, 5, 2025, 2, 40)],
+]
+
+
+def test_stream_xlsx_writes_chunked_workbook_with_sized_columns():
+    produced = []
+
+    def rows():
+        for index in range(20000):
+            produced.append(index)
+            bell = "\x07" if index == 0 else ""  # not allowed in XML; dropped
+            yield [index, f"Employee <{index}> & co{bell}", None, date(2025, 1, 1)]
+
+    chunks = stream_xlsx(
+        [SheetSpec("People", ["ID", "Name", "Blank", "Start"], rows()), SheetSpec("Empty", ["Only"], [])],
+        chunk_size=8192,
+    )
+    first = next(chunks)
+    # The package parts go out before any row has been read.
+    assert first.startswith(b"PK") and produced == []
+
+    body = first + b"".join(chunks)
+    assert len(produced) == 20000
+
+    workbook = openpyxl.load_workbook(io.BytesIO(body))
+    assert workbook.sheetnames == ["People", "Empty"]
+    sheet = workbook["People"]
+    assert sheet.max_row == 20001
+    assert [cell.value for cell in sheet[1]] == ["ID", "Name", "Blank", "Start"]
+    assert sheet["A1"].font.b
+    assert [cell.value for cell in sheet[2]] == [0, "Employee <0> & co", None, "2025-01-01"]
+    assert sheet.column_dimensions["B"].width == len("Employee <19999> & co") + 4
+    assert [cell.value for cell in workbook["Empty"][1]] == ["Only"]
+
+
+def test_fact_table_csv_resolves_labels_per_batch():
+    chunks = list(stream_fact_table(FACT_BATCHES, FACT_LABELS, FactFormat.CSV))
+    assert len(chunks) == 2  # one per batch
+    assert b"".join(chunks).decode().splitlines() == [
+        "user_id,user,project_id,project,role,lcat,year,month,hours",
+        '7,"Ada, Lovelace",1,Apollo,Engineer,Level 2,2025,1,160',
+        "3,Grace Hopper,1,Apollo,Engineer,Level 2,2025,1,80",
+        "9,,1,Apollo,Engineer,Level 2,2025,2,40",
+    ]
+
+
+@pytest.mark.parametrize("fmt", [FactFormat.PARQUET, FactFormat.ARROW])
+def test_fact_table_columnar_formats_round_trip(fmt):
+    pa = pytest.importorskip("pyarrow")
+    body = b"".join(stream_fact_table(FACT_BATCHES, FACT_LABELS, fmt))
+    if fmt is FactFormat.PARQUET:
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(pa.BufferReader(body))
+    else:
+        table = pa.ipc.open_stream(body).read_all()
+
+    assert table.column_names == [
+        "user_id", "user", "project_id", "project", "role", "lcat", "year", "month", "hours"
+    ]
+    assert pa.types.is_dictionary(table.schema.field("user").type)
+    assert table.column("user").to_pylist() == ["Ada, Lovelace", "Grace Hopper", None]
+    assert table.column("user").null_count == 1
+    assert None not in table.column("user").chunk(0).dictionary.to_pylist()
+    assert table.column("hours").to_pylist() == [160, 80, 40]
+    assert table.column("month").to_pylist() == [1, 1, 2]
@@ -0,0 +1,294 @@
+"""Tests for the background job queue (imports, exports and RAG reindex)."""
+
+from __future__ import annotations
+
+import datetime
+import io
+import os
+import socket
+import subprocess
+import sys
+
+import pytest
+from openpyxl import Workbook, load_workbook
+from sqlalchemy import create_engine
+
+from app import models
+from app.core.config import settings
+from app.services.jobs import (
+    JobContext,
+    jobs_directory,
+    live_progress,
+    purge_expired_job_files,
+    recover_interrupted_jobs,
+    wait_for_job,
+)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """File-backed engine so job workers get their own connections.
+
+    The shared in-memory engine hands every thread the same connection, which
+    cannot host a request and a background job at the same time.
+    """
+
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'jobs.db'}",
+        connect_args={"check_same_thread": False, "timeout": 30},
+    )
+    models.Base.metadata.create_all(bind=engine)
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def reports_path(tmp_path, monkeypatch):
+    reports = tmp_path / "reports"
+    monkeypatch.setattr(settings, "REPORTS_PATH", str(reports))
+    return reports
+
+
+def _wait(client, api_prefix, job_id):
+    wait_for_job(job_id, timeout=30)
+    response = client.get(f"{api_prefix}/jobs/{job_id}")
+    assert response.status_code == 200
+    return response.json()
+
+
+def _workbook_bytes(manager_email: str) -> bytes:
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = "Projects"
+    sheet.append(["Name", "Code", "Client", "Start Date", "Sprints", "Status"])
+    sheet.append(["Queued Import", "JOB-1", "Acme", "2025-01-01", 4, "Active"])
+    sheet = workbook.create_sheet("Assignments")
+    sheet.append(["Project Code", "Employee Email", "Role", "LCAT", "Funded Hours"])
+    sheet.append(["JOB-1", manager_email, "Analyst", "Level 1", 320])
+    sheet = workbook.create_sheet("Allocations")
+    sheet.append(["Project Code", "Employee Email", "Year", "Month", "Hours"])
+    for month in range(1, 4):
+        sheet.append(["JOB-1", manager_email, 2025, month, 80])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def _create_employee(client, api_prefix, email="job.runner@example.com"):
+    response = client.post(
+        f"{api_prefix}/employees/",
+        json={
+            "email": email,
+            "full_name": "Job Runner",
+            "password": "Password1!",
+            "system_role": "PM",
+            "is_active": True,
+        },
+    )
+    assert response.status_code == 201
+    return response.json()
+
+
+def test_import_job_runs_in_background(client, api_prefix, reports_path):
+    _create_employee(client, api_prefix)
+
+    response = client.post(
+        f"{api_prefix}/projects/import/jobs",
+        files={"file": ("import.xlsx", _workbook_bytes("job.runner@example.com"), "application/octet-stream")},
+    )
+    assert response.status_code == 202
+    job = response.json()
+    assert job["kind"] == "project_import"
+    assert job["status"] in {"Queued", "Running", "Succeeded"}
+
+    job = _wait(client, api_prefix, job["id"])
+    assert job["status"] == "Succeeded", job["error"]
+    assert job["progress"] == 1.0
+    assert job["result"]["created_project_codes"] == ["JOB-1"]
+
+    projects = client.get(f"{api_prefix}/projects/").json()
+    assert [project["code"] for project in projects] == ["JOB-1"]
+    # The spooled upload is removed once the import has run.
+    assert not list((reports_path / "jobs").glob("upload-*"))
+
+    listing = client.get(f"{api_prefix}/jobs/", params={"status": "Succeeded"})
+    assert [entry["id"] for entry in listing.json()] == [job["id"]]
+
+
+def test_failed_import_job_reports_error(client, api_prefix):
+    response = client.post(
+        f"{api_prefix}/projects/import/jobs",
+        files={"file": ("import.xlsx", _workbook_bytes("nobody@example.com"), "application/octet-stream")},
+    )
+    assert response.status_code == 202
+
+    job = _wait(client, api_prefix, response.json()["id"])
+    assert job["status"] == "Failed"
+    assert "nobody@example.com" in job["error"]
+    assert client.get(f"{api_prefix}/projects/").json() == []
+
+    result = client.get(f"{api_prefix}/jobs/{job['id']}/result")
+    assert result.status_code == 409
+    assert result.json()["detail"] == "Job is Failed; no result is available yet"
+
+
+def _create_project(client, api_prefix, name="Exported", code="EXP-1"):
+    response = client.post(
+        f"{api_prefix}/projects/",
+        json={
+            "name": name,
+            "code": code,
+            "client": "Acme",
+            "start_date": "2025-01-01",
+            "sprints": 4,
+            "status": "Active",
+        },
+    )
+    assert response.status_code == 201
+
+
+def test_portfolio_export_job_produces_download(client, api_prefix):
+    _create_project(client, api_prefix)
+
+    response = client.post(f"{api_prefix}/reports/export/portfolio/jobs")
+    assert response.status_code == 202
+
+    job = _wait(client, api_prefix, response.json()["id"])
+    assert job["status"] == "Succeeded", job["error"]
+    assert job["result_filename"].endswith(".xlsx")
+
+    download = client.get(f"{api_prefix}/jobs/{job['id']}/result")
+    assert download.status_code == 200
+    workbook = load_workbook(io.BytesIO(download.content))
+    names = [row[0] for row in workbook["Portfolio"].iter_rows(min_row=2, values_only=True)]
+    assert names == ["Exported"]
+
+
+def test_reindex_job_reports_document_count(client, api_prefix):
+    _create_project(client, api_prefix)
+
+    response = client.post(f"{api_prefix}/ai/reindex/jobs")
+    assert response.status_code == 202
+
+    job = _wait(client, api_prefix, response.json()["id"])
+    assert job["status"] == "Succeeded", job["error"]
+    assert job["result"]["documents_indexed"] >= 1
+
+
+def test_unknown_job_returns_404(client, api_prefix):
+    assert client.get(f"{api_prefix}/jobs/999").status_code == 404
+    assert client.get(f"{api_prefix}/jobs/999/result").status_code == 404
+
+
+def test_recover_interrupted_jobs(db_session):
+    db_session.add_all(
+        [
+            models.BackgroundJob(kind="portfolio_export", status=models.JobStatus.RUNNING),
+            models.BackgroundJob(kind="portfolio_export", status=models.JobStatus.QUEUED),
+            models.BackgroundJob(kind="portfolio_export", status=models.JobStatus.SUCCEEDED),
+        ]
+    )
+    db_session.commit()
+
+    assert recover_interrupted_jobs(db_session) == 2
+    statuses = sorted(job.status for job in db_session.query(models.BackgroundJob))
+    assert statuses == ["Failed", "Failed", "Succeeded"]
+
+
+def test_recover_interrupted_jobs_spares_live_workers(db_session):
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    host = socket.gethostname()
+
+    def job(name, owner_host, owner_pid, heartbeat_at):
+        return models.BackgroundJob(
+            kind="portfolio_export",
+            status=models.JobStatus.RUNNING,
+            message=name,
+            owner_host=owner_host,
+            owner_pid=owner_pid,
+            heartbeat_at=heartbeat_at,
+        )
+
+    stale = now - datetime.timedelta(seconds=settings.JOB_STALE_AFTER_SECONDS + 60)
+    db_session.add_all(
+        [
+            job("sibling", host, os.getppid(), now),
+            job("other host", "elsewhere", 1234, now),
+            job("exited", host, exited.pid, now),
+            job("not held here", host, os.getpid(), now),
+            job("stale", "elsewhere", 1234, stale),
+        ]
+    )
+    db_session.commit()
+
+    assert recover_interrupted_jobs(db_session) == 3
+    statuses = {job.message: job.status for job in db_session.query(models.BackgroundJob)}
+    assert statuses == {
+        "sibling": "Running",
+        "other host": "Running",
+        "exited": "Failed",
+        "not held here": "Failed",
+        "stale": "Failed",
+    }
+
+
+def test_purge_expired_job_files(db_session):
+    directory = jobs_directory()
+    old = datetime.datetime(2020, 1, 1)
+    aged = old.timestamp()
+
+    def write(name, age=True):
+        path = directory / name
+        path.write_bytes(b"data")
+        if age:
+            os.utime(path, (aged, aged))
+        return path
+
+    expired_result = write("1-old.xlsx")
+    fresh_result = write("2-new.xlsx")
+    leftover_upload = write("upload-crashed.xlsx")
+    queued_upload = write("upload-queued.xlsx")
+    recent_upload = write("upload-recent.xlsx", age=False)
+    db_session.add_all(
+        [
+            models.BackgroundJob(
+                kind="portfolio_export",
+                status=models.JobStatus.SUCCEEDED,
+                result_path=str(expired_result),
+                finished_at=old,
+            ),
+            models.BackgroundJob(
+                kind="portfolio_export",
+                status=models.JobStatus.SUCCEEDED,
+                result_path=str(fresh_result),
+                finished_at=datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None),
+            ),
+            models.BackgroundJob(
+                kind="project_import",
+                status=models.JobStatus.QUEUED,
+                params={"path": str(queued_upload)},
+            ),
+        ]
+    )
+    db_session.commit()
+
+    assert purge_expired_job_files(db_session) == 2
+    assert sorted(path.name for path in directory.iterdir()) == [
+        "2-new.xlsx",
+        "upload-queued.xlsx",
+        "upload-recent.xlsx",
+    ]
+    assert not leftover_upload.exists() and recent_upload.exists()
+    paths = sorted(filter(None, (job.result_path for job in db_session.query(models.BackgroundJob))))
+    assert paths == [str(fresh_result)]
+
+
+def test_progress_reports_stay_in_process():
+    context = JobContext(job_id=424242)
+    context.report(progress=1.5, message="Halfway")
+    context.report(message="Still going")
+    assert live_progress(424242) == {"progress": 1.0, "message": "Still going"}
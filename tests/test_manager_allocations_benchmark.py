@@ -0,0 +1,165 @@
+"""Latency benchmark for the manager allocations rollup at portfolio scale.
+
+Seeds 2,000 employees across 50 projects with 36 months of allocations and
+checks that the SQL pushdown path and the warm allocation cube agree. The
+latency budget for both paths is only enforced when ``STAFFALLOC_LATENCY_TESTS``
+is set.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from datetime import date
+
+import pytest
+from sqlalchemy import insert
+
+from app import crud, models
+from app.db.changes import mark_structural_change
+from app.services.allocation_cube import get_allocation_cube
+
+EMPLOYEE_COUNT = 2000
+PROJECT_COUNT = 50
+MONTH_COUNT = 36
+PROJECTS_PER_EMPLOYEE = 3
+START_YEAR = 2025
+
+# End-to-end request budget, including serialising ~72k monthly cells. Slow CI
+# hosts can raise it through the environment.
+ROLLUP_BUDGET_SECONDS = float(os.getenv("STAFFALLOC_ROLLUP_BUDGET_SECONDS", "4.0"))
+
+latency = pytest.mark.skipif(
+    not os.getenv("STAFFALLOC_LATENCY_TESTS"), reason="set STAFFALLOC_LATENCY_TESTS=1 to enforce latency budgets"
+)
+
+
+@pytest.fixture
+def portfolio_scale_seed(db_session):
+    conn = db_session.connection()
+
+    manager_id = conn.execute(
+        insert(models.User).returning(models.User.id),
+        {
+            "email": "bench.manager@example.com",
+            "full_name": "Bench Manager",
+            "password_hash": "hashed",
+            "system_role": models.SystemRole.PM,
+            "is_active": True,
+        },
+    ).scalar_one()
+
+    role_id = conn.execute(
+        insert(models.Role).returning(models.Role.id), {"name": "Engineer"}
+    ).scalar_one()
+    lcat_id = conn.execute(
+        insert(models.LCAT).returning(models.LCAT.id), {"name": "Level 2"}
+    ).scalar_one()
+
+    conn.execute(
+        insert(models.User),
+        [
+            {
+                "id": manager_id + 1 + index,
+                "email": f"bench.employee{index}@example.com",
+                "full_name": f"Employee {index:04d}",
+                "password_hash": "hashed",
+                "system_role": models.SystemRole.EMPLOYEE,
+                "is_active": True,
+                "manager_id": manager_id,
+            }
+            for index in range(EMPLOYEE_COUNT)
+        ],
+    )
+    employee_ids = [manager_id + 1 + index for index in range(EMPLOYEE_COUNT)]
+
+    conn.execute(
+        insert(models.Project),
+        [
+            {
+                "id": index + 1,
+                "name": f"Project {index:02d}",
+                "code": f"BENCH-{index:02d}",
+                "start_date": date(START_YEAR, 1, 1),
+                "sprints": 78,
+                "manager_id": manager_id,
+                "status": models.ProjectStatus.ACTIVE,
+            }
+            for index in range(PROJECT_COUNT)
+        ],
+    )
+
+    assignments = []
+    for position, user_id in enumerate(employee_ids):
+        for offset in range(PROJECTS_PER_EMPLOYEE):
+            assignments.append(
+                {
+                    "id": len(assignments) + 1,
+                    "project_id": (position + offset * 7) % PROJECT_COUNT + 1,
+                    "user_id": user_id,
+                    "role_id": role_id,
+                    "lcat_id": lcat_id,
+                    "funded_hours": 1200,
+                }
+            )
+    conn.execute(insert(models.ProjectAssignment), assignments)
+
+    conn.execute(
+        insert(models.Allocation),
+        [
+            {
+                "project_assignment_id": assignment["id"],
+                "year": START_YEAR + month_index // 12,
+                "month": month_index % 12 + 1,
+                "allocated_hours": 40 + (assignment["id"] + month_index) % 20,
+            }
+            for assignment in assignments
+            for month_index in range(MONTH_COUNT)
+        ],
+    )
+    # Core inserts bypass change tracking; run the queued rollup rebuild now
+    # rather than on the maintenance tick.
+    mark_structural_change(db_session)
+    db_session.commit()
+    crud.rebuild_requested_allocation_rollups(db_session)
+
+    return {"manager_id": manager_id, "employee_ids": employee_ids}
+
+
+def _timed_rollup(client, api_prefix, manager_id):
+    params = {
+        "manager_id": manager_id,
+        "start_year": START_YEAR,
+        "start_month": 1,
+        "end_year": START_YEAR + MONTH_COUNT // 12 - 1,
+        "end_month": 12,
+    }
+    started = time.perf_counter()
+    response = client.get(f"{api_prefix}/reports/manager-allocations", params=params)
+    elapsed = time.perf_counter() - started
+    assert response.status_code == 200
+    return response.json(), elapsed
+
+
+def test_manager_rollup_matches_cube_at_scale(client, api_prefix, db_session, portfolio_scale_seed):
+    manager_id = portfolio_scale_seed["manager_id"]
+
+    cold, _ = _timed_rollup(client, api_prefix, manager_id)
+    assert len(cold["employees"]) == EMPLOYEE_COUNT
+    assert all(len(row["monthly_totals"]) == MONTH_COUNT for row in cold["employees"])
+
+    get_allocation_cube(db_session, manager_id=manager_id)
+    warm, _ = _timed_rollup(client, api_prefix, manager_id)
+    assert warm == cold
+
+
+@latency
+def test_manager_rollup_latency_budget(client, api_prefix, db_session, portfolio_scale_seed):
+    manager_id = portfolio_scale_seed["manager_id"]
+
+    _, cold_elapsed = _timed_rollup(client, api_prefix, manager_id)
+    assert cold_elapsed < ROLLUP_BUDGET_SECONDS, f"SQL rollup took {cold_elapsed:.2f}s"
+
+    get_allocation_cube(db_session, manager_id=manager_id)
+    _, warm_elapsed = _timed_rollup(client, api_prefix, manager_id)
+    assert warm_elapsed < ROLLUP_BUDGET_SECONDS, f"Cube rollup took {warm_elapsed:.2f}s"
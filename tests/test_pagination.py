@@ -0,0 +1,162 @@
+"""Tests for keyset pagination and server-side filters on list endpoints."""
+
+from __future__ import annotations
+
+from datetime import date
+
+from sqlalchemy import text
+
+import benchmark_db
+from app import crud, models, schemas
+from app.utils.pagination import NEXT_CURSOR_HEADER
+
+
+def _pages(client, url, **params):
+    """Follow the cursors of a list endpoint and return every page."""
+
+    pages, cursor = [], None
+    while True:
+        response = client.get(url, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200, response.text
+        pages.append(response.json())
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return pages
+
+
+def test_user_pages_follow_name_order_without_gaps_or_repeats(client, api_prefix, db_session):
+    for index, name in enumerate(["Bo", "Al", "Cy", "Al", "Di", "Al", "Ed"]):
+        db_session.add(
+            models.User(
+                email=f"user{index}@example.com",
+                full_name=name,
+                password_hash="hashed",
+                system_role=models.SystemRole.EMPLOYEE,
+            )
+        )
+    db_session.commit()
+
+    pages = _pages(client, f"{api_prefix}/employees/", limit=2)
+    assert [len(page) for page in pages] == [2, 2, 2, 1]
+    users = [(user["full_name"], user["id"]) for page in pages for user in page]
+    assert users == sorted(users)
+    assert len({user_id for _, user_id in users}) == 7
+
+    # A row inserted before the cursor does not shift the following pages.
+    first = client.get(f"{api_prefix}/employees/", params={"limit": 3})
+    db_session.add(
+        models.User(
+            email="early@example.com",
+            full_name="Aa",
+            password_hash="hashed",
+            system_role=models.SystemRole.EMPLOYEE,
+        )
+    )
+    db_session.commit()
+    second = client.get(
+        f"{api_prefix}/employees/",
+        params={"limit": 3, "cursor": first.headers[NEXT_CURSOR_HEADER]},
+    )
+    assert [user["full_name"] for user in second.json()] == ["Bo", "Cy", "Di"]
+
+    invalid = client.get(f"{api_prefix}/employees/", params={"cursor": "not-a-cursor"})
+    assert invalid.status_code == 400
+
+
+def test_legacy_skip_and_oversized_limit_are_still_accepted(client, api_prefix, db_session):
+    for index, name in enumerate(["Al", "Bo", "Cy", "Di"]):
+        db_session.add(
+            models.User(
+                email=f"legacy{index}@example.com",
+                full_name=name,
+                password_hash="hashed",
+                system_role=models.SystemRole.EMPLOYEE,
+            )
+        )
+    db_session.commit()
+
+    response = client.get(f"{api_prefix}/employees/", params={"skip": 1, "limit": 2})
+    assert response.status_code == 200
+    assert [user["full_name"] for user in response.json()] == ["Bo", "Cy"]
+
+    for path in ("/employees/", "/projects/", "/admin/roles/", "/admin/lcats/", "/admin/audit-logs/"):
+        response = client.get(f"{api_prefix}{path}", params={"skip": 0, "limit": 10_000})
+        assert response.status_code == 200, path
+
+
+def test_recommendations_are_filtered_before_paging(client, api_prefix, db_session):
+    for index in range(6):
+        recommendation = crud.create_ai_recommendation(
+            db_session,
+            schemas.AIRecommendationCreate(
+                recommendation_type=schemas.RecommendationType.STAFFING,
+                recommendation_text=f"Recommendation {index}",
+            ),
+        )
+        if index % 3 == 0:
+            recommendation.status = models.RecommendationStatus.ACCEPTED
+    db_session.commit()
+
+    pages = _pages(client, f"{api_prefix}/admin/recommendations/", status="Accepted", limit=1)
+    texts = [item["recommendation_text"] for page in pages for item in page]
+    # Newest first, and a full page even though most rows do not match.
+    assert texts == ["Recommendation 3", "Recommendation 0"]
+    assert [len(page) for page in pages] == [1, 1]
+
+
+def test_allocations_and_assignments_filter_by_project_role_and_period(
+    client, api_prefix, session_factory
+):
+    benchmark_db.seed_database(session_factory, managers=2, employees=4, months=6)
+
+    allocations = [
+        item
+        for page in _pages(
+            client,
+            f"{api_prefix}/allocations/",
+            project_id=1,
+            start_year=2025,
+            start_month=2,
+            end_year=2025,
+            end_month=4,
+            limit=4,
+        )
+        for item in page
+    ]
+    assert len(allocations) == 2 * 3  # two employees on project 1, three months
+    assert {item["month"] for item in allocations} == {2, 3, 4}
+    assert [item["id"] for item in allocations] == sorted(item["id"] for item in allocations)
+
+    assignments = client.get(f"{api_prefix}/allocations/assignments", params={"project_id": 2})
+    assert assignments.status_code == 200
+    assert {item["user"]["full_name"] for item in assignments.json()} == {"Employee 0001", "Employee 0003"}
+    assert client.get(f"{api_prefix}/allocations/assignments", params={"role_id": 99}).json() == []
+
+
+def test_project_filters_and_index_backed_pages(client, api_prefix, db_session):
+    for index, (status, start) in enumerate(
+        [("Active", date(2025, 1, 1)), ("Closed", date(2024, 6, 1)), ("Active", date(2025, 7, 1))]
+    ):
+        db_session.add(
+            models.Project(name=f"Project {index}", code=f"P-{index}", start_date=start, sprints=4, status=status)
+        )
+    db_session.commit()
+
+    response = client.get(
+        f"{api_prefix}/projects/", params={"status": "Active", "start_from": "2025-03-01"}
+    )
+    assert [project["name"] for project in response.json()] == ["Project 2"]
+
+    page = crud.get_projects(db_session, limit=1, manager_id=7)
+    assert page == [] and page.next_cursor is None
+
+    # Deep pages seek on the composite index instead of sorting.
+    plan = db_session.execute(
+        text(
+            "EXPLAIN QUERY PLAN SELECT id FROM audit_log "
+            "WHERE entity_type = 'project' AND entity_id = 1 AND id < 1000 ORDER BY id DESC LIMIT 51"
+        )
+    ).all()
+    details = " ".join(row[-1] for row in plan)
+    assert "idx_audit_log_entity_id" in details
+    assert "TEMP B-TREE" not in details
@@ -348,3 +348,283 @@ def test_user_allocation_summary_detects_over_allocation(client, api_prefix):
     assert summary[0]["total_hours"] > 160
 
 
+
+
+def test_bulk_allocation_upsert(client, api_prefix):
+    manager_id = client.post(
+        f"{api_prefix}/employees/",
+        json={
+            "email": "bulk.manager@example.com",
+            "full_name": "Bulk Manager",
+            "password": "Password1!",
+            "system_role": "PM",
+            "is_active": True,
+        },
+    ).json()["id"]
+    user_id = client.post(
+        f"{api_prefix}/employees/",
+        json={
+            "email": "bulk.employee@example.com",
+            "full_name": "Bulk Employee",
+            "password": "Password1!",
+            "system_role": "Employee",
+            "is_active": True,
+            "manager_id": manager_id,
+        },
+    ).json()["id"]
+    role_id = client.post(
+        f"{api_prefix}/admin/roles/", json={"name": "Developer", "description": "Writes code"}
+    ).json()["id"]
+    lcat_id = client.post(
+        f"{api_prefix}/admin/lcats/", json={"name": "Level 3", "description": "Senior"}
+    ).json()["id"]
+    project_id = _create_project(client, api_prefix, code="PRJ-BULK").json()["id"]
+    assignment_id = client.post(
+        f"{api_prefix}/allocations/assignments",
+        json={
+            "project_id": project_id,
+            "user_id": user_id,
+            "role_id": role_id,
+            "lcat_id": lcat_id,
+            "funded_hours": 2000,
+        },
+    ).json()["id"]
+
+    existing = client.post(
+        f"{api_prefix}/allocations/",
+        json={
+            "project_assignment_id": assignment_id,
+            "year": 2025,
+            "month": 1,
+            "allocated_hours": 80,
+        },
+    ).json()
+
+    cells = [
+        {"project_assignment_id": assignment_id, "year": 2025, "month": month, "allocated_hours": 100 + month}
+        for month in range(1, 13)
+    ]
+    cells.append({"project_assignment_id": assignment_id, "year": 2025, "month": 3, "allocated_hours": 1})
+    cells.append({"project_assignment_id": 999999, "year": 2025, "month": 1, "allocated_hours": 10})
+
+    response = client.post(f"{api_prefix}/allocations/bulk", json={"cells": cells})
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["created"], data["updated"], data["unchanged"], data["failed"]) == (11, 1, 0, 2)
+
+    results = data["results"]
+    assert len(results) == len(cells)
+    assert results[0]["status"] == "updated"
+    assert results[0]["id"] == existing["id"]
+    assert all(result["status"] == "created" for result in results[1:12])
+    assert results[12]["status"] == "error"
+    assert "Duplicate" in results[12]["detail"]
+    assert results[13]["status"] == "error"
+    assert results[13]["id"] is None
+
+    stored = client.get(f"{api_prefix}/allocations/assignments/{assignment_id}").json()["allocations"]
+    assert {(a["month"], a["allocated_hours"]) for a in stored} == {
+        (month, 100 + month) for month in range(1, 13)
+    }
+
+    # Re-sending the same block is idempotent.
+    repeat = client.post(f"{api_prefix}/allocations/bulk", json={"cells": cells[:12]}).json()
+    assert repeat["unchanged"] == 12
+
+
+def test_bulk_allocation_rejects_invalid_cells(client, api_prefix):
+    response = client.post(
+        f"{api_prefix}/allocations/bulk",
+        json={"cells": [{"project_assignment_id": 1, "year": 2025, "month": 13, "allocated_hours": 5}]},
+    )
+    assert response.status_code == 422
+
+    response = client.post(f"{api_prefix}/allocations/bulk", json={"cells": []})
+    assert response.status_code == 422
+
+
+def _import_workbook(projects, assignments, allocations) -> bytes:
+    import io
+
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = "Projects"
+    sheet.append(["Name", "Code", "Client", "Start Date", "Sprints", "Status"])
+    for row in projects:
+        sheet.append(row)
+    sheet = workbook.create_sheet("Assignments")
+    sheet.append(["Project Code", "Employee Email", "Role", "LCAT", "Funded Hours"])
+    for row in assignments:
+        sheet.append(row)
+    sheet = workbook.create_sheet("Allocations")
+    sheet.append(["Project Code", "Employee Email", "Year", "Month", "Hours"])
+    for row in allocations:
+        sheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def test_project_import_bulk_writes(client, api_prefix):
+    manager_id = client.post(
+        f"{api_prefix}/employees/",
+        json={
+            "email": "import.manager@example.com",
+            "full_name": "Import Manager",
+            "password": "Password1!",
+            "system_role": "PM",
+            "is_active": True,
+        },
+    ).json()["id"]
+    for index in range(3):
+        client.post(
+            f"{api_prefix}/employees/",
+            json={
+                "email": f"import{index}@example.com",
+                "full_name": f"Import Employee {index}",
+                "password": "Password1!",
+                "system_role": "Employee",
+                "is_active": True,
+                "manager_id": manager_id,
+            },
+        )
+
+    emails = [f"import{index}@example.com" for index in range(3)]
+    content = _import_workbook(
+        projects=[
+            ["Import One", "IMP-1", "Acme", "2025-01-01", 6, "Active"],
+            ["Import Two", "IMP-2", "Acme", "2025-01-01", 6, "Active"],
+        ],
+        assignments=[
+            [code, email, "Analyst", "Level 1", 500]
+            for code in ("IMP-1", "IMP-2")
+            for email in emails
+        ],
+        allocations=[
+            [code, email.upper(), 2025, month, 40]
+            for code in ("IMP-1", "IMP-2")
+            for email in emails
+            for month in range(1, 13)
+        ]
+        + [["IMP-1", emails[0], 2025, 1, 60]],
+    )
+
+    def upload(data):
+        return client.post(
+            f"{api_prefix}/projects/import",
+            params={"manager_id": manager_id},
+            files={"file": ("import.xlsx", data, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")},
+        )
+
+    response = upload(content)
+    assert response.status_code == 201, response.text
+    data = response.json()
+    assert sorted(project["code"] for project in data["created_projects"]) == ["IMP-1", "IMP-2"]
+    assert data["skipped_codes"] == []
+
+    project_id = next(p["id"] for p in data["created_projects"] if p["code"] == "IMP-1")
+    dashboard = client.get(f"{api_prefix}/reports/project-dashboard/{project_id}").json()
+    assert dashboard["total_funded_hours"] == 1500
+    assert dashboard["total_allocated_hours"] == 3 * 12 * 40 + 20
+
+    # Re-importing updates in place and reports the existing codes as skipped.
+    response = upload(content)
+    assert response.status_code == 201
+    assert sorted(response.json()["skipped_codes"]) == ["IMP-1", "IMP-2"]
+    dashboard = client.get(f"{api_prefix}/reports/project-dashboard/{project_id}").json()
+    assert dashboard["total_allocated_hours"] == 3 * 12 * 40 + 20
+
+
+def test_project_import_rejects_unknown_employee_without_writing(client, api_prefix):
+    content = _import_workbook(
+        projects=[["Import Bad", "IMP-BAD", "Acme", "2025-01-01", 6, "Active"]],
+        assignments=[["IMP-BAD", "nobody@example.com", "Analyst", "Level 1", 100]],
+        allocations=[],
+    )
+    response = client.post(
+        f"{api_prefix}/projects/import",
+        files={"file": ("import.xlsx", content, "application/octet-stream")},
+    )
+    assert response.status_code == 400
+    assert "nobody@example.com" in response.json()["detail"]
+    codes = [project["code"] for project in client.get(f"{api_prefix}/projects/").json()]
+    assert "IMP-BAD" not in codes
+
+
+def test_project_import_streams_csv_allocations_in_batches(client, api_prefix, db_session):
+    import io
+
+    from app.services.importer import import_projects_from_workbook
+
+    manager_id = client.post(
+        f"{api_prefix}/employees/",
+        json={
+            "email": "csv.manager@example.com",
+            "full_name": "CSV Manager",
+            "password": "Password1!",
+            "system_role": "PM",
+            "is_active": True,
+        },
+    ).json()["id"]
+    client.post(
+        f"{api_prefix}/employees/",
+        json={
+            "email": "csv.employee@example.com",
+            "full_name": "CSV Employee",
+            "password": "Password1!",
+            "system_role": "Employee",
+            "is_active": True,
+            "manager_id": manager_id,
+        },
+    )
+    workbook = _import_workbook(
+        projects=[["CSV Project", "CSV-1", "Acme", "2025-01-01", 6, "Active"]],
+        assignments=[["CSV-1", "csv.employee@example.com", "Analyst", "Level 1", 900]],
+        allocations=[],
+    )
+    project_id = client.post(
+        f"{api_prefix}/projects/import",
+        params={"manager_id": manager_id},
+        files={"file": ("seed.xlsx", workbook, "application/octet-stream")},
+    ).json()["created_projects"][0]["id"]
+
+    lines = ["Project Code,Employee Email,Year,Month,Hours"]
+    lines += [f"CSV-1,csv.employee@example.com,2025,{month},{month * 10}" for month in range(1, 13)]
+    csv_bytes = ("\n".join(lines) + "\n").encode("utf-8")
+
+    created, skipped = import_projects_from_workbook(
+        data=io.BytesIO(csv_bytes),
+        db=db_session,
+        manager_id=manager_id,
+        file_format="csv",
+        batch_size=5,
+    )
+    assert (created, skipped) == ([], [])
+
+    dashboard = client.get(f"{api_prefix}/reports/project-dashboard/{project_id}").json()
+    assert dashboard["total_allocated_hours"] == sum(month * 10 for month in range(1, 13))
+
+    response = client.post(
+        f"{api_prefix}/projects/import",
+        params={"manager_id": manager_id},
+        files={"file": ("allocations.csv", csv_bytes.replace(b"CSV-1", b"CSV-X"), "text/csv")},
+    )
+    assert response.status_code == 400
+    assert "CSV-X" in response.json()["detail"]
+
+
+def test_project_import_rejects_undecodable_csv(client, api_prefix):
+    header = b"Project Code,Employee Email,Year,Month,Hours\n"
+    for content in (
+        header + "CSV-1,caf\u00e9@example.com,2025,1,40\n".encode("cp1252"),
+        header + b"\xff\xfe,2025\n",
+        header + b"x" * 200_000 + b"\n",
+    ):
+        response = client.post(
+            f"{api_prefix}/projects/import",
+            files={"file": ("allocations.csv", content, "text/csv")},
+        )
+        assert response.status_code == 400, response.text
+        assert "CSV" in response.json()["detail"]
@@ -0,0 +1,78 @@
+"""Regression tests for the number of SQL statements detail endpoints run."""
+
+from __future__ import annotations
+
+import pytest
+
+import benchmark_db
+from app import models
+from app.core.config import settings
+from app.db.query_counter import QUERY_COUNT_HEADER, count_queries
+
+MANAGERS = 6
+
+
+@pytest.fixture
+def query_count_headers(monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_COUNT_HEADERS", True)
+
+
+@pytest.fixture
+def seed(session_factory):
+    """Projects with several assignments and overrides; one employee on every project."""
+
+    ids = benchmark_db.seed_database(session_factory, managers=MANAGERS, employees=18, months=3)
+    with session_factory() as db:
+        busy_user_id = MANAGERS + 1
+        role, lcat = db.query(models.Role).one(), db.query(models.LCAT).one()
+        for project_id in range(2, MANAGERS + 1):
+            db.add(
+                models.ProjectAssignment(
+                    project_id=project_id, user_id=busy_user_id, role=role, lcat=lcat, funded_hours=100
+                )
+            )
+        for month in (3, 1, 2):
+            db.add(models.MonthlyHourOverride(project_id=1, year=2025, month=month, overridden_hours=120))
+        db.commit()
+    return ids
+
+
+def _query_count(client, url):
+    response = client.get(url)
+    assert response.status_code == 200, response.text
+    return int(response.headers[QUERY_COUNT_HEADER]), response.json()
+
+
+def test_project_detail_loads_relationships_in_a_fixed_number_of_queries(
+    client, api_prefix, seed, query_count_headers
+):
+    count, project = _query_count(client, f"{api_prefix}/projects/1")
+    assert count <= 3
+    assert len(project["assignments"]) == 3
+    assert {assignment["project"]["manager"]["id"] for assignment in project["assignments"]} == {1}
+    assert [override["month"] for override in project["monthly_hour_overrides"]] == [1, 2, 3]
+
+    # More assignments and no overrides take the same number.
+    assert _query_count(client, f"{api_prefix}/projects/{MANAGERS}")[0] == count
+
+
+def test_user_detail_does_not_query_per_assignment(client, api_prefix, seed, query_count_headers):
+    count, user = _query_count(client, f"{api_prefix}/employees/{MANAGERS + 1}")
+    assert count <= 2
+    assignments = user["assignments"]
+    assert [assignment["project_id"] for assignment in assignments] == list(range(1, MANAGERS + 1))
+    # Every project has its own manager, which used to be loaded one by one.
+    assert {assignment["project"]["manager"]["id"] for assignment in assignments} == set(range(1, MANAGERS + 1))
+    assert {assignment["user"]["id"] for assignment in assignments} == {MANAGERS + 1}
+
+    assert _query_count(client, f"{api_prefix}/employees/{MANAGERS + 2}")[0] == count
+
+
+def test_query_count_header_is_opt_in(client, api_prefix, session_factory):
+    assert QUERY_COUNT_HEADER not in client.get(f"{api_prefix}/projects/").headers
+
+    with count_queries() as outer, session_factory() as db:
+        db.query(models.User).all()
+        with count_queries() as inner:
+            db.query(models.Project).all()
+    assert (outer.count, inner.count) == (1, 1)
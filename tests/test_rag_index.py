@@ -0,0 +1,249 @@
+"""Tests for the persisted RAG inverted index and BM25 retrieval."""
+
+from __future__ import annotations
+
+from datetime import date
+
+from sqlalchemy import insert
+
+from app import crud, models, schemas
+from app.services.ai import (
+    rag,
+    refresh_dirty_rag_documents,
+    refresh_rag_index,
+    reindex_rag_cache,
+    retrieve_rag_context,
+)
+from app.services.ai.index import index_stale_documents, search, tokenize
+from app.services.jobs import run_job_maintenance
+
+
+def _cache(db_session, entity, source_id, text):
+    return crud.create_or_update_rag_cache(
+        db_session,
+        schemas.AIRagCacheCreate(source_entity=entity, source_id=source_id, document_text=text),
+    )
+
+
+def _postings(db_session, document_id):
+    return {
+        posting.term: posting.frequency
+        for posting in db_session.query(models.AIRagPosting).filter_by(document_id=document_id)
+    }
+
+
+def test_index_builds_postings_and_token_counts(db_session):
+    document = _cache(db_session, "project", 1, "Apollo apollo launch team")
+
+    assert index_stale_documents(db_session) == 1
+    db_session.refresh(document)
+    assert document.token_count == 4
+    assert _postings(db_session, document.id) == {"apollo": 2, "launch": 1, "team": 1}
+    # Nothing is stale any more.
+    assert index_stale_documents(db_session) == 0
+
+
+def test_changed_text_is_reindexed_and_deleted_documents_drop_postings(db_session):
+    document = _cache(db_session, "project", 1, "Apollo launch")
+    index_stale_documents(db_session)
+
+    _cache(db_session, "project", 1, "Gemini capsule")
+    db_session.refresh(document)
+    assert document.token_count is None
+    index_stale_documents(db_session)
+    assert _postings(db_session, document.id) == {"gemini": 1, "capsule": 1}
+
+    assert crud.delete_rag_cache(db_session, document.id)
+    assert db_session.query(models.AIRagPosting).count() == 0
+
+
+def test_bm25_prefers_rare_terms_and_scores_only_matches(db_session):
+    alpha = _cache(db_session, "project", 1, "Project Alpha staffing plan for the data team")
+    beta = _cache(db_session, "project", 2, "Project Beta staffing plan")
+    _cache(db_session, "employee", 3, "Employee Carol works on Gamma")
+    index_stale_documents(db_session)
+
+    ranked = search(db_session, tokenize("alpha staffing"), limit=5)
+    assert [document_id for document_id, _ in ranked] == [alpha.id, beta.id]
+    assert ranked[0][1] > ranked[1][1] > 0
+
+    assert search(db_session, tokenize("unrelated words"), limit=5) == []
+
+
+def test_retrieve_rag_context_ranks_and_pads(db_session):
+    _cache(db_session, "project", 1, "Project Alpha staffing plan")
+    _cache(db_session, "project", 2, "Project Beta budget review")
+    _cache(db_session, "employee", 3, "Employee Carol works on Gamma")
+
+    refresh_rag_index(db_session)
+
+    context = retrieve_rag_context(db_session, "Who works on Gamma?", limit=2)
+    assert [source for source, _ in context][0] == "employee:3"
+    assert len(context) == 2
+
+    # Retrieval does not index; stale rows are picked up by the next refresh.
+    beta = _cache(db_session, "project", 2, "Project Beta now covers Gamma integration")
+    retrieve_rag_context(db_session, "gamma integration", limit=1)
+    db_session.refresh(beta)
+    assert beta.token_count is None
+
+    refresh_rag_index(db_session)
+    context = retrieve_rag_context(db_session, "gamma integration", limit=1)
+    assert context == [("project:2", "Project Beta now covers Gamma integration")]
+
+
+def test_maintenance_tick_builds_and_refreshes_the_index(db_session, session_factory):
+    employee, (orion, _), allocation = _seed_staffing(db_session)
+    assert retrieve_rag_context(db_session, "Orion", limit=1) == []
+
+    run_job_maintenance(session_factory)
+    assert retrieve_rag_context(db_session, "Orion", limit=1)[0][0] in {
+        f"project:{orion.id}",
+        f"employee:{employee.id}",
+    }
+
+    allocation.allocated_hours = 120
+    db_session.commit()
+    retrieve_rag_context(db_session, "Orion", limit=2)
+    assert {("project", orion.id), ("employee", employee.id)} <= _dirty(db_session)
+
+    run_job_maintenance(session_factory)
+    db_session.expire_all()
+    assert _dirty(db_session) == set()
+    texts = dict(retrieve_rag_context(db_session, "Orion", limit=2))
+    assert "Allocated hours: 120" in texts[f"project:{orion.id}"]
+
+
+def _seed_staffing(db_session):
+    manager = models.User(
+        email="rag.manager@example.com",
+        full_name="Rag Manager",
+        password_hash="x",
+        system_role=models.SystemRole.PM,
+    )
+    db_session.add(manager)
+    db_session.flush()
+    employee = models.User(
+        email="rag.employee@example.com",
+        full_name="Dana Analyst",
+        password_hash="x",
+        system_role=models.SystemRole.EMPLOYEE,
+        manager_id=manager.id,
+    )
+    role = models.Role(name="Analyst")
+    lcat = models.LCAT(name="Level 1")
+    projects = [
+        models.Project(name=name, code=code, start_date=date(2025, 1, 1), sprints=4, manager_id=manager.id)
+        for name, code in (("Orion", "RAG-1"), ("Vega", "RAG-2"))
+    ]
+    db_session.add_all([employee, role, lcat, *projects])
+    db_session.flush()
+    assignment = models.ProjectAssignment(
+        project_id=projects[0].id, user_id=employee.id, role_id=role.id, lcat_id=lcat.id, funded_hours=160
+    )
+    db_session.add(assignment)
+    db_session.flush()
+    allocation = models.Allocation(project_assignment_id=assignment.id, year=2025, month=1, allocated_hours=40)
+    db_session.add(allocation)
+    db_session.commit()
+    return employee, projects, allocation
+
+
+def _dirty(db_session):
+    return {(entity, source_id) for entity, source_id, _ in crud.get_dirty_rag_sources(db_session)}
+
+
+def test_reindex_covers_every_page_of_sources(db_session, monkeypatch):
+    monkeypatch.setattr(rag, "RAG_REINDEX_BATCH_SIZE", 3)
+    db_session.execute(
+        insert(models.Project),
+        [
+            {"name": f"Bulk {index:02d}", "code": f"BULK-{index:02d}", "start_date": date(2025, 1, 1), "sprints": 2}
+            for index in range(10)
+        ],
+    )
+    db_session.commit()
+
+    assert reindex_rag_cache(db_session) == 10
+    assert db_session.query(models.AIRagCache).filter_by(source_entity="project").count() == 10
+
+
+def test_data_changes_mark_only_affected_documents_dirty(db_session):
+    employee, (orion, vega), allocation = _seed_staffing(db_session)
+    reindex_rag_cache(db_session)
+    db_session.query(models.AIRagDirtySource).delete()
+    db_session.commit()
+
+    allocation.allocated_hours = 120
+    db_session.commit()
+    assert _dirty(db_session) == {("project", orion.id), ("employee", employee.id)}
+
+    vega_before = db_session.query(models.AIRagCache).filter_by(source_entity="project", source_id=vega.id).one()
+    vega_indexed_at = vega_before.last_indexed_at
+
+    assert refresh_dirty_rag_documents(db_session) == 2
+    assert _dirty(db_session) == set()
+    texts = {
+        (document.source_entity, document.source_id): document.document_text
+        for document in db_session.query(models.AIRagCache)
+    }
+    assert "Allocated hours: 120" in texts[("project", orion.id)]
+    assert "120h" in texts[("employee", employee.id)]
+    db_session.refresh(vega_before)
+    assert vega_before.last_indexed_at == vega_indexed_at
+
+
+def test_renames_and_deletes_propagate_on_refresh(db_session):
+    employee, (orion, vega), _ = _seed_staffing(db_session)
+    reindex_rag_cache(db_session)
+    refresh_dirty_rag_documents(db_session)
+
+    orion.name = "Orion Prime"
+    db_session.commit()
+    # The employee's document names the project, so it is rebuilt too.
+    assert _dirty(db_session) == {("project", orion.id), ("employee", employee.id)}
+    refresh_dirty_rag_documents(db_session)
+    context = retrieve_rag_context(db_session, "prime", limit=1)
+    assert context[0][0] in {f"project:{orion.id}", f"employee:{employee.id}"}
+
+    db_session.delete(vega)
+    db_session.commit()
+    refresh_dirty_rag_documents(db_session)
+    sources = {(document.source_entity, document.source_id) for document in db_session.query(models.AIRagCache)}
+    assert ("project", vega.id) not in sources
+    assert ("project", orion.id) in sources
+
+
+def test_retrieval_reads_only_the_managers_partition(db_session):
+    employee, (orion, vega), _ = _seed_staffing(db_session)
+    other_manager = models.User(
+        email="other.manager@example.com",
+        full_name="Other Manager",
+        password_hash="x",
+        system_role=models.SystemRole.PM,
+    )
+    db_session.add(other_manager)
+    db_session.commit()
+    reindex_rag_cache(db_session)
+
+    owners = {
+        (document.source_entity, document.source_id): document.owner_manager_id
+        for document in db_session.query(models.AIRagCache)
+    }
+    assert owners[("project", orion.id)] == employee.manager_id
+    assert owners[("employee", employee.id)] == employee.manager_id
+
+    assert retrieve_rag_context(db_session, "orion", manager_id=other_manager.id) == []
+    context = retrieve_rag_context(db_session, "orion", limit=5, manager_id=employee.manager_id)
+    assert {source for source, _ in context} == {
+        f"project:{orion.id}",
+        f"project:{vega.id}",
+        f"employee:{employee.id}",
+    }
+
+    # Handing a project to another manager moves its document with it.
+    vega.manager_id = other_manager.id
+    db_session.commit()
+    refresh_rag_index(db_session)
+    context = retrieve_rag_context(db_session, "vega", limit=5, manager_id=other_manager.id)
+    assert [source for source, _ in context] == [f"project:{vega.id}"]
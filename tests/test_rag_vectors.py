@@ -0,0 +1,88 @@
+"""Tests for embedding-based and hybrid RAG retrieval."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from app import crud, models, schemas
+from app.core.config import settings
+from app.services.ai import retrieve_rag_context
+from app.services.ai import vectors
+from app.services.ai.index import index_stale_documents
+
+
+@pytest.fixture(autouse=True)
+def vector_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "VECTOR_STORE_PATH", str(tmp_path))
+    monkeypatch.setattr(settings, "RAG_EMBEDDING_BACKEND", "hashing")
+    return tmp_path
+
+
+def _cache(db_session, entity, source_id, text):
+    return crud.create_or_update_rag_cache(
+        db_session,
+        schemas.AIRagCacheCreate(source_entity=entity, source_id=source_id, document_text=text),
+    )
+
+
+def test_hashing_embedder_is_deterministic_and_normalized():
+    embedder = vectors.HashingEmbedder(64)
+    first, second = embedder.embed(["Alpha staffing plan", "Alpha staffing plan"])
+    assert np.allclose(first, second)
+    assert np.isclose(np.linalg.norm(first), 1.0)
+    assert not embedder.embed([""]).any()
+
+
+def test_chunk_text_keeps_whole_lines():
+    text = "\n".join(f"line {index} with five tokens" for index in range(10))
+    chunks = vectors.chunk_text(text, max_tokens=10)
+    assert len(chunks) == 5
+    assert "\n".join(chunks) == text
+
+
+def test_vector_search_uses_memory_mapped_store(db_session, vector_store):
+    alpha = _cache(db_session, "project", 1, "Project Alpha staffing plan for the data team")
+    _cache(db_session, "project", 2, "Project Beta budget review")
+
+    ranked = vectors.search(db_session, "alpha data team", limit=2)
+    assert ranked[0][0] == alpha.id
+    assert db_session.query(models.AIRagChunk).count() == 2
+    stored = sorted(path.name for path in vector_store.glob("*.npy"))
+    assert len(stored) == 2
+
+    # Changing a document re-embeds it and replaces the on-disk matrix.
+    _cache(db_session, "project", 2, "Project Beta now staffs the data team with Alpha alumni")
+    index_stale_documents(db_session)
+    vectors.search(db_session, "data team", limit=2)
+    assert sorted(path.name for path in vector_store.glob("*.npy")) != stored
+    assert len(list(vector_store.glob("*.npy"))) == 2
+
+
+def test_vector_search_respects_criteria(db_session):
+    _cache(db_session, "project", 1, "Project Alpha staffing plan")
+    employee = _cache(db_session, "employee", 2, "Employee Alpha staffing notes")
+
+    ranked = vectors.search(
+        db_session,
+        "alpha staffing",
+        limit=5,
+        criteria=[models.AIRagCache.source_entity == "employee"],
+    )
+    assert [document_id for document_id, _ in ranked] == [employee.id]
+
+
+@pytest.mark.parametrize("mode", ["vector", "hybrid"])
+def test_retrieval_modes(db_session, monkeypatch, mode):
+    monkeypatch.setattr(settings, "RAG_RETRIEVAL_MODE", mode)
+    _cache(db_session, "project", 1, "Project Alpha staffing plan")
+    _cache(db_session, "project", 2, "Project Beta budget review")
+    _cache(db_session, "employee", 3, "Employee Carol works on Gamma integration")
+
+    context = retrieve_rag_context(db_session, "gamma integration", limit=1)
+    assert context == [("employee:3", "Employee Carol works on Gamma integration")]
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = vectors.reciprocal_rank_fusion([[(1, 9.0), (2, 5.0)], [(2, 0.9), (3, 0.8)]])
+    assert [document_id for document_id, _ in fused] == [2, 1, 3]
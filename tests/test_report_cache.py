@@ -0,0 +1,208 @@
+"""Tests for the report response cache and its data-version invalidation."""
+
+from __future__ import annotations
+
+import pytest
+
+from app import models
+from app.api import reports
+
+
+@pytest.fixture
+def cache_seed(client, api_prefix):
+    def post(path, payload):
+        response = client.post(f"{api_prefix}{path}", json=payload)
+        assert response.status_code in (200, 201), response.text
+        return response.json()["id"]
+
+    managers = [
+        post(
+            "/employees/",
+            {
+                "email": f"cache.manager{index}@example.com",
+                "full_name": f"Cache Manager {index}",
+                "password": "SecurePass9!",
+                "system_role": "PM",
+                "is_active": True,
+            },
+        )
+        for index in range(2)
+    ]
+    role_id = post("/admin/roles/", {"name": "Engineer"})
+    lcat_id = post("/admin/lcats/", {"name": "Level 2"})
+    users, projects, assignments = [], [], []
+    for index, manager_id in enumerate(managers):
+        users.append(
+            post(
+                "/employees/",
+                {
+                    "email": f"cache.user{index}@example.com",
+                    "full_name": f"Cache User {index}",
+                    "password": "SecurePass9!",
+                    "system_role": "Employee",
+                    "is_active": True,
+                    "manager_id": manager_id,
+                },
+            )
+        )
+        projects.append(
+            post(
+                "/projects/",
+                {
+                    "name": f"Cache Project {index}",
+                    "code": f"RC-{index}",
+                    "start_date": "2025-01-01",
+                    "sprints": 6,
+                    "manager_id": manager_id,
+                },
+            )
+        )
+        assignments.append(
+            post(
+                "/allocations/assignments",
+                {
+                    "project_id": projects[index],
+                    "user_id": users[index],
+                    "role_id": role_id,
+                    "lcat_id": lcat_id,
+                    "funded_hours": 400,
+                },
+            )
+        )
+    return {
+        "post": post,
+        "managers": managers,
+        "role_id": role_id,
+        "users": users,
+        "projects": projects,
+        "assignments": assignments,
+    }
+
+
+def _report_urls(api_prefix, seed):
+    return {
+        f"portfolio-{index}": (
+            f"{api_prefix}/reports/portfolio-dashboard",
+            {"manager_id": manager_id},
+        )
+        for index, manager_id in enumerate(seed["managers"])
+    } | {
+        f"project-{index}": (f"{api_prefix}/reports/project-dashboard/{project_id}", {})
+        for index, project_id in enumerate(seed["projects"])
+    } | {
+        f"timeline-{index}": (f"{api_prefix}/reports/employee-timeline/{user_id}", {})
+        for index, user_id in enumerate(seed["users"])
+    } | {
+        "utilization": (f"{api_prefix}/reports/utilization-by-role", {"year": 2025, "month": 1}),
+    }
+
+
+def _etags(client, urls):
+    etags = {}
+    for name, (url, params) in urls.items():
+        response = client.get(url, params=params)
+        assert response.status_code == 200, response.text
+        etags[name] = response.headers["etag"]
+    return etags
+
+
+def _changed(client, urls, etags):
+    """Return the reports whose cached ETag no longer validates."""
+
+    changed = set()
+    for name, (url, params) in urls.items():
+        response = client.get(url, params=params, headers={"If-None-Match": etags[name]})
+        if response.status_code == 200:
+            changed.add(name)
+        else:
+            assert response.status_code == 304
+            assert response.content == b""
+    return changed
+
+
+def test_repeat_requests_are_served_from_cache(client, api_prefix, cache_seed, monkeypatch):
+    url = f"{api_prefix}/reports/project-dashboard/{cache_seed['projects'][0]}"
+    first = client.get(url)
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    def fail_build(*args, **kwargs):
+        raise AssertionError("report rebuilt while its data was unchanged")
+
+    monkeypatch.setattr(reports, "build_project_dashboard", fail_build)
+    cached = client.get(url)
+    assert cached.status_code == 200
+    assert cached.json() == first.json()
+    assert cached.headers["etag"] == first.headers["etag"]
+
+    revalidated = client.get(url, headers={"If-None-Match": f'W/{first.headers["etag"]}'})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == first.headers["etag"]
+
+    # Another project's dashboard has its own key, so the ETag does not carry over.
+    monkeypatch.undo()
+    other_url = f"{api_prefix}/reports/project-dashboard/{cache_seed['projects'][1]}"
+    other = client.get(other_url, headers={"If-None-Match": first.headers["etag"]})
+    assert other.status_code == 200
+    assert other.json()["project_id"] == cache_seed["projects"][1]
+
+
+def test_writes_invalidate_only_the_reports_they_touch(client, api_prefix, cache_seed):
+    post = cache_seed["post"]
+    urls = _report_urls(api_prefix, cache_seed)
+    etags = _etags(client, urls)
+    assert _changed(client, urls, etags) == set()
+
+    post(
+        "/allocations/",
+        {"project_assignment_id": cache_seed["assignments"][0], "year": 2025, "month": 1, "allocated_hours": 80},
+    )
+    assert _changed(client, urls, etags) == {"portfolio-0", "project-0", "timeline-0", "utilization"}
+    body = client.get(urls["project-0"][0]).json()
+    assert body["total_allocated_hours"] == 80
+
+    etags = _etags(client, urls)
+    post(
+        "/projects/overrides",
+        {"project_id": cache_seed["projects"][1], "year": 2025, "month": 3, "overridden_hours": 100},
+    )
+    assert _changed(client, urls, etags) == {"portfolio-1", "project-1", "timeline-1", "utilization"}
+
+    etags = _etags(client, urls)
+    response = client.put(
+        f"{api_prefix}/projects/{cache_seed['projects'][0]}", json={"manager_id": cache_seed["managers"][1]}
+    )
+    assert response.status_code == 200
+    assert _changed(client, urls, etags) == {
+        "portfolio-0",
+        "portfolio-1",
+        "project-0",
+        "timeline-0",
+        "utilization",
+    }
+
+
+def test_unattributed_changes_invalidate_every_report(client, api_prefix, cache_seed):
+    urls = _report_urls(api_prefix, cache_seed)
+    etags = _etags(client, urls)
+
+    response = client.put(f"{api_prefix}/admin/roles/{cache_seed['role_id']}", json={"name": "Senior Engineer"})
+    assert response.status_code == 200
+    assert _changed(client, urls, etags) == set(urls)
+
+
+def test_all_managers_reports_follow_the_manager_versions(client, api_prefix, cache_seed, db_session):
+    urls = _report_urls(api_prefix, cache_seed)
+    unmanaged = cache_seed["post"](
+        "/projects/", {"name": "Orphan", "code": "RC-X", "start_date": "2025-01-01", "sprints": 2}
+    )
+    etags = _etags(client, urls)
+
+    # Projects without a manager still count towards the all-managers reports.
+    response = client.put(f"{api_prefix}/projects/{unmanaged}", json={"name": "Orphan Renamed"})
+    assert response.status_code == 200
+    assert _changed(client, urls, etags) == {"utilization"}
+
+    # No single counter row is written by every transaction.
+    assert db_session.query(models.ReportDataVersion).filter_by(scope=models.REPORT_SCOPE_ALL).count() == 0
+
@@ -2,6 +2,9 @@
 
 from __future__ import annotations
 
+import io
+
+import openpyxl
 import pytest
 
 from app.utils.reporting import standard_month_hours
@@ -160,6 +163,43 @@ def test_employee_timeline(client, api_prefix, reports_seed):
     assert jan_entry["allocations"][0]["allocated_hours"] == 160
 
 
+def test_employee_timeline_totals_months_across_projects(client, api_prefix, reports_seed):
+    project_id = client.post(
+        f"{api_prefix}/projects/",
+        json={"name": "Project Second", "code": "PRJ-TWO", "start_date": "2025-01-01", "sprints": 4},
+    ).json()["id"]
+    assignment_id = client.post(
+        f"{api_prefix}/allocations/assignments",
+        json={
+            "project_id": project_id,
+            "user_id": reports_seed["user_id"],
+            "role_id": reports_seed["role_id"],
+            "lcat_id": reports_seed["lcat_id"],
+            "funded_hours": 200,
+        },
+    ).json()["id"]
+    for month, hours in ((2, 150), (3, 40)):
+        client.post(
+            f"{api_prefix}/allocations/",
+            json={"project_assignment_id": assignment_id, "year": 2025, "month": month, "allocated_hours": hours},
+        )
+
+    response = client.get(
+        f"{api_prefix}/reports/employee-timeline/{reports_seed['user_id']}",
+        params={"start_year": 2025, "start_month": 2, "end_year": 2025, "end_month": 2},
+    )
+    assert response.status_code == 200
+    (february,) = response.json()["timeline"]
+    assert (february["year"], february["month"], february["total_hours"]) == (2025, 2, 270)
+    assert [(a["project_name"], a["allocated_hours"]) for a in february["allocations"]] == [
+        ("Project Second", 150),
+        ("Project Reports", 120),
+    ]
+
+    months = client.get(f"{api_prefix}/reports/employee-timeline/{reports_seed['user_id']}").json()
+    assert [(m["month"], m["total_hours"]) for m in months["timeline"]] == [(1, 160), (2, 270), (3, 40)]
+
+
 def test_utilization_by_role(client, api_prefix, reports_seed):
     response = client.get(
         f"{api_prefix}/reports/utilization-by-role",
@@ -193,6 +233,40 @@ def test_export_endpoints(client, api_prefix, reports_seed):
     assert project_export.headers["content-type"] == "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
 
 
+def test_portfolio_export_streams_project_rows(client, api_prefix, reports_seed):
+    response = client.get(f"{api_prefix}/reports/export/portfolio")
+    assert response.status_code == 200
+    assert "content-length" not in response.headers  # chunked
+
+    workbook = openpyxl.load_workbook(io.BytesIO(response.content))
+    assert workbook.sheetnames == ["Portfolio", "Over-allocated", "Bench"]
+    rows = list(workbook["Portfolio"].iter_rows(values_only=True))
+    assert rows[0][:5] == ("Project", "Manager", "Status", "Funded Hours", "Allocated Hours")
+    assert rows[1] == ("Project Reports", "—", "Active", 320, 280, 87.5, "2025-01-01", 4)
+
+
+def test_allocation_fact_export_as_csv(client, api_prefix, reports_seed):
+    response = client.get(f"{api_prefix}/reports/export/allocations", params={"format": "csv"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert ".csv" in response.headers["content-disposition"]
+
+    user_id, project_id = reports_seed["user_id"], reports_seed["project_id"]
+    assert response.text.splitlines() == [
+        "user_id,user,project_id,project,role,lcat,year,month,hours",
+        f"{user_id},Casey Consultant,{project_id},Project Reports,Consultant,Senior,2025,1,160",
+        f"{user_id},Casey Consultant,{project_id},Project Reports,Consultant,Senior,2025,2,120",
+    ]
+
+    # The seeded project has no manager.
+    scoped = client.get(
+        f"{api_prefix}/reports/export/allocations",
+        params={"format": "csv", "manager_id": reports_seed["manager_id"]},
+    )
+    assert scoped.text.splitlines() == ["user_id,user,project_id,project,role,lcat,year,month,hours"]
+    assert client.get(f"{api_prefix}/reports/export/allocations", params={"format": "xml"}).status_code == 422
+
+
 def test_reports_handles_missing_entities(client, api_prefix):
     missing_project = client.get(f"{api_prefix}/reports/project-dashboard/999")
     assert missing_project.status_code == 404